@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+
+This module contains helper functions used to tabulate the ingredients
+of the analytic prediction for the clustering of HOD-style models,
+`~halotools.empirical_models.HodModelFactory.predict_galaxy_clustering`.
+"""
+
+import numpy as np
+
+from .. import model_defaults
+
+try:
+    from ...mock_observables.pair_counters import npairs
+    HAS_MOCKOBS = True
+except ImportError:
+    HAS_MOCKOBS = False
+
+from ...custom_exceptions import HalotoolsError
+
+def shell_pair_separation_cdf(s, r1, r2):
+    """ Fraction of the pairs of points separated by less than ``s`` when
+    the two points are distributed uniformly and independently
+    over concentric spheres of radii ``r1`` and ``r2``.
+
+    Parameters
+    ----------
+    s : array_like
+        Separation.
+
+    r1, r2 : array_like
+        Radii of the two spheres. All inputs are broadcast against each other.
+
+    Returns
+    -------
+    cdf : array
+        Fraction of pairs with separation less than ``s``.
+
+    Notes
+    -----
+    The separation :math:`d` of the pair satisfies
+    :math:`d^{2} = r_{1}^{2} + r_{2}^{2} - 2r_{1}r_{2}\\mu`,
+    with :math:`\\mu` uniformly distributed in :math:`[-1, 1]`, so that
+    :math:`P(d < s) = (s^{2} - (r_{1} - r_{2})^{2}) / 4r_{1}r_{2}`,
+    clipped to the interval :math:`[0, 1]`.
+    """
+    s, r1, r2 = np.broadcast_arrays(np.asarray(s, dtype=float),
+        np.asarray(r1, dtype=float), np.asarray(r2, dtype=float))
+
+    # A point at the center of the sphere is at fixed separation from the other point
+    cdf = (s >= np.abs(r1 - r2)).astype(float)
+    nonzero = (r1*r2 > 0)
+    cdf[nonzero] = ((s[nonzero]**2 - (r1[nonzero] - r2[nonzero])**2) /
+        (4.*r1[nonzero]*r2[nonzero]))
+    return np.clip(cdf, 0, 1)
+
+def profile_radius_quantiles(profile_model, profile_params,
+    num_quantiles = model_defaults.default_halo_model_num_profile_quantiles):
+    """ Halo-centric distances, in units of the halo boundary,
+    of equally spaced quantiles of the mass enclosed by a radial profile.
+
+    Parameters
+    ----------
+    profile_model : object
+        Any profile model with a ``cumulative_mass_PDF`` method,
+        e.g., `~halotools.empirical_models.NFWProfile`.
+
+    profile_params : sequence
+        Values of the profile parameters passed to ``cumulative_mass_PDF``,
+        e.g., the concentration of an NFW profile.
+
+    num_quantiles : int, optional
+        Number of quantiles. Default is set in `~halotools.empirical_models.model_defaults`.
+
+    Returns
+    -------
+    x : array
+        Array of length ``num_quantiles`` storing the halo-centric distance
+        enclosing the fraction ``(i + 0.5)/num_quantiles`` of the halo mass.
+    """
+    x_table = np.logspace(model_defaults.default_lograd_min - 1, 0, 1001)
+    cdf_table = profile_model.cumulative_mass_PDF(x_table, *profile_params)
+    quantiles = (np.arange(num_quantiles) + 0.5)/float(num_quantiles)
+    return np.interp(quantiles, cdf_table, x_table)
+
+def one_halo_separation_cdf(x, profile_model1 = None, profile_params1 = (),
+    profile_model2 = None, profile_params2 = (),
+    num_quantiles = model_defaults.default_halo_model_num_profile_quantiles):
+    """ Cumulative distribution of the separation, in units of the halo boundary,
+    of pairs of galaxies residing in the same halo.
+
+    Parameters
+    ----------
+    x : array_like
+        Separation in units of the halo boundary.
+
+    profile_model1, profile_model2 : object, optional
+        Profile models with a ``cumulative_mass_PDF`` method
+        governing the halo-centric distance of each member of the pair.
+        Default is None, in which case the galaxy resides at the halo center.
+
+    profile_params1, profile_params2 : sequence, optional
+        Values of the profile parameters of each profile model.
+
+    num_quantiles : int, optional
+        Number of quantiles of the radial profiles used to compute the separation
+        of pairs in which both galaxies are distributed according to a profile.
+        Default is set in `~halotools.empirical_models.model_defaults`.
+
+    Returns
+    -------
+    cdf : array
+        Fraction of the pairs with separation less than ``x``.
+    """
+    x = np.atleast_1d(x).astype(float)
+
+    if (profile_model1 is None) & (profile_model2 is None):
+        return np.ones_like(x)
+    elif profile_model1 is None:
+        return profile_model2.cumulative_mass_PDF(np.where(x > 1, 1, x), *profile_params2)
+    elif profile_model2 is None:
+        return profile_model1.cumulative_mass_PDF(np.where(x > 1, 1, x), *profile_params1)
+    else:
+        r1 = profile_radius_quantiles(profile_model1, profile_params1, num_quantiles)
+        r2 = profile_radius_quantiles(profile_model2, profile_params2, num_quantiles)
+        cdf = shell_pair_separation_cdf(x[:, np.newaxis, np.newaxis],
+            r1[np.newaxis, :, np.newaxis], r2[np.newaxis, np.newaxis, :])
+        return cdf.mean(axis=2).mean(axis=1)
+
+def binned_one_halo_pair_fractions(rbins, halo_radius, halo_bin_index, num_bins,
+    x_table, cdf_tables, cdf_table_index):
+    """ Mean fraction of the pairs of galaxies residing in the same halo
+    whose separation lies in each radial bin, averaged over the halos of each bin.
+
+    Parameters
+    ----------
+    rbins : array
+        Radial bins.
+
+    halo_radius : array
+        Length-Nhalos array storing the boundary of each halo,
+        in the same units as ``rbins``.
+
+    halo_bin_index : array
+        Length-Nhalos integer array storing the bin of each halo.
+
+    num_bins : int
+        Number of bins of halos.
+
+    x_table : array
+        Separations, in units of the halo boundary, at which the ``cdf_tables`` are tabulated.
+
+    cdf_tables : array
+        Array of shape (Ntables, len(x_table)), each row storing the
+        cumulative distribution of the separation of pairs,
+        e.g., as returned by `one_halo_separation_cdf`.
+
+    cdf_table_index : array
+        Length-Nhalos integer array storing the row of ``cdf_tables``
+        used for each halo.
+
+    Returns
+    -------
+    fractions : array
+        Array of shape (num_bins, len(rbins)-1).
+    """
+    cumulative_fractions = np.zeros((len(halo_radius), len(rbins)))
+    for itable in np.unique(cdf_table_index):
+        mask = (cdf_table_index == itable)
+        x = rbins[np.newaxis, :]/halo_radius[mask][:, np.newaxis]
+        cumulative_fractions[mask] = np.interp(x, x_table, cdf_tables[itable])
+    fractions = np.diff(cumulative_fractions, axis=1)
+
+    num_halos = np.bincount(halo_bin_index, minlength=num_bins)
+    result = np.zeros((num_bins, len(rbins)-1))
+    for irbin in range(len(rbins)-1):
+        result[:, irbin] = np.bincount(halo_bin_index,
+            weights=fractions[:, irbin], minlength=num_bins)
+    return result/np.maximum(num_halos, 1)[:, np.newaxis]
+
+def binned_halo_pair_counts(halo_pos, halo_bin_index, num_bins, rbins, period, N_threads = 1):
+    """ Number of ordered pairs of distinct halos in each radial bin,
+    for every pair of bins of halos.
+
+    Parameters
+    ----------
+    halo_pos : array
+        Array of shape (Nhalos, 3) storing the halo positions.
+
+    halo_bin_index : array
+        Length-Nhalos integer array storing the bin of each halo.
+
+    num_bins : int
+        Number of bins of halos.
+
+    rbins : array
+        Radial bins. The first bin edge must be strictly positive,
+        so that the pair of each halo with itself is never counted.
+
+    period : array_like
+        Length of the periodic box, either a float or a length-3 sequence.
+
+    N_threads : int, optional
+        Number of processes used by `~halotools.mock_observables.pair_counters.npairs`.
+        Default is 1.
+
+    Returns
+    -------
+    pair_counts : array
+        Array of shape (num_bins, num_bins, len(rbins)-1) whose ``(i, j, k)`` element
+        is the number of pairs of halos of bins ``i`` and ``j``
+        with separation in the ``k``-th radial bin.
+    """
+    if HAS_MOCKOBS is False:
+        raise HalotoolsError("The mock_observables sub-package is required "
+            "to count the pairs of halos")
+    if rbins[0] <= 0:
+        raise HalotoolsError("The first edge of the radial bins must be strictly positive")
+
+    period = np.ones(3)*period
+    cumulative_counts = np.zeros((num_bins, num_bins, len(rbins)))
+    for jbin in range(num_bins):
+        mask = (halo_bin_index == jbin)
+        if np.any(mask) == False:
+            continue
+        per_point_counts = npairs(halo_pos, halo_pos[mask], rbins,
+            period = period, per_point = True, N_threads = N_threads)
+        for irbin in range(len(rbins)):
+            cumulative_counts[:, jbin, irbin] = np.bincount(halo_bin_index,
+                weights=per_point_counts[:, irbin], minlength=num_bins)
+
+    return np.diff(cumulative_counts, axis=2)
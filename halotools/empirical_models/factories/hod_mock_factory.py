@@ -8,15 +8,21 @@ Currently only composite HOD models are supported.
 
 """
 
+import os
+import hashlib
 import numpy as np
 from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 from copy import copy 
+from collections import OrderedDict
 from astropy.extern import six
+from astropy.extern.six.moves import cPickle as pickle
 from abc import ABCMeta, abstractmethod, abstractproperty
 from astropy.table import Table 
 
 from .mock_factory_template import MockFactory
-from .mock_helpers import three_dim_pos_bundle, infer_mask_from_kwargs
+from .mock_helpers import three_dim_pos_bundle, infer_mask_from_kwargs, GalaxyColumns
+from . import halo_model_helpers
 
 from .. import model_helpers, model_defaults
 
@@ -28,7 +34,7 @@ except ImportError:
 
 from ...sim_manager import sim_defaults
 from ...utils.array_utils import randomly_downsample_data
-from ...utils.table_utils import SampleSelector
+from ...utils.table_utils import SampleSelector, compute_conditional_percentiles
 from ...sim_manager import FakeSim, FakeMock
 from ...custom_exceptions import *
 
@@ -36,6 +42,30 @@ from ...custom_exceptions import *
 __all__ = ['HodMockFactory']
 __author__ = ['Andrew Hearin']
 
+# Process-wide cache of the results of HodMockFactory.preprocess_halo_catalog, 
+# keyed by the identity of the snapshot and the configuration of the model, 
+# in order of last use so that the least recently used entries can be evicted 
+_preprocessing_cache = OrderedDict()
+
+
+def _configuration_repr(obj, depth = 0):
+    """ String describing the configuration of the input object. 
+
+    Objects with their own ``__repr__``, such as strings, numbers or cosmologies, 
+    are described by their ``repr``. Any other object is described by its class 
+    and the configuration of its attributes, excluding methods, dictionaries 
+    such as ``param_dict``, and arrays, so that e.g. component models 
+    that only differ in the values of their parameters have the same configuration. 
+    """
+    if isinstance(obj, (list, tuple)):
+        return repr([_configuration_repr(item, depth + 1) for item in obj])
+    elif (type(obj).__repr__ is not object.__repr__) or (depth > 3) or (not hasattr(obj, '__dict__')):
+        return repr(obj)
+    else:
+        attrs = [(attr, _configuration_repr(value, depth + 1)) 
+            for attr, value in sorted(vars(obj).items()) 
+            if not (callable(value) or isinstance(value, (dict, np.ndarray)))]
+        return repr((obj.__class__.__name__, attrs))
 
 class HodMockFactory(MockFactory):
     """ Class responsible for populating a simulation with a 
@@ -77,22 +107,50 @@ class HodMockFactory(MockFactory):
             If True, only halos passing the mass completeness cut defined in 
             `~halotools.empirical_models.model_defaults` will be used to populate the mock. 
             Default is True. 
+
+        reuse_memory : bool, optional 
+            Default value of the ``reuse_memory`` argument of `populate`. 
+            Default is False. 
+
+        use_preprocessing_cache : bool, optional 
+            If True, the results of `preprocess_halo_catalog` are retrieved from 
+            the cache of previously pre-processed halo catalogs, when possible. 
+            Default is True. 
+
+        cache_preprocessing_to_disk : bool, optional 
+            If True, the results of `preprocess_halo_catalog` are also cached 
+            in a file stored next to the processed halo catalog of the snapshot, 
+            so that they persist between sessions. Default is False. 
         """
 
         super(HodMockFactory, self).__init__(populate=populate, **kwargs)
+        self.reuse_memory = kwargs.get('reuse_memory', False)
 
-        self.preprocess_halo_catalog()
+        self.preprocess_halo_catalog(
+            apply_completeness_cut = kwargs.get('apply_completeness_cut', True), 
+            use_cache = kwargs.get('use_preprocessing_cache', True), 
+            cache_to_disk = kwargs.get('cache_preprocessing_to_disk', False))
 
         if populate is True:
             self.populate()
 
-    def preprocess_halo_catalog(self, apply_completeness_cut = True, **kwargs):
+    def preprocess_halo_catalog(self, apply_completeness_cut = True, 
+        use_cache = True, cache_to_disk = False, **kwargs):
         """ Method to pre-process a halo catalog upon instantiation of 
         the mock object. This pre-processing includes identifying the 
         catalog columns that will be used by the model to create the mock, 
         building lookup tables associated with the halo profile, 
         and possibly creating new halo properties. 
 
+        For a given snapshot and model configuration, the pre-processing is deterministic, 
+        so its results are stored in a process-wide cache: 
+        the rows of the halo catalog that pass the cuts, 
+        the new halo properties computed by the functions in the 
+        ``new_haloprop_func_dict`` of the model, and the lookup tables 
+        built by the component models. 
+        Any subsequent mock of the same snapshot made with an identically configured model 
+        retrieves these results from the cache instead of recomputing them. 
+
         Parameters 
         ----------
         logrmin : float, optional 
@@ -111,37 +169,351 @@ class HodMockFactory(MockFactory):
             If True, only halos passing the mass completeness cut defined in 
             `~halotools.empirical_models.model_defaults` will be used to populate the mock. 
             Default is True. 
+
+        use_cache : bool, optional 
+            If False, the halo catalog is pre-processed from scratch, 
+            and the results are not stored in the cache. Default is True. 
+
+        cache_to_disk : bool, optional 
+            If True, the results are also read from, or stored in, an hdf5 file 
+            in the same directory as the processed halo catalog of the snapshot, 
+            named after the halo catalog and the configuration of the model. 
+            Only snapshots read from a processed halo catalog, 
+            e.g., `~halotools.sim_manager.HaloCatalog`, can be cached on disk. 
+            Default is False. 
+
+        Notes 
+        -----
+        The configuration of the model is identified by the class and 
+        the scalar, string and sequence attributes of each component model, 
+        so that component models whose ``param_dict`` values differ 
+        share the same pre-processed catalog, 
+        together with a checksum of the halos passing the ``halo_selection_func`` of the model. 
+        Snapshots that are not read from a processed halo catalog are identified 
+        by a checksum of every column of their halo catalog. 
+        The cache holds the results of at most ``preprocessing_cache_max_entries`` 
+        pre-processed catalogs, set in `~halotools.empirical_models.model_defaults`, 
+        evicting the least recently used ones. 
+        Call `clear_preprocessing_cache` to release the memory held by the cache. 
+        """
+        if use_cache is False:
+            self._preprocess_halo_catalog(apply_completeness_cut, **kwargs)
+            return
+
+        configuration = self._preprocessing_configuration(apply_completeness_cut, **kwargs)
+        snapshot_identity = self._snapshot_identity()
+        cache_key = hashlib.md5((snapshot_identity + configuration).encode('utf-8')).hexdigest()
+
+        if cache_to_disk is True:
+            try:
+                halo_table_fname = self.snapshot.processed_halo_table_fname
+            except AttributeError:
+                raise HalotoolsError("Only snapshots with a ``processed_halo_table_fname`` "
+                    "can cache the pre-processed halo catalog on disk")
+            cache_fname = (os.path.splitext(halo_table_fname)[0] + '.hod_preprocessing.' + 
+                hashlib.md5(configuration.encode('utf-8')).hexdigest() + '.h5')
+
+        if cache_key in _preprocessing_cache:
+            cached = _preprocessing_cache.pop(cache_key)
+        elif (cache_to_disk is True) and os.path.isfile(cache_fname):
+            cached = self._read_preprocessing_cache(cache_fname, 
+                configuration, os.path.getmtime(halo_table_fname))
+        else:
+            cached = None
+
+        if cached is None:
+            cached = self._preprocess_halo_catalog(apply_completeness_cut, **kwargs)
+            if cache_to_disk is True:
+                self._write_preprocessing_cache(cache_fname, cached, 
+                    configuration, os.path.getmtime(halo_table_fname))
+        else:
+            self._restore_preprocessed_halo_catalog(cached)
+        _preprocessing_cache[cache_key] = cached
+        while len(_preprocessing_cache) > model_defaults.preprocessing_cache_max_entries:
+            _preprocessing_cache.popitem(last = False)
+
+    def _preprocess_halo_catalog(self, apply_completeness_cut = True, **kwargs):
+        """ Private method performing the pre-processing of the halo catalog 
+        described in `preprocess_halo_catalog`. 
+
+        Returns 
+        -------
+        cached : dict 
+            Dictionary storing the indices of the rows of the input halo catalog 
+            passing the cuts in ``halo_table_index``, 
+            the new halo properties in ``new_haloprops``, 
+            and the attributes bound to each component model 
+            by its lookup tables in ``lookup_tables``. 
         """
 
         ################ Make cuts on halo catalog ################
         # Select host halos only, since this is an HOD-style model
-        self.halo_table = SampleSelector.host_halo_selection(
-            table = self.halo_table)
+        mask = np.array(SampleSelector.host_halo_mask(table = self.halo_table), dtype=bool)
 
         # make a conservative mvir completeness cut 
         # This cut can be controlled by changing sim_defaults.Num_ptcl_requirement
         if apply_completeness_cut is True:
             cutoff_mvir = sim_defaults.Num_ptcl_requirement*self.snapshot.particle_mass
-            mass_cut = (self.halo_table['halo_mvir'] > cutoff_mvir)
-            self.halo_table = self.halo_table[mass_cut]
+            mask &= np.asarray(self.halo_table['halo_mvir'] > cutoff_mvir)
+
+        halo_table_index = np.flatnonzero(mask)
+        self.halo_table = self.halo_table[halo_table_index]
 
         ############################################################
 
         ### Create new columns of the halo catalog, if applicable
+        new_haloprops = {}
         try:
             d = self.model.new_haloprop_func_dict
             for new_haloprop_key, new_haloprop_func in d.iteritems():
                 self.halo_table[new_haloprop_key] = new_haloprop_func(halo_table = self.halo_table)
                 self.additional_haloprops.append(new_haloprop_key)
+                new_haloprops[new_haloprop_key] = np.array(self.halo_table[new_haloprop_key])
         except AttributeError:
             pass
 
+        ### Build the lookup tables, keeping track of the attributes they bind 
+        old_attrs = dict((feature, dict(vars(component_model))) 
+            for feature, component_model in self.model.model_dictionary.iteritems())
         self.model.build_lookup_tables(**kwargs)
+        lookup_tables = {}
+        for feature, component_model in self.model.model_dictionary.iteritems():
+            lookup_tables[feature] = dict((attr, value) 
+                for attr, value in vars(component_model).iteritems() 
+                if (attr not in old_attrs[feature]) or (old_attrs[feature][attr] is not value))
+
+        return {'halo_table_index': halo_table_index, 
+            'new_haloprops': new_haloprops, 'lookup_tables': lookup_tables}
+
+    def _restore_preprocessed_halo_catalog(self, cached):
+        """ Private method applying the results of `preprocess_halo_catalog` 
+        retrieved from the cache to the halo catalog and the model. 
+        """
+        self.halo_table = self.halo_table[cached['halo_table_index']]
+
+        for new_haloprop_key, new_haloprop in cached['new_haloprops'].iteritems():
+            self.halo_table[new_haloprop_key] = new_haloprop
+            self.additional_haloprops.append(new_haloprop_key)
+
+        for feature, attrs in cached['lookup_tables'].iteritems():
+            component_model = self.model.model_dictionary[feature]
+            for attr, value in attrs.iteritems():
+                setattr(component_model, attr, value)
+
+    def _snapshot_identity(self):
+        """ Private method returning a string identifying the halo catalog of the snapshot. 
+
+        Snapshots read from a processed halo catalog are identified by the name 
+        and modification time of the file. Any other snapshot, e.g., a `FakeSim` 
+        or a halo catalog edited in memory, is identified by its class, ``simname``, 
+        ``Lbox`` and a checksum of every column of its halo catalog, 
+        since any of them may be read by the pre-processing, 
+        e.g., by the functions in the ``new_haloprop_func_dict`` of the model. 
+        """
+        fname = getattr(self.snapshot, 'processed_halo_table_fname', None)
+        if (fname is not None) and os.path.isfile(fname):
+            return repr((os.path.abspath(fname), os.path.getmtime(fname)))
+        else:
+            return repr((self.snapshot.__class__.__name__, 
+                getattr(self.snapshot, 'simname', None), float(self.snapshot.Lbox), 
+                self._halo_table_checksum(self.halo_table.keys())))
+
+    def _halo_selection_checksum(self):
+        """ Private method returning a checksum of the ``halo_id`` column of ``halo_table``, 
+        i.e., of the halos that pass the ``halo_selection_func`` of the model, if any. 
+        """
+        return self._halo_table_checksum(['halo_id'])
+
+    def _halo_table_checksum(self, keys):
+        """ Private method returning a checksum of the input columns of ``halo_table``. 
+        """
+        checksum = hashlib.md5()
+        for key in sorted(keys):
+            checksum.update(key.encode('utf-8'))
+            checksum.update(np.ascontiguousarray(self.halo_table[key]).tobytes())
+        return repr((len(self.halo_table), checksum.hexdigest()))
+
+    def _preprocessing_configuration(self, apply_completeness_cut, **kwargs):
+        """ Private method returning a string describing the configuration 
+        of the model that determines the results of `preprocess_halo_catalog`. 
+
+        Each component model is described by `_configuration_repr`. 
+        Since ``halo_table`` is the result of the ``halo_selection_func`` of the model, 
+        the selected halos are described by `_halo_selection_checksum`. 
+        """
+        configuration = [('halo_selection', self._halo_selection_checksum()), 
+            ('apply_completeness_cut', apply_completeness_cut), 
+            ('Num_ptcl_requirement', sim_defaults.Num_ptcl_requirement), 
+            ('particle_mass', float(self.snapshot.particle_mass)), 
+            ('lookup_table_kwargs', sorted(kwargs.items())), 
+            ('new_haloprop_keys', sorted(getattr(self.model, 'new_haloprop_func_dict', {}).keys()))]
+
+        for feature in sorted(self.model.model_dictionary.keys()):
+            component_model = self.model.model_dictionary[feature]
+            configuration.append((feature, _configuration_repr(component_model)))
+
+        return repr(configuration)
+
+    def _write_preprocessing_cache(self, fname, cached, configuration, halo_table_mtime):
+        """ Private method storing the results of `preprocess_halo_catalog` 
+        in the hdf5 file ``fname``. The lookup tables are pickled, 
+        since they store spline objects. 
+        """
+        try:
+            import h5py
+        except ImportError:
+            raise HalotoolsError("Must have h5py installed to cache the pre-processed halo catalog")
+
+        with h5py.File(fname, 'w') as f:
+            f.create_dataset('halo_table_index', data = cached['halo_table_index'])
+            new_haloprops = f.create_group('new_haloprops')
+            for key, value in cached['new_haloprops'].iteritems():
+                new_haloprops.create_dataset(key, data = value)
+            f.create_dataset('lookup_tables', 
+                data = np.void(pickle.dumps(cached['lookup_tables'], protocol = 2)))
+            f.attrs['configuration'] = configuration
+            f.attrs['halo_table_mtime'] = halo_table_mtime
+
+    def _read_preprocessing_cache(self, fname, configuration, halo_table_mtime):
+        """ Private method reading the results of `preprocess_halo_catalog` 
+        stored in the hdf5 file ``fname``. Returns None if the file was written 
+        for a different model configuration or an older version of the halo catalog. 
+        """
+        try:
+            import h5py
+        except ImportError:
+            raise HalotoolsError("Must have h5py installed to read the pre-processed halo catalog")
+
+        with h5py.File(fname, 'r') as f:
+            stored_configuration = f.attrs['configuration']
+            if not isinstance(stored_configuration, str):
+                stored_configuration = stored_configuration.decode('utf-8')
+            if ((stored_configuration != configuration) or 
+                (f.attrs['halo_table_mtime'] != halo_table_mtime)):
+                return None
+            cached = {'halo_table_index': f['halo_table_index'][...]}
+            cached['new_haloprops'] = dict((key, f['new_haloprops'][key][...]) 
+                for key in f['new_haloprops'].keys())
+            cached['lookup_tables'] = pickle.loads(f['lookup_tables'][()].tobytes())
+        return cached
+
+    @staticmethod
+    def clear_preprocessing_cache():
+        """ Release the memory held by the process-wide cache of pre-processed halo catalogs. 
+        Files written with the ``cache_to_disk`` option of `preprocess_halo_catalog` are kept. 
+        """
+        _preprocessing_cache.clear()
 
     def populate(self, **kwargs):
         """ Method populating halos with mock galaxies. 
+
+        The ``halo_table_index`` column of ``galaxy_table`` stores the row 
+        of ``halo_table`` hosting each galaxy, so that any other property of the host halos 
+        can be retrieved as ``halo_table[key][galaxy_table['halo_table_index']]``. 
+
+        Parameters 
+        ----------
+        reuse_memory : bool, optional 
+            If True, the columns of ``galaxy_table`` are views into buffers that are 
+            allocated at the largest number of galaxies populated so far, 
+            and reused by every subsequent call to `populate`. 
+            Host halo properties are gathered into the buffers with a single index array per ``gal_type``, 
+            and the ``gal_type`` of each galaxy is also stored as the integer ``gal_type_code``, 
+            the index of its ``gal_type`` in ``sorted(gal_types)``, 
+            as given by the ``gal_type_codes`` dictionary of the mock. 
+            Repeatedly populating the same snapshot, e.g., in a likelihood analysis 
+            where only ``param_dict`` changes, is then dominated by the 
+            Monte Carlo realization of the model. Note that ``galaxy_table`` 
+            is overwritten by the next call to `populate`, so it must be copied to be kept. 
+            Default is set by the ``reuse_memory`` attribute of the mock. 
+
+        seed : int or `~numpy.random.RandomState`, optional 
+            Random number seed of the Monte Carlo realization. 
+            If passed, the halo catalog is divided into chunks of ``chunk_size`` halos, 
+            and each model method populates each chunk with its own random stream, 
+            identified by the seed, the method and the index of the chunk. 
+            The realization is then identical for the same ``seed`` and ``chunk_size``, 
+            whatever the value of ``num_threads``, and the global state of 
+            `numpy.random` is left untouched. 
+            If a `~numpy.random.RandomState` is passed instead, every model method 
+            draws its realization in turn from that generator, so that independent mocks 
+            can be populated concurrently, each with its own generator. 
+            Default is None, in which case the 
+            realization is drawn from the global state of `numpy.random`. 
+
+        num_threads : int, optional 
+            Number of threads populating the chunks of the halo catalog. 
+            If larger than 1 and no integer ``seed`` is passed, the seed is drawn 
+            from the input generator, or else from the global state of `numpy.random`. 
+            Default is 1. 
+
+        chunk_size : int, optional 
+            Number of halos in each chunk of the halo catalog. 
+            Only used if either an integer ``seed`` is passed or ``num_threads`` is larger than 1. 
+            Default is set by ``default_populate_chunk_size`` 
+            in `~halotools.empirical_models.model_defaults`. 
+        """
+        seed = kwargs.get('seed', None)
+        num_threads = kwargs.get('num_threads', 1)
+        single_stream = (seed is None) or isinstance(seed, np.random.RandomState)
+        if single_stream & (num_threads > 1):
+            seed = model_helpers.random_state(seed).randint(2**31)
+            single_stream = False
+        chunk_size = kwargs.get('chunk_size', model_defaults.default_populate_chunk_size)
+
+        if kwargs.get('reuse_memory', self.reuse_memory) is True:
+            self._populate_buffers(seed = seed, num_threads = num_threads, chunk_size = chunk_size)
+        else:
+            self._populate_new_table(seed = seed, num_threads = num_threads, chunk_size = chunk_size)
+
+        if single_stream is True:
+            seed_kwargs = {} if seed is None else {'seed': seed}
+            for method in self._remaining_methods_to_call:
+                func = getattr(self.model, method)
+                gal_type_slice = self._gal_type_indices[func.gal_type]
+                func(halo_table = self._galaxy_columns[gal_type_slice], **seed_kwargs)
+        else:
+            calling_sequence = self.model._mock_generation_calling_sequence
+            def populate_chunk(ichunk):
+                for method in self._remaining_methods_to_call:
+                    func = getattr(self.model, method)
+                    gal_type_slice = self._chunk_gal_type_indices[func.gal_type][ichunk]
+                    if gal_type_slice.stop == gal_type_slice.start:
+                        continue
+                    func(halo_table = self._galaxy_columns[gal_type_slice], 
+                        seed = model_helpers.derived_seed(seed, calling_sequence.index(method), ichunk))
+            self._map_halo_chunks(populate_chunk, num_threads)
+                
+        # Positions are now assigned to all populations. 
+        # Now enforce the periodic boundary conditions for all populations at once
+        for key in ('x', 'y', 'z'):
+            coords = self._galaxy_columns[key]
+            np.mod(coords, self.snapshot.Lbox, out=coords)
+
+        if hasattr(self.model, 'galaxy_selection_func'):
+            mask = self.model.galaxy_selection_func(self.galaxy_table)
+            self.galaxy_table = self.galaxy_table[mask]
+
+    def _map_halo_chunks(self, func, num_threads):
+        """ Call ``func`` on the index of each chunk of the halo catalog, 
+        using a pool of ``num_threads`` threads, and return the list of results. 
+        """
+        chunk_indices = list(range(len(self._halo_chunks)))
+        if (num_threads > 1) & (len(chunk_indices) > 1):
+            pool = ThreadPool(min(num_threads, len(chunk_indices)))
+            try:
+                result = pool.map(func, chunk_indices)
+            finally:
+                pool.close()
+                pool.join()
+            return result
+        else:
+            return [func(ichunk) for ichunk in chunk_indices]
+
+    def _populate_new_table(self, **kwargs):
+        """ Allocate a new ``galaxy_table`` and fill it with the properties of the host halos. 
         """
-        self.allocate_memory()
+        self.allocate_memory(**kwargs)
 
         # Loop over all gal_types in the model 
         for gal_type in self.gal_types:
@@ -154,48 +526,155 @@ class HodMockFactory(MockFactory):
             # For the gal_type_slice indices of 
             # the pre-allocated array self.gal_type, 
             # set each string-type entry equal to the gal_type string
-            self.galaxy_table['gal_type'][gal_type_slice] = (
+            self._galaxy_columns['gal_type'][gal_type_slice] = (
                 np.repeat(gal_type, self._total_abundance[gal_type],axis=0))
 
-            # Store all other relevant host halo properties into their 
-            # appropriate pre-allocated array 
+        # Store all other relevant host halo properties into their 
+        # appropriate pre-allocated array 
+        self._gather_host_haloprops()
+
+        self._galaxy_columns['x'] = np.copy(self._galaxy_columns['halo_x'])
+        self._galaxy_columns['y'] = np.copy(self._galaxy_columns['halo_y'])
+        self._galaxy_columns['z'] = np.copy(self._galaxy_columns['halo_z'])
+
+    def _populate_buffers(self, **kwargs):
+        """ Fill the reusable galaxy buffers with the properties of the host halos, 
+        and bind ``galaxy_table`` to views of the first ``Ngals`` rows of the buffers. 
+        """
+        self.allocate_buffers(**kwargs)
+
+        galaxy_columns = GalaxyColumns(self.Ngals)
+        for key in self._galaxy_buffer_keys:
+            galaxy_columns[key] = self._galaxy_buffers[key][:self.Ngals]
+        self._set_galaxy_columns(galaxy_columns)
+
+        for gal_type in self.gal_types:
+            gal_type_slice = self._gal_type_indices[gal_type]
+            galaxy_columns['gal_type_code'][gal_type_slice] = self.gal_type_codes[gal_type]
+            galaxy_columns['gal_type'][gal_type_slice] = gal_type
+
+        self._gather_host_haloprops()
+
+        # Galaxy properties assigned by the model start from zero, as in allocate_memory. 
+        # Calling the scalar type of the buffer gives the zero of any dtype, e.g., '' for strings
+        for key in self._zeroed_galaxy_buffer_keys:
+            buf = self._galaxy_buffers[key]
+            buf[:self.Ngals] = buf.dtype.type()
+
+        for key in ('x', 'y', 'z'):
+            galaxy_columns[key] = galaxy_columns['halo_'+key]
+
+    def _gather_host_haloprops(self):
+        """ Store the row of ``halo_table`` hosting each galaxy in the ``halo_table_index`` column, 
+        and gather each host halo property in ``additional_haloprops`` 
+        into its pre-allocated column with a single ``np.take`` per ``gal_type``. 
+        """
+        for gal_type in self.gal_types:
+            gal_type_slice = self._gal_type_indices[gal_type]
+            halo_index = self._halo_index[gal_type]
+            self._galaxy_columns['halo_table_index'][gal_type_slice] = halo_index
             for halocatkey in self.additional_haloprops:
-                self.galaxy_table[halocatkey][gal_type_slice] = np.repeat(
-                    self.halo_table[halocatkey], self._occupation[gal_type], axis=0)
+                np.take(np.asarray(self.halo_table[halocatkey]), halo_index, 
+                    out=self._galaxy_columns[halocatkey][gal_type_slice])
 
-        self.galaxy_table['x'] = self.galaxy_table['halo_x']
-        self.galaxy_table['y'] = self.galaxy_table['halo_y']
-        self.galaxy_table['z'] = self.galaxy_table['halo_z']
+    def allocate_buffers(self, **kwargs):
+        """ Method determines the number of galaxies of each ``gal_type``, 
+        exactly as `allocate_memory`, but stores the galaxy properties 
+        in buffers that are reused by each call to `populate` with ``reuse_memory`` set to True. 
+        The buffers are only reallocated when the number of galaxies exceeds 
+        the largest number populated so far, in which case they are enlarged by 20%. 
 
-        for method in self._remaining_methods_to_call:
-            func = getattr(self.model, method)
-            gal_type_slice = self._gal_type_indices[func.gal_type]
-            func(halo_table = self.galaxy_table[gal_type_slice])
-                
-        # Positions are now assigned to all populations. 
-        # Now enforce the periodic boundary conditions for all populations at once
-        self.galaxy_table['x'] = model_helpers.enforce_periodicity_of_box(
-            self.galaxy_table['x'], self.snapshot.Lbox)
-        self.galaxy_table['y'] = model_helpers.enforce_periodicity_of_box(
-            self.galaxy_table['y'], self.snapshot.Lbox)
-        self.galaxy_table['z'] = model_helpers.enforce_periodicity_of_box(
-            self.galaxy_table['z'], self.snapshot.Lbox)
+        Parameters 
+        ----------
+        seed, num_threads, chunk_size : optional 
+            Passed to the occupation methods of the model, as described in `populate`. 
+        """
+        self._set_occupations(**kwargs)
 
-        if hasattr(self.model, 'galaxy_selection_func'):
-            mask = self.model.galaxy_selection_func(self.galaxy_table)
-            self.galaxy_table = self.galaxy_table[mask]
+        self.gal_type_codes = dict((gal_type, code) 
+            for code, gal_type in enumerate(sorted(self.gal_types)))
 
-    def allocate_memory(self):
+        if not hasattr(self, '_galaxy_buffers'):
+            self._galaxy_buffers = {}
+            self._galaxy_buffer_capacity = 0
+
+        dtypes = {}
+        for halocatkey in self.additional_haloprops:
+            dtypes[halocatkey] = self.halo_table[halocatkey].dtype
+        for key in ('x', 'y', 'z'):
+            dtypes[key] = self.halo_table['halo_'+key].dtype
+        for galcatkey in self.model.prof_param_keys:
+            dtypes[galcatkey] = np.dtype(float)
+        dt = self.model._galprop_dtypes_to_allocate
+        for key in dt.names:
+            dtypes[key] = np.dtype(dt[key].type)
+        self._zeroed_galaxy_buffer_keys = (
+            [key for key in list(self.model.prof_param_keys) + list(dt.names) 
+            if key not in self.additional_haloprops])
+        dtypes['halo_table_index'] = self._halo_index_base.dtype
+        dtypes['gal_type_code'] = np.dtype(np.int8)
+        gal_type_strlen = max(len(gal_type) for gal_type in self.gal_types)
+        dtypes['gal_type'] = np.dtype((np.str_, gal_type_strlen))
+
+        if self.Ngals > self._galaxy_buffer_capacity:
+            self._galaxy_buffer_capacity = int(1.2*self.Ngals) + 1
+            self._galaxy_buffers = {}
+        for key, dtype in dtypes.items():
+            buf = self._galaxy_buffers.get(key, None)
+            if (buf is None) or (buf.dtype != dtype):
+                self._galaxy_buffers[key] = np.zeros(self._galaxy_buffer_capacity, dtype = dtype)
+
+        self._galaxy_buffer_keys = sorted(dtypes.keys())
+
+    def allocate_memory(self, **kwargs):
         """ Method allocates the memory for all the numpy arrays 
         that will store the information about the mock. 
         These arrays are bound directly to the mock object. 
 
         The main bookkeeping devices generated by this method are 
-        ``_occupation`` and ``_gal_type_indices``. 
+        ``_occupation``, ``_gal_type_indices`` and ``_halo_index``. 
 
+        Parameters 
+        ----------
+        seed, num_threads, chunk_size : optional 
+            Passed to the occupation methods of the model, as described in `populate`. 
         """
 
-        self.galaxy_table = Table() 
+        self._set_occupations(**kwargs)
+
+        self._set_galaxy_columns(GalaxyColumns(self.Ngals))
+
+        # Allocate memory for all additional halo properties, 
+        # including profile parameters of the halos such as 'conc_NFWmodel'
+        for halocatkey in self.additional_haloprops:
+            self._galaxy_columns[halocatkey] = np.zeros(self.Ngals, 
+                dtype = self.halo_table[halocatkey].dtype)
+
+        # Separately allocate memory for the galaxy profile parameters
+        for galcatkey in self.model.prof_param_keys:
+            self._galaxy_columns[galcatkey] = 0.
+
+        self._galaxy_columns['gal_type'] = np.zeros(self.Ngals, dtype=object)
+
+        self._galaxy_columns['halo_table_index'] = np.zeros(self.Ngals, 
+            dtype = self._halo_index_base.dtype)
+
+        dt = self.model._galprop_dtypes_to_allocate
+        for key in dt.names:
+            self._galaxy_columns[key] = np.zeros(self.Ngals, dtype = dt[key].type)
+
+    def _set_occupations(self, seed = None, num_threads = 1, 
+        chunk_size = model_defaults.default_populate_chunk_size):
+        """ Call the model methods preceding the occupation methods on the halo table, 
+        and the occupation methods of each ``gal_type``, setting the bookkeeping devices 
+        ``_occupation``, ``_total_abundance``, ``_gal_type_indices`` and ``Ngals``. 
+
+        If an integer ``seed`` is passed, the occupation methods are called on each chunk 
+        of ``chunk_size`` halos with its own random stream, and the bookkeeping device 
+        ``_chunk_gal_type_indices`` stores the slice of the galaxies 
+        of each ``gal_type`` hosted by each chunk. 
+        """
+        calling_sequence = self.model._mock_generation_calling_sequence
 
         # We will keep track of the calling sequence with a list called _remaining_methods_to_call
         # Each time a function in this list is called, we will remove that function from the list
@@ -211,7 +690,11 @@ class HodMockFactory(MockFactory):
                 break
             else:
                 func = getattr(self.model, func_name)
-                func(halo_table = self.halo_table)
+                if seed is None:
+                    func(halo_table = self.halo_table)
+                else:
+                    func(halo_table = self.halo_table, 
+                        seed = model_helpers.derived_seed(seed, calling_sequence.index(func_name)))
                 galprops_assigned_to_halo_table_by_func = func._galprop_dtypes_to_allocate.names
                 galprops_assigned_to_halo_table.extend(galprops_assigned_to_halo_table_by_func)
                 self._remaining_methods_to_call.remove(func_name)
@@ -229,6 +712,20 @@ class HodMockFactory(MockFactory):
         self._occupation = {}
         self._total_abundance = {}
         self._gal_type_indices = {}
+        self._halo_index = {}
+
+        # The np.arange of the halo indices is only rebuilt when the halo table changes length
+        Nhalos = len(self.halo_table)
+        if len(getattr(self, '_halo_index_base', [])) != Nhalos:
+            self._halo_index_base = np.arange(Nhalos)
+
+        single_stream = (seed is None) or isinstance(seed, np.random.RandomState)
+        if single_stream is True:
+            self._halo_chunks = [slice(0, Nhalos)]
+        else:
+            self._halo_chunks = [slice(first, min(first + chunk_size, Nhalos)) 
+                for first in range(0, Nhalos, chunk_size)]
+        self._chunk_gal_type_indices = {}
 
         first_galaxy_index = 0
         for gal_type in self.gal_types:
@@ -236,7 +733,28 @@ class HodMockFactory(MockFactory):
             occupation_func = getattr(self.model, occupation_func_name)
             # Call the component model to get a Monte Carlo
             # realization of the abundance of gal_type galaxies
-            self._occupation[gal_type] = occupation_func(halo_table=self.halo_table)
+            galprops_assigned_to_halo_table_by_func = occupation_func._galprop_dtypes_to_allocate.names
+            if single_stream is True:
+                seed_kwargs = {} if seed is None else {'seed': seed}
+                self._occupation[gal_type] = occupation_func(halo_table=self.halo_table, **seed_kwargs)
+            else:
+                method_index = calling_sequence.index(occupation_func_name)
+                def occupy_chunk(ichunk):
+                    chunk_table = self.halo_table[self._halo_chunks[ichunk]]
+                    occupation = occupation_func(halo_table = chunk_table, 
+                        seed = model_helpers.derived_seed(seed, method_index, ichunk))
+                    return occupation, [chunk_table[key] for key in galprops_assigned_to_halo_table_by_func]
+                chunk_results = self._map_halo_chunks(occupy_chunk, num_threads)
+                self._occupation[gal_type] = np.concatenate([result[0] for result in chunk_results])
+                # The occupation methods assigned these columns to the chunks of the halo table
+                for ikey, key in enumerate(galprops_assigned_to_halo_table_by_func):
+                    self.halo_table[key] = np.concatenate([result[1][ikey] for result in chunk_results])
+
+            # Slice of the gal_type galaxies hosted by each chunk of the halo table
+            chunk_abundances = [self._occupation[gal_type][chunk].sum() for chunk in self._halo_chunks]
+            chunk_edges = first_galaxy_index + np.concatenate(([0], np.cumsum(chunk_abundances)))
+            self._chunk_gal_type_indices[gal_type] = [slice(chunk_edges[ichunk], chunk_edges[ichunk+1]) 
+                for ichunk in range(len(self._halo_chunks))]
 
             # Now use the above result to set up the indexing scheme
             self._total_abundance[gal_type] = (
@@ -247,27 +765,233 @@ class HodMockFactory(MockFactory):
             # which array elements pertain to which gal_type. 
             self._gal_type_indices[gal_type] = slice(
                 first_galaxy_index, last_galaxy_index)
+            # Row of the halo table hosting each gal_type galaxy. 
+            # This single index array is used to gather every host halo property
+            self._halo_index[gal_type] = np.repeat(
+                self._halo_index_base, self._occupation[gal_type])
             first_galaxy_index = last_galaxy_index
             # Remove the mc_occupation function from the list of methods to call
             self._remaining_methods_to_call.remove(occupation_func_name)
-            galprops_assigned_to_halo_table_by_func = occupation_func._galprop_dtypes_to_allocate.names
             self.additional_haloprops.extend(galprops_assigned_to_halo_table_by_func)
+        self.additional_haloprops = list(set(self.additional_haloprops))
             
         self.Ngals = np.sum(self._total_abundance.values())
 
-        # Allocate memory for all additional halo properties, 
-        # including profile parameters of the halos such as 'conc_NFWmodel'
-        for halocatkey in self.additional_haloprops:
-            self.galaxy_table[halocatkey] = np.zeros(self.Ngals, 
-                dtype = self.halo_table[halocatkey].dtype)
+    def tabulate_halo_pairs(self, rbins = model_defaults.default_rbins, 
+        num_mass_bins = model_defaults.default_halo_model_num_mass_bins, 
+        num_sec_haloprop_bins = None, fname = None, overwrite = False, N_threads = 1):
+        """ Method counting the pairs of host halos in each radial bin, 
+        for every pair of bins of halos. 
 
-        # Separately allocate memory for the galaxy profile parameters
-        for galcatkey in self.model.prof_param_keys:
-            self.galaxy_table[galcatkey] = 0.
+        The halo catalog is fixed, so the table only needs to be computed once 
+        for any number of points in the parameter space of the model: 
+        the two-halo pair counts of galaxies then follow from weighting the table 
+        by the mean occupation of the halos of each bin, see `two_halo_pair_counts`. 
 
-        self.galaxy_table['gal_type'] = np.zeros(self.Ngals, dtype=object)
+        Host halos are binned in the logarithm of the ``prim_haloprop_key`` 
+        of the occupation components, and, for assembly-biased models, 
+        in the conditional percentile of their ``sec_haloprop_key``. 
+        The table is bound to the ``halo_pair_table`` dictionary, 
+        and can be stored on disk to be reused by subsequent mocks of the same snapshot. 
 
-        dt = self.model._galprop_dtypes_to_allocate
-        for key in dt.names:
-            self.galaxy_table[key] = np.zeros(self.Ngals, dtype = dt[key].type)
+        Parameters 
+        ----------
+        rbins : array, optional 
+            Radial bins, which must all be strictly positive. 
+            Default is set in `~halotools.empirical_models.model_defaults` module. 
+
+        num_mass_bins : int, optional 
+            Number of logarithmic bins of the primary halo property. 
+            Default is set in `~halotools.empirical_models.model_defaults` module. 
+
+        num_sec_haloprop_bins : int, optional 
+            Number of bins of the conditional percentile of the secondary halo property. 
+            Default is set in `~halotools.empirical_models.model_defaults` module 
+            for assembly-biased models, and is unity otherwise. 
+
+        fname : string, optional 
+            Name of the hdf5 file (including absolute path) storing the table. 
+            If the file exists, the table is read from disk rather than computed, 
+            provided it was tabulated for the same halo catalog and binning. 
+            Otherwise, the computed table is written to ``fname``. 
+            Default is None, in which case the table is not stored on disk. 
+
+        overwrite : bool, optional 
+            If True, the table is computed and written to ``fname`` 
+            even if the file already exists. Default is False. 
+
+        N_threads : int, optional 
+            Number of processes used to count the pairs of halos. Default is 1. 
+
+        Examples 
+        --------
+        >>> model = Zheng07() # doctest: +SKIP 
+        >>> mock = HodMockFactory(snapshot = FakeSim(), model = model, populate = False) # doctest: +SKIP 
+        >>> mock.tabulate_halo_pairs(fname = 'halo_pairs.hdf5') # doctest: +SKIP 
+        >>> cen_sat_pairs = mock.two_halo_pair_counts('centrals', 'satellites') # doctest: +SKIP 
+        """
+        rbins = np.asarray(rbins, dtype = float)
+
+        occupation_components = [self.model.model_dictionary[gal_type + '_occupation'] 
+            for gal_type in self.model.gal_types]
+
+        prim_haloprop_keys = list(set(component.prim_haloprop_key 
+            for component in occupation_components))
+        if len(prim_haloprop_keys) == 1:
+            prim_haloprop_key = prim_haloprop_keys[0]
+        else:
+            prim_haloprop_key = model_defaults.prim_haloprop_key
+
+        sec_haloprop_keys = sorted(set(component.sec_haloprop_key 
+            for component in occupation_components if hasattr(component, 'sec_haloprop_key')))
+        if len(sec_haloprop_keys) == 0:
+            sec_haloprop_key = ''
+            num_sec_haloprop_bins = 1
+        else:
+            sec_haloprop_key = sec_haloprop_keys[0]
+            if num_sec_haloprop_bins is None:
+                num_sec_haloprop_bins = model_defaults.default_halo_model_num_sec_haloprop_bins
+
+        metadata = {'prim_haloprop_key': prim_haloprop_key, 
+            'sec_haloprop_key': sec_haloprop_key, 
+            'num_mass_bins': num_mass_bins, 
+            'num_sec_haloprop_bins': num_sec_haloprop_bins, 
+            'num_halos': len(self.halo_table), 
+            'simname': getattr(self.snapshot, 'simname', ''), 
+            'halo_finder': getattr(self.snapshot, 'halo_finder', ''), 
+            'Lbox': self.snapshot.Lbox}
+
+        if (fname is not None) and (os.path.isfile(fname)) and (overwrite is False):
+            self.halo_pair_table = self._read_halo_pair_table(fname, rbins, metadata)
+            return
+
+        log_prim_haloprop = np.log10(self.halo_table[prim_haloprop_key])
+        mass_bins = np.linspace(log_prim_haloprop.min(), log_prim_haloprop.max(), num_mass_bins + 1)
+        halo_bin_index = np.digitize(log_prim_haloprop, mass_bins[1:-1])*num_sec_haloprop_bins
+
+        sec_haloprop_percentile_bins = np.linspace(0, 1, num_sec_haloprop_bins + 1)
+        if num_sec_haloprop_bins > 1:
+            try:
+                percentile = self.halo_table[sec_haloprop_key + '_percentile']
+            except KeyError:
+                percentile = compute_conditional_percentiles(halo_table = self.halo_table, 
+                    prim_haloprop_key = prim_haloprop_key, sec_haloprop_key = sec_haloprop_key)
+            halo_bin_index += np.digitize(percentile, sec_haloprop_percentile_bins[1:-1])
+
+        num_bins = num_mass_bins*num_sec_haloprop_bins
+        halo_pos = three_dim_pos_bundle(self.halo_table, 'halo_x', 'halo_y', 'halo_z')
+        pair_counts = halo_model_helpers.binned_halo_pair_counts(halo_pos, halo_bin_index, 
+            num_bins, rbins, self.snapshot.Lbox, N_threads = N_threads)
+
+        self.halo_pair_table = {'rbins': rbins, 
+            'mass_bins': mass_bins, 
+            'sec_haloprop_percentile_bins': sec_haloprop_percentile_bins, 
+            'halo_bin_index': halo_bin_index, 
+            'num_halos_per_bin': np.bincount(halo_bin_index, minlength = num_bins), 
+            'pair_counts': pair_counts}
+        self.halo_pair_table.update(metadata)
+
+        if fname is not None:
+            self._write_halo_pair_table(fname)
+
+    def _write_halo_pair_table(self, fname):
+        """ Private method storing ``halo_pair_table`` in the hdf5 file ``fname``, 
+        with the arrays stored as datasets and the remaining entries as attributes. 
+        """
+        try:
+            import h5py
+        except ImportError:
+            raise HalotoolsError("Must have h5py installed to store the table of halo pairs")
+
+        with h5py.File(fname, 'w') as f:
+            for key, value in self.halo_pair_table.items():
+                if isinstance(value, np.ndarray):
+                    f.create_dataset(key, data = value)
+                else:
+                    f.attrs[key] = value
+
+    def _read_halo_pair_table(self, fname, rbins, metadata):
+        """ Private method reading the table of halo pairs stored in the hdf5 file ``fname``, 
+        after verifying that it was tabulated for the input ``rbins`` 
+        and the halo catalog and binning described by ``metadata``. 
+        """
+        try:
+            import h5py
+        except ImportError:
+            raise HalotoolsError("Must have h5py installed to read the table of halo pairs")
+
+        table = {}
+        with h5py.File(fname, 'r') as f:
+            for key in f.keys():
+                table[key] = f[key][...]
+            for key in f.attrs.keys():
+                value = f.attrs[key]
+                if isinstance(value, bytes):
+                    value = value.decode()
+                table[key] = value
+
+        inconsistent_keys = [key for key in metadata if (key not in table) or (table[key] != metadata[key])]
+        if (len(table['rbins']) != len(rbins)) or (np.allclose(table['rbins'], rbins) == False):
+            inconsistent_keys.append('rbins')
+        if len(inconsistent_keys) > 0:
+            msg = ("\nThe table of halo pairs stored in the following file:\n%s\n"
+                "was tabulated for a different halo catalog or binning.\n"
+                "Inconsistent entries: %s\n"
+                "Call tabulate_halo_pairs with ``overwrite`` set to True to recompute the table.\n")
+            raise HalotoolsError(msg % (fname, ', '.join(inconsistent_keys)))
+        return table
+
+    def binned_mean_occupation(self, gal_type):
+        """ Mean occupation of ``gal_type`` galaxies in the halos of each bin 
+        of the table computed by `tabulate_halo_pairs`, 
+        for the current values of the model ``param_dict``. 
+
+        Parameters 
+        ----------
+        gal_type : string 
+            Name of the galaxy population. 
+
+        Returns 
+        -------
+        mean_occupation : array 
+            Array of length ``num_mass_bins*num_sec_haloprop_bins``. 
+        """
+        if not hasattr(self, 'halo_pair_table'):
+            raise HalotoolsError("You must first call tabulate_halo_pairs")
+
+        mean_occupation = getattr(self.model, 'mean_occupation_' + gal_type)(
+            halo_table = self.halo_table)
+        halo_bin_index, num_halos = (self.halo_pair_table['halo_bin_index'], 
+            self.halo_pair_table['num_halos_per_bin'])
+        return (np.bincount(halo_bin_index, weights = mean_occupation, minlength = len(num_halos)) / 
+            np.maximum(num_halos, 1))
 
+    def two_halo_pair_counts(self, gal_type1, gal_type2 = None):
+        """ Expected number of ordered pairs of ``gal_type1`` and ``gal_type2`` galaxies 
+        residing in distinct halos in each radial bin, 
+        for the current values of the model ``param_dict``. 
+
+        The result is the contraction of the table of halo pairs 
+        computed by `tabulate_halo_pairs` with the mean occupation of each bin of halos, 
+        so that galaxies are placed at the center of their halos. 
+
+        Parameters 
+        ----------
+        gal_type1 : string 
+            Name of the first galaxy population, e.g., ``centrals``. 
+
+        gal_type2 : string, optional 
+            Name of the second galaxy population, e.g., ``satellites``. 
+            Default is ``gal_type1``. 
+
+        Returns 
+        -------
+        pair_counts : array 
+            Array of length ``len(rbins)-1``. 
+        """
+        if gal_type2 is None:
+            gal_type2 = gal_type1
+        mean_occupation1 = self.binned_mean_occupation(gal_type1)
+        mean_occupation2 = self.binned_mean_occupation(gal_type2)
+        return np.einsum('i,ijk,j->k', 
+            mean_occupation1, self.halo_pair_table['pair_counts'], mean_occupation2)
@@ -17,6 +17,7 @@ import collections
 from .model_factory_template import ModelFactory
 from .hod_mock_factory import HodMockFactory
 from .subhalo_mock_factory import SubhaloMockFactory
+from . import halo_model_helpers
 
 from .. import model_helpers
 from .. import model_defaults 
@@ -575,6 +576,256 @@ class HodModelFactory(ModelFactory):
         self.param_dict = self._init_param_dict
         self._set_primary_behaviors()
 
+    def build_halo_model_tables(self, rbins = model_defaults.default_rbins, 
+        num_mass_bins = model_defaults.default_halo_model_num_mass_bins, **kwargs):
+        """ Method tabulating the properties of the halo catalog used by 
+        `predict_galaxy_clustering`. The tables only depend on the snapshot, 
+        and so only need to be built once for any number of points in parameter space. 
+
+        The pairs of halos in each pair of bins of halos are counted by the 
+        `~halotools.empirical_models.factories.HodMockFactory.tabulate_halo_pairs` method 
+        of the mock, which bins the halos in the primary halo property of the 
+        occupation components and, for assembly-biased models, in the conditional 
+        percentile of the secondary halo property. 
+        For each bin of halos and each pair of gal_types, the separation distribution 
+        of pairs of galaxies residing in the same halo is computed from the 
+        radial profiles of the two gal_types. 
+
+        The tables are bound to the ``halo_model_tables`` dictionary. 
+
+        Parameters 
+        ----------
+        rbins : array, optional 
+            Radial bins of the correlation function, which must all be strictly positive. 
+            Default is set in `~halotools.empirical_models.model_defaults` module. 
+
+        num_mass_bins : int, optional 
+            Number of logarithmic bins of the primary halo property. 
+            Default is set in `~halotools.empirical_models.model_defaults` module. 
+
+        num_sec_haloprop_bins, fname, overwrite, N_threads : optional 
+            Passed to `~halotools.empirical_models.factories.HodMockFactory.tabulate_halo_pairs`, 
+            e.g., to store the table of halo pairs on disk. 
+
+        snapshot : object, optional 
+            `~halotools.sim_manager.HaloCatalog` storing the halo catalog. 
+            If no ``snapshot`` is passed and the model already has a ``mock``, 
+            the pre-processed halo catalog of the mock will be used. 
+            Otherwise, the snapshot is loaded according to the 
+            ``simname``, ``halo_finder`` and ``desired_redshift`` keyword arguments. 
+
+        simname, halo_finder : string, optional 
+            Nicknames of the simulation and halo-finder of the snapshot. 
+            Default is set in `~halotools.sim_manager.sim_defaults`. 
+
+        desired_redshift : float, optional
+            Redshift of the desired snapshot. 
+            Default is set in `~halotools.sim_manager.sim_defaults`. 
+        """
+        rbins = np.asarray(rbins, dtype = float)
+        if rbins[0] <= 0:
+            raise HalotoolsError("The radial bins of ``build_halo_model_tables`` "
+                "must all be strictly positive")
+
+        if 'snapshot' in kwargs:
+            mock = self.mock_factory(snapshot = kwargs['snapshot'], model = self, populate = False)
+        elif hasattr(self, 'mock'):
+            mock = self.mock
+        else:
+            halocat_kwargs = {}
+            if 'simname' in kwargs:
+                halocat_kwargs['simname'] = kwargs['simname']
+            if 'desired_redshift' in kwargs:
+                halocat_kwargs['redshift'] = kwargs['desired_redshift']
+            if 'halo_finder' in kwargs:
+                halocat_kwargs['halo_finder'] = kwargs['halo_finder']
+            snapshot = HaloCatalog(preload_halo_table = True, **halocat_kwargs)
+            mock = self.mock_factory(snapshot = snapshot, model = self, populate = False)
+
+        tabulation_kwargs = dict((key, kwargs[key]) 
+            for key in ('num_sec_haloprop_bins', 'fname', 'overwrite', 'N_threads') if key in kwargs)
+        mock.tabulate_halo_pairs(rbins = rbins, num_mass_bins = num_mass_bins, **tabulation_kwargs)
+        halo_bin_index = mock.halo_pair_table['halo_bin_index']
+        num_halos_per_bin = mock.halo_pair_table['num_halos_per_bin']
+        num_bins = len(num_halos_per_bin)
+
+        one_halo_pair_fractions = {}
+        gal_types = sorted(self.gal_types)
+        for i, gal_type1 in enumerate(gal_types):
+            for gal_type2 in gal_types[i:]:
+                fractions = self._one_halo_pair_fractions(gal_type1, gal_type2, 
+                    mock.halo_table, halo_bin_index, num_bins, rbins)
+                one_halo_pair_fractions[(gal_type1, gal_type2)] = fractions
+                one_halo_pair_fractions[(gal_type2, gal_type1)] = fractions
+
+        self.halo_model_tables = {
+            'halo_table': mock.halo_table, 
+            'Lbox': mock.snapshot.Lbox, 
+            'rbins': rbins, 
+            'halo_bin_index': halo_bin_index, 
+            'num_halos_per_bin': num_halos_per_bin, 
+            'two_halo_pair_counts': mock.halo_pair_table['pair_counts'], 
+            'one_halo_pair_fractions': one_halo_pair_fractions
+            }
+
+    def _one_halo_pair_fractions(self, gal_type1, gal_type2, 
+        halo_table, halo_bin_index, num_bins, rbins):
+        """ Private method returning the mean fraction of the pairs of 
+        ``gal_type1`` and ``gal_type2`` galaxies residing in the same halo 
+        whose separation lies in each radial bin, for each bin of halos. 
+
+        Galaxies whose profile component has no ``cumulative_mass_PDF`` method, 
+        e.g., `~halotools.empirical_models.TrivialPhaseSpace`, reside at the halo center. 
+        To limit the number of profile convolutions, the profile parameters 
+        of the halos are rounded to ``default_halo_model_num_profile_param_bins`` values. 
+        """
+        profile_models = []
+        for gal_type in (gal_type1, gal_type2):
+            profile_model = self.model_dictionary.get(gal_type + '_profile', None)
+            if not hasattr(profile_model, 'cumulative_mass_PDF'):
+                profile_model = None
+            profile_models.append(profile_model)
+
+        if (profile_models[0] is None) & (profile_models[1] is None):
+            # Both galaxies are at the halo center, so their separation is zero
+            return np.zeros((num_bins, len(rbins)-1))
+
+        halo_boundary_key = [profile_model.halo_boundary_key 
+            for profile_model in profile_models if profile_model is not None][0]
+        halo_radius = np.asarray(halo_table[halo_boundary_key])
+
+        # Round the profile parameters of each halo onto a grid
+        param_grids, param_indices = [], []
+        for profile_model in profile_models:
+            if profile_model is None:
+                continue
+            for key in profile_model.prof_param_keys:
+                try:
+                    values = np.asarray(halo_table[key])
+                except KeyError:
+                    values = np.asarray(getattr(profile_model, key)(halo_table = halo_table))
+                grid = np.linspace(values.min(), values.max(), 
+                    model_defaults.default_halo_model_num_profile_param_bins)
+                param_grids.append(grid)
+                param_indices.append(np.digitize(values, (grid[1:] + grid[:-1])/2.))
+
+        if len(param_grids) == 0:
+            cdf_table_keys, cdf_table_index = np.zeros(1, dtype=int), np.zeros(len(halo_table), dtype=int)
+        else:
+            dims = [len(grid) for grid in param_grids]
+            cdf_table_keys, cdf_table_index = np.unique(
+                np.ravel_multi_index(param_indices, dims), return_inverse = True)
+
+        x_table = np.append(0, np.logspace(model_defaults.default_lograd_min, np.log10(2), 200))
+        cdf_tables = np.zeros((len(cdf_table_keys), len(x_table)))
+        for itable, table_key in enumerate(cdf_table_keys):
+            if len(param_grids) > 0:
+                params = [grid[i] for grid, i in 
+                    zip(param_grids, np.unravel_index(table_key, dims))]
+            else:
+                params = []
+            profile_kwargs = {}
+            for i, profile_model in enumerate(profile_models):
+                if profile_model is None:
+                    continue
+                num_params = len(profile_model.prof_param_keys)
+                profile_kwargs['profile_model' + str(i+1)] = profile_model
+                profile_kwargs['profile_params' + str(i+1)] = params[:num_params]
+                params = params[num_params:]
+            cdf_tables[itable] = halo_model_helpers.one_halo_separation_cdf(x_table, **profile_kwargs)
+
+        return halo_model_helpers.binned_one_halo_pair_fractions(rbins, 
+            halo_radius, halo_bin_index, num_bins, x_table, cdf_tables, cdf_table_index)
+
+    def predict_galaxy_clustering(self, **kwargs):
+        """ Analytic prediction for the galaxy two-point correlation function 
+        and the galaxy number density, computed from the expectation values 
+        of the halo occupation, without populating a Monte Carlo realization of the model. 
+
+        Each halo is weighted by the ``mean_occupation`` of each gal_type. 
+        The number of pairs of galaxies in different halos is computed 
+        by weighting the pre-computed pairs of halos of each pair of bins of halos 
+        by the mean occupation of the halos in each bin; 
+        the number of pairs of galaxies in the same halo is computed from 
+        the convolution of the radial profiles tabulated for each bin of halos. 
+        The tables depend only on the snapshot, and are built by `build_halo_model_tables` 
+        the first time the method is called, or whenever ``kwargs`` are passed. 
+        Subsequent calls only evaluate the mean occupation of each halo, 
+        and so can be used to quickly explore the parameter space of the model. 
+
+        Parameters 
+        ----------
+        kwargs : optional 
+            Any keyword argument of `build_halo_model_tables`. 
+
+        Returns 
+        -------
+        rbin_centers : array 
+            Midpoint of the radial bins. 
+
+        correlation_func : array 
+            Galaxy two-point correlation function in each radial bin. 
+
+        number_density : float 
+            Number density of galaxies, in units of the inverse cube of the box length. 
+
+        Notes 
+        -----
+        Satellite galaxies are placed at the center of their halos 
+        when computing the pairs of galaxies in different halos, 
+        and the mean occupation is averaged over the halos in each bin, 
+        so the prediction is most accurate on scales larger than the halo boundary, 
+        and for narrow bins. The occupations of different gal_types are assumed to be 
+        independent, and gal_types whose ``upper_occupation_bound`` is not unity 
+        are assumed to have Poisson-distributed occupations. 
+
+        Examples 
+        --------
+        >>> model = HodModelFactory('zheng07') # doctest: +SKIP 
+        >>> r, xi, ngal = model.predict_galaxy_clustering() # doctest: +SKIP 
+        >>> model.param_dict['logMmin'] += 0.1 # doctest: +SKIP 
+        >>> r, xi, ngal = model.predict_galaxy_clustering() # doctest: +SKIP 
+        """
+        if (not hasattr(self, 'halo_model_tables')) or (len(kwargs) > 0):
+            self.build_halo_model_tables(**kwargs)
+        tables = self.halo_model_tables
+        halo_table, halo_bin_index = tables['halo_table'], tables['halo_bin_index']
+        num_bins, rbins = len(tables['num_halos_per_bin']), tables['rbins']
+
+        mean_occupation = {}
+        for gal_type in self.gal_types:
+            mean_occupation[gal_type] = getattr(self, 'mean_occupation_' + gal_type)(
+                halo_table = halo_table)
+        total_mean_occupation = sum(mean_occupation.values())
+
+        num_gals = total_mean_occupation.sum()
+        binned_occupation = (np.bincount(halo_bin_index, 
+            weights = total_mean_occupation, minlength = num_bins) / 
+            np.maximum(tables['num_halos_per_bin'], 1))
+
+        # Pairs of galaxies in different halos
+        pair_counts = np.einsum('i,ijk,j->k', 
+            binned_occupation, tables['two_halo_pair_counts'], binned_occupation)
+
+        # Pairs of galaxies in the same halo
+        for (gal_type1, gal_type2), fractions in tables['one_halo_pair_fractions'].items():
+            if gal_type1 != gal_type2:
+                mean_num_pairs = mean_occupation[gal_type1]*mean_occupation[gal_type2]
+            elif self.model_dictionary[gal_type1 + '_occupation']._upper_occupation_bound == 1:
+                continue
+            else:
+                mean_num_pairs = mean_occupation[gal_type1]**2
+            pair_counts += np.dot(np.bincount(halo_bin_index, 
+                weights = mean_num_pairs, minlength = num_bins), fractions)
+
+        volume = tables['Lbox']**3
+        shell_volumes = 4*np.pi/3.*np.diff(rbins**3)
+        random_pair_counts = num_gals**2*shell_volumes/volume
+        correlation_func = pair_counts/random_pair_counts - 1
+
+        rbin_centers = (rbins[1:] + rbins[:-1])/2.
+        return rbin_centers, correlation_func, num_gals/volume
+
     def _set_model_redshift(self):
         """ 
         """
@@ -21,6 +21,8 @@ from .. import model_helpers, model_defaults
 
 try:
     from ... import mock_observables
+    from ...mock_observables.mock_survey import (distant_observer_redshift, 
+        redshift_to_comoving_distance)
     HAS_MOCKOBS = True
 except ImportError:
     HAS_MOCKOBS = False
@@ -74,10 +76,13 @@ class MockFactory(object):
         except AttributeError:
             self.halo_table = self.snapshot.halo_table            
 
-        try:
-            self.ptcl_table = self.snapshot.ptcl_table # pre-retrieve the particles from disk, if available
-        except:
-            pass   
+        # pre-retrieve the particles from disk, if available, 
+        # unless the snapshot can serve random subsamples without loading the full table
+        if not hasattr(self.snapshot, 'ptcl_table_subsample'):
+            try:
+                self.ptcl_table = self.snapshot.ptcl_table 
+            except:
+                pass   
             
         try:
             self.gal_types = self.model.gal_types 
@@ -133,6 +138,31 @@ class MockFactory(object):
         # Eliminate any possible redundancies 
         self.additional_haloprops = list(set(self.additional_haloprops))
 
+    @property 
+    def galaxy_table(self):
+        """ `~astropy.table.Table` storing the mock galaxies. 
+
+        While populating the mock, some mock factories store the galaxies in a 
+        `~halotools.empirical_models.factories.mock_helpers.GalaxyColumns` container. 
+        In that case the table is only built the first time it is accessed 
+        after each call to `populate`, and its columns share memory with the container. 
+        """
+        if self._galaxy_table is None:
+            self._galaxy_table = self._galaxy_columns.to_table()
+        return self._galaxy_table
+
+    @galaxy_table.setter
+    def galaxy_table(self, galaxy_table):
+        self._galaxy_table = galaxy_table
+        self._galaxy_columns = None
+
+    def _set_galaxy_columns(self, galaxy_columns):
+        """ Bind a `~halotools.empirical_models.factories.mock_helpers.GalaxyColumns` 
+        container to the mock, discarding any previously built ``galaxy_table``. 
+        """
+        self._galaxy_columns = galaxy_columns
+        self._galaxy_table = None
+
     @property 
     def number_density(self):
         """ Comoving number density of the mock galaxy catalog.
@@ -176,6 +206,12 @@ class MockFactory(object):
             Bins in which the correlation function will be calculated. 
             Default is set in `~halotools.empirical_models.model_defaults` module. 
 
+        pool : multiprocessing.Pool, optional 
+            Pool of worker processes used to count pairs, e.g., shared between 
+            the Monte Carlo realizations of 
+            `~halotools.empirical_models.ModelFactory.compute_average_galaxy_clustering`. 
+            Default is None, in which case the pair counter uses ``cpu_count()`` new processes. 
+
         Returns 
         --------
         rbin_centers : array 
@@ -237,6 +273,7 @@ class MockFactory(object):
             raise HalotoolsError(msg)
 
         Nthreads = cpu_count()
+        pool = kwargs.get('pool', None)
         if 'rbins' in kwargs:
             rbins = kwargs['rbins']
         else:
@@ -253,7 +290,7 @@ class MockFactory(object):
             pos = three_dim_pos_bundle(table = self.galaxy_table, 
                 key1='x', key2='y', key3='z', mask=mask, return_complement=False)
             clustering = mock_observables.clustering.tpcf(
-                pos, rbins, period=self.snapshot.Lbox, N_threads=Nthreads)
+                pos, rbins, period=self.snapshot.Lbox, N_threads=Nthreads, pool=pool)
             return rbin_centers, clustering
         else:
             # Verify that the complementary mask is non-trivial
@@ -266,7 +303,7 @@ class MockFactory(object):
                 key1='x', key2='y', key3='z', mask=mask, return_complement=True)
             xi11, xi12, xi22 = mock_observables.clustering.tpcf(
                 sample1=pos, rbins=rbins, sample2=pos2, 
-                period=self.snapshot.Lbox, N_threads=Nthreads)
+                period=self.snapshot.Lbox, N_threads=Nthreads, pool=pool)
             return rbin_centers, xi11, xi12, xi22 
 
 
@@ -298,6 +335,17 @@ class MockFactory(object):
             Bins in which the correlation function will be calculated. 
             Default is set in `~halotools.empirical_models.model_defaults` module. 
 
+        ptcl_table : table, optional 
+            Downsampling of the dark matter particles of the snapshot, 
+            e.g., as returned by the ``_ptcl_table_subsample`` method. 
+            Default is None, in which case a new random downsampling is drawn. 
+
+        pool : multiprocessing.Pool, optional 
+            Pool of worker processes used to count pairs, e.g., shared between 
+            the Monte Carlo realizations of 
+            `~halotools.empirical_models.ModelFactory.compute_average_galaxy_matter_cross_clustering`. 
+            Default is None, in which case the pair counter uses ``cpu_count()`` new processes. 
+
         Returns 
         --------
         rbin_centers : array 
@@ -357,12 +405,14 @@ class MockFactory(object):
                 )
             raise HalotoolsError(msg)
 
-        nptcl = np.max([model_defaults.default_nptcls, len(self.galaxy_table)])
-        ptcl_table = randomly_downsample_data(self.snapshot.ptcl_table, nptcl)
+        ptcl_table = kwargs.get('ptcl_table', None)
+        if ptcl_table is None:
+            ptcl_table = self._ptcl_table_subsample()
         ptcl_pos = three_dim_pos_bundle(table = ptcl_table, 
             key1='x', key2='y', key3='z')
 
         Nthreads = cpu_count()
+        pool = kwargs.get('pool', None)
         if 'rbins' in kwargs:
             rbins = kwargs['rbins']
         else:
@@ -380,7 +430,7 @@ class MockFactory(object):
                 key1='x', key2='y', key3='z', mask=mask, return_complement=False)
             clustering = mock_observables.clustering.tpcf(
                 sample1=pos, rbins=rbins, sample2=ptcl_pos, 
-                period=self.snapshot.Lbox, N_threads=Nthreads, do_auto=False)
+                period=self.snapshot.Lbox, N_threads=Nthreads, do_auto=False, pool=pool)
             return rbin_centers, clustering
         else:
             # Verify that the complementary mask is non-trivial
@@ -393,12 +443,23 @@ class MockFactory(object):
                 key1='x', key2='y', key3='z', mask=mask, return_complement=True)
             clustering = mock_observables.clustering.tpcf(
                 sample1=pos, rbins=rbins, sample2=ptcl_pos, 
-                period=self.snapshot.Lbox, N_threads=Nthreads, do_auto=False)
+                period=self.snapshot.Lbox, N_threads=Nthreads, do_auto=False, pool=pool)
             clustering2 = mock_observables.clustering.tpcf(
                 sample1=pos2, rbins=rbins, sample2=ptcl_pos, 
-                period=self.snapshot.Lbox, N_threads=Nthreads, do_auto=False)
+                period=self.snapshot.Lbox, N_threads=Nthreads, do_auto=False, pool=pool)
             return rbin_centers, clustering, clustering2 
 
+    def _ptcl_table_subsample(self):
+        """ Random downsampling of the dark matter particles of the snapshot 
+        used to compute the galaxy-matter cross-correlation function, 
+        with at least as many particles as there are mock galaxies. 
+        """
+        nptcl = np.max([model_defaults.default_nptcls, len(self.galaxy_table)])
+        if hasattr(self.snapshot, 'ptcl_table_subsample'):
+            return self.snapshot.ptcl_table_subsample(nptcl)
+        else:
+            return randomly_downsample_data(self.snapshot.ptcl_table, nptcl)
+
 
     def compute_fof_group_ids(self, zspace = True, 
         b_perp = model_defaults.default_b_perp, 
@@ -412,6 +473,10 @@ class MockFactory(object):
         zspace : bool, optional 
             Boolean determining whether we apply redshift-space distortions to the 
             positions of galaxies using the distant-observer approximation. 
+            The observed redshifts are computed by 
+            `~halotools.mock_observables.mock_survey.distant_observer_redshift` 
+            using the cosmology of the snapshot, and are then converted back into 
+            line-of-sight comoving distances. 
             Default is True. 
 
         b_perp : float, optional 
@@ -451,7 +516,12 @@ class MockFactory(object):
         y = self.galaxy_table['y']
         z = self.galaxy_table['z']
         if zspace is True:
-            z += self.galaxy_table['vz']/100.
+            cosmo = getattr(self.snapshot, 'cosmology', sim_defaults.default_cosmology)
+            pos = np.vstack((x, y, z)).T
+            vel = np.vstack((self.galaxy_table['vx'], 
+                self.galaxy_table['vy'], self.galaxy_table['vz'])).T
+            zobs = distant_observer_redshift(pos, vel, cosmo=cosmo)
+            z = redshift_to_comoving_distance(zobs, cosmo)*cosmo.h
             z = model_helpers.enforce_periodicity_of_box(z, self.snapshot.Lbox)
         pos = np.vstack((x, y, z)).T
 
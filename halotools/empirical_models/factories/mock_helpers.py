@@ -7,6 +7,8 @@ used to provide convenience wrappers for mock objects
 
 import numpy as np 
 from warnings import warn
+from collections import OrderedDict
+from astropy.table import Table 
 
 from ...custom_exceptions import HalotoolsError
 
@@ -74,13 +76,106 @@ def infer_mask_from_kwargs(galaxy_table, **kwargs):
     return mask
 
 
+class GalaxyColumns(object):
+    """ Lightweight container storing the properties of a galaxy population 
+    as a dictionary of equal-length numpy arrays. 
 
+    Mock factories store the galaxies in a `GalaxyColumns` instance 
+    while populating a mock, so that the component models operate on plain numpy arrays. 
+    Selecting a slice of the rows returns a new `GalaxyColumns` of views into the 
+    same arrays, which is much cheaper than slicing an `~astropy.table.Table`. 
+    The `to_table` method exports the galaxies to an `~astropy.table.Table` 
+    whose columns share memory with the container. 
+    """
 
-
-
-
-
-
-
-
-
+    def __init__(self, length, columns=None):
+        """
+        Parameters 
+        ----------
+        length : int 
+            Number of galaxies. 
+
+        columns : dict, optional 
+            Dictionary of length-``length`` arrays. Default is an empty container. 
+            The arrays are stored without being copied, in the order of ``columns.keys()``. 
+
+        Examples 
+        --------
+        >>> galaxies = GalaxyColumns(5)
+        >>> galaxies['x'] = np.zeros(5)
+        >>> galaxies['conc_NFWmodel'] = 0.
+        >>> centrals = galaxies[0:2]
+        >>> centrals['x'][:] = 1.
+        >>> print(galaxies['x'])
+        [ 1.  1.  0.  0.  0.]
+        """
+        self._length = int(length)
+        self._columns = OrderedDict()
+        if columns is not None:
+            for key in columns.keys():
+                self[key] = columns[key]
+
+    def __len__(self):
+        return self._length
+
+    def keys(self):
+        return list(self._columns.keys())
+
+    @property 
+    def colnames(self):
+        return self.keys()
+
+    def __contains__(self, key):
+        return key in self._columns
+
+    def __getitem__(self, key):
+        """ Return the array stored under the input column name, 
+        or a `GalaxyColumns` of views into the input slice of rows. 
+        """
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+            length = len(range(start, stop, step))
+            result = GalaxyColumns(length)
+            for colname, column in self._columns.items():
+                result._columns[colname] = column[key]
+            return result
+        else:
+            return self._columns[key]
+
+    def __setitem__(self, key, value):
+        """ Set the values of a column. 
+
+        If the column already exists, the input values are written into it in place, 
+        so that assignments to a slice of the container propagate to the parent container. 
+        Otherwise the input array is stored as a new column without being copied, 
+        and scalars are broadcast to arrays of length ``len(self)``. 
+        """
+        if key in self._columns:
+            self._columns[key][:] = value
+            return
+
+        value = np.asarray(value)
+        if value.ndim == 0:
+            column = np.empty(self._length, dtype = value.dtype)
+            column[:] = value
+            value = column
+        if len(value) != self._length:
+            raise HalotoolsError("Length of column ``%s`` = %i does not match "
+                "the number of galaxies = %i" % (key, len(value), self._length))
+        self._columns[key] = value
+
+    def __delitem__(self, key):
+        del self._columns[key]
+
+    def to_table(self):
+        """ Export the galaxies to an `~astropy.table.Table` 
+        whose columns share memory with the arrays of the container. 
+
+        Returns 
+        -------
+        table : `~astropy.table.Table`
+        """
+        keys = self.keys()
+        if len(keys) == 0:
+            return Table()
+        return Table([self._columns[key] for key in keys], names = keys, copy = False)
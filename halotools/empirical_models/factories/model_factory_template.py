@@ -9,6 +9,7 @@ __author__ = ['Andrew Hearin']
 import numpy as np
 from copy import copy
 from functools import partial
+from multiprocessing import Pool, cpu_count
 from astropy.extern import six
 from abc import ABCMeta, abstractmethod, abstractproperty
 from warnings import warn 
@@ -98,6 +99,21 @@ class ModelFactory(object):
             Redshift of the desired catalog. 
             Default is set in `~halotools.sim_manager.sim_defaults`. 
 
+        reuse_memory : bool, optional 
+            Passed to the ``populate`` method of HOD-style mocks. 
+            If True, the memory of ``galaxy_table`` is reused between calls to `populate_mock`; 
+            see `~halotools.empirical_models.factories.HodMockFactory.populate`. 
+
+        seed : int or `~numpy.random.RandomState`, optional 
+            Random number seed, or generator, passed to the ``populate`` method of the mock. 
+            Default is None, in which case the realization is drawn 
+            from the global state of `numpy.random`. 
+
+        num_threads, chunk_size : int, optional 
+            Passed to the ``populate`` method of HOD-style mocks to populate 
+            chunks of the halo catalog in parallel; 
+            see `~halotools.empirical_models.factories.HodMockFactory.populate`. 
+
         """
         inconsistent_redshift_error_msg = ("Inconsistency between the model redshift = %.2f "
             "and the snapshot redshift = %.2f.\n"
@@ -151,8 +167,9 @@ class ModelFactory(object):
             mock_factory = self.mock_factory 
             self.mock = mock_factory(snapshot=snapshot, model=self, populate=False)
 
-
-        self.mock.populate()
+        populate_kwargs = dict((key, kwargs[key]) 
+            for key in ('reuse_memory', 'seed', 'num_threads', 'chunk_size') if key in kwargs)
+        self.mock.populate(**populate_kwargs)
 
     def compute_average_galaxy_clustering(self, num_iterations=5, summary_statistic = 'median', **kwargs):
         """
@@ -210,6 +227,13 @@ class ModelFactory(object):
             Bins in which the correlation function will be calculated. 
             Default is set in `~halotools.empirical_models.model_defaults` module. 
 
+        seed : int or `~numpy.random.RandomState`, optional 
+            Random number seed of the sequence of Monte Carlo realizations. 
+            Realization ``i`` is populated with the seed 
+            ``model_helpers.derived_seed(seed, i)``, so that the entire sequence 
+            is reproducible. Default is None, in which case the realizations 
+            are drawn from the global state of `numpy.random`. 
+
         Returns 
         --------
         rbin_centers : array 
@@ -277,55 +301,8 @@ class ModelFactory(object):
         control over how your galaxy clustering signal is estimated, 
         see the `~halotools.mock_observables.clustering.tpcf` documentation. 
         """
-        if summary_statistic == 'mean':
-            summary_func = np.mean 
-        else:
-            summary_func = np.median
-
-        halocat_kwargs = {}
-        if 'simname' in kwargs:
-            halocat_kwargs['simname'] = kwargs['simname']
-        if 'desired_redshift' in kwargs:
-            halocat_kwargs['redshift'] = kwargs['desired_redshift']
-        if 'halo_finder' in kwargs:
-            halocat_kwargs['halo_finder'] = kwargs['halo_finder']
-
-        snapshot = HaloCatalog(preload_halo_table = True, **halocat_kwargs)
-
-        if 'rbins' in kwargs:
-            rbins = kwargs['rbins']
-        else:
-            rbins = model_defaults.default_rbins
-
-        if 'include_crosscorr' in kwargs.keys():
-            include_crosscorr = kwargs['include_crosscorr']
-        else:
-            include_crosscorr = False
-
-        if include_crosscorr is True:
-
-            xi_coll = np.zeros(
-                (len(rbins)-1)*num_iterations*3).reshape(3, num_iterations, len(rbins)-1)
-
-            for i in range(num_iterations):
-                self.populate_mock(snapshot = snapshot)
-                rbin_centers, xi_coll[0, i, :], xi_coll[1, i, :], xi_coll[2, i, :] = (
-                    self.mock.compute_galaxy_clustering(**kwargs)
-                    )
-            xi_11 = summary_func(xi_coll[0, :], axis=0)
-            xi_12 = summary_func(xi_coll[1, :], axis=0)
-            xi_22 = summary_func(xi_coll[2, :], axis=0)
-            return rbin_centers, xi_11, xi_12, xi_22
-        else:
-
-            xi_coll = np.zeros(
-                (len(rbins)-1)*num_iterations).reshape(num_iterations, len(rbins)-1)
-
-            for i in range(num_iterations):
-                self.populate_mock(snapshot = snapshot)
-                rbin_centers, xi_coll[i, :] = self.mock.compute_galaxy_clustering(**kwargs)
-            xi = summary_func(xi_coll, axis=0)
-            return rbin_centers, xi
+        return self._compute_average_mock_statistic('compute_galaxy_clustering', 
+            num_iterations, summary_statistic, **kwargs)
 
     def compute_average_galaxy_matter_cross_clustering(self, num_iterations=5, 
         summary_statistic = 'median', **kwargs):
@@ -384,6 +361,13 @@ class ModelFactory(object):
             Bins in which the correlation function will be calculated. 
             Default is set in `~halotools.empirical_models.model_defaults` module. 
 
+        seed : int or `~numpy.random.RandomState`, optional 
+            Random number seed of the sequence of Monte Carlo realizations. 
+            Realization ``i`` is populated with the seed 
+            ``model_helpers.derived_seed(seed, i)``, so that the entire sequence 
+            is reproducible. Default is None, in which case the realizations 
+            are drawn from the global state of `numpy.random`. 
+
         Examples 
         ---------
         The simplest use-case of the `compute_average_galaxy_matter_cross_clustering` function 
@@ -452,6 +436,40 @@ class ModelFactory(object):
         control over how your galaxy clustering signal is estimated, 
         see the `~halotools.mock_observables.clustering.tpcf` documentation. 
         """
+        return self._compute_average_mock_statistic('compute_galaxy_matter_cross_clustering', 
+            num_iterations, summary_statistic, **kwargs)
+
+    def _compute_average_mock_statistic(self, statistic, num_iterations, summary_statistic, **kwargs):
+        """ Engine shared by `compute_average_galaxy_clustering` and 
+        `compute_average_galaxy_matter_cross_clustering`. 
+
+        The Monte Carlo realizations are populated in a single batch into the same snapshot, 
+        which is only loaded and pre-processed once. HOD-style mocks reuse the memory 
+        of the galaxy table between realizations, all realizations share the same 
+        pool of pair-counting processes and, for the galaxy-matter cross-correlation, 
+        the same random downsampling of the dark matter particles. 
+        The summary statistic is computed from the stacked measurements. 
+
+        Parameters 
+        ----------
+        statistic : string 
+            Name of the mock method computing the clustering of each realization, 
+            either ``compute_galaxy_clustering`` or ``compute_galaxy_matter_cross_clustering``. 
+
+        num_iterations : int 
+            Number of Monte Carlo realizations. 
+
+        summary_statistic : string 
+            Either ``median`` or ``mean``. 
+
+        Returns 
+        -------
+        rbin_centers : array 
+            Midpoint of the bins used in the correlation function calculation 
+
+        correlation_funcs : arrays 
+            Summary of each correlation function returned by the mock method. 
+        """
         if summary_statistic == 'mean':
             summary_func = np.mean 
         else:
@@ -467,39 +485,39 @@ class ModelFactory(object):
 
         snapshot = HaloCatalog(preload_halo_table = True, **halocat_kwargs)
 
-        if 'rbins' in kwargs:
-            rbins = kwargs['rbins']
-        else:
-            rbins = model_defaults.default_rbins
-
-        if 'include_complement' in kwargs.keys():
-            include_complement = kwargs['include_complement']
-        else:
-            include_complement = False
+        populate_kwargs = {}
+        if issubclass(self.mock_factory, HodMockFactory):
+            populate_kwargs['reuse_memory'] = True
 
-        if include_complement is True:
-
-            xi_coll = np.zeros(
-                (len(rbins)-1)*num_iterations*2).reshape(2, num_iterations, len(rbins)-1)
-
-            for i in range(num_iterations):
-                self.populate_mock(snapshot = snapshot)
-                rbin_centers, xi_coll[0, i, :], xi_coll[1, i, :] = (
-                    self.mock.compute_galaxy_matter_cross_clustering(**kwargs)
-                    )
-            xi_11 = summary_func(xi_coll[0, :], axis=0)
-            xi_22 = summary_func(xi_coll[1, :], axis=0)
-            return rbin_centers, xi_11, xi_22
-        else:
-
-            xi_coll = np.zeros(
-                (len(rbins)-1)*num_iterations).reshape(num_iterations, len(rbins)-1)
+        statistic_kwargs = copy(kwargs)
+        seed = statistic_kwargs.pop('seed', None)
 
+        # The pair counts of all realizations share the same pool of processes
+        num_processes = cpu_count()
+        pool = Pool(num_processes) if num_processes > 1 else None
+        try:
+            measurements = []
             for i in range(num_iterations):
-                self.populate_mock(snapshot = snapshot)
-                rbin_centers, xi_coll[i, :] = self.mock.compute_galaxy_matter_cross_clustering(**kwargs)
-            xi = summary_func(xi_coll, axis=0)
-            return rbin_centers, xi
+                realization_seed = model_helpers.derived_seed(seed, i)
+                if i == 0:
+                    self.populate_mock(snapshot = snapshot, seed = realization_seed, **populate_kwargs)
+                else:
+                    # The mock is bound to the snapshot, so we repopulate it directly
+                    self.mock.populate(seed = realization_seed, **populate_kwargs)
+                if ((statistic == 'compute_galaxy_matter_cross_clustering') & 
+                    ('ptcl_table' not in statistic_kwargs)):
+                    statistic_kwargs['ptcl_table'] = self.mock._ptcl_table_subsample()
+                result = getattr(self.mock, statistic)(pool = pool, **statistic_kwargs)
+                rbin_centers = result[0]
+                measurements.append(result[1:])
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        # Stacked measurements have shape (num_iterations, num_correlation_funcs, num_rbins)
+        summary = summary_func(np.array(measurements), axis=0)
+        return (rbin_centers, ) + tuple(summary)
 
 
 
@@ -51,6 +51,9 @@ class SubhaloMockFactory(MockFactory):
 
         super(SubhaloMockFactory, self).__init__(populate = populate, **kwargs)
 
+        self._last_populated_seed = None
+        self._last_populated_param_dict = None
+
         # Pre-compute any additional halo properties required by the model
         self.preprocess_halo_catalog()
         self.precompute_galprops()
@@ -91,15 +94,16 @@ class SubhaloMockFactory(MockFactory):
         self._precomputed_galprop_list = []
 
         for key in self.additional_haloprops:
-            self.galaxy_table[key] = self.halo_table[key]
+            self._subhalo_galaxy_table[key] = self.halo_table[key]
             self._precomputed_galprop_list.append(key)
 
         phase_space_keys = ['x', 'y', 'z', 'vx', 'vy', 'vz']
         for newkey in phase_space_keys:
-            self.galaxy_table[newkey] = self.galaxy_table[model_defaults.host_haloprop_prefix+newkey]
+            self._subhalo_galaxy_table[newkey] = (
+                self._subhalo_galaxy_table[model_defaults.host_haloprop_prefix+newkey])
             self._precomputed_galprop_list.append(newkey)
 
-        self.galaxy_table['galid'] = np.arange(len(self.galaxy_table))
+        self._subhalo_galaxy_table['galid'] = np.arange(len(self._subhalo_galaxy_table))
         self._precomputed_galprop_list.append('galid')
 
         for feature, component_model in self.model.model_dictionary.iteritems():
@@ -107,7 +111,7 @@ class SubhaloMockFactory(MockFactory):
             try:
                 f = component_model.gal_type_func
                 newkey = feature + '_gal_type'
-                self.galaxy_table[newkey] = f(halo_table=self.galaxy_table)
+                self._subhalo_galaxy_table[newkey] = f(halo_table=self._subhalo_galaxy_table)
                 self._precomputed_galprop_list.append(newkey)
             except AttributeError:
                 pass
@@ -123,34 +127,124 @@ class SubhaloMockFactory(MockFactory):
                     "and returns a length-N array of strings.\n")
                 raise HalotoolsError(msg)
 
-    def populate(self):
-        """ Method populating subhalos with mock galaxies. 
+    @property 
+    def galaxy_table(self):
+        """ `~astropy.table.Table` storing the mock galaxies. 
+
+        Every subhalo of the catalog hosts a galaxy, whose properties are stored 
+        in the same row of an internal table in between calls to `populate`. 
+        If the model has a ``galaxy_selection_func``, the galaxies it selects are stored 
+        as the boolean ``galaxy_selection_mask``, and ``galaxy_table`` is only built 
+        from the selected rows the first time it is accessed after each call to `populate`. 
         """
-        self._allocate_memory()
+        if self._galaxy_table is None:
+            if self.galaxy_selection_mask is None:
+                self._galaxy_table = self._subhalo_galaxy_table
+            else:
+                self._galaxy_table = self._subhalo_galaxy_table[self.galaxy_selection_mask]
+        return self._galaxy_table
+
+    @galaxy_table.setter
+    def galaxy_table(self, galaxy_table):
+        self._subhalo_galaxy_table = galaxy_table
+        self._galaxy_table = galaxy_table
+        self._galaxy_columns = None
+        self.galaxy_selection_mask = None
+
+    @property 
+    def number_density(self):
+        """ Comoving number density of the mock galaxy catalog.
+
+        Returns
+        --------
+        number density : float 
+            Comoving number density in units of :math:`(h/Mpc)^{3}`. 
+        """
+        if self.galaxy_selection_mask is None:
+            ngals = len(self._subhalo_galaxy_table)
+        else:
+            ngals = np.count_nonzero(self.galaxy_selection_mask)
+        comoving_volume = self.snapshot.Lbox**3
+        return ngals/float(comoving_volume)
+
+    def populate(self, seed=None):
+        """ Method populating subhalos with mock galaxies. 
+
+        When the mock is repopulated with the same integer ``seed`` as the previous call, 
+        only the methods of the ``_mock_generation_calling_sequence`` that read a parameter 
+        whose value has changed in the ``param_dict``, or a column written by 
+        a method that is called again, are called, 
+        as determined by ``_mock_generation_methods_to_call`` of the model. 
+        Since each model method draws from its own random stream, 
+        the result is identical to calling every method. 
+        The ``galaxy_selection_func`` of the model is evaluated on every call. 
 
-        for method in self.model._mock_generation_calling_sequence:
+        Parameters 
+        ----------
+        seed : int or `~numpy.random.RandomState`, optional 
+            Random number seed of the Monte Carlo realization. 
+            If passed, each model method draws from its own random stream, 
+            identified by the seed and the method, 
+            and the global state of `numpy.random` is left untouched. 
+            If a `~numpy.random.RandomState` is passed instead, 
+            the model methods draw in turn from that generator. 
+            Default is None, in which case the realization is drawn 
+            from the global state of `numpy.random`. 
+        """
+        calling_sequence = self.model._mock_generation_calling_sequence
+
+        if (seed is None) or isinstance(seed, np.random.RandomState):
+            seed_key = None
+        else:
+            seed_key = [int(s) for s in np.atleast_1d(seed)]
+
+        if ((seed_key is None) or (seed_key != self._last_populated_seed) or 
+            (self._last_populated_param_dict is None)):
+            methods_to_call = list(calling_sequence)
+        else:
+            changed_param_keys = [key for key, value in self.model.param_dict.iteritems() 
+                if (key not in self._last_populated_param_dict) or 
+                np.any(value != self._last_populated_param_dict[key])]
+            methods_to_call = self.model._mock_generation_methods_to_call(changed_param_keys)
+
+        self._allocate_memory(methods_to_call)
+
+        for method_index, method in enumerate(calling_sequence):
+            if method not in methods_to_call:
+                continue
             func = getattr(self.model, method)
-            func(halo_table = self.galaxy_table)
+            if seed is None:
+                func(halo_table = self._subhalo_galaxy_table)
+            else:
+                func(halo_table = self._subhalo_galaxy_table, 
+                    seed = model_helpers.derived_seed(seed, method_index))
 
-        if hasattr(self.model, 'galaxy_selection_func'):
-            mask = self.model.galaxy_selection_func(self.galaxy_table)
-            self.galaxy_table = self.galaxy_table[mask]
+        self._last_populated_seed = seed_key
+        self._last_populated_param_dict = copy(self.model.param_dict)
 
-    def _allocate_memory(self):
-        """
+        # The galaxy selection is always re-evaluated, since the 
+        # galaxy_selection_func of the model may have changed since the previous call
+        if hasattr(self.model, 'galaxy_selection_func'):
+            self.galaxy_selection_mask = self.model.galaxy_selection_func(
+                self._subhalo_galaxy_table)
+        else:
+            self.galaxy_selection_mask = None
+        self._galaxy_table = None
+
+    def _allocate_memory(self, methods_to_call):
+        """ Allocate the columns written by each method in ``methods_to_call``, 
+        as well as any other non-static galaxy property missing from the table. 
         """
-        Ngals = len(self.galaxy_table)
+        Ngals = len(self._subhalo_galaxy_table)
+
+        keys_to_allocate = []
+        for method in methods_to_call:
+            keys_to_allocate.extend(self.model._mock_generation_dependencies[method]['output_keys'])
 
         # Allocate or overwrite any non-static galaxy propery 
         for key in self.model._galprop_dtypes_to_allocate.names:
-            if key not in self._precomputed_galprop_list:
+            if key in self._precomputed_galprop_list:
+                continue
+            if (key in keys_to_allocate) or (key not in self._subhalo_galaxy_table.keys()):
                 dt = self.model._galprop_dtypes_to_allocate[key]
-                self.galaxy_table[key] = np.empty(Ngals, dtype = dt)
-
-
-
-
-
-
-
-
+                self._subhalo_galaxy_table[key] = np.empty(Ngals, dtype = dt)
@@ -364,6 +364,7 @@ class SubhaloModelFactory(ModelFactory):
                 setattr(self, new_attr_name, attr)
 
         self._set_calling_sequence(**kwargs)
+        self._build_mock_generation_dependencies()
 
     def _update_param_dict_decorator(self, component_model, func_name):
         """ Decorator used to propagate any possible changes 
@@ -430,6 +431,90 @@ class SubhaloModelFactory(ModelFactory):
             else:
                 warn(missing_calling_sequence_msg % component_model.__class__.__name__)
 
+    def _build_mock_generation_dependencies(self):
+        """ Method used to build a dictionary storing, for each method in the 
+        ``_mock_generation_calling_sequence``, the ``param_dict`` keys and the 
+        ``galaxy_table`` columns the method reads, and the columns it writes. 
+        Method returns nothing, but binds ``_mock_generation_dependencies`` to the class instance. 
+
+        Notes 
+        -----
+        Component models declare the inputs of their methods with an optional 
+        ``_mock_generation_dependencies`` dictionary, whose keys are method names 
+        and whose values are dictionaries with ``param_dict_keys`` and ``input_keys`` lists. 
+        If a component model does not declare the ``param_dict_keys`` of a method, 
+        the method is assumed to depend on every parameter of the component model. 
+        If a component model does not declare the ``input_keys`` of a method, 
+        the method is assumed to depend on every column written by the methods 
+        called before it. The columns written by each method are the 
+        ``_galprop_dtypes_to_allocate`` of its component model. 
+        """
+        self._mock_generation_dependencies = {}
+
+        for feature, component_model in self.model_dictionary.iteritems():
+
+            try:
+                component_dependencies = component_model._mock_generation_dependencies
+            except AttributeError:
+                component_dependencies = {}
+            try:
+                output_keys = list(component_model._galprop_dtypes_to_allocate.names)
+            except AttributeError:
+                output_keys = []
+
+            try:
+                component_methods = component_model._mock_generation_calling_sequence
+            except AttributeError:
+                component_methods = []
+
+            for methodname in component_methods:
+                method_dependencies = component_dependencies.get(methodname, {})
+                self._mock_generation_dependencies[methodname] = {
+                    'param_dict_keys': method_dependencies.get('param_dict_keys', 
+                        list(component_model.param_dict.keys())), 
+                    'input_keys': method_dependencies.get('input_keys', None), 
+                    'output_keys': output_keys
+                    }
+
+    def _mock_generation_methods_to_call(self, changed_param_keys, changed_input_keys = []):
+        """ Determine which methods of the ``_mock_generation_calling_sequence`` 
+        must be called to repopulate a mock after a change of some parameters or halo properties. 
+
+        Parameters 
+        ----------
+        changed_param_keys : list 
+            Keys of ``param_dict`` whose values have changed since the mock was last populated. 
+
+        changed_input_keys : list, optional 
+            Columns of the ``galaxy_table`` that have changed since the mock was last populated. 
+            Default is an empty list. 
+
+        Returns 
+        -------
+        methods_to_call : list 
+            Names of the methods to call, in the order of the ``_mock_generation_calling_sequence``. 
+            A method is called if it reads any of the changed parameters, 
+            or any column that is changed or written by a method called before it. 
+        """
+        changed_param_keys = set(changed_param_keys)
+        dirty_keys = set(changed_input_keys)
+
+        methods_to_call = []
+        for methodname in self._mock_generation_calling_sequence:
+            dependencies = self._mock_generation_dependencies[methodname]
+
+            if dependencies['input_keys'] is None:
+                reads_dirty_keys = (dirty_keys != set())
+            else:
+                reads_dirty_keys = (dirty_keys & set(dependencies['input_keys']) != set())
+            reads_changed_params = (changed_param_keys & set(dependencies['param_dict_keys']) != set())
+
+            if reads_dirty_keys or reads_changed_params:
+                methods_to_call.append(methodname)
+                dirty_keys.update(dependencies['output_keys'])
+
+        return methods_to_call
+
     def _set_model_redshift(self):
         """ 
         """
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+from ..halo_model_helpers import (one_halo_separation_cdf,
+    binned_one_halo_pair_fractions, binned_halo_pair_counts)
+from ...phase_space_models.profile_models import NFWProfile
+
+from ....mock_observables.pair_counters import npairs
+
+__all__ = ['test_one_halo_separation_cdf', 'test_binned_one_halo_pair_fractions',
+    'test_binned_halo_pair_counts']
+
+def test_one_halo_separation_cdf():
+    """ Verify that the separation distribution of pairs of
+    galaxies in the same halo agrees with the NFW profile when one galaxy
+    is at the halo center, and with a Monte Carlo realization when both
+    galaxies follow the profile.
+    """
+    nfw = NFWProfile()
+    conc = 5.
+    x = np.logspace(-2, np.log10(2), 20)
+
+    censat_cdf = one_halo_separation_cdf(x, profile_model2 = nfw, profile_params2 = [conc])
+    assert np.allclose(censat_cdf, nfw.cumulative_mass_PDF(np.where(x > 1, 1, x), conc))
+
+    cencen_cdf = one_halo_separation_cdf(x)
+    assert np.all(cencen_cdf == 1)
+
+    satsat_cdf = one_halo_separation_cdf(x, profile_model1 = nfw, profile_params1 = [conc],
+        profile_model2 = nfw, profile_params2 = [conc])
+    assert np.all(np.diff(satsat_cdf) >= 0)
+    assert satsat_cdf[-1] == 1
+
+    # Draw NFW radii by inverting the tabulated cumulative mass PDF
+    np.random.seed(43)
+    npts = int(1e5)
+    x_table = np.logspace(-4, 0, 1000)
+    cdf_table = nfw.cumulative_mass_PDF(x_table, conc)
+    pos = []
+    for i in range(2):
+        r = np.interp(np.random.uniform(0, 1, npts), cdf_table, x_table)
+        mu = np.random.uniform(-1, 1, npts)
+        phi = np.random.uniform(0, 2*np.pi, npts)
+        pos.append(r[:, np.newaxis]*np.vstack((np.sqrt(1-mu**2)*np.cos(phi),
+            np.sqrt(1-mu**2)*np.sin(phi), mu)).T)
+    separation = np.sqrt(np.sum((pos[0] - pos[1])**2, axis=1))
+    mc_cdf = np.array([np.mean(separation < s) for s in x])
+    assert np.allclose(satsat_cdf, mc_cdf, atol = 0.01)
+
+def test_binned_one_halo_pair_fractions():
+    """ Verify that the one-halo pair fractions are averaged over the halos of each bin.
+    """
+    rbins = np.array([0.1, 0.5, 1., 2.])
+    halo_radius = np.array([1., 1., 2.])
+    halo_bin_index = np.array([0, 1, 1])
+    x_table = np.linspace(0, 2, 101)
+    cdf_tables = np.array([np.minimum(x_table, 1)])
+    cdf_table_index = np.zeros(3, dtype=int)
+
+    fractions = binned_one_halo_pair_fractions(rbins, halo_radius,
+        halo_bin_index, 3, x_table, cdf_tables, cdf_table_index)
+    assert fractions.shape == (3, 3)
+    assert np.allclose(fractions[0], [0.4, 0.5, 0])
+    assert np.allclose(fractions[1], [0.3, 0.375, 0.25])
+    assert np.all(fractions[2] == 0)
+
+def test_binned_halo_pair_counts():
+    """ Verify that the pair counts of each pair of bins of halos
+    sum to the pair counts of the full sample.
+    """
+    np.random.seed(43)
+    Lbox = 100.
+    halo_pos = np.random.uniform(0, Lbox, 3000).reshape((1000, 3))
+    halo_bin_index = np.random.randint(0, 4, 1000)
+    rbins = np.array([1., 5., 10.])
+
+    pair_counts = binned_halo_pair_counts(halo_pos, halo_bin_index, 4, rbins, Lbox)
+    assert pair_counts.shape == (4, 4, 2)
+    assert np.allclose(pair_counts, np.swapaxes(pair_counts, 0, 1))
+
+    total_counts = np.diff(npairs(halo_pos, halo_pos, rbins, period = Lbox*np.ones(3)))
+    assert np.all(pair_counts.sum(axis=0).sum(axis=0) == total_counts)
@@ -2,14 +2,17 @@
 
 import numpy as np 
 from copy import copy 
+import threading
 
 from ...factories import HodModelFactory
 from ... import factories
 from ...occupation_models import *
 
 from ....sim_manager import FakeSim
+from ....mock_observables.pair_counters import npairs
 
-__all__ = ['test_Zheng07_composite']
+__all__ = ['test_Zheng07_composite', 'test_reuse_memory', 'test_halo_table_index', 'test_seeded_populate', 
+	'test_concurrent_populate', 'test_poisson_distribution', 'test_halo_model_prediction']
 
 def test_Zheng07_composite():
 	""" Method to test the basic behavior of 
@@ -149,3 +152,170 @@ def test_Leauthaud11_composite():
 
 
 
+
+def test_reuse_memory():
+	""" Verify that populating a mock with ``reuse_memory`` set to True 
+	produces a galaxy table with the same structure as the default behavior, 
+	and reuses the same buffers between calls to 
+	`~halotools.empirical_models.factories.HodMockFactory.populate`. 
+	"""
+	model = HodModelFactory('zheng07')
+	fakesim = FakeSim()
+	mock = factories.HodMockFactory(snapshot = fakesim, model = model, populate = False)
+
+	mock.populate()
+	default_table = copy(mock.galaxy_table)
+
+	mock.populate(reuse_memory = True)
+	assert set(mock.galaxy_table.keys()) == set(default_table.keys()) | set(['gal_type_code'])
+	for gal_type in mock.gal_types:
+		mask = mock.galaxy_table['gal_type'] == gal_type
+		assert np.all(mock.galaxy_table['gal_type_code'][mask] == mock.gal_type_codes[gal_type])
+		assert mask.sum() == mock.halo_table['halo_num_'+gal_type].sum()
+	centrals = mock.galaxy_table['gal_type'] == 'centrals'
+	assert np.allclose(mock.galaxy_table['x'][centrals], mock.galaxy_table['halo_x'][centrals])
+	assert np.all(mock.galaxy_table['x'] >= 0) & np.all(mock.galaxy_table['x'] < fakesim.Lbox)
+
+	mock.reuse_memory = True
+	buffer_address = mock._galaxy_buffers['x'].ctypes.data
+	num_haloprops = len(mock.additional_haloprops)
+	for i in range(3):
+		mock.populate()
+		assert mock._galaxy_buffers['x'].ctypes.data == buffer_address
+		assert len(mock.galaxy_table) == mock.Ngals
+	assert len(mock.additional_haloprops) == num_haloprops
+
+def test_halo_table_index():
+	""" Verify that the ``halo_table_index`` column of the galaxy table 
+	points to the host halo of each galaxy, with and without ``reuse_memory``. 
+	"""
+	model = HodModelFactory('zheng07')
+	mock = factories.HodMockFactory(snapshot = FakeSim(), model = model, populate = False)
+
+	for reuse_memory in (False, True):
+		mock.populate(reuse_memory = reuse_memory)
+		idx = mock.galaxy_table['halo_table_index']
+		for key in ('halo_id', 'halo_mvir', 'halo_x'):
+			assert np.all(mock.galaxy_table[key] == mock.halo_table[key][idx])
+		for gal_type in mock.gal_types:
+			mask = mock.galaxy_table['gal_type'] == gal_type
+			counts = np.bincount(idx[mask], minlength = len(mock.halo_table))
+			assert np.all(counts == mock.halo_table['halo_num_'+gal_type])
+
+def test_seeded_populate():
+	""" Verify that populating a mock with an input ``seed``, either an integer or a 
+	`~numpy.random.RandomState`, is reproducible, does not depend on the number of threads, 
+	and leaves the global random state untouched. 
+	"""
+	model = HodModelFactory('zheng07')
+	mock = factories.HodMockFactory(snapshot = FakeSim(), model = model, populate = False)
+	chunk_size = len(mock.halo_table)//5 + 1
+
+	def check_identical(table1, table2):
+		assert len(table1) == len(table2)
+		for key in ('x', 'y', 'z', 'vx', 'halo_table_index'):
+			assert np.all(table1[key] == table2[key])
+
+	np.random.seed(43)
+	global_draw = np.random.random()
+	np.random.seed(43)
+	mock.populate(seed = 44, chunk_size = chunk_size)
+	mock.populate(seed = np.random.RandomState(44))
+	assert np.random.random() == global_draw
+
+	mock.populate(seed = 44, chunk_size = chunk_size)
+	table1 = copy(mock.galaxy_table)
+	mock.populate(seed = 44, chunk_size = chunk_size, num_threads = 3)
+	check_identical(table1, mock.galaxy_table)
+
+	mock.populate(seed = 45, chunk_size = chunk_size)
+	assert np.any(mock.galaxy_table['x'][:10] != table1['x'][:10])
+
+	mock.populate(seed = np.random.RandomState(44))
+	table1 = copy(mock.galaxy_table)
+	rng = np.random.RandomState(44)
+	mock.populate(seed = rng)
+	check_identical(table1, mock.galaxy_table)
+
+	# The generator has been advanced, so the next realization differs
+	mock.populate(seed = rng)
+	assert np.any(mock.galaxy_table['x'][:10] != table1['x'][:10])
+
+def test_concurrent_populate():
+	""" Verify that two mocks populated concurrently in separate threads, 
+	each from its own `~numpy.random.RandomState`, are identical to the mocks 
+	populated one after the other. 
+	"""
+	seeds = (44, 45)
+	mocks = [factories.HodMockFactory(snapshot = FakeSim(), 
+		model = HodModelFactory('zheng07'), populate = False) for seed in seeds]
+
+	sequential_tables = []
+	for mock, seed in zip(mocks, seeds):
+		mock.populate(seed = np.random.RandomState(seed))
+		sequential_tables.append(copy(mock.galaxy_table))
+
+	threads = [threading.Thread(target = mock.populate, 
+		kwargs = {'seed': np.random.RandomState(seed)}) for mock, seed in zip(mocks, seeds)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+	for mock, table in zip(mocks, sequential_tables):
+		assert len(mock.galaxy_table) == len(table)
+		for key in ('x', 'y', 'z', 'vx', 'halo_table_index'):
+			assert np.all(mock.galaxy_table[key] == table[key])
+
+def test_poisson_distribution():
+	""" Verify that the Poisson occupation sampler returns zero galaxies 
+	in halos whose first occupation moment is zero or negative. 
+	"""
+	model = Zheng07Sats()
+	first_occupation_moment = np.array([-1., 0., 0., 1.e-20, 5., 5.])
+	result = model._poisson_distribution(first_occupation_moment, 
+		seed = np.random.RandomState(43))
+	assert np.all(result[:4] == 0)
+
+	first_occupation_moment = np.zeros(10000) + 2.
+	first_occupation_moment[::2] = -2.
+	result = model._poisson_distribution(first_occupation_moment, 
+		seed = np.random.RandomState(43))
+	assert np.all(result[::2] == 0)
+	assert np.allclose(result[1::2].mean(), 2., rtol = 0.05)
+
+def test_halo_model_prediction():
+	""" Verify that the analytic prediction of 
+	`~halotools.empirical_models.factories.HodModelFactory.predict_galaxy_clustering` 
+	agrees with the clustering of Monte Carlo realizations of the model, 
+	and that the tabulated halo catalog is reused when the parameters change. 
+	"""
+	model = HodModelFactory('zheng07')
+	fakesim = FakeSim()
+	rbins = np.array([0.1, 0.3, 1., 5., 20.])
+	r, xi, number_density = model.predict_galaxy_clustering(snapshot = fakesim, rbins = rbins)
+	assert np.allclose(r, (rbins[1:] + rbins[:-1])/2.)
+
+	mock = factories.HodMockFactory(snapshot = fakesim, model = model, populate = False)
+	volume = fakesim.Lbox**3
+	mean_ngals = (model.mean_occupation_centrals(halo_table = mock.halo_table).sum() + 
+		model.mean_occupation_satellites(halo_table = mock.halo_table).sum())
+	assert np.allclose(number_density, mean_ngals/volume)
+
+	mc_xi = []
+	for seed in range(5):
+		mock.populate(seed = seed)
+		pos = np.vstack((mock.galaxy_table['x'], mock.galaxy_table['y'], mock.galaxy_table['z'])).T
+		pair_counts = np.diff(npairs(pos, pos, rbins, period = fakesim.Lbox*np.ones(3)))
+		random_pair_counts = len(pos)**2*4*np.pi/3.*np.diff(rbins**3)/volume
+		mc_xi.append(pair_counts/random_pair_counts - 1)
+	mc_xi = np.mean(mc_xi, axis=0)
+	# The one-halo term dominates the first bins
+	assert np.allclose(xi[:3], mc_xi[:3], rtol = 0.1)
+
+	two_halo_pair_counts = model.halo_model_tables['two_halo_pair_counts']
+	model.param_dict['logM1'] += 0.3
+	r, xi2, number_density2 = model.predict_galaxy_clustering()
+	assert model.halo_model_tables['two_halo_pair_counts'] is two_halo_pair_counts
+	assert number_density2 < number_density
+	assert np.all(xi2[:2] < xi[:2])
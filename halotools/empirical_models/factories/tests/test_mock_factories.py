@@ -1,13 +1,28 @@
 #!/usr/bin/env python
 
 import numpy as np 
+import os
+import tempfile
+from astropy.tests.helper import pytest
+
+try:
+    import h5py
+    HAS_H5PY = True
+except ImportError:
+    HAS_H5PY = False
 
 from ...composite_models import *
 from ...factories import *
+from ...factories.hod_mock_factory import _preprocessing_cache
+from ... import model_defaults
 
 from ....sim_manager.generate_random_sim import FakeSim
+from ....mock_observables.pair_counters import npairs
+from ....custom_exceptions import HalotoolsError
 
-__all__ = ['test_preloaded_hod_mocks']
+__all__ = ['test_preloaded_hod_mocks', 'test_tabulate_halo_pairs', 
+    'test_subhalo_mock_repopulation', 'test_preprocessing_cache', 
+    'test_preprocessing_cache_halo_selection', 'test_preprocessing_cache_snapshot_identity']
 
 
 def test_preloaded_hod_mocks():
@@ -65,12 +80,220 @@ def test_preloaded_hod_mocks():
     # for model in component_models_to_test:
     #     test_hod_mock_attrs(model, sim)
 
+@pytest.mark.skipif('not HAS_H5PY')
+def test_tabulate_halo_pairs():
+    """ Verify that the table of halo pairs computed by 
+    `~halotools.empirical_models.HodMockFactory.tabulate_halo_pairs` 
+    is consistent with the pair counts of the full halo catalog, 
+    that its contraction with the mean occupations agrees with 
+    Monte Carlo realizations of the model, and that it can be stored on disk. 
+    """
+    model = HodModelFactory('zheng07')
+    fakesim = FakeSim()
+    mock = HodMockFactory(snapshot = fakesim, model = model, populate = False)
+    rbins = np.array([5., 10., 20.])
+    period = fakesim.Lbox*np.ones(3)
+    fname = tempfile.mktemp(suffix='.hdf5')
+    mock.tabulate_halo_pairs(rbins = rbins, num_mass_bins = 5, fname = fname)
+
+    pair_counts = mock.halo_pair_table['pair_counts']
+    assert pair_counts.shape == (5, 5, 2)
+    halo_pos = np.vstack((mock.halo_table['halo_x'], 
+        mock.halo_table['halo_y'], mock.halo_table['halo_z'])).T
+    assert np.all(pair_counts.sum(axis=0).sum(axis=0) == np.diff(npairs(halo_pos, halo_pos, rbins, period = period)))
+
+    cen_sat_pairs = mock.two_halo_pair_counts('centrals', 'satellites')
+    assert np.allclose(cen_sat_pairs, mock.two_halo_pair_counts('satellites', 'centrals'))
+
+    cen_cen_pairs = mock.two_halo_pair_counts('centrals')
+    mc_cen_cen_pairs = []
+    for seed in range(5):
+        mock.populate(seed = seed)
+        centrals = mock.galaxy_table['gal_type'] == 'centrals'
+        pos = np.vstack((mock.galaxy_table['x'][centrals], 
+            mock.galaxy_table['y'][centrals], mock.galaxy_table['z'][centrals])).T
+        mc_cen_cen_pairs.append(np.diff(npairs(pos, pos, rbins, period = period)))
+    assert np.allclose(cen_cen_pairs, np.mean(mc_cen_cen_pairs, axis=0), rtol = 0.05)
+
+    # A new mock reads the table from disk, provided the binning is consistent
+    mock2 = HodMockFactory(snapshot = fakesim, model = model, populate = False)
+    mock2.tabulate_halo_pairs(rbins = rbins, num_mass_bins = 5, fname = fname)
+    assert np.all(mock2.halo_pair_table['pair_counts'] == pair_counts)
+    assert np.all(mock2.halo_pair_table['halo_bin_index'] == mock.halo_pair_table['halo_bin_index'])
+    with pytest.raises(HalotoolsError):
+        mock2.tabulate_halo_pairs(rbins = rbins, num_mass_bins = 4, fname = fname)
+    mock2.tabulate_halo_pairs(rbins = rbins, num_mass_bins = 4, fname = fname, overwrite = True)
+    assert mock2.halo_pair_table['pair_counts'].shape == (4, 4, 2)
+    os.remove(fname)
 
+    # Assembly-biased models are also binned in the secondary halo property
+    model = HodModelFactory('hearin15')
+    mock = HodMockFactory(snapshot = fakesim, model = model, populate = False)
+    mock.tabulate_halo_pairs(rbins = rbins, num_mass_bins = 5)
+    assert mock.halo_pair_table['pair_counts'].shape == (10, 10, 2)
 
+def test_subhalo_mock_repopulation():
+    """ Verify that repopulating a subhalo-based mock with the same seed 
+    only calls the methods whose parameters have changed, 
+    that the result agrees with a newly populated mock, 
+    and that the galaxy selection is stored as a mask. 
+    """
+    fakesim = FakeSim()
+    model = SubhaloModelFactory('behroozi10')
+    mock = SubhaloMockFactory(snapshot = fakesim, model = model, populate = False)
+    mock.populate(seed = 43)
+    stellar_mass = mock.galaxy_table['stellar_mass']
+
+    mock.populate(seed = 43)
+    assert mock.galaxy_table['stellar_mass'] is stellar_mass
+    assert model._mock_generation_methods_to_call(['smhm_m0_0']) == ['mc_stellar_mass']
+    assert model._mock_generation_methods_to_call([]) == []
+
+    model.param_dict['smhm_m0_0'] += 0.5
+    mock.populate(seed = 43)
+    assert np.any(mock.galaxy_table['stellar_mass'] != stellar_mass)
 
+    model2 = SubhaloModelFactory('behroozi10')
+    model2.param_dict['smhm_m0_0'] += 0.5
+    mock2 = SubhaloMockFactory(snapshot = fakesim, model = model2, populate = False)
+    mock2.populate(seed = 43)
+    assert np.all(mock2.galaxy_table['stellar_mass'] == mock.galaxy_table['stellar_mass'])
 
+    model.galaxy_selection_func = lambda t: t['stellar_mass'] > 1e10
+    mock.populate()
+    mask = mock.galaxy_selection_mask
+    assert len(mask) == len(fakesim.halo_table)
+    assert len(mock.galaxy_table) == np.count_nonzero(mask)
+    assert np.all(mock.galaxy_table['stellar_mass'] > 1e10)
+    assert mock.number_density == np.count_nonzero(mask)/fakesim.Lbox**3.
+
+    # Replacing the selection function alone updates the mask on repopulation
+    mock.populate(seed = 43)
+    assert len(mock.galaxy_table) == np.count_nonzero(mock.galaxy_selection_mask)
+    model.galaxy_selection_func = lambda t: t['stellar_mass'] > 1e11
+    mock.populate(seed = 43)
+    assert np.count_nonzero(mock.galaxy_selection_mask) < np.count_nonzero(mask)
+    assert np.all(mock.galaxy_table['stellar_mass'] > 1e11)
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_preprocessing_cache():
+    """ Verify that mocks of the same snapshot made with identically configured models 
+    retrieve the pre-processed halo catalog from the cache, in memory or on disk, 
+    and that the result agrees with a halo catalog pre-processed from scratch. 
+    """
+    fakesim = FakeSim()
+    model = HodModelFactory('hearin15')
+    mock = HodMockFactory(snapshot = fakesim, model = model, 
+        populate = False, use_preprocessing_cache = False)
 
+    HodMockFactory.clear_preprocessing_cache()
+    model1 = HodModelFactory('hearin15')
+    mock1 = HodMockFactory(snapshot = fakesim, model = model1, populate = False)
+    model2 = HodModelFactory('hearin15')
+    mock2 = HodMockFactory(snapshot = fakesim, model = model2, populate = False)
+    for feature, component_model in model1.model_dictionary.iteritems():
+        if hasattr(component_model, 'rad_prof_func_table'):
+            assert model2.model_dictionary[feature].rad_prof_func_table is component_model.rad_prof_func_table
 
+    for m in (mock1, mock2):
+        assert set(m.halo_table.keys()) == set(mock.halo_table.keys())
+        assert set(m.additional_haloprops) == set(mock.additional_haloprops)
+        for key in mock.halo_table.keys():
+            assert np.all(m.halo_table[key] == mock.halo_table[key])
 
+    mock.populate(seed = 43)
+    mock2.populate(seed = 43)
+    assert np.all(mock2.galaxy_table['x'] == mock.galaxy_table['x'])
+
+    # The pre-processed halo catalog can persist on disk next to the processed catalog 
+    with pytest.raises(HalotoolsError):
+        HodMockFactory(snapshot = fakesim, model = model, 
+            populate = False, cache_preprocessing_to_disk = True)
+    fakesim.processed_halo_table_fname = tempfile.mktemp(suffix='.hdf5')
+    open(fakesim.processed_halo_table_fname, 'w').close()
+    mock3 = HodMockFactory(snapshot = fakesim, model = HodModelFactory('hearin15'), 
+        populate = False, cache_preprocessing_to_disk = True)
+    HodMockFactory.clear_preprocessing_cache()
+    mock4 = HodMockFactory(snapshot = fakesim, model = HodModelFactory('hearin15'), 
+        populate = False, cache_preprocessing_to_disk = True)
+    for key in mock4.halo_table.keys():
+        assert np.all(mock4.halo_table[key] == mock.halo_table[key])
+    mock4.populate(seed = 43)
+    assert np.all(mock4.galaxy_table['x'] == mock.galaxy_table['x'])
+
+    for fname in os.listdir(os.path.dirname(fakesim.processed_halo_table_fname)):
+        if fname.startswith(os.path.splitext(os.path.basename(fakesim.processed_halo_table_fname))[0]):
+            os.remove(os.path.join(os.path.dirname(fakesim.processed_halo_table_fname), fname))
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_preprocessing_cache_halo_selection():
+    """ Verify that mocks of the same snapshot made with models whose 
+    ``halo_selection_func`` differ do not share the pre-processed halo catalog, 
+    in memory or on disk. 
+    """
+    fakesim = FakeSim()
+    fakesim.processed_halo_table_fname = tempfile.mktemp(suffix='.hdf5')
+    open(fakesim.processed_halo_table_fname, 'w').close()
+    mass_cuts = (1e12, 1e13)
+
+    def selected_models():
+        models = []
+        for mass_cut in mass_cuts:
+            model = HodModelFactory('zheng07')
+            model.halo_selection_func = lambda t, mass_cut=mass_cut: t[t['halo_mvir'] > mass_cut]
+            models.append(model)
+        return models
+
+    expected_halo_ids = []
+    for model in selected_models():
+        mock = HodMockFactory(snapshot = fakesim, model = model, 
+            populate = False, use_preprocessing_cache = False)
+        expected_halo_ids.append(mock.halo_table['halo_id'])
+    assert len(expected_halo_ids[0]) != len(expected_halo_ids[1])
+
+    for cache_to_disk in (False, True):
+        HodMockFactory.clear_preprocessing_cache()
+        for model, halo_id in zip(selected_models(), expected_halo_ids):
+            mock = HodMockFactory(snapshot = fakesim, model = model, 
+                populate = False, cache_preprocessing_to_disk = cache_to_disk)
+            assert np.all(mock.halo_table['halo_id'] == halo_id)
+
+    # Retrieve both pre-processed catalogs from disk
+    HodMockFactory.clear_preprocessing_cache()
+    for model, halo_id in zip(selected_models(), expected_halo_ids):
+        mock = HodMockFactory(snapshot = fakesim, model = model, 
+            populate = False, cache_preprocessing_to_disk = True)
+        assert np.all(mock.halo_table['halo_id'] == halo_id)
+
+    for fname in os.listdir(os.path.dirname(fakesim.processed_halo_table_fname)):
+        if fname.startswith(os.path.splitext(os.path.basename(fakesim.processed_halo_table_fname))[0]):
+            os.remove(os.path.join(os.path.dirname(fakesim.processed_halo_table_fname), fname))
+
+def test_preprocessing_cache_snapshot_identity():
+    """ Verify that in-memory snapshots whose halo catalogs differ, 
+    even with identical ``halo_id`` columns, do not share the pre-processed halo catalog, 
+    and that the cache holds at most ``preprocessing_cache_max_entries`` catalogs. 
+    """
+    HodMockFactory.clear_preprocessing_cache()
+    fakesims = [FakeSim(seed = 43), FakeSim(seed = 44)]
+    assert np.all(fakesims[0].halo_table['halo_id'] == fakesims[1].halo_table['halo_id'])
 
+    for fakesim in fakesims:
+        mock = HodMockFactory(snapshot = fakesim, model = HodModelFactory('hearin15'), 
+            populate = False)
+        mock_nocache = HodMockFactory(snapshot = fakesim, model = HodModelFactory('hearin15'), 
+            populate = False, use_preprocessing_cache = False)
+        assert len(mock.halo_table) == len(mock_nocache.halo_table)
+        for key in mock_nocache.halo_table.keys():
+            assert np.all(mock.halo_table[key] == mock_nocache.halo_table[key])
+    assert len(_preprocessing_cache) == 2
 
+    max_entries = model_defaults.preprocessing_cache_max_entries
+    try:
+        model_defaults.preprocessing_cache_max_entries = 1
+        mock = HodMockFactory(snapshot = fakesims[0], model = HodModelFactory('hearin15'), 
+            populate = False)
+        assert len(_preprocessing_cache) == 1
+    finally:
+        model_defaults.preprocessing_cache_max_entries = max_entries
+        HodMockFactory.clear_preprocessing_cache()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+import numpy as np 
+
+from ..mock_helpers import GalaxyColumns
+
+__all__ = ['test_galaxy_columns_slicing', 'test_galaxy_columns_to_table']
+
+def test_galaxy_columns_slicing():
+    """ Verify that writing to a slice of a 
+    `~halotools.empirical_models.factories.mock_helpers.GalaxyColumns` 
+    container modifies the parent container, 
+    including when a column of the slice is re-assigned. 
+    """
+    galaxies = GalaxyColumns(10)
+    galaxies['x'] = np.zeros(10)
+    galaxies['halo_vx'] = np.arange(10.)
+    galaxies['vx'] = 0.
+    assert galaxies['vx'].shape == (10, )
+
+    satellites = galaxies[4:]
+    assert len(satellites) == 6
+    satellites['x'][:] += 1.
+    satellites['vx'] = satellites['halo_vx']
+    assert np.all(galaxies['x'][4:] == 1.)
+    assert np.all(galaxies['x'][:4] == 0.)
+    assert np.all(galaxies['vx'][4:] == galaxies['halo_vx'][4:])
+
+    # assigning an existing column writes in place rather than aliasing the input
+    satellites['vx'] *= 2.
+    assert np.all(galaxies['halo_vx'] == np.arange(10.))
+
+def test_galaxy_columns_to_table():
+    """ Verify that the table exported by 
+    `~halotools.empirical_models.factories.mock_helpers.GalaxyColumns` 
+    shares memory with the container. 
+    """
+    galaxies = GalaxyColumns(5)
+    galaxies['x'] = np.zeros(5)
+    galaxies['gal_type'] = 'centrals'
+    table = galaxies.to_table()
+    assert table.keys() == ['x', 'gal_type']
+    galaxies['x'][0] = 3.
+    assert table['x'][0] == 3.
+    assert np.all(table['gal_type'] == 'centrals')
@@ -13,11 +13,15 @@ from astropy import cosmology
 default_luminosity_threshold = -20
 default_stellar_mass_threshold = 10.5
 
-# Small numerical value passed to the scipy Poisson number generator. 
-# Used when executing a Monte Carlo realization of a Poission distribution 
-# whose mean is formally zero, which causes the built-in 
-# scipy method to raise an exception.
-default_tiny_poisson_fluctuation = 1.e-20
+# Number of halos in each chunk of the halo catalog populated with 
+# its own random stream when a mock is populated with an input seed. 
+# The realization only depends on the seed and on this chunk size, 
+# not on the number of threads used to populate the chunks. 
+default_populate_chunk_size = 2**16
+
+# Maximum number of pre-processed halo catalogs held in memory by the 
+# process-wide cache of the HodMockFactory before the least recently used are evicted
+preprocessing_cache_max_entries = 8
 
 # The numpy.digitize command has an annoying convention 
 # such that if the value of the array being digitized, x, 
@@ -106,6 +110,14 @@ conc_mass_model = 'dutton_maccio14'
 default_rbins = np.logspace(-1, 1.25, 15)
 default_nptcls = 1e5
 
+# Binning of the halo catalog used by the analytic prediction for the clustering of HOD models
+default_halo_model_num_mass_bins = 20
+default_halo_model_num_sec_haloprop_bins = 2
+default_halo_model_num_profile_param_bins = 20
+# Number of quantiles of the radial profile used to compute 
+# the separation distribution of pairs of satellites in the same halo
+default_halo_model_num_profile_quantiles = 100
+
 default_b_perp = 0.2
 default_b_para = 0.75
 
@@ -9,7 +9,8 @@ used by many of the hod model components.
 __all__ = (
     ['solve_for_polynomial_coefficients', 'polynomial_from_table', 
     'enforce_periodicity_of_box', 'custom_spline', 'create_composite_dtype', 'bind_default_kwarg_mixin_safe', 
-    'custom_incomplete_gamma', 'bounds_enforcing_decorator_factory']
+    'custom_incomplete_gamma', 'bounds_enforcing_decorator_factory', 
+    'random_state', 'derived_seed']
     )
 
 __author__ = ['Andrew Hearin', 'Surhud More']
@@ -505,8 +506,71 @@ def bounds_enforcing_decorator_factory(lower_bound, upper_bound, warning = True)
 
     return decorator
 
+def random_state(seed=None):
+    """ Return the random number generator used by a Monte Carlo method 
+    of a component model. 
 
+    Monte Carlo methods never call ``np.random.seed``, 
+    so that seeding one realization does not affect the global state of `numpy.random`, 
+    nor any other realization generated concurrently. 
 
+    Parameters 
+    ----------
+    seed : int, sequence of ints or `~numpy.random.RandomState`, optional 
+        If None, the global `~numpy.random.RandomState` used by 
+        the functions of `numpy.random` is returned. 
+        If an int or a sequence of non-negative ints, e.g., as returned by `derived_seed`, 
+        a new `~numpy.random.RandomState` seeded with ``seed`` is returned. 
+        If a `~numpy.random.RandomState`, ``seed`` is returned. Default is None. 
+
+    Returns 
+    -------
+    rng : `~numpy.random.RandomState`
+
+    Examples 
+    --------
+    >>> rng = random_state(43)
+    >>> uran = rng.uniform(0, 1, 100)
+    """
+    if seed is None:
+        return np.random.mtrand._rand
+    elif isinstance(seed, np.random.RandomState):
+        return seed
+    else:
+        return np.random.RandomState(seed)
+
+def derived_seed(seed, *counters):
+    """ Seed of an independent random stream identified by 
+    the input ``seed`` and a sequence of integer counters. 
 
+    Streams with the same ``seed`` and counters are identical, 
+    regardless of the order in which they are generated, so that 
+    e.g. each chunk of a halo catalog can be populated with its own stream, 
+    keyed by the index of the chunk, and the realization does not depend 
+    on how the chunks are distributed between threads. 
 
+    If ``seed`` is a `~numpy.random.RandomState`, the generator itself is returned, 
+    so that the streams are drawn in turn from the same generator. 
 
+    Parameters 
+    ----------
+    seed : int, sequence of ints or `~numpy.random.RandomState` 
+        Non-negative integer(s) seeding the realization, a generator, or None. 
+
+    counters : ints 
+        Non-negative integers identifying the stream. 
+
+    Returns 
+    -------
+    stream_seed : list 
+        List of ints that can be passed as the ``seed`` argument of `random_state`, 
+        or the input ``seed`` if it is None or a `~numpy.random.RandomState`. 
+
+    Examples 
+    --------
+    >>> seed = derived_seed(43, 2, 0)
+    >>> rng = random_state(seed)
+    """
+    if (seed is None) or isinstance(seed, np.random.RandomState):
+        return seed
+    return [int(s) for s in np.atleast_1d(seed)] + [int(c) for c in counters]
@@ -13,7 +13,6 @@ from copy import copy
 import numpy as np
 import math
 from scipy.special import erf 
-from scipy.stats import poisson
 from scipy.optimize import brentq
 from scipy.interpolate import InterpolatedUnivariateSpline as spline
 from astropy.extern import six
@@ -105,7 +104,7 @@ class OccupationComponent(object):
             Data table storing halo catalog. 
             If ``halo_table`` is not passed, then ``prim_haloprop`` keyword argument must be passed. 
 
-        seed : int, optional  
+        seed : int or `~numpy.random.RandomState`, optional  
             Random number seed used to generate the Monte Carlo realization. 
             Default is None. 
 
@@ -132,7 +131,7 @@ class OccupationComponent(object):
         first_occupation_moment : array
             Array giving the first moment of the occupation distribution function. 
 
-        seed : int, optional  
+        seed : int or `~numpy.random.RandomState`, optional  
             Random number seed used to generate the Monte Carlo realization. 
             Default is None. 
 
@@ -141,8 +140,8 @@ class OccupationComponent(object):
         mc_abundance : array
             Integer array giving the number of galaxies in each of the input halo_table. 
         """
-        np.random.seed(seed=seed)
-        mc_generator = np.random.random(custom_len(first_occupation_moment))
+        rng = model_helpers.random_state(seed)
+        mc_generator = rng.random_sample(custom_len(first_occupation_moment))
 
         result = np.where(mc_generator < first_occupation_moment, 1, 0)
         if 'halo_table' in kwargs:
@@ -158,7 +157,7 @@ class OccupationComponent(object):
         first_occupation_moment : array
             Array giving the first moment of the occupation distribution function. 
 
-        seed : int, optional  
+        seed : int or `~numpy.random.RandomState`, optional  
             Random number seed used to generate the Monte Carlo realization. 
             Default is None. 
 
@@ -167,13 +166,13 @@ class OccupationComponent(object):
         mc_abundance : array
             Integer array giving the number of galaxies in each of the input halo_table. 
         """
-        np.random.seed(seed=seed)
-        # The scipy built-in Poisson number generator raises an exception 
-        # if its input is zero, so here we impose a simple workaround
-        first_occupation_moment = np.where(first_occupation_moment <=0, 
-            model_defaults.default_tiny_poisson_fluctuation, first_occupation_moment)
+        rng = model_helpers.random_state(seed)
+        # The Poisson sampler of numpy already returns zero for a zero mean, 
+        # but raises an exception for a negative mean, so negative means are clipped to zero
+        first_occupation_moment = np.where(first_occupation_moment < 0, 
+            0., first_occupation_moment)
 
-        result = poisson.rvs(first_occupation_moment)
+        result = rng.poisson(first_occupation_moment)
         if 'halo_table' in kwargs:
             kwargs['halo_table']['halo_num_'+self.gal_type] = result
         return result
@@ -174,9 +174,8 @@ class Tinker13Cens(OccupationComponent):
         """
         quiescent_fraction = self.mean_quiescent_fraction(**kwargs)
 
-        if 'seed' in kwargs:
-            np.random.seed(seed=kwargs['seed'])
-        mc_generator = np.random.random(custom_len(quiescent_fraction))
+        rng = model_helpers.random_state(kwargs.get('seed', None))
+        mc_generator = rng.random_sample(custom_len(quiescent_fraction))
 
         result = np.where(mc_generator < quiescent_fraction, 'quiescent', 'active')
         if 'halo_table' in kwargs:
@@ -476,7 +475,7 @@ class Tinker13QuiescentSats(OccupationComponent):
         return mean_nsat
 
 
-    def mc_sfr_designation(self, halo_table):
+    def mc_sfr_designation(self, halo_table, **kwargs):
         """
         """
         halo_table[self.sfr_designation_key][:] = 'quiescent'
@@ -639,7 +638,7 @@ class Tinker13ActiveSats(OccupationComponent):
 
         return mean_nsat
 
-    def mc_sfr_designation(self, halo_table):
+    def mc_sfr_designation(self, halo_table, **kwargs):
         """
         """
         halo_table[self.sfr_designation_key][:] = 'active'
@@ -18,7 +18,7 @@ from functools import partial
 from itertools import product
 from time import time
 
-from ..model_helpers import custom_spline, call_func_table
+from ..model_helpers import custom_spline, call_func_table, random_state, derived_seed
 from .. import model_defaults
 
 from ...utils.array_utils import custom_len, convert_to_ndarray
@@ -160,7 +160,7 @@ class MonteCarloGalProf(object):
             There should be a ``profile_params`` list item for 
             every parameter in the profile model, each item a length-Ngals array.
 
-        seed : int, optional  
+        seed : int or `~numpy.random.RandomState`, optional  
             Random number seed used in Monte Carlo realization. Default is None. 
 
         Returns 
@@ -177,9 +177,8 @@ class MonteCarloGalProf(object):
         # Draw random values for the cumulative mass PDF         
         # These will be turned into random radial positions 
         # by inverting the tabulated cumulative_mass_PDF
-        if 'seed' in kwargs.keys():
-            np.random.seed(kwargs['seed'])
-        rho = np.random.random(len(profile_params[0]))
+        rng = random_state(kwargs.get('seed', None))
+        rho = rng.random_sample(len(profile_params[0]))
 
         # Discretize each profile parameter for every galaxy
         # Store the collection of arrays in digitized_param_list 
@@ -224,7 +223,7 @@ class MonteCarloGalProf(object):
         Npts : int 
             Number of 3d points to generate
 
-        seed : int, optional  
+        seed : int or `~numpy.random.RandomState`, optional  
             Random number seed used in Monte Carlo realization. Default is None. 
 
         Returns 
@@ -233,11 +232,10 @@ class MonteCarloGalProf(object):
             Length-Npts arrays of the coordinate positions. 
 
         """
-        if 'seed' in kwargs:
-            np.random.seed(kwargs['seed'])
+        rng = random_state(kwargs.get('seed', None))
 
-        cos_t = np.random.uniform(-1.,1.,Npts)
-        phi = np.random.uniform(0,2*np.pi,Npts)
+        cos_t = rng.uniform(-1.,1.,Npts)
+        phi = rng.uniform(0,2*np.pi,Npts)
         sin_t = np.sqrt((1.-cos_t*cos_t))
 
         x = sin_t * np.cos(phi)
@@ -263,7 +261,7 @@ class MonteCarloGalProf(object):
             Astropy Table storing a length-Ngals galaxy catalog. 
             If ``halo_table`` is not passed, ``profile_params`` must be passed. 
 
-        seed : int, optional  
+        seed : int or `~numpy.random.RandomState`, optional  
             Random number seed used in Monte Carlo realization. Default is None. 
 
         Returns 
@@ -285,17 +283,16 @@ class MonteCarloGalProf(object):
                     "keyword argument to mc_solid_sphere,\n"
                     "must pass a ``profile_params`` keyword argument")
 
+        # The angles and radial positions are drawn from independent streams
+        seed = kwargs.get('seed', None)
+
         # get random angles
         Ngals = len(profile_params[0])
-        x, y, z = self.mc_unit_sphere(Ngals, **kwargs)
+        x, y, z = self.mc_unit_sphere(Ngals, seed = derived_seed(seed, 0))
 
         # Get the radial positions of the galaxies scaled by the halo radius
-        if 'seed' in kwargs:
-            seed = kwargs['seed']
-        else:
-            seed = None
         dimensionless_radial_distance = self._mc_dimensionless_radial_distance(
-            profile_params = profile_params, seed = seed) 
+            profile_params = profile_params, seed = derived_seed(seed, 1)) 
 
         # get random positions within the solid sphere
         x *= dimensionless_radial_distance
@@ -337,7 +334,7 @@ class MonteCarloGalProf(object):
             hosting each galaxy. Units assumed to be in Mpc/h. 
             If ``profile_params`` and ``halo_radius`` are not passed, ``halo_table`` must be passed. 
 
-        seed : int, optional  
+        seed : int or `~numpy.random.RandomState`, optional  
             Random number seed used in Monte Carlo realization. Default is None. 
 
         Returns 
@@ -389,7 +386,7 @@ class MonteCarloGalProf(object):
             hosting each galaxy. Units assumed to be in Mpc/h. 
             If ``profile_params`` and ``halo_radius`` are not passed, ``halo_table`` must be passed. 
 
-        seed : int, optional  
+        seed : int or `~numpy.random.RandomState`, optional  
             Random number seed used in Monte Carlo realization. Default is None. 
 
         Returns 
@@ -508,7 +505,7 @@ class MonteCarloGalProf(object):
             There should be a ``profile_params`` list item for 
             every parameter in the profile model, each item a length-Ngals array.
 
-        seed : int, optional  
+        seed : int or `~numpy.random.RandomState`, optional  
             Random number seed used in Monte Carlo realization. Default is None. 
 
         Returns 
@@ -524,14 +521,13 @@ class MonteCarloGalProf(object):
         virial_velocities = convert_to_ndarray(kwargs['virial_velocities'])
         radial_dispersions = virial_velocities*dimensionless_radial_dispersions
 
-        if 'seed' in kwargs.keys():
-            np.random.seed(kwargs['seed'])
+        rng = random_state(kwargs.get('seed', None))
 
-        radial_velocities = np.random.normal(scale = radial_dispersions)
+        radial_velocities = rng.normal(scale = radial_dispersions)
 
         return radial_velocities
 
-    def mc_vel(self, halo_table):
+    def mc_vel(self, halo_table, seed=None):
         """ Method assigns a Monte Carlo realization of the Jeans velocity 
         solution to the halos in the input ``halo_table``. 
 
@@ -541,6 +537,9 @@ class MonteCarloGalProf(object):
             `astropy.table.Table` object storing the halo catalog. 
             Calling the `mc_vel` method will over-write the existing values of 
             the ``vx``, ``vy`` and ``vz`` columns. 
+
+        seed : int or `~numpy.random.RandomState`, optional  
+            Random number seed used in Monte Carlo realization. Default is None. 
         """
         try:
             d = halo_table['host_centric_distance']
@@ -566,13 +565,13 @@ class MonteCarloGalProf(object):
     
         vx = self.mc_radial_velocity(
             virial_velocities = virial_velocities, 
-            x = x, profile_params = profile_params)
+            x = x, profile_params = profile_params, seed = derived_seed(seed, 0))
         vy = self.mc_radial_velocity(
             virial_velocities = virial_velocities, 
-            x = x, profile_params = profile_params)
+            x = x, profile_params = profile_params, seed = derived_seed(seed, 1))
         vz = self.mc_radial_velocity(
             virial_velocities = virial_velocities, 
-            x = x, profile_params = profile_params)
+            x = x, profile_params = profile_params, seed = derived_seed(seed, 2))
 
 
         halo_table['vx'][:] = halo_table['halo_vx'] + vx
@@ -18,6 +18,7 @@ from .velocity_models import *
 from .monte_carlo_phase_space import *
 
 from .. import model_defaults
+from ..model_helpers import derived_seed
 
 from ...sim_manager import sim_defaults
 
@@ -86,11 +87,11 @@ class NFWPhaseSpace(NFWProfile, NFWJeansVelocity, MonteCarloGalProf):
 
         self._mock_generation_calling_sequence = ['assign_phase_space']
 
-    def assign_phase_space(self, halo_table):
+    def assign_phase_space(self, halo_table, seed=None):
         """
         """
-        self.mc_pos(halo_table = halo_table)
-        self.mc_vel(halo_table = halo_table)
+        self.mc_pos(halo_table = halo_table, seed = derived_seed(seed, 0))
+        self.mc_vel(halo_table = halo_table, seed = derived_seed(seed, 1))
 
 
     def mc_generate_phase_space_points(self, Ngals = 1e4, conc=5, mass = 1e12):
@@ -199,7 +200,7 @@ class TrivialPhaseSpace(object):
         self.mdef = mdef 
         self.halo_boundary_key = model_defaults.get_halo_boundary_key(self.mdef)
 
-    def assign_phase_space(self, halo_table):
+    def assign_phase_space(self, halo_table, **kwargs):
         """
         """
         phase_space_keys = ['x', 'y', 'z', 'vx', 'vy', 'vz']
@@ -97,7 +97,7 @@ class BinaryGalpropModel(object):
             If ``galaxy_table`` is not passed, then either ``prim_haloprop`` or ``halos`` 
             keyword arguments must be passed. 
 
-        seed : int, optional  
+        seed : int or `~numpy.random.RandomState`, optional  
             Random number seed used to generate the Monte Carlo realization.
             Default is None. 
 
@@ -107,11 +107,11 @@ class BinaryGalpropModel(object):
             Array storing the values of the primary galaxy property 
             of the galaxies living in the input halos. 
         """
-        np.random.seed(seed=seed)
+        rng = model_helpers.random_state(seed)
 
         mean_func = getattr(self, 'mean_'+self.galprop_name+'_fraction')
         mean_galprop_fraction = mean_func(**kwargs)
-        mc_generator = np.random.random(custom_len(mean_galprop_fraction))
+        mc_generator = rng.random_sample(custom_len(mean_galprop_fraction))
         return np.where(mc_generator < mean_galprop_fraction, True, False)
 
 class BinaryGalpropInterpolModel(BinaryGalpropModel):
@@ -128,7 +128,7 @@ class LogNormalScatterModel(object):
             Data table storing halo catalog. 
             If ``halo_table`` is not passed, then ``prim_haloprop`` keyword argument must be passed. 
 
-        seed : int, optional  
+        seed : int or `~numpy.random.RandomState`, optional  
             Random number seed. Default is None. 
 
         Returns 
@@ -140,9 +140,9 @@ class LogNormalScatterModel(object):
 
         scatter_scale = self.mean_scatter(**kwargs)
 
-        np.random.seed(seed=seed)
+        rng = model_helpers.random_state(seed)
             
-        return np.random.normal(loc=0, scale=scatter_scale)
+        return rng.normal(loc=0, scale=scatter_scale)
 
     def _update_interpol(self):
         """ Private method that updates the interpolating functon used to 
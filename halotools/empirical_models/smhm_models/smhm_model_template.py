@@ -111,9 +111,19 @@ class PrimGalpropModel(object):
 
         # The _mock_generation_calling_sequence determines which methods 
         # will be called during mock population, as well as in what order they will be called
-        self._mock_generation_calling_sequence = ['mc_stellar_mass']
+        mc_method_name = 'mc_' + self.galprop_name
+        self._mock_generation_calling_sequence = [mc_method_name]
         self._galprop_dtypes_to_allocate = np.dtype([(str(self.galprop_name), 'f4')])
 
+        # The _mock_generation_dependencies determines which halo properties 
+        # are read by each method in the calling sequence, so that repopulating a mock
+        # only calls the methods whose inputs have changed. 
+        # The Monte Carlo method reads every parameter of the model, 
+        # so its param_dict_keys are left to their default. 
+        self._mock_generation_dependencies = {
+            mc_method_name: {'input_keys': [self.prim_haloprop_key]}
+            }
+
         # The _methods_to_inherit determines which methods will be directly callable 
         # by the composite model built by the HodModelFactory
         method_names_to_inherit = ['mc_' + self.galprop_name, 'mean_' + self.galprop_name]
@@ -13,7 +13,8 @@ from ...smhm_models import *
 
 from ... import model_defaults
 
-__all__ = ['test_Moster13SmHm_initialization', 'test_LogNormalScatterModel_initialization']
+__all__ = ['test_Moster13SmHm_initialization', 'test_LogNormalScatterModel_initialization', 
+	'test_mock_generation_method_names']
 
 def test_Moster13SmHm_initialization():
 	""" Function testing the initialization of 
@@ -354,16 +355,21 @@ class TestBehroozi10SmHm(TestCase):
 		z1_result = np.log10(z1_ratio)
 		assert np.allclose(z1_result, self.logmratio_z1, rtol=0.02)
 
-
-
-
-
-
-
-
-
-
-
-
-
-
+def test_mock_generation_method_names():
+	""" Verify that the mock generation calling sequence and dependencies 
+	of a `~halotools.empirical_models.PrimGalpropModel` name the same 
+	method for a ``galprop_name`` other than ``stellar_mass``. 
+	"""
+	class LuminosityModel(Moster13SmHm):
+		def __init__(self, **kwargs):
+			PrimGalpropModel.__init__(self, galprop_name='luminosity', **kwargs)
+
+		def mean_luminosity(self, **kwargs):
+			return self.mean_stellar_mass(**kwargs)
+
+	model = LuminosityModel()
+	assert model._mock_generation_calling_sequence == ['mc_luminosity']
+	assert list(model._mock_generation_dependencies.keys()) == ['mc_luminosity']
+	assert hasattr(model, 'mc_luminosity')
+	mstar = model.mc_luminosity(prim_haloprop = np.logspace(10, 15, 10), seed = 43)
+	assert len(mstar) == 10
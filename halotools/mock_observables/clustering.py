@@ -24,7 +24,7 @@ np.seterr(divide='ignore', invalid='ignore') #ignore divide by zero in e.g. DD/R
 
 def tpcf(sample1, rbins, sample2=None, randoms=None, period=None,\
          do_auto=True, do_cross=True, estimator='Natural', N_threads=1,\
-         max_sample_size=int(1e6)):
+         max_sample_size=int(1e6), pool=None):
     """ 
     Calculate the real space two-point correlation function, :math:`\\xi(r)`.
     
@@ -68,6 +68,10 @@ def tpcf(sample1, rbins, sample2=None, randoms=None, period=None,\
         If sample size exeeds max_sample_size, the sample will be randomly down-sampled
         such that the subsample is equal to max_sample_size. 
     
+    pool : multiprocessing.Pool, optional
+        pool of worker processes used by the pair counter, e.g. shared between many 
+        calls to tpcf.  If passed, `N_threads` is ignored and the pool is left open.
+    
     Returns 
     -------
     correlation_function : numpy.array
@@ -201,25 +205,25 @@ def tpcf(sample1, rbins, sample2=None, randoms=None, period=None,\
         
         #No PBCs, randoms must have been provided.
         if PBCs==False:
-            RR = npairs(randoms, randoms, rbins, period=period, N_threads=N_threads)
+            RR = npairs(randoms, randoms, rbins, period=period, N_threads=N_threads, pool=pool)
             RR = np.diff(RR)
-            D1R = npairs(sample1, randoms, rbins, period=period, N_threads=N_threads)
+            D1R = npairs(sample1, randoms, rbins, period=period, N_threads=N_threads, pool=pool)
             D1R = np.diff(D1R)
             if np.all(sample1 == sample2): #calculating the cross-correlation
                 D2R = None
             else:
-                D2R = npairs(sample2, randoms, rbins, period=period, N_threads=N_threads)
+                D2R = npairs(sample2, randoms, rbins, period=period, N_threads=N_threads, pool=pool)
                 D2R = np.diff(D2R)
             
             return D1R, D2R, RR
         #PBCs and randoms.
         elif randoms is not None:
             if do_RR==True:
-                RR = npairs(randoms, randoms, rbins, period=period, N_threads=N_threads)
+                RR = npairs(randoms, randoms, rbins, period=period, N_threads=N_threads, pool=pool)
                 RR = np.diff(RR)
             else: RR=None
             if do_DR==True:
-                D1R = npairs(sample1, randoms, rbins, period=period, N_threads=N_threads)
+                D1R = npairs(sample1, randoms, rbins, period=period, N_threads=N_threads, pool=pool)
                 D1R = np.diff(D1R)
             else: D1R=None
             if np.all(sample1 == sample2): #calculating the cross-correlation
@@ -227,7 +231,7 @@ def tpcf(sample1, rbins, sample2=None, randoms=None, period=None,\
             else:
                 if do_DR==True:
                     D2R = npairs(sample2, randoms, rbins, period=period,\
-                                 N_threads=N_threads)
+                                 N_threads=N_threads, pool=pool)
                     D2R = np.diff(D2R)
                 else: D2R=None
             
@@ -268,7 +272,7 @@ def tpcf(sample1, rbins, sample2=None, randoms=None, period=None,\
         Count data pairs.
         """
         if do_auto==True:
-            D1D1 = npairs(sample1, sample1, rbins, period=period, N_threads=N_threads)
+            D1D1 = npairs(sample1, sample1, rbins, period=period, N_threads=N_threads, pool=pool)
             D1D1 = np.diff(D1D1)
         else:
             D1D1=None
@@ -279,11 +283,11 @@ def tpcf(sample1, rbins, sample2=None, randoms=None, period=None,\
             D2D2 = D1D1
         else:
             if do_cross==True:
-                D1D2 = npairs(sample1, sample2, rbins, period=period, N_threads=N_threads)
+                D1D2 = npairs(sample1, sample2, rbins, period=period, N_threads=N_threads, pool=pool)
                 D1D2 = np.diff(D1D2)
             else: D1D2=None
             if do_auto==True:
-                D2D2 = npairs(sample2, sample2, rbins, period=period, N_threads=N_threads)
+                D2D2 = npairs(sample2, sample2, rbins, period=period, N_threads=N_threads, pool=pool)
                 D2D2 = np.diff(D2D2)
             else: D2D2=None
 
@@ -9,16 +9,187 @@ from __future__ import (absolute_import, division, print_function,
 ####import modules########################################################################
 import sys
 import numpy as np
-from scipy.interpolate import interp1d
 from astropy import cosmology
 from astropy.constants import c #the speed of light
+
+from ..custom_exceptions import HalotoolsError
 ##########################################################################################
 
 
-__all__=['distant_observer_redshift', 'ra_dec_z']
+__all__=['distant_observer_redshift', 'ra_dec_z', 
+         'comoving_distance_to_redshift', 'redshift_to_comoving_distance']
 __author__ = ['Duncan Campbell']
 
 
+#spacing of the distance-redshift tables in ln(1+z)
+_table_dlog1pz = 1e-4
+#initial and maximum redshift covered by the distance-redshift tables
+_table_zmax_init = 1.0
+_table_zmax_limit = 1e4
+
+#module-level cache of distance-redshift tables, keyed by cosmology
+_distance_redshift_tables = {}
+
+
+def _cosmology_key(cosmo):
+    """
+    Hashable key uniquely identifying the parameters of an astropy cosmology object.
+    """
+    return repr(cosmo)
+
+
+def _build_distance_redshift_table(cosmo, zmax):
+    """
+    Tabulate the line-of-sight comoving distance as a function of redshift.
+    
+    The table is built by cumulative trapezoidal integration of 1/E(z) on a grid 
+    uniformly spaced in ln(1+z), so that a single vectorised call to 
+    ``cosmo.inv_efunc`` replaces one numerical quadrature per grid point.
+    
+    Parameters
+    ----------
+    cosmo: astropy.cosmology object
+    
+    zmax: float
+        maximum redshift of the table
+    
+    Returns
+    -------
+    z_table: np.array
+        monotonically increasing redshifts
+    
+    d_table: np.array
+        comoving distance in Mpc at each redshift in z_table
+    """
+    
+    Npts = int(np.ceil(np.log1p(zmax)/_table_dlog1pz))+1
+    u = np.linspace(0.0, np.log1p(zmax), Npts)
+    z_table = np.expm1(u)
+    
+    #dz = (1+z)du
+    integrand = np.asarray(cosmo.inv_efunc(z_table))*(1.0+z_table)
+    d_table = np.zeros(Npts)
+    d_table[1:] = np.cumsum(0.5*(integrand[1:]+integrand[:-1])*np.diff(u))
+    d_table = d_table*cosmo.hubble_distance.to('Mpc').value
+    
+    return z_table, d_table
+
+
+def _get_distance_redshift_table(cosmo, dmax=0.0, zmax=0.0):
+    """
+    Return the cached distance-redshift table for the input cosmology, 
+    extending the table if it does not reach ``dmax`` or ``zmax``.
+    
+    Parameters
+    ----------
+    cosmo: astropy.cosmology object
+    
+    dmax: float, optional
+        maximum comoving distance in Mpc the table must cover
+    
+    zmax: float, optional
+        maximum redshift the table must cover
+    
+    Returns
+    -------
+    z_table: np.array
+    
+    d_table: np.array
+    """
+    
+    key = _cosmology_key(cosmo)
+    
+    if key in _distance_redshift_tables:
+        z_table, d_table = _distance_redshift_tables[key]
+        if (d_table[-1] >= dmax) & (z_table[-1] >= zmax):
+            return z_table, d_table
+        table_zmax = 2.0*z_table[-1]
+    else:
+        table_zmax = _table_zmax_init
+    
+    #build (or extend) the table until it covers the requested range
+    table_zmax = min(max(table_zmax, zmax), _table_zmax_limit)
+    z_table, d_table = _build_distance_redshift_table(cosmo, table_zmax)
+    while d_table[-1] < dmax:
+        if table_zmax >= _table_zmax_limit:
+            msg = ("\nThe input comoving distance of %.3e Mpc exceeds the comoving distance \n"
+                   "to redshift %.1e in the input cosmology.\n" % (dmax, _table_zmax_limit))
+            raise HalotoolsError(msg)
+        table_zmax = min(2.0*table_zmax, _table_zmax_limit)
+        z_table, d_table = _build_distance_redshift_table(cosmo, table_zmax)
+    
+    _distance_redshift_tables[key] = (z_table, d_table)
+    
+    return z_table, d_table
+
+
+def comoving_distance_to_redshift(d, cosmo):
+    """
+    Calculate the cosmological redshift corresponding to a line-of-sight comoving 
+    distance.
+    
+    The inversion is done by linear interpolation of a dense table of comoving distance 
+    vs. redshift.  Tables are cached for each cosmology, so repeated calls only pay for 
+    the interpolation.  Linear interpolation of the monotonic table guarantees the 
+    result is monotonic in the input distance.
+    
+    Parameters
+    ----------
+    d: array_like
+        comoving distance in Mpc.  Negative distances return negative redshifts, 
+        i.e. the relation is continued as an odd function.
+    
+    cosmo: astropy.cosmology object
+    
+    Returns
+    -------
+    z: np.array
+        cosmological redshift
+    """
+    
+    d = np.asarray(d, dtype=np.float64)
+    abs_d = np.fabs(d)
+    
+    if abs_d.size==0:
+        return np.zeros(d.shape)
+    
+    z_table, d_table = _get_distance_redshift_table(cosmo, dmax=np.max(abs_d))
+    
+    return np.sign(d)*np.interp(abs_d, d_table, z_table)
+
+
+def redshift_to_comoving_distance(z, cosmo):
+    """
+    Calculate the line-of-sight comoving distance corresponding to a cosmological 
+    redshift.
+    
+    This is the inverse of `comoving_distance_to_redshift`, and uses the same cached 
+    table.
+    
+    Parameters
+    ----------
+    z: array_like
+        redshift.  Negative redshifts return negative distances.
+    
+    cosmo: astropy.cosmology object
+    
+    Returns
+    -------
+    d: np.array
+        comoving distance in Mpc
+    """
+    
+    z = np.asarray(z, dtype=np.float64)
+    abs_z = np.fabs(z)
+    
+    if abs_z.size==0:
+        return np.zeros(z.shape)
+    
+    z_table, d_table = _get_distance_redshift_table(cosmo, zmax=np.max(abs_z))
+    
+    return np.sign(z)*np.interp(abs_z, z_table, d_table)
+
+
 def distant_observer_redshift(x, v, period=None, cosmo=None):
     """
     Calculate observed redshifts using the distant observer approximation.
@@ -28,7 +199,9 @@ def distant_observer_redshift(x, v, period=None, cosmo=None):
     z_cosmo = z*H0/c
     
     where z is the 'z' position, H0 is the Hubble constant at z=0, and c is the speed of
-    light.  Note that this is an approximation
+    light.  Note that this is an approximation.  If a cosmology is passed, the 
+    cosmological redshift is instead found by inverting the comoving distance-redshift 
+    relation (see `comoving_distance_to_redshift`).
     
     Parameters
     ----------
@@ -41,6 +214,10 @@ def distant_observer_redshift(x, v, period=None, cosmo=None):
     period: array_like, optional
         periodic boundary conditions of simulation box
     
+    cosmo: astropy.cosmology object, optional
+        if passed, the exact cosmological redshift is used in place of the linear 
+        approximation
+    
     Returns
     -------
     redshift: np.array
@@ -52,15 +229,22 @@ def distant_observer_redshift(x, v, period=None, cosmo=None):
     #get the peculiar velocity component along the line of sight direction (z direction)
     v_los = v[:,2]
     
-    #compute cosmological redshift (h=1, note that positions are in Mpc/h)
-    z_cos = x[:,2]*100.0/c_km_s
+    #compute cosmological redshift (note that positions are in Mpc/h)
+    if cosmo is None:
+        z_cos = x[:,2]*100.0/c_km_s
+    else:
+        z_cos = comoving_distance_to_redshift(x[:,2]/cosmo.h, cosmo)
     
     #redshift is combination of cosmological and peculiar velocities
     z = z_cos+(v_los/c_km_s)*(1.0+z_cos)
     
     #reflect galaxies around PBC
     if period is not None:
-        z_cos_max = period[2]*100.00/c_km_s #maximum cosmological redshift
+        #maximum cosmological redshift
+        if cosmo is None:
+            z_cos_max = period[2]*100.00/c_km_s
+        else:
+            z_cos_max = comoving_distance_to_redshift(period[2]/cosmo.h, cosmo)
         flip = (z > z_cos_max)
         z[flip] = z[flip] - z_cos_max
         flip = (z < 0.0)
@@ -113,10 +297,7 @@ def ra_dec_z(x, v, cosmo=None):
     vr = v[:,0]*st*cp + v[:,1]*st*sp + v[:,2]*ct
     
     #compute cosmological redshift and add contribution from perculiar velocity
-    yy = np.arange(0,1.0,0.001)
-    xx = cosmo.comoving_distance(yy).value
-    f = interp1d(xx, yy, kind='cubic')
-    z_cos = f(r)
+    z_cos = comoving_distance_to_redshift(r, cosmo)
     redshift = z_cos+(vr/c_km_s)*(1.0+z_cos)
 
     #calculate spherical coordinates
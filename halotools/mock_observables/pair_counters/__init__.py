@@ -3,4 +3,5 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 from .rect_cuboid_pairs import *
-from .objective_rect_cuboid_pairs import *
\ No newline at end of file
+from .objective_rect_cuboid_pairs import *
+from .neighbor_queries import *
@@ -21,7 +21,12 @@ __all__ = ['npairs_no_pbc', 'npairs_pbc', 'wnpairs_no_pbc', 'wnpairs_pbc',\
            'jnpairs_no_pbc', 'jnpairs_pbc',\
            'xy_z_npairs_no_pbc', 'xy_z_npairs_pbc', 'xy_z_wnpairs_no_pbc', 'xy_z_wnpairs_pbc',\
            'xy_z_jnpairs_no_pbc', 'xy_z_jnpairs_pbc',\
-           's_mu_npairs_no_pbc', 's_mu_npairs_pbc']
+           's_mu_npairs_no_pbc', 's_mu_npairs_pbc',\
+           'velocity_npairs_no_pbc', 'velocity_npairs_pbc',\
+           'npairs_per_point_no_pbc', 'npairs_per_point_pbc',\
+           'xy_z_npairs_per_point_no_pbc', 'xy_z_npairs_per_point_pbc',\
+           'nearest_neighbors_no_pbc', 'nearest_neighbors_pbc',\
+           'cylinder_isolation_no_pbc', 'cylinder_isolation_pbc']
 __author__=['Duncan Campbell']
 
 @cython.boundscheck(False)
@@ -740,6 +745,559 @@ def s_mu_npairs_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
     return counts
 
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def velocity_npairs_no_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                           np.ndarray[np.float64_t, ndim=1] y_icell1,
+                           np.ndarray[np.float64_t, ndim=1] z_icell1,
+                           np.ndarray[np.float64_t, ndim=1] vx_icell1,
+                           np.ndarray[np.float64_t, ndim=1] vy_icell1,
+                           np.ndarray[np.float64_t, ndim=1] vz_icell1,
+                           np.ndarray[np.float64_t, ndim=1] x_icell2,
+                           np.ndarray[np.float64_t, ndim=1] y_icell2,
+                           np.ndarray[np.float64_t, ndim=1] z_icell2,
+                           np.ndarray[np.float64_t, ndim=1] vx_icell2,
+                           np.ndarray[np.float64_t, ndim=1] vy_icell2,
+                           np.ndarray[np.float64_t, ndim=1] vz_icell2,
+                           np.ndarray[np.float64_t, ndim=1] rbins):
+    """
+    real-space pairwise velocity accumulator without periodic boundary conditions.
+    For pairs with separations less than or equal to rbins[i], calculate the number of 
+    pairs, and the sum and sum of squares of the radial and line-of-sight (z) relative 
+    velocities.  The relative velocity is v2-v1, and the radial component is positive 
+    for receding pairs.
+    """
+    
+    #c definitions
+    cdef int nbins = len(rbins)
+    cdef int nbins_minus_one = len(rbins) -1
+    cdef np.ndarray[np.float64_t, ndim=2] result = np.zeros((5,nbins), dtype=np.float64)
+    cdef double dx, dy, dz, d, v_r, v_los
+    cdef int i, j
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    
+    #loop over points in grid1's cells
+    for i in range(0,Ni):
+        #loop over points in grid2's cells
+        for j in range(0,Nj):
+            
+            #calculate the separation vector and square distance
+            dx = x_icell2[j] - x_icell1[i]
+            dy = y_icell2[j] - y_icell1[i]
+            dz = z_icell2[j] - z_icell1[i]
+            d = dx*dx+dy*dy+dz*dz
+            
+            if d>rbins[nbins_minus_one]: continue
+            
+            #calculate relative velocities
+            v_los = vz_icell2[j] - vz_icell1[i]
+            if d>0.0:
+                v_r = ((vx_icell2[j] - vx_icell1[i])*dx +\
+                       (vy_icell2[j] - vy_icell1[i])*dy +\
+                       v_los*dz)/sqrt(d)
+            else: v_r = 0.0
+            
+            #accumulate velocity moments in bins
+            radial_vbinning(<np.float64_t*> result.data,\
+                            <np.float64_t*> rbins.data, d, nbins_minus_one, nbins,\
+                            v_r, v_los)
+        
+    return result
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def velocity_npairs_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                        np.ndarray[np.float64_t, ndim=1] y_icell1,
+                        np.ndarray[np.float64_t, ndim=1] z_icell1,
+                        np.ndarray[np.float64_t, ndim=1] vx_icell1,
+                        np.ndarray[np.float64_t, ndim=1] vy_icell1,
+                        np.ndarray[np.float64_t, ndim=1] vz_icell1,
+                        np.ndarray[np.float64_t, ndim=1] x_icell2,
+                        np.ndarray[np.float64_t, ndim=1] y_icell2,
+                        np.ndarray[np.float64_t, ndim=1] z_icell2,
+                        np.ndarray[np.float64_t, ndim=1] vx_icell2,
+                        np.ndarray[np.float64_t, ndim=1] vy_icell2,
+                        np.ndarray[np.float64_t, ndim=1] vz_icell2,
+                        np.ndarray[np.float64_t, ndim=1] rbins,
+                        np.ndarray[np.float64_t, ndim=1] period):
+    """
+    real-space pairwise velocity accumulator with periodic boundary conditions (PBCs).
+    For pairs with separations less than or equal to rbins[i], calculate the number of 
+    pairs, and the sum and sum of squares of the radial and line-of-sight (z) relative 
+    velocities.  The relative velocity is v2-v1, and the radial component is positive 
+    for receding pairs.
+    """
+    
+    #c definitions
+    cdef int nbins = len(rbins)
+    cdef int nbins_minus_one = len(rbins) -1
+    cdef np.ndarray[np.float64_t, ndim=2] result = np.zeros((5,nbins), dtype=np.float64)
+    cdef double dx, dy, dz, d, v_r, v_los
+    cdef int i, j
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    
+    #loop over points in grid1's cells
+    for i in range(0,Ni):
+        #loop over points in grid2's cells
+        for j in range(0,Nj):
+            
+            #calculate the separation vector of the nearest periodic image
+            dx = x_icell2[j] - x_icell1[i]
+            if dx > period[0]/2.0: dx = dx - period[0]
+            elif dx < -period[0]/2.0: dx = dx + period[0]
+            dy = y_icell2[j] - y_icell1[i]
+            if dy > period[1]/2.0: dy = dy - period[1]
+            elif dy < -period[1]/2.0: dy = dy + period[1]
+            dz = z_icell2[j] - z_icell1[i]
+            if dz > period[2]/2.0: dz = dz - period[2]
+            elif dz < -period[2]/2.0: dz = dz + period[2]
+            d = dx*dx+dy*dy+dz*dz
+            
+            if d>rbins[nbins_minus_one]: continue
+            
+            #calculate relative velocities
+            v_los = vz_icell2[j] - vz_icell1[i]
+            if d>0.0:
+                v_r = ((vx_icell2[j] - vx_icell1[i])*dx +\
+                       (vy_icell2[j] - vy_icell1[i])*dy +\
+                       v_los*dz)/sqrt(d)
+            else: v_r = 0.0
+            
+            #accumulate velocity moments in bins
+            radial_vbinning(<np.float64_t*> result.data,\
+                            <np.float64_t*> rbins.data, d, nbins_minus_one, nbins,\
+                            v_r, v_los)
+        
+    return result
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def npairs_per_point_no_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                            np.ndarray[np.float64_t, ndim=1] y_icell1,
+                            np.ndarray[np.float64_t, ndim=1] z_icell1,
+                            np.ndarray[np.float64_t, ndim=1] x_icell2,
+                            np.ndarray[np.float64_t, ndim=1] y_icell2,
+                            np.ndarray[np.float64_t, ndim=1] z_icell2,
+                            np.ndarray[np.float64_t, ndim=1] rbins):
+    """
+    real-space per-point pair counter without periodic boundary conditions (no PBCs).
+    Calculate the number of points in cell 2 with separations less than or equal to 
+    rbins[k] for each point i in cell 1, returned as an Ni by len(rbins) array.
+    """
+    
+    #c definitions
+    cdef int nbins = len(rbins)
+    cdef int nbins_minus_one = len(rbins) -1
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    cdef np.ndarray[np.int_t, ndim=2] counts = np.zeros((Ni,nbins), dtype=np.int)
+    cdef double d
+    cdef int i, j
+    
+    #loop over points in grid1's cells
+    for i in range(0,Ni):
+        #loop over points in grid2's cells
+        for j in range(0,Nj):
+                        
+            #calculate the square distance
+            d = square_distance(x_icell1[i],y_icell1[i],z_icell1[i],\
+                                x_icell2[j],y_icell2[j],z_icell2[j])
+                        
+            #calculate counts in bins of point i
+            radial_binning((<np.int_t*> counts.data) + i*nbins,\
+                           <np.float64_t*> rbins.data, d, nbins_minus_one)
+        
+    return counts
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def npairs_per_point_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                         np.ndarray[np.float64_t, ndim=1] y_icell1,
+                         np.ndarray[np.float64_t, ndim=1] z_icell1,
+                         np.ndarray[np.float64_t, ndim=1] x_icell2,
+                         np.ndarray[np.float64_t, ndim=1] y_icell2,
+                         np.ndarray[np.float64_t, ndim=1] z_icell2,
+                         np.ndarray[np.float64_t, ndim=1] rbins,
+                         np.ndarray[np.float64_t, ndim=1] period):
+    """
+    real-space per-point pair counter with periodic boundary conditions (PBCs).
+    Calculate the number of points in cell 2 with separations less than or equal to 
+    rbins[k] for each point i in cell 1, returned as an Ni by len(rbins) array.
+    """
+    
+    #c definitions
+    cdef int nbins = len(rbins)
+    cdef int nbins_minus_one = len(rbins) -1
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    cdef np.ndarray[np.int_t, ndim=2] counts = np.zeros((Ni,nbins), dtype=np.int)
+    cdef double d
+    cdef int i, j
+    
+    #loop over points in grid1's cells
+    for i in range(0,Ni):
+        #loop over points in grid2's cells
+        for j in range(0,Nj):
+                        
+            #calculate the square distance
+            d = periodic_square_distance(x_icell1[i],y_icell1[i],z_icell1[i],\
+                                         x_icell2[j],y_icell2[j],z_icell2[j],\
+                                         <np.float64_t*> period.data)
+                        
+            #calculate counts in bins of point i
+            radial_binning((<np.int_t*> counts.data) + i*nbins,\
+                           <np.float64_t*> rbins.data, d, nbins_minus_one)
+        
+    return counts
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def xy_z_npairs_per_point_no_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                                 np.ndarray[np.float64_t, ndim=1] y_icell1,
+                                 np.ndarray[np.float64_t, ndim=1] z_icell1,
+                                 np.ndarray[np.float64_t, ndim=1] x_icell2,
+                                 np.ndarray[np.float64_t, ndim=1] y_icell2,
+                                 np.ndarray[np.float64_t, ndim=1] z_icell2,
+                                 np.ndarray[np.float64_t, ndim=1] rp_bins,
+                                 np.ndarray[np.float64_t, ndim=1] pi_bins):
+    """
+    2+1D per-point pair counter without periodic boundary conditions (no PBCs).
+    Calculate the number of points in cell 2 with separations in the x-y plane less than 
+    or equal to rp_bins[k], and separations in the z coordinate less than or equal to 
+    pi_bins[g] for each point i in cell 1, returned as an Ni by len(rp_bins) by 
+    len(pi_bins) array.
+    """
+    
+    #c definitions
+    cdef int nrp_bins = len(rp_bins)
+    cdef int npi_bins = len(pi_bins)
+    cdef int nrp_bins_minus_one = len(rp_bins) -1
+    cdef int npi_bins_minus_one = len(pi_bins) -1
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    cdef np.ndarray[np.int_t, ndim=3] counts =\
+        np.zeros((Ni, nrp_bins, npi_bins), dtype=np.int)
+    cdef double d_perp, d_para
+    cdef int i, j
+    
+    #loop over points in grid1's cell
+    for i in range(0,Ni):
+                
+        #loop over points in grid2's cell
+        for j in range(0,Nj):
+                    
+            #calculate the square distance
+            d_perp = perp_square_distance(x_icell1[i], y_icell1[i],\
+                                          x_icell2[j], y_icell2[j])
+            d_para = para_square_distance(z_icell1[i], z_icell2[j])
+                        
+            #calculate counts in bins of point i
+            xy_z_binning((<np.int_t*>counts.data) + i*nrp_bins*npi_bins,\
+                         <np.float64_t*>rp_bins.data,\
+                         <np.float64_t*>pi_bins.data,\
+                         d_perp, d_para, nrp_bins_minus_one, npi_bins_minus_one)
+        
+    return counts
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def xy_z_npairs_per_point_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                              np.ndarray[np.float64_t, ndim=1] y_icell1,
+                              np.ndarray[np.float64_t, ndim=1] z_icell1,
+                              np.ndarray[np.float64_t, ndim=1] x_icell2,
+                              np.ndarray[np.float64_t, ndim=1] y_icell2,
+                              np.ndarray[np.float64_t, ndim=1] z_icell2,
+                              np.ndarray[np.float64_t, ndim=1] rp_bins,
+                              np.ndarray[np.float64_t, ndim=1] pi_bins,
+                              np.ndarray[np.float64_t, ndim=1] period):
+    """
+    2+1D per-point pair counter with periodic boundary conditions (PBCs).
+    Calculate the number of points in cell 2 with separations in the x-y plane less than 
+    or equal to rp_bins[k], and separations in the z coordinate less than or equal to 
+    pi_bins[g] for each point i in cell 1, returned as an Ni by len(rp_bins) by 
+    len(pi_bins) array.
+    """
+    
+    #c definitions
+    cdef int nrp_bins = len(rp_bins)
+    cdef int npi_bins = len(pi_bins)
+    cdef int nrp_bins_minus_one = len(rp_bins) -1
+    cdef int npi_bins_minus_one = len(pi_bins) -1
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    cdef np.ndarray[np.int_t, ndim=3] counts =\
+        np.zeros((Ni, nrp_bins, npi_bins), dtype=np.int)
+    cdef double d_perp, d_para
+    cdef int i, j
+    
+    #loop over points in grid1's cell
+    for i in range(0,Ni):
+                
+        #loop over points in grid2's cell
+        for j in range(0,Nj):
+                    
+            #calculate the square distance
+            d_perp = periodic_perp_square_distance(x_icell1[i],y_icell1[i],\
+                                                   x_icell2[j],y_icell2[j],\
+                                                   <np.float64_t*>period.data)
+            d_para = periodic_para_square_distance(z_icell1[i],\
+                                                   z_icell2[j],\
+                                                   <np.float64_t*>period.data)
+                        
+            #calculate counts in bins of point i
+            xy_z_binning((<np.int_t*>counts.data) + i*nrp_bins*npi_bins,\
+                         <np.float64_t*>rp_bins.data,\
+                         <np.float64_t*>pi_bins.data,\
+                         d_perp, d_para, nrp_bins_minus_one, npi_bins_minus_one)
+        
+    return counts
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def nearest_neighbors_no_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                             np.ndarray[np.float64_t, ndim=1] y_icell1,
+                             np.ndarray[np.float64_t, ndim=1] z_icell1,
+                             np.ndarray[np.float64_t, ndim=1] x_icell2,
+                             np.ndarray[np.float64_t, ndim=1] y_icell2,
+                             np.ndarray[np.float64_t, ndim=1] z_icell2,
+                             np.ndarray[np.int_t, ndim=1] inds1,
+                             np.ndarray[np.int_t, ndim=1] inds2,
+                             int k, np.float64_t r_max_sq, int exclude_self):
+    """
+    real-space k-nearest neighbor search without periodic boundary conditions (no PBCs).
+    Calculate the square distances to the k nearest points in cell 2 within r_max of 
+    each point i in cell 1, returned as an Ni by k array sorted in increasing order.  
+    If exclude_self is non-zero, points with inds1[i]==inds2[j] are not neighbors.
+    """
+    
+    #c definitions
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    cdef np.ndarray[np.float64_t, ndim=2] d_sq = np.zeros((Ni,k), dtype=np.float64)+np.inf
+    cdef double d
+    cdef int i, j
+    
+    #loop over points in grid1's cells
+    for i in range(0,Ni):
+        #loop over points in grid2's cells
+        for j in range(0,Nj):
+            
+            if (exclude_self!=0) and (inds1[i]==inds2[j]):
+                continue
+            
+            #calculate the square distance
+            d = square_distance(x_icell1[i],y_icell1[i],z_icell1[i],\
+                                x_icell2[j],y_icell2[j],z_icell2[j])
+            
+            #keep the k smallest square distances of point i
+            if d<=r_max_sq:
+                insert_sorted((<np.float64_t*> d_sq.data) + i*k, d, k)
+    
+    return d_sq
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def nearest_neighbors_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                          np.ndarray[np.float64_t, ndim=1] y_icell1,
+                          np.ndarray[np.float64_t, ndim=1] z_icell1,
+                          np.ndarray[np.float64_t, ndim=1] x_icell2,
+                          np.ndarray[np.float64_t, ndim=1] y_icell2,
+                          np.ndarray[np.float64_t, ndim=1] z_icell2,
+                          np.ndarray[np.int_t, ndim=1] inds1,
+                          np.ndarray[np.int_t, ndim=1] inds2,
+                          int k, np.float64_t r_max_sq, int exclude_self,
+                          np.ndarray[np.float64_t, ndim=1] period):
+    """
+    real-space k-nearest neighbor search with periodic boundary conditions (PBCs).
+    Calculate the square distances to the k nearest points in cell 2 within r_max of 
+    each point i in cell 1, returned as an Ni by k array sorted in increasing order.  
+    If exclude_self is non-zero, points with inds1[i]==inds2[j] are not neighbors.
+    """
+    
+    #c definitions
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    cdef np.ndarray[np.float64_t, ndim=2] d_sq = np.zeros((Ni,k), dtype=np.float64)+np.inf
+    cdef double d
+    cdef int i, j
+    
+    #loop over points in grid1's cells
+    for i in range(0,Ni):
+        #loop over points in grid2's cells
+        for j in range(0,Nj):
+            
+            if (exclude_self!=0) and (inds1[i]==inds2[j]):
+                continue
+            
+            #calculate the square distance
+            d = periodic_square_distance(x_icell1[i],y_icell1[i],z_icell1[i],\
+                                         x_icell2[j],y_icell2[j],z_icell2[j],\
+                                         <np.float64_t*> period.data)
+            
+            #keep the k smallest square distances of point i
+            if d<=r_max_sq:
+                insert_sorted((<np.float64_t*> d_sq.data) + i*k, d, k)
+    
+    return d_sq
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def cylinder_isolation_no_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                              np.ndarray[np.float64_t, ndim=1] y_icell1,
+                              np.ndarray[np.float64_t, ndim=1] z_icell1,
+                              np.ndarray[np.float64_t, ndim=1] x_icell2,
+                              np.ndarray[np.float64_t, ndim=1] y_icell2,
+                              np.ndarray[np.float64_t, ndim=1] z_icell2,
+                              np.ndarray[np.float64_t, ndim=1] marks_icell1,
+                              np.ndarray[np.float64_t, ndim=1] marks_icell2,
+                              np.ndarray[np.int_t, ndim=1] inds1,
+                              np.ndarray[np.int_t, ndim=1] inds2,
+                              int condition, np.float64_t ratio,
+                              np.float64_t rp_max_sq, np.float64_t pi_max_sq,
+                              int exclude_self):
+    """
+    conditional cylinder isolation without periodic boundary conditions (no PBCs).
+    Point i in cell 1 is not isolated if a point j in cell 2 lies within the cylinder 
+    and satisfies the condition on the marks: marks_icell2[j] > ratio*marks_icell1[i] 
+    if condition==1, marks_icell2[j] < ratio*marks_icell1[i] if condition==2, and no 
+    condition if condition==0.  Returns a length Ni array, 1 for isolated points.
+    If exclude_self is non-zero, points with inds1[i]==inds2[j] are not compared.
+    """
+    
+    #c definitions
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    cdef np.ndarray[np.uint8_t, ndim=1] is_isolated = np.ones(Ni, dtype=np.uint8)
+    cdef double d_perp, d_para
+    cdef int i, j
+    
+    #loop over points in grid1's cells
+    for i in range(0,Ni):
+        #loop over points in grid2's cells
+        for j in range(0,Nj):
+            
+            if (exclude_self!=0) and (inds1[i]==inds2[j]):
+                continue
+            if not satisfies_condition(marks_icell1[i], marks_icell2[j], condition, ratio):
+                continue
+            
+            #calculate the square distances
+            d_perp = perp_square_distance(x_icell1[i],y_icell1[i],\
+                                          x_icell2[j],y_icell2[j])
+            d_para = para_square_distance(z_icell1[i],z_icell2[j])
+            
+            #one neighbor in the cylinder is enough
+            if (d_perp<rp_max_sq) and (d_para<pi_max_sq):
+                is_isolated[i] = 0
+                break
+    
+    return is_isolated
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def cylinder_isolation_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                           np.ndarray[np.float64_t, ndim=1] y_icell1,
+                           np.ndarray[np.float64_t, ndim=1] z_icell1,
+                           np.ndarray[np.float64_t, ndim=1] x_icell2,
+                           np.ndarray[np.float64_t, ndim=1] y_icell2,
+                           np.ndarray[np.float64_t, ndim=1] z_icell2,
+                           np.ndarray[np.float64_t, ndim=1] marks_icell1,
+                           np.ndarray[np.float64_t, ndim=1] marks_icell2,
+                           np.ndarray[np.int_t, ndim=1] inds1,
+                           np.ndarray[np.int_t, ndim=1] inds2,
+                           int condition, np.float64_t ratio,
+                           np.float64_t rp_max_sq, np.float64_t pi_max_sq,
+                           int exclude_self,
+                           np.ndarray[np.float64_t, ndim=1] period):
+    """
+    conditional cylinder isolation with periodic boundary conditions (PBCs).
+    Point i in cell 1 is not isolated if a point j in cell 2 lies within the cylinder 
+    and satisfies the condition on the marks: marks_icell2[j] > ratio*marks_icell1[i] 
+    if condition==1, marks_icell2[j] < ratio*marks_icell1[i] if condition==2, and no 
+    condition if condition==0.  Returns a length Ni array, 1 for isolated points.
+    If exclude_self is non-zero, points with inds1[i]==inds2[j] are not compared.
+    """
+    
+    #c definitions
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    cdef np.ndarray[np.uint8_t, ndim=1] is_isolated = np.ones(Ni, dtype=np.uint8)
+    cdef double d_perp, d_para
+    cdef int i, j
+    
+    #loop over points in grid1's cells
+    for i in range(0,Ni):
+        #loop over points in grid2's cells
+        for j in range(0,Nj):
+            
+            if (exclude_self!=0) and (inds1[i]==inds2[j]):
+                continue
+            if not satisfies_condition(marks_icell1[i], marks_icell2[j], condition, ratio):
+                continue
+            
+            #calculate the square distances
+            d_perp = periodic_perp_square_distance(x_icell1[i],y_icell1[i],\
+                                                   x_icell2[j],y_icell2[j],\
+                                                   <np.float64_t*>period.data)
+            d_para = periodic_para_square_distance(z_icell1[i],z_icell2[j],\
+                                                   <np.float64_t*>period.data)
+            
+            #one neighbor in the cylinder is enough
+            if (d_perp<rp_max_sq) and (d_para<pi_max_sq):
+                is_isolated[i] = 0
+                break
+    
+    return is_isolated
+
+
+cdef inline insert_sorted(np.float64_t* d_sq, np.float64_t d, np.int_t k):
+    """
+    insert d into the length k array d_sq sorted in increasing order, discarding the 
+    largest element.
+    """
+    cdef int m = k-1
+    if d>=d_sq[m]:
+        return
+    while (m>0) and (d_sq[m-1]>d):
+        d_sq[m] = d_sq[m-1]
+        m = m-1
+    d_sq[m] = d
+
+
+cdef inline bint satisfies_condition(np.float64_t mark1, np.float64_t mark2,\
+                                     np.int_t condition, np.float64_t ratio):
+    """
+    condition on the marks of a pair of points used by the isolation criteria.
+    """
+    if condition==1:
+        return mark2 > ratio*mark1
+    elif condition==2:
+        return mark2 < ratio*mark1
+    else:
+        return True
+
+
 cdef inline radial_binning(np.int_t* counts, np.float64_t* bins,\
                            np.float64_t d, np.int_t k):
     """
@@ -765,6 +1323,24 @@ cdef inline radial_wbinning(np.float64_t* counts, np.float64_t* bins,\
         if k<0: break
 
 
+cdef inline radial_vbinning(np.float64_t* result, np.float64_t* bins,\
+                            np.float64_t d, np.int_t k, np.int_t nbins,\
+                            np.float64_t v_r, np.float64_t v_los):
+    """
+    real space radial binning function for velocity moments.  result is a C-contiguous 
+    5 by nbins array storing the counts, sum(v_r), sum(v_r^2), sum(v_los), sum(v_los^2).
+    """
+    
+    while d<=bins[k]:
+        result[k] += 1.0
+        result[nbins+k] += v_r
+        result[2*nbins+k] += v_r*v_r
+        result[3*nbins+k] += v_los
+        result[4*nbins+k] += v_los*v_los
+        k=k-1
+        if k<0: break
+
+
 cdef inline radial_jbinning(np.float64_t* counts, np.float64_t* bins,\
                             np.float64_t d,\
                             np.int_t nbins_minus_one,\
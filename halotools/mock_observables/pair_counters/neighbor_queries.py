@@ -0,0 +1,484 @@
+# -*- coding: utf-8 -*-
+
+"""
+nearest neighbor and isolation criterion queries.
+
+This module contains functions that return a per-point result for each point in data1,
+e.g. the distances to the k nearest neighbors in data2, or whether a point has a
+neighbor in data2 satisfying some condition within a cylinder.  The searches are done
+over the same cell structure used by the pair counters.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+from time import time
+import sys
+import multiprocessing
+from functools import partial
+
+from .rect_cuboid import *
+from .rect_cuboid_pairs import _enclose_in_box
+from .cpairs import nearest_neighbors_no_pbc, nearest_neighbors_pbc,\
+                    cylinder_isolation_no_pbc, cylinder_isolation_pbc
+
+__all__=['nearest_neighbor_distances', 'conditional_cylinder_isolation']
+__author__=['Duncan Campbell', 'Andrew Hearin']
+
+#the grid is coarsened until it has at most this many cells, and at most one cell per
+#_min_points_per_cell points in data1, so that the time spent looping over cells does not
+#dominate the search when the search radius is small
+_max_num_cells = 1000000
+_min_points_per_cell = 16
+
+
+def nearest_neighbor_distances(data1, data2, r_max, k=1, Lbox=None, period=None,\
+                               exclude_self=False, verbose=False, N_threads=1):
+    """
+    real-space k-nearest neighbor search.
+
+    For each point in data1, find the distances to the k nearest points in data2 within
+    a maximum search radius r_max.
+
+    Parameters
+    ----------
+    data1: array_like
+        N1 by 3 numpy array of 3-dimensional positions. Should be between zero and
+        period.
+
+    data2: array_like
+        N2 by 3 numpy array of 3-dimensional positions. Should be between zero and
+        period.
+
+    r_max: float
+        maximum search radius.  Neighbors beyond r_max are not found.
+
+    k: int, optional
+        number of nearest neighbors to return.  Default is 1.
+
+    Lbox: array_like, optional
+        length of cube sides which encloses data1 and data2.
+
+    period: array_like, optional
+        length 3 array defining axis-aligned periodic boundary conditions. If only
+        one number, Lbox, is specified, period is assumed to be np.array([Lbox]*3).
+        If none, PBCs are set to infinity.  If True, period is set to be Lbox
+
+    exclude_self: Boolean, optional
+        If True, data1 and data2 are taken to be the same sample, and point i in data1 is
+        not counted as a neighbor of itself, i.e. of point i in data2.  Default is False.
+
+    verbose: Boolean, optional
+        If True, print out information and progress.
+
+    N_threads: int, optional
+        number of 'threads' to use in the search.  if set to 'max', use all
+        available cores.  N_threads=0 is the default.
+
+    Returns
+    -------
+    distances : np.array
+        N1 by k array of the distances to the k nearest neighbors of each point in data1,
+        sorted in increasing order.  If fewer than k neighbors are found within r_max,
+        the remaining distances are set to np.inf.
+    """
+
+    if N_threads is not 1:
+        if N_threads=='max':
+            N_threads = multiprocessing.cpu_count()
+        if isinstance(N_threads,int):
+            pool = multiprocessing.Pool(N_threads)
+        else: return ValueError("N_threads argument must be an integer number or 'max'")
+
+    #process input
+    data1 = np.array(data1)
+    data2 = np.array(data2)
+    k = int(k)
+    if np.all(period==np.inf): period=None
+
+    #enforce shape requirements on input
+    if (np.shape(data1)[1]!=3) | (data1.ndim>2):
+        raise ValueError("data1 must be of shape (Npts,3)")
+    if (np.shape(data2)[1]!=3) | (data2.ndim>2):
+        raise ValueError("data2 must be of shape (Npts,3)")
+    if k<1:
+        raise ValueError("k must be a positive integer")
+    if (exclude_self==True) & (len(data1)!=len(data2)):
+        raise ValueError("data1 and data2 must be the same length if exclude_self is True")
+
+    #process Lbox parameter
+    if (Lbox is None) & (period is None): 
+        data1, data2, Lbox = _enclose_in_box(data1, data2)
+    elif (Lbox is None) & (period is not None):
+        Lbox = period
+    elif np.shape(Lbox)==():
+        Lbox = np.array([Lbox]*3)
+    elif np.shape(Lbox)==(1,):
+        Lbox = np.array([Lbox[0]]*3)
+    else: Lbox = np.array(Lbox)
+    if np.shape(Lbox) != (3,):
+        raise ValueError("Lbox must be an array of length 3, or number indicating the \
+                          length of one side of a cube")
+    
+    #are we working with periodic boundary conditions (PBCs)?
+    if period is None: 
+        PBCs = False
+    elif np.shape(period) == (3,):
+        PBCs = True
+        if np.any(period!=Lbox):
+            raise ValueError("period must == Lbox") 
+    elif np.shape(period) == (1,):
+        period = np.array([period[0]]*3)
+        PBCs = True
+        if np.any(period!=Lbox):
+            raise ValueError("period must == Lbox") 
+    elif isinstance(period, (int, long, float, complex)):
+        period = np.array([period]*3)
+        PBCs = True
+        if np.any(period!=Lbox):
+            raise ValueError("period must == Lbox") 
+    elif (period == True) & (Lbox is not None):
+        PBCs = True
+        period = Lbox
+    elif (period == True) & (Lbox is None):
+        raise ValueError("If period is set to True, Lbox must be defined.")
+    else: PBCs=True
+    if PBCs==True:
+        period = np.asarray(period, dtype=np.float64)
+
+    #check to see we dont find neighbors more than once
+    if (PBCs==True) & np.any(r_max>Lbox/2.0):
+        raise ValueError('cannot search for neighbors with seperations \
+                          larger than Lbox/2 with PBCs')
+
+    #build grids for data1 and data2
+    cell_size = _choose_cell_size(Lbox, np.array([r_max]*3), len(data1))
+    grid1 = rect_cuboid_cells(data1[:,0], data1[:,1], data1[:,2], Lbox, cell_size)
+    grid2 = rect_cuboid_cells(data2[:,0], data2[:,1], data2[:,2], Lbox, cell_size)
+
+    #print come information
+    if verbose==True:
+        print("running neighbor search with {0} by {1} points".format(len(data1),len(data2)))
+        print("cell size= {0}".format(grid1.dL))
+        print("number of cells = {0}".format(np.prod(grid1.num_divs)))
+
+    #number of cells
+    Ncell1 = np.prod(grid1.num_divs)
+
+    #create a function to call with only one argument
+    engine = partial(_nearest_neighbor_engine, grid1, grid2, k, r_max**2.0, period, PBCs,\
+                     exclude_self)
+
+    #do the search
+    if N_threads>1:
+        result = pool.map(engine,range(Ncell1))
+        pool.close()
+    if N_threads==1:
+        result = list(map(engine,range(Ncell1)))
+
+    #place the result of each cell into the output in the original order of data1
+    distances = np.empty((len(data1), k), dtype=np.float64)
+    for inds, d in result:
+        distances[inds,:] = d
+
+    return distances
+
+
+def _nearest_neighbor_engine(grid1, grid2, k, r_max_sq, period, PBCs, exclude_self,\
+                             icell1):
+    """
+    search engine for nearest_neighbor_distances function.
+    """
+
+    inds1 = grid1.idx_sorted[grid1.slice_array[icell1]]
+    if len(inds1)==0:
+        return inds1, np.zeros((0,k))
+
+    #extract the points in the cell and in the neighboring cells
+    x_icell1, y_icell1, z_icell1 = (grid1.x[grid1.slice_array[icell1]],\
+                                    grid1.y[grid1.slice_array[icell1]],\
+                                    grid1.z[grid1.slice_array[icell1]])
+    x_icell2, y_icell2, z_icell2, inds2 = _adjacent_cell_points(grid1, grid2, icell1)
+
+    #find the k smallest square separations
+    if PBCs==True:
+        d_sq = nearest_neighbors_pbc(x_icell1, y_icell1, z_icell1,\
+                                     x_icell2, y_icell2, z_icell2,\
+                                     inds1, inds2, k, r_max_sq, int(exclude_self),\
+                                     period)
+    else:
+        d_sq = nearest_neighbors_no_pbc(x_icell1, y_icell1, z_icell1,\
+                                        x_icell2, y_icell2, z_icell2,\
+                                        inds1, inds2, k, r_max_sq, int(exclude_self))
+
+    return inds1, np.sqrt(d_sq)
+
+
+def conditional_cylinder_isolation(data1, data2, rp_max, pi_max, marks1, marks2,\
+                                   condition='greater', ratio=1.0, Lbox=None, period=None,\
+                                   exclude_self=False, verbose=False, N_threads=1):
+    """
+    conditional isolation criterion in cylinders.
+
+    A point in data1 is isolated if there are no points in data2 within a cylinder of
+    projected radius rp_max and half-length pi_max that satisfy a condition on their
+    marks.  The first two dimensions define the plane for perpendicular distances, and
+    the third dimension is used for parallel distances.  i.e. x,y positions are on the
+    plane of the sky, and z is the redshift coordinate.
+
+    For example, galaxies with no brighter neighbor within a projected distance R and a
+    velocity difference V are found by passing positions in redshift space, pi_max equal
+    to V in distance units, and luminosities as the marks with condition='greater'.
+
+    Parameters
+    ----------
+    data1: array_like
+        N1 by 3 numpy array of 3-dimensional positions. Should be between zero and
+        period.
+
+    data2: array_like
+        N2 by 3 numpy array of 3-dimensional positions. Should be between zero and
+        period.
+
+    rp_max: float
+        radius of the cylinder in the perpendicular direction.
+
+    pi_max: float
+        half-length of the cylinder in the parallel direction.
+
+    marks1: array_like
+        length N1 array of marks, e.g. stellar mass, of the points in data1
+
+    marks2: array_like
+        length N2 array of marks of the points in data2
+
+    condition: string, optional
+        If 'greater', point j in data2 violates the isolation of point i in data1 if
+        marks2[j] > ratio*marks1[i].  If 'less', point j in data2 violates the isolation
+        of point i in data1 if marks2[j] < ratio*marks1[i].  If None, any point in the
+        cylinder violates the isolation.  Default is 'greater'.
+
+    ratio: float, optional
+        ratio applied to marks1 in the condition, e.g. a mass ratio.  Default is 1.
+
+    Lbox: array_like, optional
+        length of cube sides which encloses data1 and data2.
+
+    period: array_like, optional
+        length 3 array defining axis-aligned periodic boundary conditions. If only
+        one number, Lbox, is specified, period is assumed to be np.array([Lbox]*3).
+        If none, PBCs are set to infinity.  If True, period is set to be Lbox
+
+    exclude_self: Boolean, optional
+        If True, data1 and data2 are taken to be the same sample, and point i in data1 is
+        not compared to itself, i.e. to point i in data2.  Default is False.
+
+    verbose: Boolean, optional
+        If True, print out information and progress.
+
+    N_threads: int, optional
+        number of 'threads' to use in the search.  if set to 'max', use all
+        available cores.  N_threads=0 is the default.
+
+    Returns
+    -------
+    is_isolated : np.array
+        length N1 boolean array, True for points in data1 that are isolated.
+
+    Notes
+    -----
+    Points are inside the cylinder if their projected separation is < rp_max and their
+    parallel separation is < pi_max.
+    """
+
+    if N_threads is not 1:
+        if N_threads=='max':
+            N_threads = multiprocessing.cpu_count()
+        if isinstance(N_threads,int):
+            pool = multiprocessing.Pool(N_threads)
+        else: return ValueError("N_threads argument must be an integer number or 'max'")
+
+    #process input
+    data1 = np.array(data1)
+    data2 = np.array(data2)
+    marks1 = np.asarray(marks1, dtype=np.float64)
+    marks2 = np.asarray(marks2, dtype=np.float64)
+    if np.all(period==np.inf): period=None
+
+    #enforce shape requirements on input
+    if (np.shape(data1)[1]!=3) | (data1.ndim>2):
+        raise ValueError("data1 must be of shape (Npts,3)")
+    if (np.shape(data2)[1]!=3) | (data2.ndim>2):
+        raise ValueError("data2 must be of shape (Npts,3)")
+    if np.shape(marks1)!=(len(data1),):
+        raise ValueError("marks1 must be a 1D array of the same length as data1")
+    if np.shape(marks2)!=(len(data2),):
+        raise ValueError("marks2 must be a 1D array of the same length as data2")
+    if condition not in ['greater', 'less', None]:
+        raise ValueError("condition must be 'greater', 'less', or None")
+    if (exclude_self==True) & (len(data1)!=len(data2)):
+        raise ValueError("data1 and data2 must be the same length if exclude_self is True")
+
+    #process Lbox parameter
+    if (Lbox is None) & (period is None): 
+        data1, data2, Lbox = _enclose_in_box(data1, data2)
+    elif (Lbox is None) & (period is not None):
+        Lbox = period
+    elif np.shape(Lbox)==():
+        Lbox = np.array([Lbox]*3)
+    elif np.shape(Lbox)==(1,):
+        Lbox = np.array([Lbox[0]]*3)
+    else: Lbox = np.array(Lbox)
+    if np.shape(Lbox) != (3,):
+        raise ValueError("Lbox must be an array of length 3, or number indicating the \
+                          length of one side of a cube")
+    
+    #are we working with periodic boundary conditions (PBCs)?
+    if period is None: 
+        PBCs = False
+    elif np.shape(period) == (3,):
+        PBCs = True
+        if np.any(period!=Lbox):
+            raise ValueError("period must == Lbox") 
+    elif np.shape(period) == (1,):
+        period = np.array([period[0]]*3)
+        PBCs = True
+        if np.any(period!=Lbox):
+            raise ValueError("period must == Lbox") 
+    elif isinstance(period, (int, long, float, complex)):
+        period = np.array([period]*3)
+        PBCs = True
+        if np.any(period!=Lbox):
+            raise ValueError("period must == Lbox") 
+    elif (period == True) & (Lbox is not None):
+        PBCs = True
+        period = Lbox
+    elif (period == True) & (Lbox is None):
+        raise ValueError("If period is set to True, Lbox must be defined.")
+    else: PBCs=True
+    if PBCs==True:
+        period = np.asarray(period, dtype=np.float64)
+
+    #check to see we dont find neighbors more than once
+    search_size = np.array([rp_max, rp_max, pi_max])
+    if (PBCs==True) & np.any(search_size>Lbox/2.0):
+        raise ValueError('cannot search for neighbors with seperations \
+                          larger than Lbox/2 with PBCs')
+
+    #build grids for data1 and data2
+    cell_size = _choose_cell_size(Lbox, search_size, len(data1))
+    grid1 = rect_cuboid_cells(data1[:,0], data1[:,1], data1[:,2], Lbox, cell_size)
+    grid2 = rect_cuboid_cells(data2[:,0], data2[:,1], data2[:,2], Lbox, cell_size)
+
+    #print come information
+    if verbose==True:
+        print("running isolation search with {0} by {1} points".format(len(data1),len(data2)))
+        print("cell size= {0}".format(grid1.dL))
+        print("number of cells = {0}".format(np.prod(grid1.num_divs)))
+
+    #number of cells
+    Ncell1 = np.prod(grid1.num_divs)
+
+    #create a function to call with only one argument
+    engine = partial(_conditional_cylinder_isolation_engine, grid1, grid2, marks1, marks2,\
+                     condition, ratio, rp_max**2.0, pi_max**2.0, period, PBCs, exclude_self)
+
+    #do the search
+    if N_threads>1:
+        result = pool.map(engine,range(Ncell1))
+        pool.close()
+    if N_threads==1:
+        result = list(map(engine,range(Ncell1)))
+
+    #place the result of each cell into the output in the original order of data1
+    is_isolated = np.ones(len(data1), dtype=bool)
+    for inds, iso in result:
+        is_isolated[inds] = iso
+
+    return is_isolated
+
+
+def _conditional_cylinder_isolation_engine(grid1, grid2, marks1, marks2, condition, ratio,\
+                                           rp_max_sq, pi_max_sq, period, PBCs,\
+                                           exclude_self, icell1):
+    """
+    search engine for conditional_cylinder_isolation function.
+    """
+
+    inds1 = grid1.idx_sorted[grid1.slice_array[icell1]]
+    if len(inds1)==0:
+        return inds1, np.ones(0, dtype=bool)
+
+    #extract the points in the cell and in the neighboring cells
+    x_icell1, y_icell1, z_icell1 = (grid1.x[grid1.slice_array[icell1]],\
+                                    grid1.y[grid1.slice_array[icell1]],\
+                                    grid1.z[grid1.slice_array[icell1]])
+    x_icell2, y_icell2, z_icell2, inds2 = _adjacent_cell_points(grid1, grid2, icell1)
+
+    condition_code = {None:0, 'greater':1, 'less':2}[condition]
+
+    if PBCs==True:
+        is_isolated = cylinder_isolation_pbc(x_icell1, y_icell1, z_icell1,\
+                                             x_icell2, y_icell2, z_icell2,\
+                                             marks1[inds1], marks2[inds2], inds1, inds2,\
+                                             condition_code, ratio, rp_max_sq, pi_max_sq,\
+                                             int(exclude_self), period)
+    else:
+        is_isolated = cylinder_isolation_no_pbc(x_icell1, y_icell1, z_icell1,\
+                                                x_icell2, y_icell2, z_icell2,\
+                                                marks1[inds1], marks2[inds2], inds1, inds2,\
+                                                condition_code, ratio, rp_max_sq, pi_max_sq,\
+                                                int(exclude_self))
+
+    return inds1, is_isolated.astype(bool)
+
+
+def _adjacent_cell_points(grid1, grid2, icell1):
+    """
+    gather the points of grid2 in the cells neighboring cell icell1 of grid1.
+
+    Returns
+    -------
+    x_icell2, y_icell2, z_icell2 : np.array
+        positions of the points in the neighboring cells.
+
+    inds2 : np.array
+        indices into the original (unsorted) data2 of the points in the neighboring cells.
+    """
+
+    #get the list of neighboring cells
+    ix1, iy1, iz1 = np.unravel_index(icell1,(grid1.num_divs[0],\
+                                             grid1.num_divs[1],\
+                                             grid1.num_divs[2]))
+    adj_cell_arr = grid1.adjacent_cells(ix1, iy1, iz1)
+
+    #extract the points in the neighboring cells
+    slices = [grid2.slice_array[icell2] for icell2 in adj_cell_arr]
+    x_icell2 = np.concatenate([grid2.x[s] for s in slices])
+    y_icell2 = np.concatenate([grid2.y[s] for s in slices])
+    z_icell2 = np.concatenate([grid2.z[s] for s in slices])
+    inds2 = np.concatenate([grid2.idx_sorted[s] for s in slices]).astype(np.int_)
+
+    return x_icell2, y_icell2, z_icell2, inds2
+
+
+def _choose_cell_size(Lbox, search_size, Npts):
+    """
+    choose the cell size along each dimension.  Cells must be at least as large as the
+    search size, so that all neighbors lie in the adjacent cells.  The cells are enlarged
+    if the grid would have more than min(_max_num_cells, Npts/_min_points_per_cell)
+    cells, since the cost of looping over very many sparsely populated cells exceeds the
+    cost of the additional distance evaluations.
+    """
+
+    cell_size = np.array(search_size, dtype=np.float64)
+    #cell shouldn't be bigger than the box
+    cell_size = np.minimum(cell_size, Lbox)
+
+    max_num_cells = max(27, min(_max_num_cells, Npts//_min_points_per_cell))
+    num_cells = np.prod(np.floor(Lbox/cell_size))
+    if num_cells>max_num_cells:
+        cell_size = np.minimum(cell_size*(num_cells/max_num_cells)**(1.0/3.0), Lbox)
+
+    return cell_size
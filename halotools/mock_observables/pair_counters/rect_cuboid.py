@@ -36,9 +36,14 @@ class rect_cuboid_cells():
         
         #build grid tree
         idx_sorted, slice_array = self.compute_cell_structure(x, y, z)
-        self.x = np.ascontiguousarray(x[idx_sorted],dtype=np.float64)
-        self.y = np.ascontiguousarray(y[idx_sorted],dtype=np.float64)
-        self.z = np.ascontiguousarray(z[idx_sorted],dtype=np.float64)
+        if self.presorted:
+            self.x = np.ascontiguousarray(x,dtype=np.float64)
+            self.y = np.ascontiguousarray(y,dtype=np.float64)
+            self.z = np.ascontiguousarray(z,dtype=np.float64)
+        else:
+            self.x = np.ascontiguousarray(x[idx_sorted],dtype=np.float64)
+            self.y = np.ascontiguousarray(y[idx_sorted],dtype=np.float64)
+            self.z = np.ascontiguousarray(z[idx_sorted],dtype=np.float64)
         self.slice_array = slice_array
         self.idx_sorted = idx_sorted
 
@@ -87,6 +92,11 @@ class rect_cuboid_cells():
         in-place, and then access the sorted arrays with the relevant slice_array element. 
         This is the strategy used in the `retrieve_tree` method. 
 
+        If the input points are already sorted by cellID, e.g., halo catalogs stored 
+        with the same subvolume ordering by `~halotools.sim_manager.spatial_index`, 
+        the argsort is skipped, `idx_sorted` is the identity permutation, 
+        and the ``presorted`` attribute is set to True. 
+
         """
 
         ix = np.floor(x/self.dL[0]).astype(int)
@@ -106,9 +116,16 @@ class rect_cuboid_cells():
                                                 self.num_divs[1],\
                                                 self.num_divs[2]))
         
-        idx_sorted = np.argsort(particle_indices)
-        bin_indices = np.searchsorted(particle_indices[idx_sorted], 
-                                      np.arange(np.prod(self.num_divs)))
+        #checking the order is much cheaper than sorting
+        self.presorted = bool(np.all(particle_indices[1:] >= particle_indices[:-1]))
+        if self.presorted:
+            idx_sorted = np.arange(len(particle_indices))
+            bin_indices = np.searchsorted(particle_indices, 
+                                          np.arange(np.prod(self.num_divs)))
+        else:
+            idx_sorted = np.argsort(particle_indices)
+            bin_indices = np.searchsorted(particle_indices[idx_sorted], 
+                                          np.arange(np.prod(self.num_divs)))
         bin_indices = np.append(bin_indices, None)
         
         slice_array = np.empty(np.prod(self.num_divs), dtype=object)
@@ -17,15 +17,18 @@ from time import time
 import sys
 import multiprocessing
 from functools import partial
+from scipy.sparse import csr_matrix
 
 from .rect_cuboid import *
 from .cpairs import *
 
-__all__=['npairs', 'wnpairs', 'jnpairs', 'xy_z_npairs', 'xy_z_wnpairs', 'xy_z_jnpairs']
+__all__=['npairs', 'wnpairs', 'jnpairs', 'xy_z_npairs', 'xy_z_wnpairs', 'xy_z_jnpairs',\
+         'velocity_npairs']
 __author__=['Duncan Campbell']
 
 
-def npairs(data1, data2, rbins, Lbox=None, period=None, verbose=False, N_threads=1):
+def npairs(data1, data2, rbins, Lbox=None, period=None, verbose=False, N_threads=1,\
+           per_point=False, sparse=False, pool=None):
     """
     real-space pair counter.
     
@@ -60,17 +63,33 @@ def npairs(data1, data2, rbins, Lbox=None, period=None, verbose=False, N_threads
         number of 'threads' to use in the pair counting.  if set to 'max', use all 
         available cores.  N_threads=0 is the default.
     
+    per_point: Boolean, optional
+        If True, return the number of pairs for each point in data1 instead of the total.
+    
+    sparse: Boolean, optional
+        If True, and per_point is True, return the per-point counts as a sparse matrix.
+        This is useful when len(data1) is large and most points have no pairs.
+    
+    pool: multiprocessing.Pool, optional
+        pool of worker processes used to count the pairs, e.g. shared between many 
+        calls to npairs.  If passed, N_threads is ignored and the pool is left open.
+    
     Returns
     -------
     N_pairs : array of length len(rbins)
-        number of pairs
+        number of pairs.  If per_point is True, N_pairs is an N1 by len(rbins) array 
+        where N_pairs[i,k] is the number of points in data2 with 
+        distance(data1[i], x2) <= rbins[k].  If sparse is also True, N_pairs is a 
+        scipy.sparse.csr_matrix of the same shape.
     """
     
-    if N_threads is not 1:
+    close_pool = False
+    if (pool is None) & (N_threads is not 1):
         if N_threads=='max':
             N_threads = multiprocessing.cpu_count()
         if isinstance(N_threads,int):
             pool = multiprocessing.Pool(N_threads)
+            close_pool = True
         else: return ValueError("N_threads argument must be an integer number or 'max'")
     
     #process input
@@ -86,6 +105,8 @@ def npairs(data1, data2, rbins, Lbox=None, period=None, verbose=False, N_threads
         raise ValueError("data2 must be of shape (Npts,3)")
     if rbins.ndim != 1:
         raise ValueError("rbins must be a 1D array")
+    if (sparse==True) & (per_point==False):
+        raise ValueError("sparse output is only available if per_point is True")
     
     #process Lbox parameter
     if (Lbox is None) & (period is None): 
@@ -147,14 +168,25 @@ def npairs(data1, data2, rbins, Lbox=None, period=None, verbose=False, N_threads
     #number of cells
     Ncell1 = np.prod(grid1.num_divs)
     
+    #count pairs for each point in data1
+    if per_point==True:
+        engine = partial(_npairs_per_point_engine, grid1, grid2, rbins, period, PBCs,\
+                         sparse)
+        if pool is not None:
+            result = pool.map(engine,range(Ncell1))
+            if close_pool: pool.close()
+        else:
+            result = list(map(engine,range(Ncell1)))
+        return _assemble_per_point_counts(result, grid1, (len(rbins),), sparse)
+    
     #create a function to call with only one argument
     engine = partial(_npairs_engine, grid1, grid2, rbins, period, PBCs)
     
     #do the pair counting
-    if N_threads>1:
+    if pool is not None:
         counts = np.sum(pool.map(engine,range(Ncell1)),axis=0)
-        pool.close()
-    if N_threads==1:
+        if close_pool: pool.close()
+    else:
         counts = np.sum(map(engine,range(Ncell1)),axis=0)
 
 
@@ -200,6 +232,46 @@ def _npairs_engine(grid1, grid2, rbins, period, PBCs, icell1):
     return counts
 
 
+def _npairs_per_point_engine(grid1, grid2, rbins, period, PBCs, sparse, icell1):
+    """
+    per-point pair counting engine for npairs function.  This code calls a cython 
+    function.
+    """
+    
+    #extract the points in the cell
+    x_icell1, y_icell1, z_icell1 = (grid1.x[grid1.slice_array[icell1]],\
+                                    grid1.y[grid1.slice_array[icell1]],\
+                                    grid1.z[grid1.slice_array[icell1]])
+    
+    counts = np.zeros((len(x_icell1),len(rbins)), dtype=int)
+    
+    #get the list of neighboring cells
+    ix1, iy1, iz1 = np.unravel_index(icell1,(grid1.num_divs[0],\
+                                             grid1.num_divs[1],\
+                                             grid1.num_divs[2]))
+    adj_cell_arr = grid1.adjacent_cells(ix1, iy1, iz1)
+            
+    #Loop over each of the (up to) 27 subvolumes neighboring, including the current cell.
+    for icell2 in adj_cell_arr:
+                
+        #extract the points in the cell
+        x_icell2 = grid2.x[grid2.slice_array[icell2]]
+        y_icell2 = grid2.y[grid2.slice_array[icell2]]
+        z_icell2 = grid2.z[grid2.slice_array[icell2]]
+            
+        #use cython functions to do pair counting
+        if PBCs==False:
+            counts += npairs_per_point_no_pbc(x_icell1, y_icell1, z_icell1,\
+                                              x_icell2, y_icell2, z_icell2,\
+                                              rbins)
+        else: #PBCs==True
+            counts += npairs_per_point_pbc(x_icell1, y_icell1, z_icell1,\
+                                           x_icell2, y_icell2, z_icell2,\
+                                           rbins, period)
+    
+    return _compress_per_point_counts(counts, sparse)
+
+
 
 def wnpairs(data1, data2, rbins, Lbox=None, period=None, weights1=None, weights2=None,\
             verbose=False, N_threads=1):
@@ -672,7 +744,8 @@ def _jnpairs_engine(grid1, grid2, weights1, weights2, jtags1, jtags2, N_samples,
     return counts
 
 
-def xy_z_npairs(data1, data2, rp_bins, pi_bins, Lbox=None, period=None, verbose=False, N_threads=1):
+def xy_z_npairs(data1, data2, rp_bins, pi_bins, Lbox=None, period=None, verbose=False,\
+                N_threads=1, per_point=False, sparse=False):
     """
     real-space pair counter.
     
@@ -711,10 +784,21 @@ def xy_z_npairs(data1, data2, rp_bins, pi_bins, Lbox=None, period=None, verbose=
         number of 'threads' to use in the pair counting.  if set to 'max', use all 
         available cores.  N_threads=0 is the default.
     
+    per_point: Boolean, optional
+        If True, return the number of pairs for each point in data1 instead of the total.
+    
+    sparse: Boolean, optional
+        If True, and per_point is True, return the per-point counts as a sparse matrix.
+        This is useful when len(data1) is large and most points have no pairs.
+    
     Returns
     -------
     N_pairs : array of length len(rbins)
-        number of pairs
+        number of pairs.  If per_point is True, N_pairs is an N1 by len(rp_bins) by 
+        len(pi_bins) array of the counts for each point in data1.  If sparse is also 
+        True, N_pairs is a scipy.sparse.csr_matrix of shape 
+        (N1, len(rp_bins)*len(pi_bins)), i.e. the last two axes are flattened in 
+        C order.
     """
     
     if N_threads is not 1:
@@ -740,6 +824,8 @@ def xy_z_npairs(data1, data2, rp_bins, pi_bins, Lbox=None, period=None, verbose=
         raise ValueError("rp_bins must be a 1D array")
     if pi_bins.ndim != 1:
         raise ValueError("pi_bins must be a 1D array")
+    if (sparse==True) & (per_point==False):
+        raise ValueError("sparse output is only available if per_point is True")
     
     #process Lbox parameter
     if (Lbox is None) & (period is None): 
@@ -805,6 +891,18 @@ def xy_z_npairs(data1, data2, rp_bins, pi_bins, Lbox=None, period=None, verbose=
     #number of cells
     Ncell1 = np.prod(grid1.num_divs)
     
+    #count pairs for each point in data1
+    if per_point==True:
+        engine = partial(_xy_z_npairs_per_point_engine, grid1, grid2, rp_bins, pi_bins,\
+                         period, PBCs, sparse)
+        if N_threads>1:
+            result = pool.map(engine,range(Ncell1))
+            pool.close()
+        if N_threads==1:
+            result = list(map(engine,range(Ncell1)))
+        return _assemble_per_point_counts(result, grid1, (len(rp_bins),len(pi_bins)),\
+                                          sparse)
+    
     #create a function to call with only one argument
     engine = partial(_xy_z_npairs_engine, grid1, grid2, rp_bins, pi_bins, period, PBCs)
     
@@ -856,6 +954,107 @@ def _xy_z_npairs_engine(grid1, grid2, rp_bins, pi_bins, period, PBCs, icell1):
     return counts
 
 
+def _xy_z_npairs_per_point_engine(grid1, grid2, rp_bins, pi_bins, period, PBCs, sparse,\
+                                  icell1):
+    """
+    per-point pair counting engine for xy_z_npairs function.  This code calls a cython 
+    function.
+    """
+    
+    #extract the points in the cell
+    x_icell1, y_icell1, z_icell1 = (grid1.x[grid1.slice_array[icell1]],\
+                                    grid1.y[grid1.slice_array[icell1]],\
+                                    grid1.z[grid1.slice_array[icell1]])
+    
+    counts = np.zeros((len(x_icell1),len(rp_bins),len(pi_bins)), dtype=int)
+    
+    #get the list of neighboring cells
+    ix1, iy1, iz1 = np.unravel_index(icell1,(grid1.num_divs[0],\
+                                             grid1.num_divs[1],\
+                                             grid1.num_divs[2]))
+    adj_cell_arr = grid1.adjacent_cells(ix1, iy1, iz1)
+            
+    #Loop over each of the (up to) 27 subvolumes neighboring, including the current cell.
+    for icell2 in adj_cell_arr:
+                
+        #extract the points in the cell
+        x_icell2 = grid2.x[grid2.slice_array[icell2]]
+        y_icell2 = grid2.y[grid2.slice_array[icell2]]
+        z_icell2 = grid2.z[grid2.slice_array[icell2]]
+            
+        #use cython functions to do pair counting
+        if PBCs==False:
+            counts += xy_z_npairs_per_point_no_pbc(x_icell1, y_icell1, z_icell1,\
+                                                   x_icell2, y_icell2, z_icell2,\
+                                                   rp_bins, pi_bins)
+        else: #PBCs==True
+            counts += xy_z_npairs_per_point_pbc(x_icell1, y_icell1, z_icell1,\
+                                                x_icell2, y_icell2, z_icell2,\
+                                                rp_bins, pi_bins, period)
+    
+    return _compress_per_point_counts(counts, sparse)
+
+
+def _compress_per_point_counts(counts, sparse):
+    """
+    flatten the per-point counts of a cell to 2D.  If sparse is True, only return the 
+    non-zero elements as (row, column, value) arrays.
+    """
+    
+    #cells without any points have len(counts)==0, so the number of columns can not
+    #be inferred by reshape and is given explicitly.
+    counts = counts.reshape((len(counts), int(np.prod(counts.shape[1:]))))
+    
+    if sparse==True:
+        rows, cols = np.nonzero(counts)
+        return rows, cols, counts[rows,cols]
+    else:
+        return counts
+
+
+def _assemble_per_point_counts(result, grid1, bins_shape, sparse):
+    """
+    combine the per-point counts of each cell into one array in the original order 
+    of data1.
+    
+    Parameters
+    ----------
+    result : list
+        result of the per-point engine for each cell of grid1
+    
+    grid1 : rect_cuboid_cells object
+    
+    bins_shape : tuple
+        shape of the bins of a single point
+    
+    sparse : Boolean
+        If True, return a scipy.sparse.csr_matrix
+    """
+    
+    N1 = len(grid1.idx_sorted)
+    Nbins = int(np.prod(bins_shape))
+    
+    if sparse==True:
+        rows = [grid1.idx_sorted[grid1.slice_array[icell1]][cell_result[0]]\
+                for icell1, cell_result in enumerate(result)]
+        cols = [cell_result[1] for cell_result in result]
+        vals = [cell_result[2] for cell_result in result]
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        vals = np.concatenate(vals)
+        return csr_matrix((vals, (rows, cols)), shape=(N1, Nbins))
+    
+    #fill the counts in place in the sorted order of the grid, then undo the sorting
+    counts = np.zeros((N1, Nbins), dtype=int)
+    for icell1, cell_counts in enumerate(result):
+        counts[grid1.slice_array[icell1]] = cell_counts
+    
+    per_point_counts = np.empty_like(counts)
+    per_point_counts[grid1.idx_sorted] = counts
+    
+    return per_point_counts.reshape((N1,)+tuple(bins_shape))
+
+
 def s_mu_npairs(data1, data2, s_bins, mu_bins, Lbox=None, period=None, verbose=False, N_threads=1):
     """
     real-space pair counter.
@@ -1536,6 +1735,232 @@ def _xy_z_jnpairs_engine(grid1, grid2, weights1, weights2, jtags1, jtags2, N_sam
 
 
 
+def velocity_npairs(data1, data2, rbins, velocities1, velocities2, Lbox=None, period=None,\
+                    verbose=False, N_threads=1):
+    """
+    real-space pairwise velocity accumulator.
+    
+    For the pairs (x1,x2) that can be formed, with x1 drawn from data1 and x2 drawn from 
+    data2, and where distance(x1, x2) <= rbins[i], calculate the number of pairs and the 
+    first two moments of the pairwise relative velocity, v2-v1.  Moments are calculated 
+    for the radial component, projected onto the separation vector x2-x1 (positive for 
+    receding pairs), and for the line-of-sight component, taken to be the z-direction.
+    
+    Parameters
+    ----------
+    data1: array_like
+        N1 by 3 numpy array of 3-dimensional positions. Should be between zero and 
+        period.
+            
+    data2: array_like
+        N2 by 3 numpy array of 3-dimensional positions. Should be between zero and 
+        period.
+            
+    rbins: array_like
+        numpy array of boundaries defining the bins in which pairs are counted.
+    
+    velocities1: array_like
+        N1 by 3 numpy array of 3-dimensional velocities.
+    
+    velocities2: array_like
+        N2 by 3 numpy array of 3-dimensional velocities.
+    
+    Lbox: array_like, optional
+        length of cube sides which encloses data1 and data2.
+    
+    period: array_like, optional
+        length 3 array defining axis-aligned periodic boundary conditions. If only 
+        one number, Lbox, is specified, period is assumed to be np.array([Lbox]*3).
+        If none, PBCs are set to infinity.  If True, period is set to be Lbox
+    
+    verbose: Boolean, optional
+        If True, print out information and progress.
+    
+    N_threads: int, optional
+        number of 'threads' to use in the pair counting.  if set to 'max', use all 
+        available cores.  N_threads=0 is the default.
+    
+    Returns
+    -------
+    N_pairs : array of length len(rbins)
+        number of pairs
+    
+    vr_sum : array of length len(rbins)
+        sum of the radial relative velocities of the pairs
+    
+    vr_sq_sum : array of length len(rbins)
+        sum of the square of the radial relative velocities of the pairs
+    
+    vlos_sum : array of length len(rbins)
+        sum of the line-of-sight relative velocities of the pairs
+    
+    vlos_sq_sum : array of length len(rbins)
+        sum of the square of the line-of-sight relative velocities of the pairs
+    
+    Notes
+    -----
+    As with `npairs`, the returned quantities are cumulative in rbins.  Quantities in 
+    the shells between rbins are obtained with np.diff.  For example, the mean radial 
+    pairwise velocity and the pairwise radial velocity dispersion are
+    
+    >>> v12 = np.diff(vr_sum)/np.diff(N_pairs) # doctest: +SKIP
+    >>> sigma12 = np.sqrt(np.diff(vr_sq_sum)/np.diff(N_pairs) - v12**2) # doctest: +SKIP
+    """
+    
+    if N_threads is not 1:
+        if N_threads=='max':
+            N_threads = multiprocessing.cpu_count()
+        if isinstance(N_threads,int):
+            pool = multiprocessing.Pool(N_threads)
+        else: return ValueError("N_threads argument must be an integer number or 'max'")
+    
+    #process input
+    data1 = np.array(data1)
+    data2 = np.array(data2)
+    velocities1 = np.array(velocities1, dtype=np.float64)
+    velocities2 = np.array(velocities2, dtype=np.float64)
+    rbins = np.array(rbins)
+    if np.all(period==np.inf): period=None
+    
+    #enforce shape requirements on input
+    if (np.shape(data1)[1]!=3) | (data1.ndim>2):
+        raise ValueError("data1 must be of shape (Npts,3)")
+    if (np.shape(data2)[1]!=3) | (data2.ndim>2):
+        raise ValueError("data2 must be of shape (Npts,3)")
+    if np.shape(velocities1)!=np.shape(data1):
+        raise ValueError("velocities1 must be the same shape as data1")
+    if np.shape(velocities2)!=np.shape(data2):
+        raise ValueError("velocities2 must be the same shape as data2")
+    if rbins.ndim != 1:
+        raise ValueError("rbins must be a 1D array")
+    
+    #process Lbox parameter
+    if (Lbox is None) & (period is None): 
+        data1, data2, Lbox = _enclose_in_box(data1, data2)
+    elif (Lbox is None) & (period is not None):
+        Lbox = period
+    elif np.shape(Lbox)==():
+        Lbox = np.array([Lbox]*3)
+    elif np.shape(Lbox)==(1,):
+        Lbox = np.array([Lbox[0]]*3)
+    else: Lbox = np.array(Lbox)
+    if np.shape(Lbox) != (3,):
+        raise ValueError("Lbox must be an array of length 3, or number indicating the \
+                          length of one side of a cube")
+    
+    #are we working with periodic boundary conditions (PBCs)?
+    if period is None: 
+        PBCs = False
+    elif np.shape(period) == (3,):
+        PBCs = True
+        if np.any(period!=Lbox):
+            raise ValueError("period must == Lbox") 
+    elif np.shape(period) == (1,):
+        period = np.array([period[0]]*3)
+        PBCs = True
+        if np.any(period!=Lbox):
+            raise ValueError("period must == Lbox") 
+    elif isinstance(period, (int, long, float, complex)):
+        period = np.array([period]*3)
+        PBCs = True
+        if np.any(period!=Lbox):
+            raise ValueError("period must == Lbox") 
+    elif (period == True) & (Lbox is not None):
+        PBCs = True
+        period = Lbox
+    elif (period == True) & (Lbox is None):
+        raise ValueError("If period is set to True, Lbox must be defined.")
+    else: PBCs=True
+    
+    #check to see we dont count pairs more than once
+    if (PBCs==True) & np.any(np.max(rbins)>Lbox/2.0):
+        raise ValueError('cannot count pairs with seperations \
+                          larger than Lbox/2 with PBCs')
+    
+    #build grids for data1 and data2
+    cell_size = np.array([np.max(rbins)]*3)
+    grid1 = rect_cuboid_cells(data1[:,0], data1[:,1], data1[:,2], Lbox, cell_size)
+    grid2 = rect_cuboid_cells(data2[:,0], data2[:,1], data2[:,2], Lbox, cell_size)
+    
+    #sort the velocity arrays
+    vel1 = [np.ascontiguousarray(velocities1[grid1.idx_sorted,i]) for i in range(3)]
+    vel2 = [np.ascontiguousarray(velocities2[grid2.idx_sorted,i]) for i in range(3)]
+    
+    #square radial bins to make distance calculation cheaper
+    rbins = rbins**2.0
+    
+    #print come information
+    if verbose==True:
+        print("running grid pairs with {0} by {1} points".format(len(data1),len(data2)))
+        print("cell size= {0}".format(grid1.dL))
+        print("number of cells = {0}".format(np.prod(grid1.num_divs)))
+    
+    #number of cells
+    Ncell1 = np.prod(grid1.num_divs)
+    
+    #create a function to call with only one argument
+    engine = partial(_velocity_npairs_engine, grid1, grid2, vel1, vel2, rbins, period, PBCs)
+    
+    #do the pair counting
+    if N_threads>1:
+        result = np.sum(pool.map(engine,range(Ncell1)),axis=0)
+        pool.close()
+    if N_threads==1:
+        result = np.sum(map(engine,range(Ncell1)),axis=0)
+    
+    counts = np.round(result[0]).astype(int)
+    
+    return counts, result[1], result[2], result[3], result[4]
+
+
+def _velocity_npairs_engine(grid1, grid2, vel1, vel2, rbins, period, PBCs, icell1):
+    """
+    pair counting engine for velocity_npairs function.  This code calls a cython function.
+    """
+    
+    result = np.zeros((5,len(rbins)))
+    
+    #extract the points and velocities in the cell
+    x_icell1, y_icell1, z_icell1 = (grid1.x[grid1.slice_array[icell1]],\
+                                    grid1.y[grid1.slice_array[icell1]],\
+                                    grid1.z[grid1.slice_array[icell1]])
+    vx_icell1, vy_icell1, vz_icell1 = (vel1[0][grid1.slice_array[icell1]],\
+                                       vel1[1][grid1.slice_array[icell1]],\
+                                       vel1[2][grid1.slice_array[icell1]])
+        
+    #get the list of neighboring cells
+    ix1, iy1, iz1 = np.unravel_index(icell1,(grid1.num_divs[0],\
+                                             grid1.num_divs[1],\
+                                             grid1.num_divs[2]))
+    adj_cell_arr = grid1.adjacent_cells(ix1, iy1, iz1)
+            
+    #Loop over each of the (up to) 27 subvolumes neighboring, including the current cell.
+    for icell2 in adj_cell_arr:
+                
+        #extract the points and velocities in the cell
+        x_icell2 = grid2.x[grid2.slice_array[icell2]]
+        y_icell2 = grid2.y[grid2.slice_array[icell2]]
+        z_icell2 = grid2.z[grid2.slice_array[icell2]]
+        vx_icell2 = vel2[0][grid2.slice_array[icell2]]
+        vy_icell2 = vel2[1][grid2.slice_array[icell2]]
+        vz_icell2 = vel2[2][grid2.slice_array[icell2]]
+            
+        #use cython functions to do pair counting
+        if PBCs==False:
+            result += velocity_npairs_no_pbc(x_icell1, y_icell1, z_icell1,\
+                                             vx_icell1, vy_icell1, vz_icell1,\
+                                             x_icell2, y_icell2, z_icell2,\
+                                             vx_icell2, vy_icell2, vz_icell2,\
+                                             rbins)
+        else: #PBCs==True
+            result += velocity_npairs_pbc(x_icell1, y_icell1, z_icell1,\
+                                          vx_icell1, vy_icell1, vz_icell1,\
+                                          x_icell2, y_icell2, z_icell2,\
+                                          vx_icell2, vy_icell2, vz_icell2,\
+                                          rbins, period)
+    return result
+
+
 def _enclose_in_box(data1, data2):
     """
     build axis aligned box which encloses all points. 
@@ -1575,6 +2000,9 @@ def main():
     _test_xy_z_npairs_speed()
     _test_xy_z_wnpairs_speed()
     _test_xy_z_jnpairs_speed()
+    
+    # pairwise velocity speed tests
+    _test_velocity_npairs_speed()
 
 
 def _test_npairs_speed():
@@ -1828,5 +2256,45 @@ def _test_xy_z_jnpairs_speed():
     print("################################ \n")
 
 
+def _test_velocity_npairs_speed():
+
+    "bolshoi like test out to ~20 Mpc"
+    N_threads=4
+    Npts = 1e5
+    Lbox = [250.0,250.0,250.0]
+    period = np.array(Lbox)
+    
+    x = np.random.uniform(0, Lbox[0], Npts)
+    y = np.random.uniform(0, Lbox[1], Npts)
+    z = np.random.uniform(0, Lbox[2], Npts)
+    data1 = np.vstack((x,y,z)).T
+    vel1 = np.random.normal(0, 300.0, (Npts,3))
+    
+    rbins = np.logspace(-1,1.3,10)
+    
+    print("##########velocity_npairs##########")
+    print("running with {0}/{1} cores".format(N_threads,multiprocessing.cpu_count()))
+    print("running speed test with {0} points".format(Npts))
+    print("in {0} x {1} x {2} box.".format(Lbox[0],Lbox[1],Lbox[2]))
+    print("to maximum seperation {0}".format(np.max(rbins)))
+
+    #w/ PBCs
+    start = time()
+    result = velocity_npairs(data1, data1, rbins, vel1, vel1, Lbox=Lbox, period=period,\
+                             verbose=False, N_threads=N_threads)
+    end = time()
+    runtime = end-start
+    print("Total runtime (PBCs) = %.1f seconds" % runtime)
+
+    #w/o PBCs
+    start = time()
+    result = velocity_npairs(data1, data1, rbins, vel1, vel1, Lbox=Lbox, period=None,\
+                             verbose=False, N_threads=N_threads)
+    end = time()
+    runtime = end-start
+    print("Total runtime (no PBCs) = %.1f seconds" % runtime)
+    print("#################################### \n")
+
+
 if __name__ == '__main__':
     main()
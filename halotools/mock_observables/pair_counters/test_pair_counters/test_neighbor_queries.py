@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+import pytest
+
+from ..neighbor_queries import nearest_neighbor_distances, conditional_cylinder_isolation
+from ..neighbor_queries import _choose_cell_size
+
+
+np.random.seed(1)
+
+
+def _brute_force_separations(data1, data2, period=None):
+    """
+    brute force calculation of the separations along each dimension.
+    """
+
+    d = np.fabs(data1[:,np.newaxis,:] - data2[np.newaxis,:,:])
+    if period is not None:
+        d = np.minimum(d, period - d)
+    return d
+
+
+@pytest.mark.slow
+def test_nearest_neighbor_distances_periodic():
+
+    Npts = 500
+    Lbox = [1.0,1.0,1.0]
+    period = np.array(Lbox)
+
+    data1 = np.random.uniform(0, Lbox[0], (Npts,3))
+    data2 = np.random.uniform(0, Lbox[0], (Npts,3))
+
+    r_max = 0.2
+    k = 3
+
+    result = nearest_neighbor_distances(data1, data2, r_max, k=k, Lbox=Lbox, period=period)
+
+    d = np.sqrt(np.sum(_brute_force_separations(data1, data2, period=period)**2, axis=2))
+    test_result = np.sort(d, axis=1)[:,:k]
+    test_result[test_result>r_max] = np.inf
+
+    assert np.shape(result)==(Npts,k)
+    assert np.allclose(result, test_result), "nearest neighbor distances are incorrect"
+
+
+@pytest.mark.slow
+def test_nearest_neighbor_distances_exclude_self():
+
+    Npts = 500
+    Lbox = [1.0,1.0,1.0]
+
+    data1 = np.random.uniform(0, Lbox[0], (Npts,3))
+
+    r_max = 0.2
+
+    result = nearest_neighbor_distances(data1, data1, r_max, k=2, Lbox=Lbox, period=None,\
+                                        exclude_self=True)
+
+    d = np.sqrt(np.sum(_brute_force_separations(data1, data1)**2, axis=2))
+    d[np.arange(Npts),np.arange(Npts)] = np.inf
+    test_result = np.sort(d, axis=1)[:,:2]
+    test_result[test_result>r_max] = np.inf
+
+    assert np.allclose(result, test_result), "nearest neighbor distances are incorrect"
+
+    #without excluding self, the nearest neighbor of each point is itself
+    result = nearest_neighbor_distances(data1, data1, r_max, k=1, Lbox=Lbox, period=None)
+    assert np.all(result==0.0)
+
+
+@pytest.mark.slow
+def test_conditional_cylinder_isolation():
+
+    Npts = 500
+    Lbox = [1.0,1.0,1.0]
+    period = np.array(Lbox)
+
+    data1 = np.random.uniform(0, Lbox[0], (Npts,3))
+    marks1 = np.random.uniform(0, 1, Npts)
+
+    rp_max = 0.05
+    pi_max = 0.2
+
+    d = _brute_force_separations(data1, data1, period=period)
+    in_cylinder = ((d[:,:,0]**2 + d[:,:,1]**2) < rp_max**2) & (d[:,:,2] < pi_max)
+
+    #no more massive neighbor
+    result = conditional_cylinder_isolation(data1, data1, rp_max, pi_max, marks1, marks1,\
+                                            condition='greater', Lbox=Lbox, period=period)
+    test_result = ~np.any(in_cylinder & (marks1[np.newaxis,:] > marks1[:,np.newaxis]), axis=1)
+    assert np.all(result==test_result), "isolation criterion is incorrect"
+
+    #no neighbor with more than half the mark, excluding the point itself
+    result = conditional_cylinder_isolation(data1, data1, rp_max, pi_max, marks1, marks1,\
+                                            condition='greater', ratio=0.5,\
+                                            Lbox=Lbox, period=period, exclude_self=True)
+    in_cylinder[np.arange(Npts),np.arange(Npts)] = False
+    test_result = ~np.any(in_cylinder & (marks1[np.newaxis,:] > 0.5*marks1[:,np.newaxis]),\
+                          axis=1)
+    assert np.all(result==test_result), "isolation criterion is incorrect"
+    assert np.any(result==False) & np.any(result==True)
+
+
+def test_choose_cell_size():
+
+    Lbox = np.array([100.0,100.0,100.0])
+
+    #cells are sized to the search radius if there are enough points
+    cell_size = _choose_cell_size(Lbox, np.array([10.0,10.0,5.0]), 32000)
+    assert np.all(cell_size==np.array([10.0,10.0,5.0]))
+
+    #otherwise the grid is coarsened, but cells are never smaller than the search size
+    cell_size = _choose_cell_size(Lbox, np.array([1.0,1.0,1.0]), 10**5)
+    num_cells = np.prod(np.floor(Lbox/cell_size))
+    assert num_cells<=10**5//16
+    assert np.all(cell_size>=1.0)
+
+    #cells are never larger than the box
+    cell_size = _choose_cell_size(Lbox, np.array([1.0,1.0,1.0]), 10)
+    assert np.all(cell_size<=Lbox)
+
+
+@pytest.mark.slow
+def test_neighbor_queries_fine_grid():
+
+    Npts = 2000
+    Lbox = [1.0,1.0,1.0]
+
+    data1 = np.random.uniform(0, Lbox[0], (Npts,3))
+    data2 = np.random.uniform(0, Lbox[0], (Npts,3))
+    marks1 = np.random.uniform(0, 1, Npts)
+    marks2 = np.random.uniform(0, 1, Npts)
+
+    #search radii much smaller than the box, without PBCs
+    r_max = 0.06
+    result = nearest_neighbor_distances(data1, data2, r_max, k=2, Lbox=Lbox)
+
+    d = _brute_force_separations(data1, data2)
+    test_result = np.sort(np.sqrt(np.sum(d**2, axis=2)), axis=1)[:,:2]
+    test_result[test_result>r_max] = np.inf
+    assert np.allclose(result, test_result), "nearest neighbor distances are incorrect"
+
+    rp_max, pi_max = 0.03, 0.06
+    result = conditional_cylinder_isolation(data1, data2, rp_max, pi_max, marks1, marks2,\
+                                            condition='less', Lbox=Lbox)
+    in_cylinder = ((d[:,:,0]**2 + d[:,:,1]**2) < rp_max**2) & (d[:,:,2] < pi_max)
+    test_result = ~np.any(in_cylinder & (marks2[np.newaxis,:] < marks1[:,np.newaxis]), axis=1)
+    assert np.all(result==test_result), "isolation criterion is incorrect"
+
+    result = conditional_cylinder_isolation(data1, data2, rp_max, pi_max, marks1, marks2,\
+                                            condition=None, Lbox=Lbox)
+    assert np.all(result==~np.any(in_cylinder, axis=1)), "isolation criterion is incorrect"
@@ -4,6 +4,7 @@ from __future__ import (absolute_import, division, print_function,
 
 import numpy as np
 import pytest 
+import multiprocessing
 #load comparison simple pair counters
 from ..pairs import npairs as simp_npairs
 from ..pairs import wnpairs as simp_wnpairs
@@ -11,6 +12,8 @@ from ..pairs import wnpairs as simp_wnpairs
 from ..rect_cuboid_pairs import npairs, wnpairs, jnpairs
 from ..rect_cuboid_pairs import xy_z_npairs, xy_z_wnpairs, xy_z_jnpairs
 from ..rect_cuboid_pairs import s_mu_npairs
+from ..rect_cuboid_pairs import velocity_npairs
+from ..rect_cuboid import rect_cuboid_cells
 
 
 np.random.seed(1)
@@ -465,4 +468,263 @@ def test_xy_z_jnpairs_nonperiodic():
     assert np.all(result[0]==result_compare), "shape xy_z jackknife pair counts of result is incorrect"
     
     
-    
\ No newline at end of file
+    
+
+def _brute_force_velocity_moments(data1, data2, vel1, vel2, rbins, period=None):
+    """
+    brute force calculation of the cumulative pairwise velocity moments.
+    """
+    
+    dx = data2[np.newaxis,:,:] - data1[:,np.newaxis,:]
+    if period is not None:
+        dx = np.where(dx > period/2.0, dx - period, dx)
+        dx = np.where(dx < -period/2.0, dx + period, dx)
+    d = np.sqrt(np.sum(dx**2, axis=2))
+    dv = vel2[np.newaxis,:,:] - vel1[:,np.newaxis,:]
+    
+    v_los = dv[:,:,2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        v_r = np.where(d>0, np.sum(dv*dx, axis=2)/d, 0.0)
+    
+    result = np.zeros((5,len(rbins)))
+    for i, r in enumerate(rbins):
+        mask = d<=r
+        result[:,i] = [np.sum(mask), np.sum(v_r[mask]), np.sum(v_r[mask]**2),\
+                       np.sum(v_los[mask]), np.sum(v_los[mask]**2)]
+    return result
+
+
+@pytest.mark.slow
+def test_velocity_npairs_periodic():
+    
+    Npts = 300
+    Lbox = [1.0,1.0,1.0]
+    period = np.array(Lbox)
+    
+    data1 = np.random.uniform(0, Lbox[0], (Npts,3))
+    vel1 = np.random.normal(0, 100.0, (Npts,3))
+    
+    rbins = np.array([0.0,0.1,0.2,0.3,0.4,0.5])
+    
+    result = velocity_npairs(data1, data1, rbins, vel1, vel1, Lbox=Lbox, period=period)
+    test_result = _brute_force_velocity_moments(data1, data1, vel1, vel1, rbins,\
+                                                period=period)
+    
+    assert np.all(result[0]==test_result[0]), "pair counts are incorrect"
+    assert np.all(result[0]==npairs(data1, data1, rbins, Lbox=Lbox, period=period))
+    for i in range(1,5):
+        assert np.allclose(result[i], test_result[i]), "velocity moments are incorrect"
+
+
+@pytest.mark.slow
+def test_velocity_npairs_nonperiodic():
+    
+    Npts = 300
+    Lbox = [1.0,1.0,1.0]
+    
+    data1 = np.random.uniform(0, Lbox[0], (Npts,3))
+    data2 = np.random.uniform(0, Lbox[0], (Npts,3))
+    vel1 = np.random.normal(0, 100.0, (Npts,3))
+    vel2 = np.random.normal(0, 100.0, (Npts,3))
+    
+    rbins = np.array([0.0,0.1,0.2,0.3,0.4,0.5])
+    
+    result = velocity_npairs(data1, data2, rbins, vel1, vel2, Lbox=Lbox, period=None)
+    test_result = _brute_force_velocity_moments(data1, data2, vel1, vel2, rbins)
+    
+    assert np.all(result[0]==test_result[0]), "pair counts are incorrect"
+    for i in range(1,5):
+        assert np.allclose(result[i], test_result[i]), "velocity moments are incorrect"
+
+
+@pytest.mark.slow
+def test_npairs_per_point():
+    
+    Npts = 300
+    Lbox = [1.0,1.0,1.0]
+    period = np.array(Lbox)
+    
+    data1 = np.random.uniform(0, Lbox[0], (Npts,3))
+    data2 = np.random.uniform(0, Lbox[0], (Npts+50,3))
+    
+    rbins = np.array([0.0,0.1,0.2,0.3])
+    
+    result = npairs(data1, data2, rbins, Lbox=Lbox, period=period, per_point=True)
+    
+    assert np.shape(result)==(Npts,len(rbins))
+    assert np.all(np.sum(result,axis=0)==npairs(data1, data2, rbins, Lbox=Lbox, period=period))
+    
+    #compare to counts for individual points
+    for i in [0, 10, Npts-1]:
+        test_result = simp_npairs(data1[i:i+1], data2, rbins, period=period)
+        assert np.all(result[i]==test_result), "per-point pair counts are incorrect"
+    
+    #sparse output
+    sparse_result = npairs(data1, data2, rbins, Lbox=Lbox, period=period, per_point=True,\
+                           sparse=True)
+    assert np.all(sparse_result.toarray()==result)
+    
+    #no PBCs
+    result = npairs(data1, data2, rbins, Lbox=Lbox, period=None, per_point=True)
+    assert np.all(np.sum(result,axis=0)==npairs(data1, data2, rbins, Lbox=Lbox, period=None))
+    
+    with pytest.raises(ValueError):
+        npairs(data1, data2, rbins, Lbox=Lbox, period=period, sparse=True)
+
+
+@pytest.mark.slow
+def test_xy_z_npairs_per_point():
+    
+    Npts = 300
+    Lbox = [1.0,1.0,1.0]
+    period = np.array(Lbox)
+    
+    data1 = np.random.uniform(0, Lbox[0], (Npts,3))
+    
+    rp_bins = np.array([0.0,0.1,0.2,0.3])
+    pi_bins = np.array([0.0,0.1,0.2,0.3,0.4])
+    
+    result = xy_z_npairs(data1, data1, rp_bins, pi_bins, Lbox=Lbox, period=period,\
+                         per_point=True)
+    total = xy_z_npairs(data1, data1, rp_bins, pi_bins, Lbox=Lbox, period=period)
+    
+    assert np.shape(result)==(Npts,len(rp_bins),len(pi_bins))
+    assert np.all(np.sum(result,axis=0)==total), "per-point pair counts are incorrect"
+    
+    #compare to counts for individual points
+    for i in [0, 10, Npts-1]:
+        test_result = xy_z_npairs(data1[i:i+1], data1, rp_bins, pi_bins, Lbox=Lbox,\
+                                  period=period)
+        assert np.all(result[i]==test_result), "per-point pair counts are incorrect"
+    
+    #sparse output
+    sparse_result = xy_z_npairs(data1, data1, rp_bins, pi_bins, Lbox=Lbox, period=period,\
+                                per_point=True, sparse=True)
+    assert np.all(sparse_result.toarray()==result.reshape((Npts,-1)))
+
+
+@pytest.mark.slow
+def test_npairs_per_point_empty_cells():
+    """
+    a few points in a large box leave most of the grid cells empty.
+    """
+    
+    Npts = 5
+    Lbox = [100.0,100.0,100.0]
+    period = np.array(Lbox)
+    
+    data1 = np.random.uniform(0, Lbox[0], (Npts,3))
+    data2 = np.random.uniform(0, Lbox[0], (Npts,3))
+    
+    rbins = np.array([0.0,10.0,30.0,50.0])
+    
+    result = npairs(data1, data2, rbins, Lbox=Lbox, period=period, per_point=True)
+    assert np.shape(result)==(Npts,len(rbins))
+    for i in range(Npts):
+        test_result = simp_npairs(data1[i:i+1], data2, rbins, period=period)
+        assert np.all(result[i]==test_result), "per-point pair counts are incorrect"
+    
+    sparse_result = npairs(data1, data2, rbins, Lbox=Lbox, period=period, per_point=True,\
+                           sparse=True)
+    assert np.all(sparse_result.toarray()==result)
+    
+    rp_bins = np.array([0.0,10.0,30.0])
+    pi_bins = np.array([0.0,10.0,30.0,50.0])
+    result = xy_z_npairs(data1, data2, rp_bins, pi_bins, Lbox=Lbox, period=period,\
+                         per_point=True)
+    total = xy_z_npairs(data1, data2, rp_bins, pi_bins, Lbox=Lbox, period=period)
+    assert np.shape(result)==(Npts,len(rp_bins),len(pi_bins))
+    assert np.all(np.sum(result,axis=0)==total), "per-point pair counts are incorrect"
+
+
+@pytest.mark.slow
+def test_npairs_per_point_fine_grid():
+    """
+    bins much smaller than the box give a fine grid of sparsely populated cells.
+    """
+    
+    Npts = 300
+    Lbox = [1.0,1.0,1.0]
+    period = np.array(Lbox)
+    
+    data1 = np.random.uniform(0, Lbox[0], (Npts,3))
+    data2 = np.random.uniform(0, Lbox[0], (Npts+50,3))
+    
+    rbins = np.array([0.0,0.02,0.05,0.1])
+    
+    for p in [period, None]:
+        result = npairs(data1, data2, rbins, Lbox=Lbox, period=p, per_point=True)
+        assert np.shape(result)==(Npts,len(rbins))
+        for i in range(Npts):
+            test_result = simp_npairs(data1[i:i+1], data2, rbins, period=p)
+            assert np.all(result[i]==test_result), "per-point pair counts are incorrect"
+        sparse_result = npairs(data1, data2, rbins, Lbox=Lbox, period=p, per_point=True,\
+                               sparse=True)
+        assert np.all(sparse_result.toarray()==result)
+    
+    rp_bins = np.array([0.0,0.02,0.05])
+    pi_bins = np.array([0.0,0.05,0.1])
+    for p in [period, None]:
+        result = xy_z_npairs(data1, data2, rp_bins, pi_bins, Lbox=Lbox, period=p,\
+                             per_point=True)
+        total = xy_z_npairs(data1, data2, rp_bins, pi_bins, Lbox=Lbox, period=p)
+        assert np.shape(result)==(Npts,len(rp_bins),len(pi_bins))
+        assert np.all(np.sum(result,axis=0)==total), "per-point pair counts are incorrect"
+        for i in [0, 10, Npts-1]:
+            test_result = xy_z_npairs(data1[i:i+1], data2, rp_bins, pi_bins, Lbox=Lbox,\
+                                      period=p)
+            assert np.all(result[i]==test_result), "per-point pair counts are incorrect"
+
+
+def test_rect_cuboid_cells_presorted():
+    
+    Npts = 1000
+    Lbox = np.array([1.0,1.0,1.0])
+    cell_size = np.array([0.25,0.25,0.25])
+    
+    data = np.random.random((Npts,3))
+    grid = rect_cuboid_cells(data[:,0], data[:,1], data[:,2], Lbox, cell_size)
+    assert grid.presorted==False
+    
+    #points that are already sorted by cell skip the argsort
+    sorted_data = data[grid.idx_sorted]
+    sorted_grid = rect_cuboid_cells(sorted_data[:,0], sorted_data[:,1], sorted_data[:,2],\
+                                    Lbox, cell_size)
+    assert sorted_grid.presorted==True
+    assert np.all(sorted_grid.idx_sorted==np.arange(Npts))
+    assert np.all(sorted_grid.x==grid.x)
+    for icell in range(len(grid.slice_array)):
+        assert sorted_grid.slice_array[icell]==grid.slice_array[icell]
+    
+    rbins = np.array([0.0,0.1,0.2,0.3])
+    result = npairs(data, data, rbins, Lbox=Lbox, period=Lbox)
+    sorted_result = npairs(sorted_data, sorted_data, rbins, Lbox=Lbox, period=Lbox)
+    assert np.all(result==sorted_result), "presorted points give different pair counts"
+
+
+@pytest.mark.slow
+def test_npairs_shared_pool():
+    
+    Npts = 300
+    Lbox = [1.0,1.0,1.0]
+    period = np.array(Lbox)
+    
+    data1 = np.random.uniform(0, Lbox[0], (Npts,3))
+    data2 = np.random.uniform(0, Lbox[0], (Npts+50,3))
+    
+    rbins = np.array([0.0,0.1,0.2,0.3])
+    
+    #the same pool is used by several calls, and is left open by each of them
+    pool = multiprocessing.Pool(2)
+    try:
+        result = npairs(data1, data2, rbins, Lbox=Lbox, period=period, pool=pool)
+        result2 = npairs(data2, data2, rbins, Lbox=Lbox, period=period, pool=pool)
+        per_point_result = npairs(data1, data2, rbins, Lbox=Lbox, period=period,\
+                                  per_point=True, pool=pool)
+    finally:
+        pool.close()
+        pool.join()
+    
+    assert np.all(result==npairs(data1, data2, rbins, Lbox=Lbox, period=period))
+    assert np.all(result2==npairs(data2, data2, rbins, Lbox=Lbox, period=period))
+    assert np.all(np.sum(per_point_result,axis=0)==result)
@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+
+"""
+survey footprints defined by spherical polygons, with a pixelised lookup used to quickly
+test whether points fall inside the footprint and to generate random catalogs.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+####import modules########################################################################
+import sys
+import numpy as np
+
+from ..custom_exceptions import HalotoolsError
+##########################################################################################
+
+
+__all__=['SphericalPolygon', 'SurveyFootprint']
+__author__ = ['Duncan Campbell', 'Andrew Hearin']
+
+
+def _unit_vectors(ra, dec):
+    """
+    Convert angular coordinates in degrees into an Npts x 3 array of unit vectors.
+    """
+
+    ra = np.radians(np.atleast_1d(np.asarray(ra, dtype=np.float64)))
+    dec = np.radians(np.atleast_1d(np.asarray(dec, dtype=np.float64)))
+
+    cos_dec = np.cos(dec)
+
+    return np.vstack((np.cos(ra)*cos_dec, np.sin(ra)*cos_dec, np.sin(dec))).T
+
+
+class SphericalPolygon(object):
+    """
+    Convex polygon on the unit sphere whose edges are great circles.
+
+    The polygon is stored as the set of unit normals of its edges, so that a point
+    :math:`\\hat{p}` is inside the polygon if :math:`\\hat{p}\\cdot\\hat{n}_{i}\\geq 0`
+    for every edge :math:`i`.  Non-convex regions can be built from the union of
+    several convex polygons with `SurveyFootprint`.
+    """
+
+    def __init__(self, ra, dec):
+        """
+        Parameters
+        ----------
+        ra: array_like
+            right ascension of the vertices in degrees
+
+        dec: array_like
+            declination of the vertices in degrees
+
+        Notes
+        -----
+        The vertices may be listed in either clockwise or counter-clockwise order, but
+        must define a convex polygon that is smaller than a hemisphere.
+        """
+
+        ra = np.atleast_1d(ra)
+        dec = np.atleast_1d(dec)
+        if (len(ra) != len(dec)) | (len(ra) < 3):
+            msg = ("\n SphericalPolygon requires at least 3 vertices, \n"
+                   "with ra and dec of equal length.\n")
+            raise HalotoolsError(msg)
+
+        self.ra = np.asarray(ra, dtype=np.float64)
+        self.dec = np.asarray(dec, dtype=np.float64)
+        self.vertices = _unit_vectors(self.ra, self.dec)
+
+        #edge normals, v_i x v_{i+1}
+        normals = np.cross(self.vertices, np.roll(self.vertices, -1, axis=0))
+        norm = np.sqrt(np.sum(normals**2, axis=1))
+        if np.any(norm == 0.0):
+            msg = ("\n SphericalPolygon vertices must be distinct and not antipodal.\n")
+            raise HalotoolsError(msg)
+        normals = normals/norm[:,np.newaxis]
+
+        #orient the normals towards the interior of the polygon
+        center = np.sum(self.vertices, axis=0)
+        center = center/np.sqrt(np.sum(center**2))
+        side = np.dot(normals, center)
+        if np.all(side < 0.0):
+            normals = -1.0*normals
+        elif not np.all(side > 0.0):
+            msg = ("\n The vertices passed to SphericalPolygon do not define \n"
+                   "a convex polygon smaller than a hemisphere.\n")
+            raise HalotoolsError(msg)
+
+        self.normals = normals
+        self.center = center
+
+    def contains(self, ra, dec):
+        """
+        Determine whether points are inside the polygon.
+
+        Parameters
+        ----------
+        ra: array_like
+            right ascension in degrees
+
+        dec: array_like
+            declination in degrees
+
+        Returns
+        -------
+        mask: np.array
+            boolean array, True for points inside the polygon
+        """
+
+        return self._contains_vectors(_unit_vectors(ra, dec))
+
+    def _contains_vectors(self, p):
+        """
+        Determine whether the Npts x 3 array of unit vectors are inside the polygon.
+        """
+
+        return np.all(np.dot(p, self.normals.T) >= 0.0, axis=1)
+
+    def _classify_caps(self, centers, sin_radius):
+        """
+        Classify spherical caps as entirely inside (1), entirely outside (0), or
+        possibly crossing the boundary (2) of the polygon.
+
+        Parameters
+        ----------
+        centers: np.array
+            Ncaps x 3 array of unit vectors
+
+        sin_radius: np.array
+            sine of the angular radius of each cap
+
+        Returns
+        -------
+        status: np.array
+            integer array of length Ncaps
+        """
+
+        #sine of the signed angular distance from the cap center to each edge
+        sin_dist = np.dot(centers, self.normals.T)
+
+        inside = np.all(sin_dist >= sin_radius[:,np.newaxis], axis=1)
+        outside = np.any(sin_dist <= -sin_radius[:,np.newaxis], axis=1)
+
+        status = np.zeros(len(centers), dtype=np.int8) + 2
+        status[inside] = 1
+        status[outside] = 0
+
+        return status
+
+
+class SurveyFootprint(object):
+    """
+    Survey footprint defined by a union of convex spherical polygons, minus a union of
+    masked (hole) polygons.
+
+    On construction the sky is divided into equal-area pixels, uniformly spaced in
+    ra and sin(dec), and each pixel is classified as entirely inside, entirely outside,
+    or on the boundary of the footprint.  Points falling in interior or exterior pixels
+    are resolved by a single array lookup, and only points in boundary pixels are tested
+    against the polygons.
+    """
+
+    def __init__(self, polygons, holes=None, N_ra=720, N_dec=360):
+        """
+        Parameters
+        ----------
+        polygons: list
+            list of `SphericalPolygon` objects whose union defines the footprint
+
+        holes: list, optional
+            list of `SphericalPolygon` objects whose union is removed from the footprint
+
+        N_ra: int, optional
+            number of pixels in the right ascension direction
+
+        N_dec: int, optional
+            number of pixels in the sin(dec) direction
+        """
+
+        if isinstance(polygons, SphericalPolygon):
+            polygons = [polygons]
+        if holes is None:
+            holes = []
+        elif isinstance(holes, SphericalPolygon):
+            holes = [holes]
+
+        if len(polygons) == 0:
+            msg = ("\n SurveyFootprint requires at least one SphericalPolygon.\n")
+            raise HalotoolsError(msg)
+
+        self.polygons = list(polygons)
+        self.holes = list(holes)
+        self.N_ra = int(N_ra)
+        self.N_dec = int(N_dec)
+        self.N_pix = self.N_ra*self.N_dec
+
+        self._build_pixel_lookup()
+
+    def _pixel_index(self, ra, dec):
+        """
+        Return the pixel index of each point, with ra and dec in degrees.
+        """
+
+        ira = np.floor(np.mod(ra, 360.0)/360.0*self.N_ra).astype(np.int64)
+        ira = np.clip(ira, 0, self.N_ra-1)
+
+        idec = np.floor((np.sin(np.radians(dec))+1.0)/2.0*self.N_dec).astype(np.int64)
+        idec = np.clip(idec, 0, self.N_dec-1)
+
+        return idec*self.N_ra + ira
+
+    def _pixel_bounds(self, ipix):
+        """
+        Return the ra and sin(dec) bounds of each pixel.
+        """
+
+        ira = ipix % self.N_ra
+        idec = ipix // self.N_ra
+
+        dra = 360.0/self.N_ra
+        dsin = 2.0/self.N_dec
+
+        ra_low = ira*dra
+        sin_low = idec*dsin - 1.0
+
+        return ra_low, ra_low + dra, sin_low, np.minimum(sin_low + dsin, 1.0)
+
+    def _build_pixel_lookup(self):
+        """
+        Classify every pixel as inside (1), outside (0), or boundary (2).
+        """
+
+        ipix = np.arange(self.N_pix)
+        ra_low, ra_high, sin_low, sin_high = self._pixel_bounds(ipix)
+
+        #pixel centers
+        ra_c = 0.5*(ra_low+ra_high)
+        dec_c = np.degrees(np.arcsin(0.5*(sin_low+sin_high)))
+        centers = _unit_vectors(ra_c, dec_c)
+
+        #bound each pixel by a cap centered on the pixel that contains points
+        #sampled along the pixel edges, padded to account for the edge curvature
+        Nsamp = 5
+        t = np.linspace(0.0, 1.0, Nsamp)
+        min_cos = np.ones(self.N_pix)
+        for ti in t:
+            edge_points = [(ra_low + ti*(ra_high-ra_low), sin_low),
+                           (ra_low + ti*(ra_high-ra_low), sin_high),
+                           (ra_low, sin_low + ti*(sin_high-sin_low)),
+                           (ra_high, sin_low + ti*(sin_high-sin_low))]
+            for ra_e, sin_e in edge_points:
+                p = _unit_vectors(ra_e, np.degrees(np.arcsin(np.clip(sin_e, -1.0, 1.0))))
+                min_cos = np.minimum(min_cos, np.sum(p*centers, axis=1))
+        radius = 1.1*np.arccos(np.clip(min_cos, -1.0, 1.0))
+        sin_radius = np.sin(np.minimum(radius, np.pi/2.0))
+
+        #pixels inside any polygon are inside, pixels outside every polygon are outside
+        in_status = np.zeros(self.N_pix, dtype=np.int8)
+        for polygon in self.polygons:
+            status = polygon._classify_caps(centers, sin_radius)
+            in_status[status == 1] = 1
+            in_status[(status == 2) & (in_status == 0)] = 2
+
+        #pixels inside any hole are outside, pixels touching a hole are boundary
+        for hole in self.holes:
+            status = hole._classify_caps(centers, sin_radius)
+            in_status[status == 1] = 0
+            in_status[(status == 2) & (in_status == 1)] = 2
+
+        self.pixel_status = in_status
+        self._candidate_pixels = np.where(in_status > 0)[0]
+
+    def _exact_in_footprint(self, p):
+        """
+        Test the Npts x 3 array of unit vectors against the polygons and holes.
+        """
+
+        result = np.zeros(len(p), dtype=bool)
+        for polygon in self.polygons:
+            result |= polygon._contains_vectors(p)
+        for hole in self.holes:
+            result &= ~hole._contains_vectors(p)
+
+        return result
+
+    def in_footprint(self, ra, dec, radians=False):
+        """
+        Determine whether points are inside the footprint.
+
+        Parameters
+        ----------
+        ra: array_like
+            right ascension
+
+        dec: array_like
+            declination
+
+        radians: bool, optional
+            If True, input is interpreted as radians, e.g. as returned by
+            `~halotools.mock_observables.mock_survey.ra_dec_z`.
+            If False, input in degrees. Default is False.
+
+        Returns
+        -------
+        mask: np.array
+            boolean array, True for points inside the footprint
+        """
+
+        ra = np.atleast_1d(np.asarray(ra, dtype=np.float64))
+        dec = np.atleast_1d(np.asarray(dec, dtype=np.float64))
+        if radians==True:
+            ra = np.degrees(ra)
+            dec = np.degrees(dec)
+
+        status = self.pixel_status[self._pixel_index(ra, dec)]
+
+        result = (status == 1)
+        boundary = np.where(status == 2)[0]
+        if len(boundary) > 0:
+            p = _unit_vectors(ra[boundary], dec[boundary])
+            result[boundary] = self._exact_in_footprint(p)
+
+        return result
+
+    def random_points(self, N_points, chunk_size=int(1e6), seed=None):
+        """
+        Randomly sample points uniformly within the footprint.
+
+        Points are drawn only within pixels that overlap the footprint, and only points
+        drawn in boundary pixels are tested against the polygons.  Points are generated
+        in chunks and written into preallocated arrays, so memory use is set by the
+        ``chunk_size`` rather than ``N_points``.
+
+        Parameters
+        ----------
+        N_points: int
+            number of points to sample
+
+        chunk_size: int, optional
+            number of candidate points drawn at a time
+
+        seed: int, optional
+            random number seed
+
+        Returns
+        -------
+        ra: np.array
+            right ascension in degrees
+
+        dec: np.array
+            declination in degrees
+        """
+
+        N_points = int(N_points)
+        chunk_size = int(chunk_size)
+
+        if len(self._candidate_pixels) == 0:
+            msg = ("\n The footprint does not overlap any pixels, \n"
+                   "so no random points can be generated.\n")
+            raise HalotoolsError(msg)
+
+        rng = np.random.RandomState(seed)
+
+        ra = np.empty(N_points, dtype=np.float64)
+        dec = np.empty(N_points, dtype=np.float64)
+
+        N_filled = 0
+        while N_filled < N_points:
+            #pixels are equal area, so a uniform choice of pixel is uniform on the sky
+            ipix = self._candidate_pixels[rng.randint(0, len(self._candidate_pixels), chunk_size)]
+            ra_low, ra_high, sin_low, sin_high = self._pixel_bounds(ipix)
+
+            ran_ra = ra_low + rng.rand(chunk_size)*(ra_high-ra_low)
+            ran_sin = sin_low + rng.rand(chunk_size)*(sin_high-sin_low)
+            ran_dec = np.degrees(np.arcsin(ran_sin))
+
+            #only points in boundary pixels need the exact test
+            keep = np.ones(chunk_size, dtype=bool)
+            boundary = np.where(self.pixel_status[ipix] == 2)[0]
+            if len(boundary) > 0:
+                p = _unit_vectors(ran_ra[boundary], ran_dec[boundary])
+                keep[boundary] = self._exact_in_footprint(p)
+
+            ran_ra = ran_ra[keep]
+            ran_dec = ran_dec[keep]
+
+            N_new = min(len(ran_ra), N_points - N_filled)
+            ra[N_filled:N_filled+N_new] = ran_ra[:N_new]
+            dec[N_filled:N_filled+N_new] = ran_dec[:N_new]
+            N_filled += N_new
+
+        return ra, dec
+
+    @property
+    def pixel_area(self):
+        """
+        Area of each pixel in square degrees.
+        """
+
+        return 4.0*np.pi*(180.0/np.pi)**2/self.N_pix
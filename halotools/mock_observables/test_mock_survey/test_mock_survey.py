@@ -6,7 +6,8 @@ import numpy as np
 import sys
 import pytest 
 
-from ..mock_survey import distant_observer_redshift, ra_dec_z
+from ..mock_survey import (distant_observer_redshift, ra_dec_z, 
+    comoving_distance_to_redshift, redshift_to_comoving_distance)
 
 @pytest.mark.slow
 def test_distant_observer():
@@ -48,3 +49,61 @@ def test_ra_dec_z():
     assert len(z)==N
     assert np.all(ra<2.0*np.pi) & np.all(ra>0.0), "ra range is incorrect"
     assert np.all(dec>-1.0*np.pi/2.0) & np.all(dec<np.pi/2.0), "ra range is incorrect"
+
+
+def test_comoving_distance_to_redshift():
+    
+    from astropy import cosmology
+    cosmo = cosmology.FlatLambdaCDM(H0=70.0, Om0=0.3)
+    
+    zz = np.linspace(0.0, 2.5, 50)
+    d = cosmo.comoving_distance(zz).value
+    
+    z_inv = comoving_distance_to_redshift(d, cosmo)
+    assert np.allclose(z_inv, zz, rtol=1e-5, atol=1e-7), "distance inversion is inaccurate"
+    
+    d_fwd = redshift_to_comoving_distance(zz, cosmo)
+    assert np.allclose(d_fwd, d, rtol=1e-5, atol=1e-4), "tabulated distances are inaccurate"
+    
+    #negative distances are continued as an odd function
+    assert np.allclose(comoving_distance_to_redshift(-d, cosmo), -z_inv)
+
+
+def test_distance_redshift_table_cache():
+    
+    from astropy import cosmology
+    from ..mock_survey import _distance_redshift_tables, _cosmology_key
+    cosmo = cosmology.FlatLambdaCDM(H0=70.0, Om0=0.25)
+    
+    z1 = comoving_distance_to_redshift([100.0, 200.0], cosmo)
+    z_table, d_table = _distance_redshift_tables[_cosmology_key(cosmo)]
+    
+    #a second call within the range of the table re-uses the cached table
+    z2 = comoving_distance_to_redshift([100.0, 200.0], cosmo)
+    assert _distance_redshift_tables[_cosmology_key(cosmo)][0] is z_table
+    assert np.all(z1==z2)
+    
+    #a call beyond the range of the table extends it
+    dmax = 2.0*d_table[-1]
+    z3 = comoving_distance_to_redshift(dmax, cosmo)
+    assert _distance_redshift_tables[_cosmology_key(cosmo)][1][-1] >= dmax
+    assert np.allclose(cosmo.comoving_distance(z3).value, dmax, rtol=1e-5)
+
+
+def test_distant_observer_cosmo():
+    
+    from astropy import cosmology
+    cosmo = cosmology.FlatLambdaCDM(H0=70.0, Om0=0.3)
+    
+    N=100
+    x = np.random.random((N,3))*250.0
+    v = np.zeros((N,3))
+    
+    #with no peculiar velocities the observed redshift is the cosmological redshift
+    redshifts = distant_observer_redshift(x,v,cosmo=cosmo)
+    d = cosmo.comoving_distance(redshifts).value*cosmo.h
+    assert np.allclose(d, x[:,2], rtol=1e-5, atol=1e-4)
+    
+    #the linear approximation is recovered at small distances
+    redshifts_linear = distant_observer_redshift(x,v)
+    assert np.allclose(redshifts, redshifts_linear, rtol=0.05)
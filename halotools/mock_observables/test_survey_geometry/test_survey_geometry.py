@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import numpy as np
+import sys
+import pytest
+
+from ..survey_geometry import SphericalPolygon, SurveyFootprint
+from ...custom_exceptions import HalotoolsError
+
+
+def test_spherical_polygon():
+
+    #the same square, listed in both orientations
+    poly1 = SphericalPolygon([10,20,20,10], [-5,-5,5,5])
+    poly2 = SphericalPolygon([10,10,20,20], [-5,5,5,-5])
+
+    ra = np.array([15.0, 15.0, 25.0, 15.0])
+    dec = np.array([0.0, 4.9, 0.0, -6.0])
+
+    assert np.all(poly1.contains(ra, dec) == [True, True, False, False])
+    assert np.all(poly2.contains(ra, dec) == poly1.contains(ra, dec))
+
+    #non-convex vertices are rejected
+    with pytest.raises(HalotoolsError):
+        SphericalPolygon([0,10,5,10,0], [0,0,5,10,10])
+
+
+def test_in_footprint():
+
+    poly1 = SphericalPolygon([10,60,60,10], [-20,-20,30,30])
+    poly2 = SphericalPolygon([350,359,5], [60,60,80])
+    hole = SphericalPolygon([30,40,40,30], [0,0,10,10])
+    footprint = SurveyFootprint([poly1, poly2], holes=[hole], N_ra=90, N_dec=45)
+
+    #compare the pixelised lookup to a brute force test
+    N=100000
+    np.random.seed(0)
+    ra = np.random.uniform(0, 360, N)
+    dec = np.degrees(np.arcsin(np.random.uniform(-1, 1, N)))
+
+    expected = (poly1.contains(ra, dec) | poly2.contains(ra, dec)) & ~hole.contains(ra, dec)
+    result = footprint.in_footprint(ra, dec)
+
+    assert np.all(result == expected), "pixel lookup disagrees with the exact test"
+    assert np.any(footprint.pixel_status == 1), "no pixels classified as interior"
+
+    #angles in radians, e.g. as returned by ra_dec_z
+    result = footprint.in_footprint(np.radians(ra), np.radians(dec), radians=True)
+    assert np.all(result == expected)
+
+
+def test_random_points():
+
+    poly = SphericalPolygon([10,60,60,10], [-20,-20,30,30])
+    hole = SphericalPolygon([30,40,40,30], [0,0,10,10])
+    footprint = SurveyFootprint(poly, holes=hole, N_ra=90, N_dec=45)
+
+    N=10000
+    ra, dec = footprint.random_points(N, chunk_size=1000, seed=43)
+
+    assert len(ra)==N
+    assert len(dec)==N
+    assert np.all(footprint.in_footprint(ra, dec)), "randoms are not inside the footprint"
+
+    #the footprint is symmetric about ra=35, so randoms should be split evenly
+    frac = np.mean(ra < 35.0)
+    assert np.fabs(frac - 0.5) < 0.03
+
+    #the same seed gives the same randoms
+    ra2, dec2 = footprint.random_points(N, chunk_size=1000, seed=43)
+    assert np.all(ra==ra2) & np.all(dec==dec2)
@@ -6,4 +6,10 @@ from .read_nbody_ascii import *
 from .generate_random_sim import *
 from .cache_config import *
 from .supported_sims import *
+from .lazy_halo_table import *
+from .columnar_hdf5 import *
+from .spatial_index import *
+from .particle_subsampling import *
+from .cache_index import *
+from .catalog_registry import *
 from .catalog_manager import *
\ No newline at end of file
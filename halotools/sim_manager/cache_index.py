@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+"""
+Module containing the `CacheIndex` class, a persistent index of the
+catalogs stored in a Halotools cache directory, used by the
+`~halotools.sim_manager.CatalogManager` to find catalogs
+without walking the entire cache directory tree.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+__all__ = ['CacheIndex']
+
+import os
+import fnmatch
+import sqlite3
+
+from .columnar_hdf5 import _columnar_colnames
+
+# Name of the index file stored in the root of the cache directory
+cache_index_basename = 'halotools_cache_index.sqlite'
+
+# Names of the subdirectories of the cache root storing each catalog type
+_catalog_subdirs = {'halo_catalogs': 'halos',
+    'particle_catalogs': 'particles', 'raw_halo_catalogs': 'raw_halos'}
+
+_schema = """
+    CREATE TABLE IF NOT EXISTS catalogs (
+        fname TEXT PRIMARY KEY,
+        dirname TEXT,
+        catalog_type TEXT,
+        simname TEXT,
+        halo_finder TEXT,
+        version_name TEXT,
+        scale_factor REAL,
+        redshift REAL,
+        size INTEGER,
+        mtime REAL,
+        colnames TEXT);
+    CREATE INDEX IF NOT EXISTS catalogs_lookup
+        ON catalogs (catalog_type, simname, halo_finder, scale_factor);
+    CREATE INDEX IF NOT EXISTS catalogs_dirname ON catalogs (dirname);
+    CREATE TABLE IF NOT EXISTS directories (
+        dirname TEXT PRIMARY KEY,
+        mtime REAL);
+    """
+
+def _scale_factor_from_fname(fname):
+    """ Extract the scale factor from the basename of a Rockstar-style hlist
+    filename, e.g., ``hlist_0.50000.list.halotools.alpha.version0.hdf5``,
+    using the same convention as the
+    `~halotools.sim_manager.CatalogManager._get_scale_factor_substring` method.
+    Returns None if the filename does not follow this convention.
+    """
+    try:
+        first_index = fname.index('_')+1
+        last_index = fname.index('.', fname.index('.')+1)
+        return float(fname[first_index:last_index])
+    except ValueError:
+        return None
+
+def _version_name_from_fname(fname):
+    """ Extract the version name from the basename of a processed halo table,
+    e.g., ``halotools.alpha.version0`` for
+    ``hlist_0.50000.list.halotools.alpha.version0.hdf5``.
+    Returns None if the filename does not follow this convention.
+    """
+    if (fname[-5:] == '.hdf5') & ('.list.' in fname):
+        return fname[fname.index('.list.')+6:-5]
+    else:
+        return None
+
+def _like_pattern(dirname, depth=1):
+    """ Return the pattern of an SQL ``LIKE`` clause matching the paths
+    nested at least ``depth`` levels below the input directory,
+    with the ``LIKE`` wildcards in ``dirname`` escaped.
+    """
+    escaped = dirname.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return os.path.join(escaped, *(['%']*depth))
+
+def _hdf5_colnames(fname, path='data'):
+    """ Return the column names of the table stored in the input hdf5 file,
+    or None if the file cannot be read.
+    """
+    try:
+        import h5py
+        with h5py.File(fname, 'r') as f:
+            obj = f[path]
+            if isinstance(obj, h5py.Group):
+                return _columnar_colnames(obj)
+            else:
+                return list(obj.dtype.names)
+    except Exception:
+        return None
+
+
+class CacheIndex(object):
+    """ Persistent index of the catalogs stored in a Halotools cache directory.
+
+    The index is stored as an SQLite database in the root of the cache directory,
+    and records the catalog type, simname, halo-finder, version name, scale factor,
+    redshift, size, modification time and column names of each catalog.
+    Lookups are made with indexed queries on the database.
+
+    The index is kept consistent with the cache directory using modification times:
+    a directory is only re-listed when its modification time has changed,
+    which happens whenever a file is added to or removed from it,
+    and the entry of a catalog is refreshed whenever the
+    modification time of the catalog file has changed.
+    """
+
+    def __init__(self, cache_root):
+        """
+        Parameters
+        ----------
+        cache_root : string
+            Root of the Halotools cache directory, containing the
+            ``halo_catalogs``, ``particle_catalogs`` and ``raw_halo_catalogs`` subdirectories.
+
+        Examples
+        --------
+        >>> from halotools.sim_manager import cache_config
+        >>> index = CacheIndex(cache_config.get_catalogs_dir()) # doctest: +SKIP
+        >>> fnames = index.catalogs('halos', simname='bolshoi', halo_finder='rockstar') # doctest: +SKIP
+        """
+        self.cache_root = os.path.abspath(cache_root)
+        self.fname = os.path.join(self.cache_root, cache_index_basename)
+        self._conn = sqlite3.connect(self.fname, timeout=60)
+        self._conn.executescript(_schema)
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def _describe(self, fname):
+        """ Return the row of the index describing the input catalog file.
+        """
+        fname = os.path.abspath(fname)
+        dirname = os.path.dirname(fname)
+        basename = os.path.basename(fname)
+        stat = os.stat(fname)
+
+        relpath = os.path.relpath(dirname, self.cache_root).split(os.sep)
+        catalog_type = _catalog_subdirs.get(relpath[0], None)
+        simname = relpath[1] if len(relpath) > 1 else None
+        if (catalog_type != 'particles') & (len(relpath) > 2):
+            halo_finder = relpath[2]
+        else:
+            halo_finder = None
+
+        scale_factor = _scale_factor_from_fname(basename)
+        redshift = 1./scale_factor - 1 if scale_factor else None
+
+        if basename[-5:] == '.hdf5':
+            colnames = _hdf5_colnames(fname)
+            if colnames is not None:
+                colnames = ' '.join(colnames)
+        else:
+            colnames = None
+
+        return (fname, dirname, catalog_type, simname, halo_finder,
+            _version_name_from_fname(basename), scale_factor, redshift,
+            stat.st_size, stat.st_mtime, colnames)
+
+    def update_file(self, fname):
+        """ Add the input catalog file to the index, or refresh its entry.
+        Files that no longer exist are removed from the index.
+
+        Parameters
+        ----------
+        fname : string
+            Name of the catalog file (including absolute path).
+        """
+        fname = os.path.abspath(fname)
+        if os.path.isfile(fname):
+            self._conn.execute("INSERT OR REPLACE INTO catalogs VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self._describe(fname))
+        else:
+            self._conn.execute("DELETE FROM catalogs WHERE fname = ?", (fname, ))
+        self._conn.commit()
+
+    def _refresh_directory(self, dirname):
+        """ Re-list the input directory if its modification time has changed,
+        and recursively refresh its subdirectories.
+        """
+        known = self._conn.execute("SELECT mtime FROM directories WHERE dirname = ?",
+            (dirname, )).fetchone()
+
+        if not os.path.isdir(dirname):
+            if known is not None:
+                self._forget_directory(dirname)
+            return
+
+        mtime = os.stat(dirname).st_mtime
+        if (known is not None) and (known[0] == mtime):
+            subdirs = self._known_subdirs(dirname)
+        else:
+            names = os.listdir(dirname)
+            fnames = set(os.path.join(dirname, name) for name in names
+                if os.path.isfile(os.path.join(dirname, name)) and name != cache_index_basename)
+            subdirs = [os.path.join(dirname, name) for name in names
+                if os.path.isdir(os.path.join(dirname, name))]
+
+            indexed = dict(self._conn.execute(
+                "SELECT fname, mtime FROM catalogs WHERE dirname = ?", (dirname, )))
+            for fname in set(indexed) - fnames:
+                self._conn.execute("DELETE FROM catalogs WHERE fname = ?", (fname, ))
+            for fname in fnames:
+                if indexed.get(fname, None) != os.stat(fname).st_mtime:
+                    self._conn.execute("INSERT OR REPLACE INTO catalogs VALUES "
+                        "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self._describe(fname))
+
+            known_subdirs = self._known_subdirs(dirname)
+            for subdir in set(known_subdirs) - set(subdirs):
+                self._forget_directory(subdir)
+
+            self._conn.execute("INSERT OR REPLACE INTO directories VALUES (?, ?)",
+                (dirname, mtime))
+
+        for subdir in subdirs:
+            self._refresh_directory(subdir)
+
+    def _known_subdirs(self, dirname):
+        """ Return the indexed subdirectories immediately below the input directory.
+        """
+        return [row[0] for row in self._conn.execute(
+            "SELECT dirname FROM directories WHERE dirname LIKE ? ESCAPE '\\' "
+            "AND dirname NOT LIKE ? ESCAPE '\\'",
+            (_like_pattern(dirname), _like_pattern(dirname, depth=2)))]
+
+    def _forget_directory(self, dirname):
+        pattern = _like_pattern(dirname)
+        self._conn.execute("DELETE FROM catalogs WHERE dirname = ? "
+            "OR dirname LIKE ? ESCAPE '\\'", (dirname, pattern))
+        self._conn.execute("DELETE FROM directories WHERE dirname = ? "
+            "OR dirname LIKE ? ESCAPE '\\'", (dirname, pattern))
+
+    def refresh(self, dirname=None):
+        """ Bring the index up to date with the contents of the input directory.
+
+        Parameters
+        ----------
+        dirname : string, optional
+            Subdirectory of the cache to refresh. Default is the entire cache.
+        """
+        if dirname is None:
+            dirname = self.cache_root
+        self._refresh_directory(os.path.abspath(dirname))
+        self._conn.commit()
+
+    def catalogs(self, catalog_type, dirname=None, simname=None, halo_finder=None,
+        fname_pattern=None, return_scale_factors=False):
+        """ Return the filenames of the catalogs in the index matching the input arguments.
+
+        Parameters
+        ----------
+        catalog_type : string
+            Either ``halos``, ``particles`` or ``raw_halos``.
+
+        dirname : string, optional
+            If passed, only catalogs stored in this directory or its
+            subdirectories are returned, and only this directory is refreshed.
+            Default is the directory of the input ``catalog_type``.
+
+        simname, halo_finder : string, optional
+            Arguments used to filter the returned filenames.
+
+        fname_pattern : string, optional
+            If passed, only filenames (including absolute path) matching
+            the `fnmatch` pattern ``fname_pattern`` are returned. Default is None.
+
+        return_scale_factors : bool, optional
+            If True, the scale factors of the catalogs will also be returned.
+            Default is False.
+
+        Returns
+        -------
+        fname_list : list
+            Filenames (including absolute path) of the matching catalogs.
+
+        scale_factor_list : list
+            Scale factors of the matching catalogs, or None for catalogs
+            whose filename does not specify a scale factor.
+            Only returned if ``return_scale_factors`` is True.
+        """
+        if dirname is None:
+            subdir = [key for key, value in _catalog_subdirs.items() if value == catalog_type][0]
+            dirname = os.path.join(self.cache_root, subdir)
+        dirname = os.path.abspath(dirname)
+        self.refresh(dirname)
+
+        query = ("SELECT fname, scale_factor, mtime FROM catalogs WHERE catalog_type = ? "
+            "AND (dirname = ? OR dirname LIKE ? ESCAPE '\\')")
+        args = [catalog_type, dirname, _like_pattern(dirname)]
+        for column, value in (('simname', simname), ('halo_finder', halo_finder)):
+            if value is not None:
+                query += " AND %s = ?" % column
+                args.append(value)
+        query += " ORDER BY fname"
+
+        fname_list, scale_factor_list = [], []
+        for fname, scale_factor, mtime in self._conn.execute(query, args).fetchall():
+            if (fname_pattern is not None) and (not fnmatch.fnmatch(fname, fname_pattern)):
+                continue
+            # Refresh entries of files that have been modified in place
+            if not os.path.isfile(fname):
+                self.update_file(fname)
+                continue
+            if os.stat(fname).st_mtime != mtime:
+                self.update_file(fname)
+            fname_list.append(fname)
+            scale_factor_list.append(scale_factor)
+
+        if return_scale_factors is True:
+            return fname_list, scale_factor_list
+        else:
+            return fname_list
+
+    def describe(self, fname):
+        """ Return the metadata stored in the index for the input catalog file.
+
+        Parameters
+        ----------
+        fname : string
+            Name of the catalog file (including absolute path).
+
+        Returns
+        -------
+        metadata : dict
+            Dictionary with keys ``catalog_type``, ``simname``, ``halo_finder``,
+            ``version_name``, ``scale_factor``, ``redshift``, ``size``, ``mtime`` and ``colnames``.
+            None if the file is not a catalog in the cache.
+        """
+        fname = os.path.abspath(fname)
+        row = self._conn.execute("SELECT * FROM catalogs WHERE fname = ?", (fname, )).fetchone()
+        if (row is None) or (os.path.isfile(fname) and os.stat(fname).st_mtime != row[9]):
+            self.update_file(fname)
+            row = self._conn.execute("SELECT * FROM catalogs WHERE fname = ?",
+                (fname, )).fetchone()
+        if row is None:
+            return None
+        keys = ['fname', 'dirname', 'catalog_type', 'simname', 'halo_finder', 'version_name',
+            'scale_factor', 'redshift', 'size', 'mtime', 'colnames']
+        metadata = dict(zip(keys, row))
+        if metadata['colnames'] is not None:
+            metadata['colnames'] = metadata['colnames'].split(' ')
+        del metadata['fname'], metadata['dirname']
+        return metadata
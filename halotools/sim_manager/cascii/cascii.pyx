@@ -0,0 +1,127 @@
+# cython: profile=False
+
+"""
+optimized cython parser of whitespace-delimited ASCII data.  This is called by the
+"read_nbody_ascii" module to convert blocks of rows of a raw halo catalog.  Only the
+columns that are kept are converted, directly to floating point or integer values;
+the other columns are skipped without being converted or stored.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+cimport cython
+import numpy as np
+cimport numpy as np
+from libc.stdlib cimport strtod, strtoll
+
+__all__ = ['parse_ascii_columns']
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def parse_ascii_columns(bytes block, int num_columns,
+                        np.ndarray[np.int64_t, ndim=1] column_slot,
+                        np.ndarray[np.uint8_t, ndim=1] column_is_integer,
+                        int num_float_columns, int num_integer_columns):
+    """
+    Convert the kept columns of a block of whitespace-delimited rows of ASCII data.
+
+    Parameters
+    ----------
+    block : bytes
+        Complete rows of ASCII data, without header lines.
+
+    num_columns : int
+        Number of columns of each row.
+
+    column_slot : numpy.array
+        For each of the ``num_columns`` columns, the index of the column in
+        ``float_values`` or ``integer_values``, or -1 if the column is not kept.
+
+    column_is_integer : numpy.array
+        For each of the ``num_columns`` columns, 1 if the column is stored in
+        ``integer_values``, 0 otherwise.
+
+    num_float_columns, num_integer_columns : int
+        Number of columns of ``float_values`` and ``integer_values``.
+
+    Returns
+    -------
+    num_rows : int
+        Number of rows of the block.  -1 if a row does not have ``num_columns`` columns,
+        -2 if a value of a kept column could not be converted.
+
+    float_values : numpy.array
+        num_rows by num_float_columns array of the kept floating point columns.
+
+    integer_values : numpy.array
+        num_rows by num_integer_columns array of the kept integer columns.
+    """
+
+    cdef Py_ssize_t max_rows = block.count(b'\n') + 1
+    cdef np.ndarray[np.float64_t, ndim=2] float_values = \
+        np.empty((max_rows, num_float_columns), dtype=np.float64)
+    cdef np.ndarray[np.int64_t, ndim=2] integer_values = \
+        np.empty((max_rows, num_integer_columns), dtype=np.int64)
+
+    cdef char* p = block
+    cdef char* end = p + len(block)
+    cdef char* q
+    cdef Py_ssize_t row = 0
+    cdef int col = 0
+    cdef np.int64_t slot
+
+    while p < end:
+        #end of a row
+        if p[0] == 10:
+            if col != 0:
+                if col != num_columns:
+                    return -1, float_values[:0], integer_values[:0]
+                row += 1
+                col = 0
+            p += 1
+            continue
+
+        #whitespace between values
+        if is_space(p[0]):
+            p += 1
+            continue
+
+        if col >= num_columns:
+            return -1, float_values[:0], integer_values[:0]
+
+        slot = column_slot[col]
+        if slot < 0:
+            #skip the value without converting it
+            while (p < end) and (not is_space(p[0])):
+                p += 1
+        elif column_is_integer[col]:
+            integer_values[row, slot] = strtoll(p, &q, 10)
+            #integers written in floating point notation, e.g. 1e+06
+            if (q < end) and (not is_space(q[0])):
+                integer_values[row, slot] = <np.int64_t>strtod(p, &q)
+            if (q == p) or ((q < end) and (not is_space(q[0]))):
+                return -2, float_values[:0], integer_values[:0]
+            p = q
+        else:
+            float_values[row, slot] = strtod(p, &q)
+            if (q == p) or ((q < end) and (not is_space(q[0]))):
+                return -2, float_values[:0], integer_values[:0]
+            p = q
+        col += 1
+
+    #last row without a trailing newline
+    if col != 0:
+        if col != num_columns:
+            return -1, float_values[:0], integer_values[:0]
+        row += 1
+
+    return row, float_values[:row], integer_values[:row]
+
+
+cdef inline bint is_space(char c):
+    """
+    True for the whitespace characters separating values and rows.
+    """
+    return (c == 32) or (c == 9) or (c == 10) or (c == 13) or (c == 11) or (c == 12)
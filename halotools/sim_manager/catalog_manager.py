@@ -26,6 +26,7 @@ import urlparse
 import datetime 
 
 import os, fnmatch, re
+import sqlite3
 from functools import partial
 
 from ..custom_exceptions import *
@@ -37,10 +38,15 @@ except ImportError:
         "which can be accomplished either with pip or conda")
 
 from . import cache_config, sim_defaults
+from .columnar_hdf5 import (write_columnar_table, read_halo_table, 
+    is_columnar_table, convert_to_columnar)
+from .spatial_index import spatially_sort_table, write_subvolume_index
+from .particle_subsampling import shuffle_ptcl_table, ptcl_table_is_shuffled
+from .cache_index import CacheIndex
 
 from ..utils.array_utils import find_idx_nearest_val
 from ..utils.array_utils import custom_len, convert_to_ndarray
-from ..utils.io_utils import download_file_from_url
+from ..utils.io_utils import download_file_from_url, fetch_checksum_manifest
 
 
 
@@ -52,9 +58,63 @@ class CatalogManager(object):
     """
 
     def __init__(self):
-        pass
+        self._cache_indices = {}
+
+    def _cache_index(self, **kwargs):
+        """ Private method returning the `~halotools.sim_manager.CacheIndex` 
+        of the cache directory, or None if the index cannot be opened, 
+        e.g., because an ``external_cache_loc`` is read-only. 
+
+        Parameters 
+        ----------
+        external_cache_loc : string, optional 
+            Absolute path to an alternative source of halo catalogs. 
+        """
+        root_kwargs = dict((key, kwargs[key]) for key in ['external_cache_loc'] if key in kwargs)
+        cache_root = os.path.abspath(cache_config.get_catalogs_dir(**root_kwargs))
+        if cache_root not in self._cache_indices:
+            try:
+                self._cache_indices[cache_root] = CacheIndex(cache_root)
+            except sqlite3.Error:
+                self._cache_indices[cache_root] = None
+        return self._cache_indices[cache_root]
+
+    def _indexed_catalogs(self, catalog_type, dirname, **kwargs):
+        """ Private method returning the filenames and scale factors of the catalogs 
+        stored in ``dirname``, looked up in the cache index. 
+        If the cache index is unavailable, ``dirname`` is scanned with `os.walk`, 
+        and the scale factors are returned as None. 
+        """
+        index = self._cache_index(**kwargs)
+        if index is not None:
+            if catalog_type == 'particles':
+                halo_finder = None
+            else:
+                halo_finder = kwargs.get('halo_finder', None)
+            try:
+                return index.catalogs(catalog_type, dirname=dirname, 
+                    simname=kwargs.get('simname', None), halo_finder=halo_finder, 
+                    return_scale_factors=True)
+            except sqlite3.Error:
+                pass
+
+        fname_list = []
+        for path, dirlist, filelist in os.walk(dirname):
+            for name in filelist:
+                fname_list.append(os.path.join(path,name))
+        return fname_list, [None]*len(fname_list)
 
-    def _scrape_cache(self, catalog_type, **kwargs):
+    def _update_cache_index(self, fname, **kwargs):
+        """ Private method recording a newly downloaded or stored catalog in the cache index. 
+        """
+        index = self._cache_index(**kwargs)
+        if index is not None:
+            try:
+                index.update_file(fname)
+            except sqlite3.Error:
+                pass
+
+    def _scrape_cache(self, catalog_type, return_scale_factors=False, **kwargs):
         """ Private method that is the workhorse behind 
         `processed_halo_tables_in_cache`, `raw_halo_tables_in_cache`, and `ptcl_tables_in_cache`. 
 
@@ -96,12 +156,26 @@ class CatalogManager(object):
 
             * Raw halo tables (unprocessed ASCII) should located in ``external_cache_loc/raw_halo_catalogs/simname/halo_finder``
 
+        return_scale_factors : bool, optional 
+            If True, the scale factors stored in the cache index are also returned. 
+            Default is False. 
+
         Returns
         -------
         fname_list : list 
             List of strings of the filenames (including absolute path) of 
             processed halo stored in the cache directory, filtered according 
             to the input arguments. 
+
+        scale_factor_list : list 
+            Scale factors of the catalogs in ``fname_list``, or None for catalogs 
+            whose scale factor is unknown. Only returned if ``return_scale_factors`` is True. 
+
+        Notes 
+        -----
+        The catalogs are looked up in the `~halotools.sim_manager.CacheIndex` 
+        stored in the root of the cache directory, so that only the 
+        directories that have changed since the previous lookup are listed. 
         """
         if 'simname' in kwargs.keys():
             if cache_config.simname_is_supported(kwargs['simname']) is False:
@@ -126,14 +200,19 @@ class CatalogManager(object):
             fname_pattern = kwargs['simname'] + '*' + fname_pattern
         fname_pattern = '*' + fname_pattern
 
-        full_fname_list = []
-        for path, dirlist, filelist in os.walk(cachedir):
-            for name in filelist:
-                full_fname_list.append(os.path.join(path,name))
+        full_fname_list, full_scale_factor_list = self._indexed_catalogs(
+            catalog_type, cachedir, **kwargs)
 
-        fname_list = fnmatch.filter(full_fname_list, fname_pattern)
-                
-        return fname_list
+        fname_list, scale_factor_list = [], []
+        for fname, scale_factor in zip(full_fname_list, full_scale_factor_list):
+            if fnmatch.fnmatch(fname, fname_pattern):
+                fname_list.append(fname)
+                scale_factor_list.append(scale_factor)
+
+        if return_scale_factors is True:
+            return fname_list, scale_factor_list
+        else:
+            return fname_list
 
     def processed_halo_tables_in_cache(self, **kwargs):
         """
@@ -505,7 +584,7 @@ class CatalogManager(object):
         scale_factor_substring = fname[first_index:last_index]
         return scale_factor_substring
 
-    def _closest_fname(self, filename_list, desired_redshift):
+    def _closest_fname(self, filename_list, desired_redshift, scale_factor_list=None):
         """
         """
 
@@ -518,13 +597,15 @@ class CatalogManager(object):
         else:
             input_scale_factor = 1./(1.+desired_redshift) 
 
-        # First create a list of floats storing the scale factors of each hlist file
-        scale_factor_list = []
-        for full_fname in filename_list:
-            fname = os.path.basename(full_fname)
-            scale_factor_substring = self._get_scale_factor_substring(fname)
-            scale_factor = float(scale_factor_substring)
-            scale_factor_list.append(scale_factor)
+        # First create a list of floats storing the scale factors of each hlist file, 
+        # unless they have already been looked up in the cache index
+        if (scale_factor_list is None) or (None in scale_factor_list):
+            scale_factor_list = []
+            for full_fname in filename_list:
+                fname = os.path.basename(full_fname)
+                scale_factor_substring = self._get_scale_factor_substring(fname)
+                scale_factor = float(scale_factor_substring)
+                scale_factor_list.append(scale_factor)
         scale_factor_list = np.array(scale_factor_list)
 
         # Now use the array utils module to determine 
@@ -600,13 +681,15 @@ class CatalogManager(object):
         
         if (catalog_type == 'halos') & ('version_name' not in kwargs.keys()):
             kwargs['version_name'] = sim_defaults.default_version_name
-        filename_list = self._scrape_cache(catalog_type = catalog_type, **kwargs)
+        filename_list, scale_factor_list = self._scrape_cache(catalog_type = catalog_type, 
+            return_scale_factors = True, **kwargs)
 
         if custom_len(filename_list) == 0:
             msg = "\nNo matching catalogs found by closest_catalog_in_cache method of CatalogManager\n"
             raise HalotoolsCacheError(msg)
 
-        output_fname, redshift = self._closest_fname(filename_list, desired_redshift)
+        output_fname, redshift = self._closest_fname(filename_list, desired_redshift, 
+            scale_factor_list = scale_factor_list)
 
         return output_fname, redshift
 
@@ -693,6 +776,27 @@ class CatalogManager(object):
 
         return output_fname, redshift
 
+    def _expected_checksum(self, url, **kwargs):
+        """ Private method returning the checksum of the catalog stored at the input ``url``, 
+        either passed as the ``checksum`` keyword argument or looked up in 
+        the checksum manifest stored in the same web directory as the catalog. 
+        Returns None if the checksum is unknown. 
+        """
+        if 'checksum' in kwargs.keys():
+            return kwargs['checksum']
+
+        manifest_url = posixpath.join(posixpath.dirname(url), 
+            sim_defaults.checksum_manifest_basename)
+        try:
+            manifest = fetch_checksum_manifest(manifest_url)
+        except IOError:
+            manifest = None
+        if manifest is None:
+            print("\nNo checksum manifest found at %s\n"
+                "The downloaded catalog will not be verified.\n" % manifest_url)
+            return None
+        return manifest.get(posixpath.basename(url), None)
+
     def download_raw_halo_table(self, dz_tol = 0.1, overwrite=False, **kwargs):
         """ Method to download one of the pre-processed binary files 
         storing a reduced halo catalog.  
@@ -733,6 +837,17 @@ class CatalogManager(object):
 
             * Raw halo tables (unprocessed ASCII) should located in ``external_cache_loc/raw_halo_catalogs/simname/halo_finder``
 
+        num_connections : int, optional 
+            Maximum number of simultaneous connections used to download the catalog. 
+            Default is 4. Interrupted downloads are resumed from the partial 
+            download the next time the method is called. 
+
+        checksum : string, optional 
+            Expected hexdigest of the catalog. Default is to look up the checksum 
+            in the manifest stored next to the catalog on the web, 
+            see `~halotools.sim_manager.sim_defaults.checksum_manifest_basename`. 
+            The download is not verified if there is no manifest. 
+
         Returns 
         -------
         output_fname : string  
@@ -767,22 +882,24 @@ class CatalogManager(object):
             file_pattern = re.sub('.gz', '', file_pattern)
             file_pattern = '*' + file_pattern + '*'
 
-            for path, dirlist, filelist in os.walk(cache_dirname):
-                 for fname in filelist:
-                    if fnmatch.filter([fname], file_pattern) != []:
-                        existing_fname = os.path.join(path, fname)
-                        msg = ("The following filename already exists in your cache directory: \n\n%s\n\n"
-                            "If you really want to overwrite the file, \n"
-                            "you must call the same function again \n"
-                            "with the keyword argument `overwrite` set to `True`")
-                        print(msg % existing_fname)
-                        return None
+            existing_fnames, _ = self._indexed_catalogs('raw_halos', cache_dirname, **kwargs)
+            for existing_fname in existing_fnames:
+                if fnmatch.fnmatch(os.path.basename(existing_fname), file_pattern):
+                    msg = ("The following filename already exists in your cache directory: \n\n%s\n\n"
+                        "If you really want to overwrite the file, \n"
+                        "you must call the same function again \n"
+                        "with the keyword argument `overwrite` set to `True`")
+                    print(msg % existing_fname)
+                    return None
 
         start = time()
-        download_file_from_url(url, output_fname)
+        download_file_from_url(url, output_fname, 
+            num_connections = kwargs.get('num_connections', 4), 
+            checksum = self._expected_checksum(url, **kwargs))
         end = time()
         runtime = (end - start)
         print("\nTotal runtime to download raw halo catalog = %.1f seconds\n" % runtime)
+        self._update_cache_index(output_fname, **kwargs)
         if 'success_msg' in kwargs.keys():
             print(kwargs['success_msg'])
         return output_fname
@@ -828,6 +945,17 @@ class CatalogManager(object):
 
             * Raw halo tables (unprocessed ASCII) should located in ``external_cache_loc/raw_halo_catalogs/simname/halo_finder``
 
+        num_connections : int, optional 
+            Maximum number of simultaneous connections used to download the catalog. 
+            Default is 4. Interrupted downloads are resumed from the partial 
+            download the next time the method is called. 
+
+        checksum : string, optional 
+            Expected hexdigest of the catalog. Default is to look up the checksum 
+            in the manifest stored next to the catalog on the web, 
+            see `~halotools.sim_manager.sim_defaults.checksum_manifest_basename`. 
+            The download is not verified if there is no manifest. 
+
         Returns 
         -------
         output_fname : string  
@@ -875,24 +1003,26 @@ class CatalogManager(object):
             file_pattern = re.sub('.gz', '', file_pattern)
             file_pattern = '*' + file_pattern + '*'
 
-            for path, dirlist, filelist in os.walk(cache_dirname):
-                 for fname in filelist:
-                    if fnmatch.filter([fname], file_pattern) != []:
-                        existing_fname = os.path.join(path, fname)
-                        if 'initial_download_script_msg' in kwargs.keys():
-                            msg = kwargs['initial_download_script_msg']
-                        else:
-                            msg = ("The following filename already exists in your cache directory: \n\n%s\n\n"
-                                "If you really want to overwrite the file, \n"
-                                "you must call the same function again \n"
-                                "with the keyword argument `overwrite` set to `True`")
-                        raise HalotoolsCacheError(msg % existing_fname)
+            existing_fnames, _ = self._indexed_catalogs('halos', cache_dirname, **kwargs)
+            for existing_fname in existing_fnames:
+                if fnmatch.fnmatch(os.path.basename(existing_fname), file_pattern):
+                    if 'initial_download_script_msg' in kwargs.keys():
+                        msg = kwargs['initial_download_script_msg']
+                    else:
+                        msg = ("The following filename already exists in your cache directory: \n\n%s\n\n"
+                            "If you really want to overwrite the file, \n"
+                            "you must call the same function again \n"
+                            "with the keyword argument `overwrite` set to `True`")
+                    raise HalotoolsCacheError(msg % existing_fname)
 
         start = time()
-        download_file_from_url(url, output_fname)
+        download_file_from_url(url, output_fname, 
+            num_connections = kwargs.get('num_connections', 4), 
+            checksum = self._expected_checksum(url, **kwargs))
         end = time()
         runtime = (end - start)
         print("\nTotal runtime to download pre-processed halo catalog = %.1f seconds\n" % runtime)
+        self._update_cache_index(output_fname, **kwargs)
         if 'success_msg' in kwargs.keys():
             print(kwargs['success_msg'])
         return output_fname
@@ -938,6 +1068,22 @@ class CatalogManager(object):
 
             * Raw halo tables (unprocessed ASCII) should located in ``external_cache_loc/raw_halo_catalogs/simname/halo_finder``
 
+        shuffle : bool, optional 
+            If True, the downloaded particles will be stored in a random order, 
+            so that random subsamples can be read without loading the full table 
+            (see `~halotools.sim_manager.shuffle_ptcl_table`). Default is True. 
+
+        num_connections : int, optional 
+            Maximum number of simultaneous connections used to download the catalog. 
+            Default is 4. Interrupted downloads are resumed from the partial 
+            download the next time the method is called. 
+
+        checksum : string, optional 
+            Expected hexdigest of the catalog. Default is to look up the checksum 
+            in the manifest stored next to the catalog on the web, 
+            see `~halotools.sim_manager.sim_defaults.checksum_manifest_basename`. 
+            The download is not verified if there is no manifest. 
+
         Returns 
         -------
         output_fname : string  
@@ -983,24 +1129,31 @@ class CatalogManager(object):
             file_pattern = re.sub('.gz', '', file_pattern)
             file_pattern = '*' + file_pattern + '*'
 
-            for path, dirlist, filelist in os.walk(cache_dirname):
-                 for fname in filelist:
-                    if fnmatch.filter([fname], file_pattern) != []:
-                        existing_fname = os.path.join(path, fname)
-                        if 'initial_download_script_msg' in kwargs.keys():
-                            msg = kwargs['initial_download_script_msg']
-                        else:
-                            msg = ("The following filename already exists in your cache directory: \n\n%s\n\n"
-                                "If you really want to overwrite the file, \n"
-                                "you must call the same function again \n"
-                                "with the keyword argument `overwrite` set to `True`")
-                        raise HalotoolsCacheError(msg % existing_fname)
+            existing_fnames, _ = self._indexed_catalogs('particles', cache_dirname, **kwargs)
+            for existing_fname in existing_fnames:
+                if fnmatch.fnmatch(os.path.basename(existing_fname), file_pattern):
+                    if 'initial_download_script_msg' in kwargs.keys():
+                        msg = kwargs['initial_download_script_msg']
+                    else:
+                        msg = ("The following filename already exists in your cache directory: \n\n%s\n\n"
+                            "If you really want to overwrite the file, \n"
+                            "you must call the same function again \n"
+                            "with the keyword argument `overwrite` set to `True`")
+                    raise HalotoolsCacheError(msg % existing_fname)
 
         start = time()
-        download_file_from_url(url, output_fname)
+        download_file_from_url(url, output_fname, 
+            num_connections = kwargs.get('num_connections', 4), 
+            checksum = self._expected_checksum(url, **kwargs))
         end = time()
         runtime = (end - start)
         print("\nTotal runtime to download particle data = %.1f seconds\n" % runtime)
+
+        if (kwargs.get('shuffle', True) is True) & (output_fname[-5:] == '.hdf5'):
+            if not ptcl_table_is_shuffled(output_fname):
+                print("...storing particles in a random order")
+                shuffle_ptcl_table(output_fname, path='data')
+        self._update_cache_index(output_fname, **kwargs)
         if 'success_msg' in kwargs.keys():
             print(kwargs['success_msg'])
         return output_fname
@@ -1047,7 +1200,7 @@ class CatalogManager(object):
             print("\nIf your science application requires particles an exact snapshot, "
                 "be sure to double-check that this filename is as expected\n")
 
-        return Table.read(fname, path='data')
+        return read_halo_table(fname, path='data')
 
     def retrieve_processed_halo_table_from_cache(self, **kwargs):
         pass
@@ -1085,6 +1238,25 @@ class CatalogManager(object):
             Each dict key of `notes` will be a metadata attribute of the hdf5 file, accessible 
             via hdf5_fileobj.attrs[key]. The value attached to each key can be any string. 
 
+        layout : string, optional 
+            Storage layout of the table in the hdf5 file. If ``columnar``, 
+            each column is stored in its own chunked dataset, so that columns can be 
+            read independently; if ``compound``, the table is stored as a single dataset 
+            with `~astropy.table.Table.write`. 
+            See `~halotools.sim_manager.columnar_hdf5` for details. Default is ``columnar``. 
+
+        compression : string, optional 
+            Compression filter applied to each column in the ``columnar`` layout. 
+            If None, the columns will not be compressed. Default is ``gzip``. 
+
+        num_subvolume_divs : int or array_like, optional 
+            If passed, the halos will be stored sorted by the subvolume containing them, 
+            with the box divided into ``num_subvolume_divs`` subvolumes per dimension, 
+            and the offsets of each subvolume will be stored in the hdf5 file, 
+            so that `~halotools.sim_manager.HaloCatalog.read_region` only reads 
+            the needed subvolumes. See `~halotools.sim_manager.spatial_index` for details. 
+            Default is None, in which case the halos are stored in their input order. 
+
         Returns 
         -------
         output_fname : string 
@@ -1112,7 +1284,20 @@ class CatalogManager(object):
             overwrite = kwargs['overwrite']
         else:
             overwrite = False
-        halo_table.write(output_fname, path='data', overwrite = overwrite, append = overwrite)
+
+        num_subvolume_divs = kwargs.get('num_subvolume_divs', None)
+        if num_subvolume_divs is not None:
+            halo_table, subvolume_offsets = spatially_sort_table(
+                halo_table, reader.halocat.Lbox, num_subvolume_divs)
+
+        layout = kwargs.get('layout', 'columnar')
+        if layout == 'columnar':
+            write_columnar_table(halo_table, output_fname, path='data', overwrite = overwrite, 
+                compression = kwargs.get('compression', 'gzip'))
+        elif layout == 'compound':
+            halo_table.write(output_fname, path='data', overwrite = overwrite, append = overwrite)
+        else:
+            raise HalotoolsIOError("Input layout must be either ``columnar`` or ``compound``")
 
         ### Add metadata to the hdf5 file
         try:
@@ -1144,8 +1329,75 @@ class CatalogManager(object):
 
         f.close()
 
+        if num_subvolume_divs is not None:
+            write_subvolume_index(output_fname, subvolume_offsets, num_subvolume_divs)
+
+        self._update_cache_index(output_fname, **kwargs)
+
         return output_fname
 
+    def convert_processed_halo_tables_to_columnar(self, **kwargs):
+        """ Convert the processed halo tables in cache that are stored in the 
+        compound hdf5 layout to the columnar layout, replacing each file in place. 
+        Tables that already use the columnar layout are left untouched. 
+        The metadata attached to each file is preserved. 
+
+        Parameters 
+        ----------
+        simname, halo_finder, version_name, external_cache_loc : string, optional 
+            Arguments used to filter the list of processed halo tables, 
+            as in `processed_halo_tables_in_cache`. 
+
+        compression : string, optional 
+            Compression filter applied to each column. 
+            If None, the columns will not be compressed. Default is ``gzip``. 
+
+        Returns 
+        -------
+        converted_fnames : list 
+            Filenames (including absolute path) of the converted halo tables. 
+        """
+        compression = kwargs.pop('compression', 'gzip')
+
+        converted_fnames = []
+        for fname in self.processed_halo_tables_in_cache(**kwargs):
+            if not is_columnar_table(fname, path='data'):
+                print("...converting %s to columnar layout" % fname)
+                convert_to_columnar(fname, path='data', compression=compression)
+                self._update_cache_index(fname, **kwargs)
+                converted_fnames.append(fname)
+        return converted_fnames
+
+    def shuffle_ptcl_tables_in_cache(self, **kwargs):
+        """ Store the particle tables in cache in a random order, replacing each file in place, 
+        so that random subsamples can be read without loading the full table. 
+        Tables that are already stored in a random order are left untouched. 
+
+        Parameters 
+        ----------
+        simname, external_cache_loc : string, optional 
+            Arguments used to filter the list of particle tables, 
+            as in `ptcl_tables_in_cache`. 
+
+        seed : int, optional 
+            Random number seed used to shuffle the particles. Default is 43. 
+
+        Returns 
+        -------
+        shuffled_fnames : list 
+            Filenames (including absolute path) of the shuffled particle tables. 
+        """
+        seed = kwargs.pop('seed', 43)
+
+        shuffled_fnames = []
+        for fname in self.ptcl_tables_in_cache(**kwargs):
+            if not ptcl_table_is_shuffled(fname):
+                print("...storing particles of %s in a random order" % fname)
+                shuffle_ptcl_table(fname, seed=seed, path='data')
+                self._update_cache_index(fname, **kwargs)
+                shuffled_fnames.append(fname)
+        return shuffled_fnames
+
 
 
 
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Module containing the `CatalogRegistry` class, and the process-wide
+registry ``catalog_registry`` through which every
+`~halotools.sim_manager.HaloCatalog` shares the columns
+of the halo catalogs it reads from disk.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+__all__ = ['CatalogRegistry', 'catalog_registry']
+
+import os
+import threading
+from collections import OrderedDict
+from astropy.table import Table
+
+from . import sim_defaults
+from .lazy_halo_table import LazyHaloTable, _HDF5ColumnSource
+from ..custom_exceptions import HalotoolsError
+
+
+class CatalogRegistry(object):
+    """ Registry of the halo catalogs that have been read from disk,
+    keyed by simname, halo-finder, version name and redshift.
+
+    All tables handed out by the registry for the same catalog read their columns
+    from a single shared hdf5 source, so that each column is read from disk
+    and held in memory only once, however many
+    `~halotools.sim_manager.HaloCatalog` or mock objects use the catalog.
+    The shared columns are read-only; columns added to a table,
+    e.g., during the pre-processing of a halo catalog by a model,
+    belong to that table only.
+
+    The total memory used by the shared columns is kept below ``memory_budget``
+    by evicting the least recently used columns. Tables that have already
+    accessed an evicted column keep their reference to it, so the memory
+    is only released once those tables are deleted.
+    """
+
+    def __init__(self, memory_budget=sim_defaults.catalog_registry_memory_budget):
+        """
+        Parameters
+        ----------
+        memory_budget : float, optional
+            Maximum number of bytes of columns held in memory by the registry.
+            Memory-mapped columns do not count against the budget.
+            Default is set by ``catalog_registry_memory_budget`` in
+            `~halotools.sim_manager.sim_defaults`.
+
+        Examples
+        --------
+        >>> registry = CatalogRegistry(memory_budget=1e9)
+        >>> registry.memory_usage()
+        0
+        """
+        self.memory_budget = memory_budget
+        self._sources = {}
+        self._mtimes = {}
+        # keys are (catalog_key, colname) pairs, in order of last access
+        self._lru = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def catalog_key(simname, halo_finder, version_name, redshift):
+        """ Key identifying a halo catalog in the registry.
+        """
+        return (simname, halo_finder, version_name, round(float(redshift), 4))
+
+    def halo_table(self, fname, simname, halo_finder, version_name, redshift, path='data'):
+        """ Return a `~halotools.sim_manager.LazyHaloTable` whose columns
+        are shared with every other table handed out for the same catalog.
+
+        If the file of a registered catalog has changed on disk,
+        or the catalog is now stored in a different file,
+        the registered catalog is evicted and read again.
+
+        Parameters
+        ----------
+        fname : string
+            Name of the hdf5 file (including absolute path) storing the halo catalog.
+
+        simname, halo_finder, version_name : string
+            Nicknames of the simulation and halo-finder, and the version name
+            of the processed halo catalog.
+
+        redshift : float
+            Redshift of the halo catalog.
+
+        path : string, optional
+            Path of the dataset within the hdf5 file. Default is ``data``.
+
+        Returns
+        -------
+        halo_table : `~halotools.sim_manager.LazyHaloTable`
+        """
+        key = self.catalog_key(simname, halo_finder, version_name, redshift)
+        mtime = os.path.getmtime(fname)
+        with self._lock:
+            source = self._sources.get(key, None)
+            if (source is not None) and ((source.fname != fname) or (self._mtimes[key] != mtime)):
+                self.evict(key)
+                source = None
+            if source is None:
+                source = _HDF5ColumnSource(fname, path, registry=self)
+                source.catalog_key = key
+                self._sources[key] = source
+                self._mtimes[key] = mtime
+        return LazyHaloTable._from_source(source)
+
+    def preload(self, key, keys=None):
+        """ Read the columns of a registered catalog into memory.
+
+        Parameters
+        ----------
+        key : tuple
+            Key of the catalog returned by `catalog_key`.
+
+        keys : list, optional
+            Column names to read. Default is to read all columns.
+        """
+        source = self._sources[key]
+        for colname in (source.names if keys is None else keys):
+            source.column(colname)
+
+    def _record_access(self, source, colname):
+        """ Mark a column of a registered catalog as the most recently used,
+        evicting the least recently used columns if the memory budget is exceeded.
+        Called whenever a table accesses a shared column.
+        """
+        with self._lock:
+            if (source.registry is not self) or (colname not in source._columns):
+                return
+            entry = (source.catalog_key, colname)
+            self._lru.pop(entry, None)
+            self._lru[entry] = source.column_nbytes(colname)
+            self._evict_to_budget()
+
+    def _evict_to_budget(self):
+        """ Evict the least recently used columns until the memory usage
+        is within the budget. The most recently used column is never evicted.
+        """
+        while (self.memory_usage() > self.memory_budget) & (len(self._lru) > 1):
+            (key, colname), nbytes = self._lru.popitem(last=False)
+            self._sources[key].evict(colname)
+
+    def evict(self, key=None):
+        """ Remove a catalog from the registry.
+
+        Parameters
+        ----------
+        key : tuple, optional
+            Key of the catalog returned by `catalog_key`.
+            Default is None, in which case all catalogs are removed.
+        """
+        with self._lock:
+            if key is None:
+                keys = list(self._sources.keys())
+            elif key not in self._sources:
+                raise HalotoolsError("Catalog %s is not in the registry" % str(key))
+            else:
+                keys = [key]
+            for key in keys:
+                for entry in [entry for entry in self._lru if entry[0] == key]:
+                    del self._lru[entry]
+                source = self._sources.pop(key)
+                del self._mtimes[key]
+                source.registry = None
+                source._columns = {}
+
+    def memory_usage(self, key=None):
+        """ Number of bytes of memory used by the columns held in the registry.
+
+        Parameters
+        ----------
+        key : tuple, optional
+            Key of the catalog returned by `catalog_key`.
+            Default is None, in which case the usage of all catalogs is summed.
+
+        Returns
+        -------
+        nbytes : int
+        """
+        return sum(nbytes for entry, nbytes in self._lru.items()
+            if (key is None) or (entry[0] == key))
+
+    def memory_report(self):
+        """ Summarize the memory used by each registered catalog.
+
+        Returns
+        -------
+        report : `~astropy.table.Table`
+            Table with one row per registered catalog, with columns
+            ``simname``, ``halo_finder``, ``version_name``, ``redshift``, ``fname``,
+            ``num_columns_loaded`` and ``nbytes``.
+        """
+        with self._lock:
+            keys = sorted(self._sources.keys())
+            report = Table()
+            report['simname'] = [key[0] for key in keys]
+            report['halo_finder'] = [key[1] for key in keys]
+            report['version_name'] = [key[2] for key in keys]
+            report['redshift'] = [key[3] for key in keys]
+            report['fname'] = [self._sources[key].fname for key in keys]
+            report['num_columns_loaded'] = [
+                len([entry for entry in self._lru if entry[0] == key]) for key in keys]
+            report['nbytes'] = [self.memory_usage(key) for key in keys]
+        return report
+
+# Process-wide registry used by the HaloCatalog class
+catalog_registry = CatalogRegistry()
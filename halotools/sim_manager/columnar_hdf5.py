@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Module containing functions used to store and read tables in
+the columnar hdf5 layout used for processed halo catalogs.
+
+In the columnar layout, the table is stored as an hdf5 group
+with one chunked and optionally compressed dataset per column,
+so that individual columns can be read without reading the entire table.
+In the original compound layout, the table is stored as a single dataset
+of structured rows, as written by `~astropy.table.Table.write`.
+The readers in this module understand both layouts.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+__all__ = ['write_columnar_table', 'read_halo_table',
+    'is_columnar_table', 'convert_to_columnar']
+
+import os
+import numpy as np
+from astropy.table import Table
+
+from ..custom_exceptions import HalotoolsError, HalotoolsIOError
+
+# Name of the attribute of the hdf5 group storing the ordered list of columns
+_colnames_attr = 'colnames'
+
+# Default number of rows in each chunk of a columnar dataset
+default_chunk_rows = 2**16
+
+def _import_h5py():
+    try:
+        import h5py
+    except ImportError:
+        raise HalotoolsError("Must have h5py package installed to use this feature")
+    return h5py
+
+def is_columnar_table(fname, path='data'):
+    """ Determine whether the table stored at ``path`` in the hdf5 file
+    uses the columnar layout.
+
+    Parameters
+    ----------
+    fname : string
+        Name of the hdf5 file (including absolute path).
+
+    path : string, optional
+        Path of the table within the hdf5 file. Default is ``data``.
+
+    Returns
+    -------
+    is_columnar : bool
+    """
+    h5py = _import_h5py()
+    with h5py.File(fname, 'r') as f:
+        if path not in f:
+            raise HalotoolsIOError("The hdf5 file %s has no table stored at path ``%s``"
+                % (fname, path))
+        return isinstance(f[path], h5py.Group)
+
+def _write_columns(group, colnames, get_column, Nrows,
+    compression, compression_opts, chunk_rows):
+    """ Write each column to its own chunked dataset of the input hdf5 group.
+    """
+    chunk_rows = int(max(1, min(chunk_rows, Nrows)))
+    for key in colnames:
+        data = get_column(key)
+        kwargs = {}
+        if Nrows > 0:
+            kwargs['chunks'] = (chunk_rows, ) + np.shape(data)[1:]
+            if compression is not None:
+                kwargs['compression'] = compression
+                kwargs['compression_opts'] = compression_opts
+                kwargs['shuffle'] = True
+        group.create_dataset(key, data=data, **kwargs)
+    group.attrs[_colnames_attr] = np.array([key.encode('ascii') for key in colnames])
+
+def write_columnar_table(table, fname, path='data', overwrite=False,
+    compression='gzip', compression_opts=4, chunk_rows=default_chunk_rows):
+    """ Store the input table in the columnar hdf5 layout.
+
+    Parameters
+    ----------
+    table : `~astropy.table.Table`
+        Table to be stored. Any object supporting ``table.keys()``
+        and column access ``table[key]`` may also be passed.
+
+    fname : string
+        Name of the hdf5 file (including absolute path).
+
+    path : string, optional
+        Path of the group storing the table within the hdf5 file. Default is ``data``.
+
+    overwrite : bool, optional
+        If True, any existing file named ``fname`` will be replaced. Default is False.
+
+    compression : string, optional
+        Compression filter applied to each column, e.g., ``gzip`` or ``lzf``.
+        If None, the columns will not be compressed. Default is ``gzip``.
+
+    compression_opts : int, optional
+        Compression level used with the ``gzip`` filter. Default is 4.
+
+    chunk_rows : int, optional
+        Number of rows in each chunk of the stored columns. Default is 65536.
+    """
+    h5py = _import_h5py()
+    if os.path.isfile(fname):
+        if overwrite is True:
+            os.remove(fname)
+        else:
+            raise HalotoolsIOError("File %s already exists. "
+                "To overwrite, call write_columnar_table with overwrite=True" % fname)
+    if compression != 'gzip':
+        compression_opts = None
+
+    colnames = list(table.keys())
+    with h5py.File(fname, 'w') as f:
+        group = f.create_group(path)
+        _write_columns(group, colnames, lambda key: np.asarray(table[key]), len(table),
+            compression, compression_opts, chunk_rows)
+
+def _columnar_colnames(group):
+    if _colnames_attr in group.attrs:
+        return [key.decode('ascii') if isinstance(key, bytes) else key
+            for key in group.attrs[_colnames_attr]]
+    else:
+        return list(group.keys())
+
+def _table_length(fname, path='data'):
+    """ Return the number of rows of a table stored in either hdf5 layout.
+    """
+    h5py = _import_h5py()
+    with h5py.File(fname, 'r') as f:
+        obj = f[path]
+        if isinstance(obj, h5py.Group):
+            colnames = _columnar_colnames(obj)
+            return obj[colnames[0]].shape[0] if len(colnames) > 0 else 0
+        else:
+            return obj.shape[0]
+
+def read_halo_table(fname, path='data', keys=None, num_rows=None):
+    """ Read a table stored in either the columnar or the compound hdf5 layout.
+
+    Parameters
+    ----------
+    fname : string
+        Name of the hdf5 file (including absolute path).
+
+    path : string, optional
+        Path of the table within the hdf5 file. Default is ``data``.
+
+    keys : list, optional
+        Names of the columns to read. Default is to read all columns.
+        For tables in the columnar layout, only the requested columns are read from disk.
+
+    num_rows : int, optional
+        If passed, only the first ``num_rows`` rows are read from disk.
+        Default is to read all rows.
+
+    Returns
+    -------
+    table : `~astropy.table.Table`
+    """
+    h5py = _import_h5py()
+    with h5py.File(fname, 'r') as f:
+        if path not in f:
+            raise HalotoolsIOError("The hdf5 file %s has no table stored at path ``%s``"
+                % (fname, path))
+        obj = f[path]
+        if isinstance(obj, h5py.Group):
+            colnames = _columnar_colnames(obj)
+            if keys is None:
+                keys = colnames
+            for key in keys:
+                if key not in colnames:
+                    raise KeyError("Input key ``%s`` is not a column of the table" % key)
+            if num_rows is None:
+                return Table([obj[key][...] for key in keys], names=keys)
+            else:
+                return Table([obj[key][:num_rows] for key in keys], names=keys)
+        elif num_rows is not None:
+            table = Table(obj[:num_rows])
+
+    if num_rows is None:
+        table = Table.read(fname, path=path)
+    if keys is not None:
+        table = table[list(keys)]
+    return table
+
+def convert_to_columnar(fname, output_fname=None, path='data',
+    compression='gzip', compression_opts=4, chunk_rows=default_chunk_rows):
+    """ Convert a table stored in the compound hdf5 layout to the columnar layout.
+
+    The metadata attributes attached to the root of the hdf5 file,
+    and any other datasets stored in the file, are copied to the new file.
+    The compound dataset is read one column at a time,
+    so that the converter never holds more than one column in memory.
+
+    Parameters
+    ----------
+    fname : string
+        Name of the hdf5 file (including absolute path) in the compound layout.
+
+    output_fname : string, optional
+        Name of the converted file. If None, ``fname`` is replaced by
+        the converted file once the conversion is complete. Default is None.
+
+    path : string, optional
+        Path of the table within the hdf5 file. Default is ``data``.
+
+    compression, compression_opts, chunk_rows : optional
+        Storage options passed to `write_columnar_table`.
+
+    Returns
+    -------
+    output_fname : string
+        Name of the converted file.
+    """
+    h5py = _import_h5py()
+    if is_columnar_table(fname, path=path):
+        raise HalotoolsIOError("The table stored in %s already uses the columnar layout" % fname)
+    if compression != 'gzip':
+        compression_opts = None
+
+    if output_fname is None:
+        replace_input = True
+        output_fname = fname + '.columnar.tmp'
+    else:
+        replace_input = False
+
+    with h5py.File(fname, 'r') as fin:
+        dset = fin[path]
+        colnames = list(dset.dtype.names)
+        with h5py.File(output_fname, 'w') as fout:
+            for key, value in fin.attrs.items():
+                fout.attrs[key] = value
+            for name in fin:
+                if name != path:
+                    fin.copy(name, fout)
+            group = fout.create_group(path)
+            _write_columns(group, colnames, lambda key: dset[key], dset.shape[0],
+                compression, compression_opts, chunk_rows)
+
+    if replace_input is True:
+        os.rename(output_fname, fname)
+        output_fname = fname
+
+    return output_fname
@@ -135,6 +135,16 @@ class FakeSim(object):
 
 		return Table(d)
 
+	def ptcl_table_subsample(self, num_ptcl):
+		""" Random subsample of ``ptcl_table``. 
+		The particles of `FakeSim` are generated in a random order, 
+		so the subsample is simply the first ``num_ptcl`` particles. 
+		"""
+		if num_ptcl > self.num_ptcl:
+			raise SyntaxError("Length of the desired downsampling = %i, "
+				"which exceeds the number of particles = %i " % (num_ptcl, self.num_ptcl))
+		return self.ptcl_table[:int(num_ptcl)]
+
 	
 class FakeMock(object):
 	""" Fake galaxy data used in the test suite of `~halotools.empirical_models`. 
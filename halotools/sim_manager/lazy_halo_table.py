@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+Module containing the `LazyHaloTable` class, a read-only view of a
+halo catalog stored on disk in hdf5 format that only loads
+the columns that are actually accessed.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+__all__ = ['LazyHaloTable']
+
+import numpy as np
+from astropy.extern import six
+from astropy.table import Table, Column
+
+from .columnar_hdf5 import _columnar_colnames
+from ..custom_exceptions import HalotoolsError
+
+def _memmap_dataset(fname, dset):
+    """ Return a memory map of the input hdf5 dataset, or None if
+    the dataset is chunked or compressed and so cannot be memory-mapped.
+    """
+    offset = dset.id.get_offset()
+    if (offset is not None) & (dset.chunks is None) & (dset.compression is None):
+        return np.memmap(fname, dtype=dset.dtype, mode='r',
+            offset=offset, shape=dset.shape)
+    else:
+        return None
+
+class _HDF5ColumnSource(object):
+    """ Private class holding the open hdf5 table of a processed halo catalog,
+    stored in either the compound or the columnar layout
+    (see `~halotools.sim_manager.columnar_hdf5`).
+    Full-length columns are read at most once.
+
+    Sources shared through the `~halotools.sim_manager.CatalogRegistry`
+    have a ``registry``, which is notified of every column access so that
+    the least recently used columns can be evicted, and their columns are read-only.
+    """
+
+    def __init__(self, fname, path, registry=None):
+        try:
+            import h5py
+        except ImportError:
+            raise HalotoolsError("Must have h5py package installed to use this feature")
+
+        self.fname = fname
+        self.path = path
+        self._f = h5py.File(fname, 'r')
+        self._dset = self._f[path]
+        self._columns = {}
+        self.registry = registry
+
+        # Contiguous, uncompressed datasets can be memory-mapped directly,
+        # in which case reading a column only touches the pages that are used
+        self.is_columnar = isinstance(self._dset, h5py.Group)
+        if self.is_columnar:
+            self.names = _columnar_colnames(self._dset)
+            self.length = self._dset[self.names[0]].shape[0] if len(self.names) > 0 else 0
+            self._memmap = dict((key, _memmap_dataset(fname, self._dset[key]))
+                for key in self.names)
+            self.is_memory_mapped = all(m is not None for m in self._memmap.values())
+        else:
+            self.names = list(self._dset.dtype.names)
+            self.length = self._dset.shape[0]
+            self._memmap = _memmap_dataset(fname, self._dset)
+            self.is_memory_mapped = self._memmap is not None
+
+    def column(self, key):
+        """ Return the full-length column of the hdf5 table with the input name.
+        """
+        if key not in self._columns:
+            if self.is_columnar:
+                if self._memmap[key] is not None:
+                    self._columns[key] = self._memmap[key]
+                else:
+                    self._columns[key] = self._dset[key][...]
+            elif self._memmap is not None:
+                self._columns[key] = self._memmap[key]
+            else:
+                self._columns[key] = self._dset[key]
+            if self.registry is not None:
+                self._columns[key].flags.writeable = False
+        if self.registry is not None:
+            self.registry._record_access(self, key)
+        return self._columns[key]
+
+    def column_nbytes(self, key):
+        """ Number of bytes of memory used by the cached column, 
+        excluding memory-mapped columns, whose pages are managed by the operating system.
+        """
+        data = self._columns.get(key, None)
+        if (data is None) or isinstance(data, np.memmap):
+            return 0
+        else:
+            return data.nbytes
+
+    def evict(self, key):
+        self._columns.pop(key, None)
+
+    def close(self):
+        self._columns = {}
+        self._memmap = None
+        self._f.close()
+
+
+class LazyHaloTable(object):
+    """ Table of halos stored on disk whose columns are only read when accessed.
+
+    `LazyHaloTable` opens the hdf5 dataset of a processed halo catalog once,
+    and reads columns on demand, memory-mapping them when the dataset
+    is stored contiguously and uncompressed. Columns are cached after the first access.
+    Tables stored in either the compound or the columnar layout are supported;
+    in the columnar layout, accessing a column never reads the other columns.
+
+    Indexing with a string returns a `~astropy.table.Column`; indexing with
+    a boolean mask, an array of indices or a slice returns a new `LazyHaloTable`
+    that only loads the selected rows of the columns that are accessed.
+    New columns can be added with item assignment and are kept in memory.
+    Thus `LazyHaloTable` can be used in place of an `~astropy.table.Table` by
+    `~halotools.empirical_models.HodMockFactory` and
+    `~halotools.utils.SampleSelector`. To create a true `~astropy.table.Table`,
+    use the `to_table` method.
+    """
+
+    def __init__(self, fname, path='data'):
+        """
+        Parameters
+        ----------
+        fname : string
+            Name of the hdf5 file (including absolute path) storing the halo catalog.
+
+        path : string, optional
+            Path of the dataset within the hdf5 file. Default is ``data``,
+            which is the path used by the `~halotools.sim_manager.CatalogManager`.
+
+        Examples
+        --------
+        >>> halo_table = LazyHaloTable(fname) # doctest: +SKIP
+        >>> mass = halo_table['halo_mvir'] # doctest: +SKIP
+        >>> hosts = halo_table[halo_table.host_halo_mask] # doctest: +SKIP
+        """
+        self._source = _HDF5ColumnSource(fname, path)
+        self._rows = None
+        self._colnames = list(self._source.names)
+        self._columns = {}
+        self._added_columns = set()
+
+    @classmethod
+    def _from_source(cls, source):
+        """ Create a new table reading its columns from an existing hdf5 source,
+        e.g., one shared through the `~halotools.sim_manager.CatalogRegistry`.
+        """
+        table = cls.__new__(cls)
+        table._source = source
+        table._rows = None
+        table._colnames = list(source.names)
+        table._columns = {}
+        table._added_columns = set()
+        return table
+
+    @classmethod
+    def _from_parent(cls, parent, rows, colnames, columns, added_columns):
+        """ Create a new view sharing the hdf5 source of the parent.
+        """
+        view = cls.__new__(cls)
+        view._source = parent._source
+        view._rows = rows
+        view._colnames = colnames
+        view._columns = columns
+        view._added_columns = added_columns
+        return view
+
+    @property
+    def fname(self):
+        return self._source.fname
+
+    @property
+    def colnames(self):
+        return list(self._colnames)
+
+    def keys(self):
+        return list(self._colnames)
+
+    def __len__(self):
+        if self._rows is None:
+            return self._source.length
+        else:
+            return len(self._rows)
+
+    def __contains__(self, key):
+        return key in self._colnames
+
+    def __getitem__(self, item):
+        if isinstance(item, six.string_types):
+            return self._get_column(item)
+        elif isinstance(item, (list, tuple)) and (len(item) > 0) and all(
+            isinstance(key, six.string_types) for key in item):
+            for key in item:
+                if key not in self._colnames:
+                    raise KeyError("Input key ``%s`` is not a column of the halo table" % key)
+            columns = dict((key, self._columns[key]) for key in item if key in self._columns)
+            return self._from_parent(self, self._rows, list(item), columns,
+                set(item) & self._added_columns)
+        else:
+            return self._select_rows(item)
+
+    def __setitem__(self, key, value):
+        value = np.asarray(value)
+        if np.shape(value) == ():
+            value = np.repeat(value, len(self))
+        if len(value) != len(self):
+            raise ValueError("Length of the new column ``%s`` = %i does not match "
+                "the length of the halo table = %i" % (key, len(value), len(self)))
+        if key not in self._colnames:
+            self._colnames.append(key)
+        self._columns[key] = Column(value, name=key)
+        self._added_columns.add(key)
+        if key == 'halo_upid':
+            self.__dict__.pop('_host_halo_mask', None)
+
+    def __delitem__(self, key):
+        if key not in self._colnames:
+            raise KeyError("Input key ``%s`` is not a column of the halo table" % key)
+        self._colnames.remove(key)
+        self._columns.pop(key, None)
+        self._added_columns.discard(key)
+
+    def _get_column(self, key):
+        if key not in self._colnames:
+            raise KeyError("Input key ``%s`` is not a column of the halo table" % key)
+        if key not in self._columns:
+            data = self._source.column(key)
+            if self._rows is not None:
+                data = data[self._rows]
+            self._columns[key] = Column(data, name=key, copy=False)
+        elif self._source.registry is not None:
+            # keep the least-recently-used order of the shared columns up to date
+            self._source.registry._record_access(self._source, key)
+        return self._columns[key]
+
+    def _select_rows(self, item):
+        """ Return a new `LazyHaloTable` containing only the selected rows.
+        """
+        if isinstance(item, slice):
+            idx = np.arange(len(self))[item]
+        elif isinstance(item, (int, np.integer)):
+            raise TypeError("Indexing a LazyHaloTable with a single integer is not supported.\n"
+                "To access the row, first convert to an astropy Table with the to_table method")
+        else:
+            item = np.asarray(item)
+            if item.dtype == bool:
+                if len(item) != len(self):
+                    raise ValueError("Length of the boolean mask = %i does not match "
+                        "the length of the halo table = %i" % (len(item), len(self)))
+                idx = np.nonzero(item)[0]
+            else:
+                idx = np.arange(len(self))[item]
+
+        if self._rows is None:
+            rows = idx
+        else:
+            rows = self._rows[idx]
+
+        columns = dict((key, Column(np.asarray(self._columns[key])[idx], name=key))
+            for key in self._added_columns)
+        view = self._from_parent(self, rows, list(self._colnames), columns,
+            set(self._added_columns))
+        if '_host_halo_mask' in self.__dict__:
+            view._host_halo_mask = self._host_halo_mask[idx]
+        return view
+
+    @property
+    def host_halo_mask(self):
+        """ Boolean array that is True for host halos, i.e., halos with ``halo_upid`` = -1.
+        The mask is computed once and cached, and is inherited by row selections.
+        """
+        if '_host_halo_mask' not in self.__dict__:
+            self._host_halo_mask = np.asarray(self['halo_upid']) == -1
+        return self._host_halo_mask
+
+    @property
+    def is_memory_mapped(self):
+        """ True if the columns of the hdf5 table are memory-mapped.
+        """
+        return self._source.is_memory_mapped
+
+    def to_table(self, keys=None):
+        """ Load the halo table into memory as an `~astropy.table.Table`.
+
+        Parameters
+        ----------
+        keys : list, optional
+            Column names to include. Default is to include all columns.
+
+        Returns
+        -------
+        table : `~astropy.table.Table`
+        """
+        if keys is None:
+            keys = self._colnames
+        return Table([np.array(self[key]) for key in keys], names=keys)
+
+    def close(self):
+        """ Close the hdf5 file. Columns that have not yet been accessed
+        can no longer be read after calling `close`.
+        The hdf5 files of tables served by the `~halotools.sim_manager.CatalogRegistry`
+        are shared with other tables, and are left open.
+        """
+        if self._source.registry is None:
+            self._source.close()
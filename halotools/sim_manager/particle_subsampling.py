@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Module containing functions used to store particle tables in a random order,
+so that a random downsampling of any size can be served by
+reading a contiguous block of rows from the beginning of the table.
+
+For a table stored in a random order, the first ``n`` rows are
+a random subsample of size ``n``, and the subsamples of
+different sizes are nested within each other.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+__all__ = ['shuffle_ptcl_table', 'ptcl_table_is_shuffled', 'read_ptcl_subsample']
+
+import os
+import numpy as np
+from warnings import warn
+
+from .columnar_hdf5 import (_import_h5py, read_halo_table,
+    write_columnar_table, _table_length)
+from ..utils.array_utils import randomly_downsample_data
+from ..custom_exceptions import HalotoolsError
+
+# Name and value of the metadata attribute marking a table stored in a random order
+_ptcl_order_attr = 'ptcl_order'
+_shuffled_ptcl_order = 'random'
+
+def ptcl_table_is_shuffled(fname):
+    """ Determine whether the particle table stored in the input hdf5 file
+    is stored in a random order.
+
+    Parameters
+    ----------
+    fname : string
+        Name of the hdf5 file (including absolute path).
+
+    Returns
+    -------
+    is_shuffled : bool
+    """
+    h5py = _import_h5py()
+    with h5py.File(fname, 'r') as f:
+        return f.attrs.get(_ptcl_order_attr, '') in (_shuffled_ptcl_order,
+            _shuffled_ptcl_order.encode('ascii'))
+
+def shuffle_ptcl_table(fname, output_fname=None, seed=43, path='data', **kwargs):
+    """ Store the particle table of the input hdf5 file in a random order,
+    using the columnar layout of `~halotools.sim_manager.columnar_hdf5`.
+
+    The metadata attributes attached to the root of the hdf5 file
+    are copied to the new file, and the new file is marked as shuffled.
+
+    Parameters
+    ----------
+    fname : string
+        Name of the hdf5 file (including absolute path) storing the particle table.
+
+    output_fname : string, optional
+        Name of the shuffled file. If None, ``fname`` is replaced by
+        the shuffled file once it has been written. Default is None.
+
+    seed : int, optional
+        Random number seed used to shuffle the particles. Default is 43.
+
+    path : string, optional
+        Path of the table within the hdf5 file. Default is ``data``.
+
+    compression : string, optional
+        Compression filter passed to `~halotools.sim_manager.write_columnar_table`.
+        Default is ``gzip``.
+
+    Returns
+    -------
+    output_fname : string
+        Name of the shuffled file.
+    """
+    h5py = _import_h5py()
+    if output_fname is None:
+        replace_input = True
+        output_fname = fname + '.shuffled.tmp'
+    else:
+        replace_input = False
+
+    table = read_halo_table(fname, path=path)
+    randomizer = np.random.RandomState(seed)
+    table = table[randomizer.permutation(len(table))]
+
+    write_columnar_table(table, output_fname, path=path, overwrite=True,
+        compression=kwargs.get('compression', 'gzip'))
+    with h5py.File(fname, 'r') as fin:
+        with h5py.File(output_fname, 'a') as fout:
+            for key, value in fin.attrs.items():
+                fout.attrs[key] = value
+            fout.attrs[_ptcl_order_attr] = _shuffled_ptcl_order
+
+    if replace_input is True:
+        os.rename(output_fname, fname)
+        output_fname = fname
+
+    return output_fname
+
+def read_ptcl_subsample(fname, num_ptcl, path='data'):
+    """ Read a random subsample of the particle table stored in the input hdf5 file.
+
+    If the table is stored in a random order (see `shuffle_ptcl_table`),
+    only the first ``num_ptcl`` rows are read from disk. Otherwise,
+    the entire table is read before being randomly downsampled.
+
+    Parameters
+    ----------
+    fname : string
+        Name of the hdf5 file (including absolute path).
+
+    num_ptcl : int
+        Number of particles in the subsample.
+
+    path : string, optional
+        Path of the table within the hdf5 file. Default is ``data``.
+
+    Returns
+    -------
+    particles : `~astropy.table.Table`
+    """
+    num_ptcl = int(num_ptcl)
+    total_num_ptcl = _table_length(fname, path)
+    if num_ptcl > total_num_ptcl:
+        raise HalotoolsError("Number of requested particles = %i exceeds "
+            "the number of particles stored in %s = %i" % (num_ptcl, fname, total_num_ptcl))
+
+    if ptcl_table_is_shuffled(fname):
+        return read_halo_table(fname, path=path, num_rows=num_ptcl)
+    else:
+        msg = ("\nThe particle table stored in %s is not stored in a random order,\n"
+            "so the entire table must be read to draw a random subsample.\n"
+            "Use the shuffle_ptcl_tables_in_cache method of the CatalogManager "
+            "to store the particles in a random order.\n")
+        warn(msg % fname)
+        return randomly_downsample_data(read_halo_table(fname, path=path), num_ptcl)
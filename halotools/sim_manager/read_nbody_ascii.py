@@ -9,10 +9,14 @@ __all__ = ['BehrooziASCIIReader']
 import os
 from time import time
 import numpy as np
+import multiprocessing
+import gzip
+from collections import deque
 from difflib import get_close_matches
 from astropy.table import Table
 
 from . import catalog_manager, supported_sims, sim_defaults, cache_config
+from .cascii import parse_ascii_columns
 
 from ..custom_exceptions import UnsupportedSimError, CatalogTypeError, HalotoolsCacheError, HalotoolsIOError
 
@@ -58,11 +62,18 @@ class BehrooziASCIIReader(object):
             If passing ``column_bounds`` keyword argument, 
             you may not pass a ``cuts_funcobj`` keyword argument. 
 
+        columns_to_keep : list, optional 
+            List of column names of the halo catalog that will be parsed and stored 
+            when reading ASCII data; all other columns are skipped during ingest. 
+            Default is ``sim_defaults.default_ascii_columns_to_keep``, 
+            plus any columns required by the row-wise cuts. 
+            If a user-supplied ``cuts_funcobj`` is passed, the columns it requires 
+            cannot be inferred, and so the default is to keep all columns. 
+            If set to the string ``all``, all columns will be kept. 
+
         recompress : bool, optional 
-            If ``input_fname`` is a compressed file, `BehrooziASCIIReader` 
-            will automatically uncompress it before reading. If recompress 
-            is True, the file will be recompressed after reading; if False, 
-            it will remain uncompressed. Default is True. 
+            Deprecated and ignored. Compressed files with a ``.gz`` extension 
+            are streamed directly, and the input file is never modified. 
         """
 
         # Check whether input_fname exists. 
@@ -79,8 +90,6 @@ class BehrooziASCIIReader(object):
         else:
             self.fname = input_fname
                 
-        self._recompress = recompress
-        self._uncompress_ascii()
 
         self.catman = catalog_manager.CatalogManager()
 
@@ -89,6 +98,7 @@ class BehrooziASCIIReader(object):
             simname=simname, halo_finder=halo_finder, redshift=redshift)
 
         self._process_cuts_funcobj(**kwargs)
+        self._process_columns_to_keep(**kwargs)
 
     def _infer_snapshot(self, fname, **kwargs):
         """
@@ -138,11 +148,14 @@ class BehrooziASCIIReader(object):
                 g = lambda x : np.ones(len(x), dtype=bool)
                 self.cuts_funcobj = g
                 self._cuts_description = 'nocut'
+                self._cut_columns = []
             else:
                 if callable(kwargs['cuts_funcobj']):
                     self.cuts_funcobj = kwargs['cuts_funcobj']
                     self._cuts_description = ('User-supplied cuts_funcobj '
                         'given as cuts_funcobj keyword argument to BehrooziASCIIReader constructor')
+                    # The columns used by an arbitrary function cannot be inferred
+                    self._cut_columns = None
                 else:
                     raise TypeError("The input cuts_funcobj must be a callable function")
         elif 'column_bounds' in kwargs.keys():
@@ -176,9 +189,37 @@ class BehrooziASCIIReader(object):
             self.cuts_funcobj = return_cutfunc(column_bounds)
             self._cuts_description = ('User-supplied cuts_funcobj '
                 'given as cuts_funcobj keyword argument to BehrooziASCIIReader constructor')
+            self._cut_columns = [cut[0] for cut in column_bounds]
         else:
             self.cuts_funcobj = self.default_halocat_cut
             self._cuts_description = 'Default cut set by BehrooziASCIIReader.default_halocat_cut method'
+            self._cut_columns = [sim_defaults.mass_like_variable_to_apply_cut]
+
+    def _process_columns_to_keep(self, **kwargs):
+        """ Determine the columns of the ASCII data that will be parsed and stored. 
+        Columns are always stored in the order they appear in ``halocat.dtype_ascii``. 
+        """
+        all_columns = self.halocat.dtype_ascii.names
+
+        if 'columns_to_keep' in kwargs.keys():
+            columns_to_keep = kwargs['columns_to_keep']
+            if columns_to_keep == 'all':
+                columns_to_keep = all_columns
+            for key in columns_to_keep:
+                if key not in all_columns:
+                    msg = ("columns_to_keep keyword argument included ``%s``, "
+                        "which is not a column of this halo catalog\n")
+                    raise HalotoolsIOError(msg % key)
+            if self._cut_columns is not None:
+                columns_to_keep = list(columns_to_keep) + self._cut_columns
+        elif self._cut_columns is None:
+            columns_to_keep = all_columns
+        else:
+            # Not every catalog has every default column, e.g., BDM catalogs
+            columns_to_keep = ([key for key in sim_defaults.default_ascii_columns_to_keep 
+                if key in all_columns] + self._cut_columns)
+
+        self.columns_to_keep = [key for key in all_columns if key in columns_to_keep]
 
 
     def default_halocat_cut(self, x):
@@ -215,13 +256,13 @@ class BehrooziASCIIReader(object):
         Nrows : int
      
         """
-        with open(self.fname) as f:
-            for i, l in enumerate(f):
-                pass
-        Nrows = i + 1
+        Nrows = 0
+        with _open_ascii(self.fname) as f:
+            for l in f:
+                Nrows += 1
         return Nrows
 
-    def header_len(self,header_char='#'):
+    def header_len(self,header_char=b'#'):
         """ Compute the number of header rows in the raw halo catalog. 
 
         Parameters 
@@ -242,9 +283,9 @@ class BehrooziASCIIReader(object):
 
         """
         Nheader = 0
-        with open(self.fname) as f:
+        with _open_ascii(self.fname) as f:
             for i, l in enumerate(f):
-                if ( (l[0:len(header_char)]==header_char) or (l=="\n") ):
+                if ( (l[0:len(header_char)]==header_char) or (l==b"\n") ):
                     Nheader += 1
                 else:
                     break
@@ -252,39 +293,19 @@ class BehrooziASCIIReader(object):
         return Nheader
 
 
-    def _uncompress_ascii(self):
-        """ If the input fname has file extension `.gz`, 
-        then the method uses `gunzip` to decompress it, 
-        and returns the input fname truncated to exclude 
-        the `.gz` extension. If the input fname does not 
-        end in `.gz`, method does nothing besides return 
-        the input fname. 
-        """
-        if self.fname[-3:]=='.gz':
-            print("...uncompressing ASCII data")
-            os.system("gunzip "+self.fname)
-            self.fname = self.fname[:-3]
-        else:
-            # input_fname was already decompressed. 
-            # Turn off auto-recompress
-            self._recompress = False
-
-    def _compress_ascii(self):
-        """ Recompresses the halo catalog ascii data, 
-        and returns the input filename appended with `.gz`.  
-        """
-
-        recompress = (self._recompress) & (self.fname[-3:]!='.gz')
-        if recompress is True:
-            print("...re-compressing ASCII data")
-            os.system("gzip "+self.fname)
-            self.fname = self.fname + '.gz'
-
-
     def read_halocat(self, **kwargs):
         """ Reads the raw halo catalog in chunks and returns a structured array
         after applying cuts.
 
+        The file is divided into byte ranges that begin and end on a newline. 
+        Each range is parsed into a structured array by a compiled parser 
+        that only converts the columns that are kept, 
+        the row-wise cuts are applied to each range, and the ranges 
+        that survive the cuts are copied into a single preallocated array. 
+        The ranges can be processed in parallel with the ``N_threads`` argument. 
+        Files with a ``.gz`` extension are decompressed as a stream, 
+        so the raw halo catalog is read in a single pass and never modified. 
+
         Parameters 
         ----------
         nchunks : int, optional 
@@ -292,89 +313,54 @@ class BehrooziASCIIReader(object):
             in chunks at a time, both to improve performance and 
             so that the entire raw halo catalog need not fit in memory 
             in order to process it. The total number of chunks to use 
-            can be specified with the `nchunks` argument. Default is 1000. 
+            can be specified with the `nchunks` argument. Default is to use 
+            chunks of roughly ``default_ascii_chunk_bytes`` bytes. 
+            For compressed files, `nchunks` divides the compressed size of the file, 
+            so the number of chunks is larger by the compression ratio. 
+
+        N_threads : int, optional 
+            Number of processes used to parse the chunks. 
+            If set to 'max', use all available cores. Default is 1. 
 
         """
         start = time()
 
         # First read the first line as a self-consistency check against self.halocat.header_ascii
-        with open(self.fname) as f:
+        with _open_ascii(self.fname) as f:
             self._header_ascii_from_input_fname = f.readline()
 
+        N_threads = kwargs.get('N_threads', 1)
+        if N_threads == 'max':
+            N_threads = multiprocessing.cpu_count()
+
+        file_size = os.path.getsize(self.fname)
         if 'nchunks' in kwargs.keys():
             Nchunks = kwargs['nchunks']
         else:
-            Nchunks = 1000
-
-        dt = self.halocat.dtype_ascii
-
-        file_length = self.file_len()
-        header_length = self.header_len()
-        chunksize = file_length / Nchunks
-        if chunksize == 0:
-            chunksize = file_length # data will now never be chunked
-            Nchunks = 1
+            Nchunks = int(np.ceil(file_size / float(default_ascii_chunk_bytes)))
+        Nchunks = max(Nchunks, N_threads, 1)
 
         print("\n...Processing ASCII data of file: \n%s\n " % self.fname)
-        print(" Total number of rows in file = %i" % file_length)
-        print(" Number of rows in detected header = %i \n" % header_length)
+        print(" Total number of bytes in file = %i" % file_size)
         if Nchunks==1:
-            print("Reading catalog in a single chunk of size %i\n" % chunksize)
+            print("Reading catalog in a single chunk\n")
         else:
-            print("...Reading catalog in %i chunks, each with %i rows\n" % (Nchunks, chunksize))
+            print("...Reading catalog in %i chunks using %i processes\n" % (Nchunks, N_threads))
 
         print("Applying the following row-wise cuts: \n%s\n" % self._cuts_description)
 
-        chunk_counter = 0
-        chunk = []
-        container = []
-        iout = np.round(Nchunks / 10.).astype(int)
-        for linenum, line in enumerate(open(self.fname)):
+        print("Keeping %i of %i columns\n" % 
+            (len(self.columns_to_keep), len(self.halocat.dtype_ascii.names)))
 
-            if line[0] == '#':
-                pass
-            else:
-                parsed_line = line.strip().split()
-                chunk.append(tuple(parsed_line))  
-        
-            if (linenum % chunksize == 0) & (linenum > 0):
-
-                chunk_counter += 1
-                if (chunk_counter % iout)==0:
-                    print("... working on chunk # %i of %i\n" % (chunk_counter, Nchunks))
-
-                try:
-                    a = np.array(chunk, dtype = dt)
-                except ValueError:
-                    Nfields = len(dt.fields)
-                    print("Number of fields in np.dtype = %i" % Nfields)
-                    Ncolumns = []
-                    for elt in chunk:
-                        if len(elt) not in Ncolumns:
-                            Ncolumns.append(len(elt))
-                    print("Number of columns in chunk = ")
-                    for ncols in Ncolumns:
-                        print(ncols)
-                    print chunk[-1]
-                    raise HalotoolsIOError("Number of columns does not match length of dtype")
-
-                container.append(a[self.cuts_funcobj(a)])
-                chunk = []
-
-        a = np.array(chunk, dtype = dt)
-        container.append(a[self.cuts_funcobj(a)])
-
-        print("Done reading ASCII. Now bundling into a single array")
-    # Bundle up all array chunks into a single array
-        for chunk in container:
-            try:
-                output = np.append(output, chunk)
-            except NameError:
-                output = np.array(chunk) 
-                
+        output, Nrows = _read_ascii(self.fname, self.halocat.dtype_ascii, 
+            self.cuts_funcobj, Nchunks, N_threads, columns_to_keep=self.columns_to_keep)
+        self._num_rows_in_file = Nrows
 
         end = time()
         runtime = (end-start)
+        print(" Total number of rows of data in file = %i" % Nrows)
+        print(" Number of rows passing cuts = %i" % len(output))
+        print(" Processing rate = %.3e rows per second" % (Nrows / max(runtime, 1e-10)))
         if runtime > 60:
             runtime = runtime/60.
             msg = "Total runtime to read in ASCII = %.1f minutes\n"
@@ -382,6 +368,303 @@ class BehrooziASCIIReader(object):
             msg = "Total runtime to read in ASCII = %.1f seconds\n"
         print(msg % runtime)
 
-        self._compress_ascii()
-
         return Table(output)
+
+
+# Approximate size in bytes of the chunks used to read ASCII data
+default_ascii_chunk_bytes = 2**26
+
+# State shared with the processes parsing ASCII chunks. 
+# The row-wise cuts need not be picklable (e.g., lambda functions), 
+# so they are passed when the worker processes are created. 
+_ascii_worker_state = {}
+
+def _init_ascii_worker(fname, dt, cuts_funcobj, columns_to_keep):
+    """ Store the arguments shared by all chunks in the worker process. 
+    """
+    _ascii_worker_state['fname'] = fname
+    _ascii_worker_state['dt'] = dt
+    _ascii_worker_state['cuts_funcobj'] = cuts_funcobj
+    _ascii_worker_state['columns_to_keep'] = columns_to_keep
+
+def _open_ascii(fname):
+    """ Open the ASCII file for reading in binary mode, 
+    decompressing on the fly if ``fname`` has a ``.gz`` extension. 
+    """
+    if fname[-3:]=='.gz':
+        return gzip.open(fname, 'rb')
+    else:
+        return open(fname, 'rb')
+
+def _ascii_byte_ranges(fname, Nchunks):
+    """ Divide the file into ``Nchunks`` byte ranges that begin and end on a newline. 
+
+    Parameters 
+    ----------
+    fname : string 
+
+    Nchunks : int 
+
+    Returns 
+    -------
+    ranges : list 
+        List of (first_byte, last_byte) tuples. Empty ranges are not included. 
+    """
+    file_size = os.path.getsize(fname)
+    boundaries = [0]
+    with open(fname, 'rb') as f:
+        for i in range(1, Nchunks):
+            offset = int(i * file_size / Nchunks)
+            if offset <= boundaries[-1]:
+                continue
+            f.seek(offset)
+            f.readline()
+            boundaries.append(f.tell())
+    boundaries.append(file_size)
+    return [(a, b) for a, b in zip(boundaries[:-1], boundaries[1:]) if b > a]
+
+def _projected_dtype(dt, columns_to_keep=None):
+    """ Return the structured dtype containing only the fields in ``columns_to_keep``, 
+    in the order they appear in ``dt``. If ``columns_to_keep`` is None, return ``dt``. 
+    """
+    if columns_to_keep is None:
+        return dt
+    return np.dtype([(name, dt[name]) for name in dt.names if name in columns_to_keep])
+
+def _parse_ascii_block(block, dt, columns_to_keep=None, header_char=b'#'):
+    """ Convert a block of whitespace-delimited ASCII rows into a structured array. 
+
+    Only the ``columns_to_keep`` are converted, directly to the type of their field 
+    in ``dt``, by the `~halotools.sim_manager.cascii.parse_ascii_columns` cython parser. 
+    The other columns are skipped without being converted, 
+    so the time and memory used to parse a block scale with the number of kept columns. 
+
+    Parameters 
+    ----------
+    block : bytes 
+        Complete rows of ASCII data. Rows beginning with ``header_char`` are ignored. 
+
+    dt : `numpy.dtype`
+        Structured dtype with one field for each column of the ASCII data. 
+
+    columns_to_keep : list, optional 
+        Names of the fields of ``dt`` to store. Default is to store all fields. 
+
+    Returns 
+    -------
+    arr : array 
+        Structured array containing the ``columns_to_keep`` fields of ``dt``
+    """
+    if block.startswith(header_char) or ((b'\n' + header_char) in block):
+        block = b'\n'.join(line for line in block.split(b'\n') 
+            if not line.startswith(header_char))
+
+    projected_dt = _projected_dtype(dt, columns_to_keep)
+
+    # Integer fields are converted to integers, all other fields to floats 
+    Ncols = len(dt.names)
+    column_slot = np.zeros(Ncols, dtype=np.int64) - 1
+    column_is_integer = np.zeros(Ncols, dtype=np.uint8)
+    num_float_columns, num_integer_columns = 0, 0
+    for icol, name in enumerate(dt.names):
+        if name not in projected_dt.names:
+            continue
+        if dt[name].kind in ('i', 'u'):
+            column_is_integer[icol] = 1
+            column_slot[icol] = num_integer_columns
+            num_integer_columns += 1
+        else:
+            column_slot[icol] = num_float_columns
+            num_float_columns += 1
+
+    Nrows, float_values, integer_values = parse_ascii_columns(block, Ncols, 
+        column_slot, column_is_integer, num_float_columns, num_integer_columns)
+    if Nrows == -1:
+        msg = ("Number of fields in np.dtype = %i \n"
+            "Number of columns does not match length of dtype")
+        raise HalotoolsIOError(msg % Ncols)
+    elif Nrows == -2:
+        raise HalotoolsIOError("ASCII data contains a value that is not a number")
+
+    arr = np.empty(Nrows, dtype=projected_dt)
+    for icol, name in enumerate(dt.names):
+        if column_slot[icol] < 0:
+            continue
+        elif column_is_integer[icol]:
+            arr[name] = integer_values[:, column_slot[icol]]
+        else:
+            arr[name] = float_values[:, column_slot[icol]]
+    return arr
+
+def _gzip_blocks(fname, block_size):
+    """ Generator yielding blocks of roughly ``block_size`` decompressed bytes 
+    of a gzipped ASCII file. Each block ends on a newline. 
+    """
+    remainder = b''
+    with _open_ascii(fname) as f:
+        while True:
+            data = f.read(block_size)
+            if not data:
+                break
+            data = remainder + data
+            last_newline = data.rfind(b'\n')
+            if last_newline == -1:
+                remainder = data
+                continue
+            remainder = data[last_newline+1:]
+            yield data[:last_newline+1]
+    if remainder.strip():
+        yield remainder
+
+def _process_ascii_byte_range(byte_range):
+    """ Read, parse and apply row-wise cuts to the rows in the input byte range. 
+
+    Returns 
+    -------
+    arr : array 
+        Structured array of rows passing the cuts 
+
+    Nrows : int 
+        Number of rows parsed before applying the cuts 
+    """
+    first_byte, last_byte = byte_range
+    with open(_ascii_worker_state['fname'], 'rb') as f:
+        f.seek(first_byte)
+        block = f.read(last_byte - first_byte)
+    return _process_ascii_block(block)
+
+def _process_ascii_block(block):
+    """ Parse and apply row-wise cuts to the rows in the input block of ASCII data. 
+
+    Returns 
+    -------
+    arr : array 
+        Structured array of rows passing the cuts 
+
+    Nrows : int 
+        Number of rows parsed before applying the cuts 
+    """
+    arr = _parse_ascii_block(block, _ascii_worker_state['dt'], 
+        columns_to_keep=_ascii_worker_state['columns_to_keep'])
+    mask = _ascii_worker_state['cuts_funcobj'](arr)
+    return arr[mask], len(arr)
+
+def _read_ascii(fname, dt, cuts_funcobj, Nchunks, N_threads, columns_to_keep=None):
+    """ Read all rows of an ASCII file passing the input cuts. 
+
+    Parameters 
+    ----------
+    fname : string 
+
+    dt : `numpy.dtype`
+        Structured dtype with one field for each column of the ASCII data. 
+
+    cuts_funcobj : function object 
+        Function accepting a structured array and returning a boolean mask 
+
+    Nchunks : int 
+        Number of byte ranges the file is divided into 
+
+    N_threads : int 
+        Number of processes used to parse the byte ranges 
+
+    columns_to_keep : list, optional 
+        Names of the columns to store. Must include all columns used by ``cuts_funcobj``. 
+        Default is to store all columns. 
+
+    Returns 
+    -------
+    output : array 
+        Structured array of rows passing the cuts, in the order of the file. 
+
+    Nrows : int 
+        Total number of rows of data in the file. 
+
+    Notes 
+    -----
+    Uncompressed files are divided into byte ranges that are read independently 
+    by each process. Gzipped files do not support random access, and so 
+    they are decompressed as a stream by the calling process, which passes 
+    newline-aligned blocks to the other processes to be parsed 
+    while decompression of the following blocks continues. 
+    """
+    if fname[-3:]=='.gz':
+        block_size = int(np.ceil(os.path.getsize(fname) / float(Nchunks)))
+        tasks = _gzip_blocks(fname, max(block_size, 1))
+        engine = _process_ascii_block
+    else:
+        tasks = _ascii_byte_ranges(fname, Nchunks)
+        engine = _process_ascii_byte_range
+
+    if N_threads > 1:
+        pool = multiprocessing.Pool(N_threads, 
+            initializer=_init_ascii_worker, initargs=(fname, dt, cuts_funcobj, columns_to_keep))
+        # Bound the number of blocks in flight so that decompressed data 
+        # is not read into memory faster than it can be parsed
+        result = []
+        pending = deque()
+        for task in tasks:
+            if len(pending) >= 2*N_threads:
+                result.append(pending.popleft().get())
+            pending.append(pool.apply_async(engine, (task, )))
+        while pending:
+            result.append(pending.popleft().get())
+        pool.close()
+        pool.join()
+    else:
+        _init_ascii_worker(fname, dt, cuts_funcobj, columns_to_keep)
+        result = [engine(task) for task in tasks]
+
+    # Bundle up all array chunks into a single preallocated array
+    Nrows = sum(chunk_Nrows for chunk, chunk_Nrows in result)
+    Nkeep = sum(len(chunk) for chunk, chunk_Nrows in result)
+    output = np.empty(Nkeep, dtype=_projected_dtype(dt, columns_to_keep))
+    first = 0
+    for chunk, chunk_Nrows in result:
+        output[first:first+len(chunk)] = chunk
+        first += len(chunk)
+
+    return output, Nrows
+
+def _test_read_ascii_speed(Nrows=int(1e6), N_threads=4):
+    """ Benchmark the processing rate of the ASCII reader on a synthetic halo catalog, 
+    keeping all columns and decreasing numbers of columns. 
+    """
+    import tempfile
+    dt = sim_defaults.dtype_bolshoi_rockstar
+    Ncols = len(dt.names)
+
+    fname = tempfile.mktemp(suffix='.list')
+    data = np.random.uniform(0, 1, (Nrows, Ncols))
+    fmt = ['%i' if dt[name].kind in ('i', 'u') else '%.5g' for name in dt.names]
+    data[:, [dt[name].kind in ('i', 'u') for name in dt.names]] *= 1e10
+    np.savetxt(fname, data, fmt=fmt, header='scale(0) id(1) ...')
+
+    nocut = lambda x : np.ones(len(x), dtype=bool)
+    Nchunks = int(np.ceil(os.path.getsize(fname) / float(default_ascii_chunk_bytes)))
+
+    print("##########_read_ascii##########")
+    print("running with {0}/{1} cores".format(N_threads, multiprocessing.cpu_count()))
+    print("running speed test with {0} rows of {1} columns".format(Nrows, Ncols))
+    for Nthreads in set([1, N_threads]):
+        start = time()
+        output, Nrows_read = _read_ascii(fname, dt, nocut, max(Nthreads, Nchunks), Nthreads)
+        runtime = time() - start
+        print("N_threads = %i: %.3e rows per second" % (Nthreads, Nrows_read / runtime))
+
+    # The time spent parsing scales with the number of kept columns 
+    for Nkeep in (Ncols, len(sim_defaults.default_ascii_columns_to_keep), 10, 2):
+        columns_to_keep = list(dt.names[:Nkeep])
+        start = time()
+        output, Nrows_read = _read_ascii(fname, dt, nocut, max(1, Nchunks), 1, 
+            columns_to_keep=columns_to_keep)
+        runtime = time() - start
+        print("keeping %i of %i columns: %.3e rows per second" % 
+            (Nkeep, Ncols, Nrows_read / runtime))
+    print("############################### \n")
+
+    os.remove(fname)
+
+
+if __name__ == '__main__':
+    _test_read_ascii_speed()
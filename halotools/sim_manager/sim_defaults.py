@@ -28,8 +28,16 @@ processed_halo_tables_webloc = 'http://www.astro.yale.edu/aphearin/Data_files/ha
 ptcl_tables_webloc = 'http://www.astro.yale.edu/aphearin/Data_files/particle_catalogs'
 default_version_name = 'halotools.alpha.version0'
 
+# Basename of the sha256sum-format manifest listing the checksums of the catalogs 
+# stored in each web directory, used to verify downloads
+checksum_manifest_basename = 'SHA256SUMS'
+
 default_cache_location = 'pkg_default'
 
+# Maximum number of bytes of halo catalog columns held in memory 
+# by the process-wide catalog registry before the least recently used columns are evicted
+catalog_registry_memory_budget = 4.0e9
+
 
 ############################################################
 ### Current versions of dtype and header 
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Module containing functions used to store halo tables sorted by subvolume,
+together with an index of the rows belonging to each subvolume,
+so that the halos in a region of the box can be read without reading the entire table.
+
+The box is divided into ``num_divs[0]`` x ``num_divs[1]`` x ``num_divs[2]`` subvolumes,
+ordered in the same dictionary order used by
+`~halotools.mock_observables.pair_counters.rect_cuboid.rect_cuboid_cells`:
+the subvolume ``(ix, iy, iz)`` has cellID ``(ix*num_divs[1] + iy)*num_divs[2] + iz``.
+Thus the halos of each slab of constant ``ix`` are stored contiguously,
+and the halos of each subvolume are stored in rows
+``offsets[cellID]`` to ``offsets[cellID+1]``.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+__all__ = ['subvolume_ids', 'spatially_sort_table',
+    'write_subvolume_index', 'read_subvolume_index', 'read_region']
+
+import numpy as np
+from astropy.table import Table
+
+from .columnar_hdf5 import _columnar_colnames, _import_h5py, _table_length
+from ..custom_exceptions import HalotoolsError, HalotoolsIOError
+
+# Name of the hdf5 dataset storing the subvolume offsets,
+# and of its attribute storing the number of subvolumes per dimension
+_offsets_path = 'subvolume_offsets'
+_num_divs_attr = 'num_divs'
+
+def _num_divs_array(num_divs):
+    num_divs = np.atleast_1d(num_divs).astype(int)
+    if len(num_divs) == 1:
+        num_divs = np.repeat(num_divs, 3)
+    if (len(num_divs) != 3) or np.any(num_divs < 1):
+        raise HalotoolsError("Input num_divs must be a positive integer or "
+            "a length-3 sequence of positive integers")
+    return num_divs
+
+def _cell_indices(x, Lbox, num_divs):
+    """ Return the integer index of the subvolume containing each coordinate,
+    with points on the upper boundary assigned to the last subvolume.
+    """
+    ix = np.floor(np.asarray(x)*num_divs/float(Lbox)).astype(int)
+    return np.clip(ix, 0, num_divs-1)
+
+def subvolume_ids(x, y, z, Lbox, num_divs):
+    """ Compute the cellID of the subvolume containing each point.
+
+    Parameters
+    ----------
+    x, y, z : arrays
+        Length-Npts arrays containing the spatial position of the Npts points.
+
+    Lbox : float or array_like
+        Length of the box in each dimension.
+
+    num_divs : int or array_like
+        Number of subvolumes in each dimension.
+
+    Returns
+    -------
+    cellID : array
+        Length-Npts integer array
+    """
+    Lbox = np.ones(3)*Lbox
+    num_divs = _num_divs_array(num_divs)
+    ix = _cell_indices(x, Lbox[0], num_divs[0])
+    iy = _cell_indices(y, Lbox[1], num_divs[1])
+    iz = _cell_indices(z, Lbox[2], num_divs[2])
+    return np.ravel_multi_index((ix, iy, iz), tuple(num_divs))
+
+def spatially_sort_table(table, Lbox, num_divs,
+    position_keys=('halo_x', 'halo_y', 'halo_z')):
+    """ Sort the rows of the input table by the subvolume containing each halo.
+
+    Parameters
+    ----------
+    table : `~astropy.table.Table`
+
+    Lbox : float or array_like
+        Length of the box in each dimension.
+
+    num_divs : int or array_like
+        Number of subvolumes in each dimension.
+
+    position_keys : tuple, optional
+        Column names storing the x, y and z positions.
+        Default is (``halo_x``, ``halo_y``, ``halo_z``).
+
+    Returns
+    -------
+    sorted_table : `~astropy.table.Table`
+        Input table sorted by cellID. Within each subvolume,
+        halos appear in the same order as in the input table.
+
+    offsets : array
+        Integer array of length ``np.prod(num_divs)+1``.
+        The halos in the subvolume with cellID ``i`` are
+        ``sorted_table[offsets[i]:offsets[i+1]]``.
+    """
+    num_divs = _num_divs_array(num_divs)
+    x, y, z = [table[key] for key in position_keys]
+    cellID = subvolume_ids(x, y, z, Lbox, num_divs)
+    idx_sorted = np.argsort(cellID, kind='mergesort')
+    offsets = np.searchsorted(cellID[idx_sorted], np.arange(np.prod(num_divs)+1))
+    return table[idx_sorted], offsets
+
+def write_subvolume_index(fname, offsets, num_divs):
+    """ Store the subvolume offsets of a spatially sorted table in an hdf5 file.
+
+    Parameters
+    ----------
+    fname : string
+        Name of the hdf5 file (including absolute path) storing the sorted table.
+
+    offsets : array
+        Subvolume offsets returned by `spatially_sort_table`.
+
+    num_divs : int or array_like
+        Number of subvolumes in each dimension.
+    """
+    h5py = _import_h5py()
+    num_divs = _num_divs_array(num_divs)
+    if len(offsets) != np.prod(num_divs)+1:
+        raise HalotoolsError("Length of the input offsets = %i is inconsistent with "
+            "the input num_divs" % len(offsets))
+    with h5py.File(fname, 'a') as f:
+        if _offsets_path in f:
+            del f[_offsets_path]
+        dset = f.create_dataset(_offsets_path, data=np.asarray(offsets, dtype='i8'))
+        dset.attrs[_num_divs_attr] = num_divs
+
+def read_subvolume_index(fname):
+    """ Retrieve the subvolume offsets stored in an hdf5 file.
+
+    Parameters
+    ----------
+    fname : string
+        Name of the hdf5 file (including absolute path).
+
+    Returns
+    -------
+    num_divs : array
+        Number of subvolumes in each dimension, or None if the table
+        stored in ``fname`` is not spatially sorted.
+
+    offsets : array
+        Subvolume offsets, or None if the table stored
+        in ``fname`` is not spatially sorted.
+    """
+    h5py = _import_h5py()
+    with h5py.File(fname, 'r') as f:
+        if _offsets_path not in f:
+            return None, None
+        dset = f[_offsets_path]
+        return np.asarray(dset.attrs[_num_divs_attr]).astype(int), dset[...]
+
+def _region_row_ranges(offsets, num_divs, Lbox, lower, upper):
+    """ Return the list of contiguous (first_row, last_row) ranges
+    of the subvolumes overlapping the input region.
+    """
+    Lbox = np.ones(3)*Lbox
+    lo = [_cell_indices(lower[i], Lbox[i], num_divs[i]) for i in range(3)]
+    hi = [_cell_indices(upper[i], Lbox[i], num_divs[i]) for i in range(3)]
+
+    ranges = []
+    for ix in range(lo[0], hi[0]+1):
+        for iy in range(lo[1], hi[1]+1):
+            first_cell = np.ravel_multi_index((ix, iy, lo[2]), tuple(num_divs))
+            last_cell = np.ravel_multi_index((ix, iy, hi[2]), tuple(num_divs))
+            first, last = offsets[first_cell], offsets[last_cell+1]
+            if last == first:
+                continue
+            # merge with the previous range when the subvolumes are adjacent on disk
+            if (len(ranges) > 0) and (ranges[-1][1] == first):
+                ranges[-1] = (ranges[-1][0], last)
+            else:
+                ranges.append((first, last))
+    return ranges
+
+def _read_rows(fname, path, ranges, keys):
+    """ Read the input row ranges of the input columns of a table
+    stored in either the compound or the columnar hdf5 layout.
+    """
+    h5py = _import_h5py()
+    with h5py.File(fname, 'r') as f:
+        obj = f[path]
+        if isinstance(obj, h5py.Group):
+            colnames = _columnar_colnames(obj)
+            get_rows = lambda key, first, last: obj[key][first:last]
+        else:
+            colnames = list(obj.dtype.names)
+            get_rows = lambda key, first, last: obj[first:last][key]
+        if keys is None:
+            keys = colnames
+        for key in keys:
+            if key not in colnames:
+                raise KeyError("Input key ``%s`` is not a column of the table" % key)
+
+        columns = []
+        for key in keys:
+            if len(ranges) == 0:
+                dtype = obj[key].dtype if isinstance(obj, h5py.Group) else obj.dtype[key]
+                columns.append(np.zeros(0, dtype=dtype))
+            else:
+                columns.append(np.concatenate(
+                    [get_rows(key, first, last) for first, last in ranges]))
+    return Table(columns, names=keys)
+
+def read_region(fname, Lbox, xmin, xmax, ymin, ymax, zmin, zmax, keys=None,
+    path='data', position_keys=('halo_x', 'halo_y', 'halo_z')):
+    """ Read the halos inside a rectangular region of the box.
+
+    If the table is spatially sorted, only the rows of the subvolumes
+    overlapping the region are read from disk; otherwise,
+    the entire table is read before selecting the halos in the region.
+
+    Parameters
+    ----------
+    fname : string
+        Name of the hdf5 file (including absolute path).
+
+    Lbox : float or array_like
+        Length of the box in each dimension.
+
+    xmin, xmax, ymin, ymax, zmin, zmax : float
+        Boundaries of the region. Halos with ``xmin <= x < xmax``, etc., are returned.
+        The region does not wrap around the periodic boundaries of the box.
+
+    keys : list, optional
+        Column names to read. Default is to read all columns.
+
+    path : string, optional
+        Path of the table within the hdf5 file. Default is ``data``.
+
+    position_keys : tuple, optional
+        Column names storing the x, y and z positions.
+        Default is (``halo_x``, ``halo_y``, ``halo_z``).
+
+    Returns
+    -------
+    table : `~astropy.table.Table`
+        Halos inside the region, in the order they are stored on disk.
+    """
+    lower = np.array([xmin, ymin, zmin], dtype=float)
+    upper = np.array([xmax, ymax, zmax], dtype=float)
+    if np.any(upper < lower):
+        raise HalotoolsIOError("The upper boundaries of the region must not be "
+            "smaller than the lower boundaries")
+
+    num_divs, offsets = read_subvolume_index(fname)
+    if num_divs is None:
+        Nrows = _table_length(fname, path)
+        ranges = [(0, Nrows)] if Nrows > 0 else []
+    else:
+        ranges = _region_row_ranges(offsets, num_divs, Lbox, lower, upper)
+
+    if keys is not None:
+        read_keys = list(keys) + [key for key in position_keys if key not in keys]
+    else:
+        read_keys = None
+    table = _read_rows(fname, path, ranges, read_keys)
+
+    mask = np.ones(len(table), dtype=bool)
+    for i, key in enumerate(position_keys):
+        mask &= (table[key] >= lower[i]) & (table[key] < upper[i])
+    table = table[mask]
+    if keys is not None:
+        table = table[list(keys)]
+    return table
@@ -32,9 +32,15 @@ except ImportError:
         "which can be accomplished either with pip or conda")
 
 from . import sim_defaults, catalog_manager
+from .lazy_halo_table import LazyHaloTable
+from .catalog_registry import catalog_registry
+from .cache_index import _version_name_from_fname
+from .columnar_hdf5 import read_halo_table
+from .spatial_index import read_region
+from .particle_subsampling import read_ptcl_subsample
 
 from ..utils.array_utils import find_idx_nearest_val
-from ..utils.array_utils import custom_len
+from ..utils.array_utils import custom_len, randomly_downsample_data
 
 from ..custom_exceptions import *
 
@@ -197,7 +203,7 @@ class HaloCatalog(object):
     def __init__(self, simname=sim_defaults.default_simname, 
         halo_finder=sim_defaults.default_halo_finder, 
         redshift = sim_defaults.default_redshift, dz_tol = 0.05, 
-        preload_halo_table = False):
+        preload_halo_table = False, lazy_halo_table = True, use_catalog_registry = True):
         """
         Parameters 
         ----------
@@ -223,6 +229,22 @@ class HaloCatalog(object):
             If True, the `HaloCatalog` class will automatically retrieve the halo 
             table from disk upon instantiation. Default is False. 
 
+        lazy_halo_table : bool, optional 
+            If True, the ``halo_table`` attribute will be a 
+            `~halotools.sim_manager.LazyHaloTable` that only reads columns 
+            from disk as they are accessed. If False, or if ``preload_halo_table`` is True, 
+            the entire halo table will be read into memory as an `~astropy.table.Table`. 
+            Default is True. 
+
+        use_catalog_registry : bool, optional 
+            If True, and ``lazy_halo_table`` is True, the columns of the halo table 
+            are shared through the process-wide `~halotools.sim_manager.catalog_registry` 
+            with every other `HaloCatalog` of the same snapshot, so that each column 
+            is only read from disk and held in memory once. In this case, 
+            ``preload_halo_table`` reads all columns into the registry, 
+            and ``halo_table`` is still a `~halotools.sim_manager.LazyHaloTable`. 
+            Default is True. 
+
         Examples 
         ---------
         The default halo catalog can be loaded into memory by calling `HaloCatalog` with no arguments: 
@@ -285,30 +307,87 @@ class HaloCatalog(object):
                 self.simname, self.halo_finder)
             self._check_catalog_self_consistency(fname, closest_redshift)
 
+        self._lazy_halo_table = lazy_halo_table
+        self._use_catalog_registry = use_catalog_registry & lazy_halo_table
         if preload_halo_table is True:
-            self._halo_table = Table.read(self.processed_halo_table_fname, path='data')
+            if self._use_catalog_registry is True:
+                catalog_registry.preload(self._catalog_registry_key, 
+                    keys = self.halo_table.keys())
+            else:
+                self._halo_table = read_halo_table(self.processed_halo_table_fname, path='data')
+
+    @property 
+    def _catalog_registry_key(self):
+        """ Key of the halo catalog in the `~halotools.sim_manager.catalog_registry`. 
+        """
+        version_name = _version_name_from_fname(os.path.basename(self.processed_halo_table_fname))
+        return catalog_registry.catalog_key(self.simname, self.halo_finder, 
+            version_name, self.redshift)
 
 
     @property 
     def halo_table(self):
         """
-        `~astropy.table.Table` object storing a catalog of dark matter halos. 
+        Table object storing a catalog of dark matter halos. 
+        By default, this is a `~halotools.sim_manager.LazyHaloTable` that 
+        reads columns from disk only as they are accessed, 
+        sharing them with the other `HaloCatalog` objects of the same snapshot 
+        through the `~halotools.sim_manager.catalog_registry`. 
         """
-        if hasattr(self, '_halo_table'):
-            return self._halo_table
-        else:
-            self._halo_table = Table.read(self.processed_halo_table_fname, path='data')
-            return self._halo_table
+        if not hasattr(self, '_halo_table'):
+            if self._use_catalog_registry is True:
+                simname, halo_finder, version_name, redshift = self._catalog_registry_key
+                self._halo_table = catalog_registry.halo_table(self.processed_halo_table_fname, 
+                    simname, halo_finder, version_name, redshift, path='data')
+            elif self._lazy_halo_table is True:
+                self._halo_table = LazyHaloTable(self.processed_halo_table_fname, path='data')
+            else:
+                self._halo_table = read_halo_table(self.processed_halo_table_fname, path='data')
+        return self._halo_table
 
     @property 
     def host_halos(self):
-        if hasattr(self, '_halo_table'):
-            mask = self._halo_table['halo_hostid'] == self._halo_table['halo_id']
-            return self._halo_table[mask]
-        else:
-            self._halo_table = Table.read(self.processed_halo_table_fname, path='data')
-            mask = self._halo_table['halo_hostid'] == self._halo_table['halo_id']
-            return self._halo_table[mask]        
+        """
+        Table object storing only the host halos of ``halo_table``, 
+        i.e., the halos whose ``halo_hostid`` equals their ``halo_id``, 
+        whether or not ``halo_table`` is a `~halotools.sim_manager.LazyHaloTable`. 
+        The host halos are only selected once. 
+        """
+        if not hasattr(self, '_host_halos'):
+            halo_table = self.halo_table
+            mask = np.asarray(halo_table['halo_hostid'] == halo_table['halo_id'])
+            self._host_halos = halo_table[mask]
+        return self._host_halos
+
+    def read_region(self, xmin, xmax, ymin, ymax, zmin, zmax, keys=None):
+        """ Read the halos inside a rectangular region of the box from disk. 
+
+        If the halo catalog was stored sorted by subvolume 
+        (see `~halotools.sim_manager.spatial_index`), only the subvolumes 
+        overlapping the region are read; otherwise the entire catalog is read 
+        before selecting the halos in the region. 
+
+        Parameters 
+        ----------
+        xmin, xmax, ymin, ymax, zmin, zmax : float 
+            Boundaries of the region in Mpc/h. 
+            Halos with ``xmin <= halo_x < xmax``, etc., are returned. 
+            The region does not wrap around the periodic boundaries of the box. 
+
+        keys : list, optional 
+            Column names to read. Default is to read all columns. 
+
+        Returns 
+        -------
+        halos : `~astropy.table.Table` 
+
+        Examples 
+        --------
+        >>> halocat = HaloCatalog() # doctest: +SKIP
+        >>> halos = halocat.read_region(0, 50, 0, 50, 0, 250, keys=['halo_mvir']) # doctest: +SKIP
+        """
+        return read_region(self.processed_halo_table_fname, self.Lbox, 
+            xmin, xmax, ymin, ymax, zmin, zmax, keys=keys, path='data')
 
     @property 
     def ptcl_table(self):
@@ -318,6 +397,41 @@ class HaloCatalog(object):
         if hasattr(self, '_ptcl_table'):
             return self._ptcl_table
         else:
+            self._ptcl_table = read_halo_table(self._get_ptcl_table_fname(), path='data')
+            return self._ptcl_table
+
+    def ptcl_table_subsample(self, num_ptcl):
+        """
+        Random subsample of the dark matter particles. 
+
+        If the particle catalog is stored in a random order 
+        (see `~halotools.sim_manager.shuffle_ptcl_table`), 
+        only the first ``num_ptcl`` particles are read from disk, 
+        and the full ``ptcl_table`` is never loaded. 
+        The subsamples returned for different values of ``num_ptcl`` are nested. 
+
+        Parameters 
+        ----------
+        num_ptcl : int 
+            Number of particles in the subsample. 
+
+        Returns 
+        -------
+        particles : `~astropy.table.Table` 
+
+        Examples 
+        --------
+        >>> particles = default_halocat.ptcl_table_subsample(int(1e5)) # doctest: +SKIP
+        """
+        if hasattr(self, '_ptcl_table'):
+            return randomly_downsample_data(self._ptcl_table, num_ptcl)
+        else:
+            return read_ptcl_subsample(self._get_ptcl_table_fname(), num_ptcl, path='data')
+
+    def _get_ptcl_table_fname(self):
+        """ Method returns the filename of the particle catalog matching the halo catalog. 
+        """
+        if not hasattr(self, 'ptcl_table_fname'):
             fname, closest_redshift = self._retrieve_closest_ptcl_table_fname()
             if abs(closest_redshift - self.redshift) > 0.01:
                 msg = ("Your input cache directory does not contain a particle catalog \n" 
@@ -329,10 +443,8 @@ class HaloCatalog(object):
                     "If there exists a matching catalog, you can download it with the "
                     "download_ptcl_table method of the CatalogManager.\n")
                 raise HalotoolsCacheError(msg % (self.redshift, self.simname, closest_redshift))
-            else:
-                self.ptcl_table_fname = fname
-                self._ptcl_table = Table.read(self.ptcl_table_fname, path='data')
-            return self._ptcl_table
+            self.ptcl_table_fname = fname
+        return self.ptcl_table_fname
 
         ### Attributes that still need to be implemented: 
         # self.version,self.orig_data_source, etc. 
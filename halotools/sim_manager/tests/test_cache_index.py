@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+import numpy as np
+import os
+import shutil
+import tempfile
+import time
+from astropy.table import Table
+from astropy.tests.helper import pytest
+
+try:
+	import h5py
+	HAS_H5PY = True
+except ImportError:
+	HAS_H5PY = False
+
+from ..cache_index import CacheIndex
+from ..columnar_hdf5 import write_columnar_table
+
+
+__all__ = (
+	['test_cache_index_lookup', 'test_cache_index_invalidation', 
+	'test_cache_index_persistence']
+	)
+
+def _make_fake_cache():
+	""" Create a temporary cache directory with the same layout as the Halotools cache. 
+	"""
+	cache_root = tempfile.mkdtemp()
+	halo_dir = os.path.join(cache_root, 'halo_catalogs', 'bolshoi', 'rockstar')
+	raw_dir = os.path.join(cache_root, 'raw_halo_catalogs', 'bolshoi', 'rockstar')
+	ptcl_dir = os.path.join(cache_root, 'particle_catalogs', 'bolshoi')
+	for dirname in (halo_dir, raw_dir, ptcl_dir):
+		os.makedirs(dirname)
+
+	t = Table({'halo_id': np.arange(10), 'halo_mvir': np.ones(10)})
+	for a in ('0.50000', '1.00035'):
+		basename = 'hlist_' + a + '.list.halotools.alpha.version0.hdf5'
+		write_columnar_table(t, os.path.join(halo_dir, basename))
+		open(os.path.join(raw_dir, 'hlist_' + a + '.list.gz'), 'w').close()
+	return cache_root, halo_dir, raw_dir, ptcl_dir
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_cache_index_lookup():
+	cache_root, halo_dir, raw_dir, ptcl_dir = _make_fake_cache()
+	index = CacheIndex(cache_root)
+
+	fnames, scale_factors = index.catalogs('halos', simname='bolshoi', 
+		halo_finder='rockstar', return_scale_factors=True)
+	assert len(fnames) == 2
+	assert np.allclose(scale_factors, [0.5, 1.00035])
+	assert index.catalogs('halos', simname='bolshoi', halo_finder='bdm') == []
+	assert index.catalogs('particles') == []
+	assert len(index.catalogs('raw_halos', fname_pattern='*.list*')) == 2
+
+	metadata = index.describe(fnames[0])
+	assert metadata['catalog_type'] == 'halos'
+	assert metadata['simname'] == 'bolshoi'
+	assert metadata['halo_finder'] == 'rockstar'
+	assert metadata['version_name'] == 'halotools.alpha.version0'
+	assert np.allclose(metadata['redshift'], 1.)
+	assert set(metadata['colnames']) == set(['halo_id', 'halo_mvir'])
+	assert metadata['size'] == os.path.getsize(fnames[0])
+
+	index.close()
+	shutil.rmtree(cache_root)
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_cache_index_invalidation():
+	cache_root, halo_dir, raw_dir, ptcl_dir = _make_fake_cache()
+	index = CacheIndex(cache_root)
+	assert len(index.catalogs('halos')) == 2
+
+	# new files and new subdirectories are picked up
+	new_dir = os.path.join(cache_root, 'halo_catalogs', 'multidark', 'rockstar')
+	os.makedirs(new_dir)
+	new_fname = os.path.join(new_dir, 'hlist_0.25000.list.halotools.alpha.version0.hdf5')
+	write_columnar_table(Table({'halo_id': np.arange(3)}), new_fname)
+	assert len(index.catalogs('halos')) == 3
+	assert index.catalogs('halos', simname='multidark') == [new_fname]
+
+	# deleted files are dropped
+	os.remove(new_fname)
+	assert len(index.catalogs('halos')) == 2
+	shutil.rmtree(new_dir)
+	assert index.catalogs('halos', simname='multidark') == []
+
+	# files modified in place are re-described
+	fname = index.catalogs('halos')[0]
+	write_columnar_table(Table({'halo_id': np.arange(3), 'halo_x': np.zeros(3)}), 
+		fname, overwrite=True)
+	mtime = os.path.getmtime(fname) + 10
+	os.utime(fname, (mtime, mtime))
+	assert set(index.describe(fname)['colnames']) == set(['halo_id', 'halo_x'])
+
+	index.close()
+	shutil.rmtree(cache_root)
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_cache_index_persistence():
+	cache_root, halo_dir, raw_dir, ptcl_dir = _make_fake_cache()
+	index = CacheIndex(cache_root)
+	fnames = index.catalogs('halos')
+	index.close()
+	assert os.path.isfile(index.fname)
+
+	# a new index reads the stored entries without describing the catalogs again
+	index = CacheIndex(cache_root)
+	stored = index._conn.execute("SELECT COUNT(*) FROM catalogs").fetchone()[0]
+	assert stored == 2
+	assert index.catalogs('halos') == fnames
+
+	ptcl_fname = os.path.join(ptcl_dir, 'hlist_0.50000.particles.hdf5')
+	write_columnar_table(Table({'x': np.zeros(5)}), ptcl_fname)
+	index.update_file(ptcl_fname)
+	assert index.describe(ptcl_fname)['catalog_type'] == 'particles'
+	assert index.describe(ptcl_fname)['halo_finder'] is None
+	assert index.catalogs('particles', simname='bolshoi') == [ptcl_fname]
+
+	index.close()
+	shutil.rmtree(cache_root)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+import numpy as np
+import os
+import tempfile
+from astropy.table import Table
+from astropy.tests.helper import pytest
+
+try:
+	import h5py
+	HAS_H5PY = True
+except ImportError:
+	HAS_H5PY = False
+
+from ..catalog_registry import CatalogRegistry
+from ..columnar_hdf5 import write_columnar_table
+
+
+__all__ = (
+	['test_shared_read_only_columns', 'test_lru_eviction', 
+	'test_registry_invalidation']
+	)
+
+def _write_fake_halo_table(Nhalos=1000, fname=None):
+	t = Table()
+	t['halo_id'] = np.arange(Nhalos)
+	t['halo_mvir'] = np.logspace(10, 15, Nhalos)
+	t['halo_x'] = np.random.uniform(0, 250, Nhalos)
+	t['halo_upid'] = np.where(np.arange(Nhalos) % 4 == 0, 1, -1)
+	if fname is None:
+		fname = tempfile.mktemp(suffix='.hdf5')
+	write_columnar_table(t, fname, overwrite=True)
+	return fname, t
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_shared_read_only_columns():
+	fname, t = _write_fake_halo_table()
+	registry = CatalogRegistry()
+	halos1 = registry.halo_table(fname, 'bolshoi', 'rockstar', 'halotools.alpha.version0', 0)
+	halos2 = registry.halo_table(fname, 'bolshoi', 'rockstar', 'halotools.alpha.version0', 0.)
+
+	assert np.all(halos1['halo_mvir'] == t['halo_mvir'])
+	assert np.may_share_memory(halos1['halo_mvir'], halos2['halo_mvir'])
+	with pytest.raises(ValueError):
+		halos1['halo_mvir'][0] = 0
+
+	# columns added to one table are not seen by the other
+	halos1['halo_new_column'] = np.ones(len(t))
+	halos1['halo_mvir'] = np.ones(len(t))
+	assert 'halo_new_column' not in halos2.keys()
+	assert np.all(halos2['halo_mvir'] == t['halo_mvir'])
+
+	key = registry.catalog_key('bolshoi', 'rockstar', 'halotools.alpha.version0', 0)
+	assert registry.memory_usage() == registry.memory_usage(key) == t['halo_mvir'].nbytes
+	report = registry.memory_report()
+	assert len(report) == 1
+	assert report['num_columns_loaded'][0] == 1
+	assert report['nbytes'][0] == t['halo_mvir'].nbytes
+
+	registry.evict()
+	assert registry.memory_usage() == 0
+	assert len(registry.memory_report()) == 0
+	os.remove(fname)
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_lru_eviction():
+	fname, t = _write_fake_halo_table()
+	nbytes = t['halo_mvir'].nbytes
+	registry = CatalogRegistry(memory_budget = 2.5*nbytes)
+	halos = registry.halo_table(fname, 'bolshoi', 'rockstar', 'halotools.alpha.version0', 0)
+	source = halos._source
+
+	halos['halo_id'], halos['halo_mvir']
+	halos['halo_id']
+	halos['halo_x']
+	assert registry.memory_usage() <= registry.memory_budget
+	# halo_mvir is the least recently used column
+	assert 'halo_mvir' not in source._columns
+	assert 'halo_id' in source._columns
+	assert 'halo_x' in source._columns
+
+	# evicted columns are read again when needed by a new table
+	halos2 = registry.halo_table(fname, 'bolshoi', 'rockstar', 'halotools.alpha.version0', 0)
+	assert np.all(halos2['halo_mvir'] == t['halo_mvir'])
+	assert 'halo_mvir' in source._columns
+	assert registry.memory_usage() <= registry.memory_budget
+	os.remove(fname)
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_registry_invalidation():
+	fname, t = _write_fake_halo_table()
+	registry = CatalogRegistry()
+	halos = registry.halo_table(fname, 'bolshoi', 'rockstar', 'halotools.alpha.version0', 0)
+	assert np.all(halos['halo_id'] == t['halo_id'])
+
+	fname, t2 = _write_fake_halo_table(Nhalos=500, fname=fname)
+	mtime = os.path.getmtime(fname) + 10
+	os.utime(fname, (mtime, mtime))
+	halos2 = registry.halo_table(fname, 'bolshoi', 'rockstar', 'halotools.alpha.version0', 0)
+	assert len(halos2) == 500
+	assert halos2._source is not halos._source
+	# the table handed out before the file changed still works
+	assert len(halos['halo_x']) == 1000
+	os.remove(fname)
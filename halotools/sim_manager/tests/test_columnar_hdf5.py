@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+import numpy as np
+import os
+import tempfile
+from astropy.table import Table
+from astropy.tests.helper import pytest
+
+try:
+	import h5py
+	HAS_H5PY = True
+except ImportError:
+	HAS_H5PY = False
+
+from ..columnar_hdf5 import (write_columnar_table, read_halo_table, 
+	is_columnar_table, convert_to_columnar)
+from ..lazy_halo_table import LazyHaloTable
+from ...custom_exceptions import HalotoolsIOError
+
+
+__all__ = (
+	['test_write_columnar_table', 'test_convert_to_columnar', 
+	'test_lazy_columnar_table']
+	)
+
+def _fake_halo_table(Nhalos=1000):
+	np.random.seed(43)
+	t = Table()
+	t['halo_id'] = np.arange(Nhalos).astype('i8')
+	t['halo_upid'] = np.where(np.random.rand(Nhalos) < 0.8, -1, 0).astype('i8')
+	t['halo_mvir'] = 10**np.random.uniform(10, 15, Nhalos)
+	t['halo_x'] = np.random.uniform(0, 250, Nhalos).astype('f4')
+	return t
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_write_columnar_table():
+	t = _fake_halo_table()
+	fname = tempfile.mktemp(suffix='.hdf5')
+	write_columnar_table(t, fname, chunk_rows=100)
+	assert is_columnar_table(fname)
+
+	t2 = read_halo_table(fname)
+	assert t2.keys() == t.keys()
+	for key in t.keys():
+		assert np.all(t2[key] == t[key])
+		assert t2[key].dtype == t[key].dtype
+
+	t3 = read_halo_table(fname, keys=['halo_x', 'halo_id'])
+	assert t3.keys() == ['halo_x', 'halo_id']
+
+	with pytest.raises(HalotoolsIOError):
+		write_columnar_table(t, fname)
+	write_columnar_table(t, fname, overwrite=True, compression=None)
+	assert np.all(read_halo_table(fname)['halo_mvir'] == t['halo_mvir'])
+	os.remove(fname)
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_convert_to_columnar():
+	t = _fake_halo_table()
+	fname = tempfile.mktemp(suffix='.hdf5')
+	t.write(fname, path='data')
+	f = h5py.File(fname, 'a')
+	f.attrs['simname'] = 'fake'
+	f.close()
+	assert not is_columnar_table(fname)
+	compound_table = read_halo_table(fname)
+
+	convert_to_columnar(fname, chunk_rows=100)
+	assert is_columnar_table(fname)
+	columnar_table = read_halo_table(fname)
+	for key in t.keys():
+		assert np.all(columnar_table[key] == compound_table[key])
+	f = h5py.File(fname, 'r')
+	assert f.attrs['simname'] == 'fake'
+	f.close()
+
+	with pytest.raises(HalotoolsIOError):
+		convert_to_columnar(fname)
+	os.remove(fname)
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_lazy_columnar_table():
+	t = _fake_halo_table()
+	fname = tempfile.mktemp(suffix='.hdf5')
+	write_columnar_table(t, fname, chunk_rows=100)
+	halos = LazyHaloTable(fname)
+	assert not halos.is_memory_mapped
+	assert halos.keys() == t.keys()
+	assert len(halos) == len(t)
+	hosts = halos[halos.host_halo_mask]
+	assert np.all(hosts['halo_mvir'] == t['halo_mvir'][t['halo_upid'] == -1])
+	halos.close()
+	os.remove(fname)
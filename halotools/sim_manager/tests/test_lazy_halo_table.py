@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+import numpy as np
+import os
+import tempfile
+from astropy.table import Table
+from astropy.tests.helper import pytest
+
+try:
+	import h5py
+	HAS_H5PY = True
+except ImportError:
+	HAS_H5PY = False
+
+from ..lazy_halo_table import LazyHaloTable
+from ..supported_sims import HaloCatalog
+from ...utils.table_utils import SampleSelector
+
+
+__all__ = (
+	['test_lazy_column_access', 'test_lazy_row_selection', 
+	'test_lazy_new_columns', 'test_lazy_host_halo_selection', 'test_host_halos']
+	)
+
+def _write_fake_halo_table(Nhalos=1000):
+	""" Write a small halo table to disk in the format of the processed 
+	halo catalogs, and return the filename and the table. 
+	"""
+	np.random.seed(43)
+	t = Table()
+	t['halo_id'] = np.arange(Nhalos).astype('i8')
+	t['halo_upid'] = np.where(np.random.rand(Nhalos) < 0.8, -1, 0).astype('i8')
+	# a few halos whose halo_hostid and halo_upid disagree on whether they are hosts
+	t['halo_hostid'] = np.where(t['halo_upid'] == -1, t['halo_id'], 0).astype('i8')
+	t['halo_hostid'][:10] = np.where(t['halo_upid'][:10] == -1, 0, t['halo_id'][:10])
+	t['halo_mvir'] = 10**np.random.uniform(10, 15, Nhalos)
+	t['halo_x'] = np.random.uniform(0, 250, Nhalos).astype('f4')
+	fname = tempfile.mktemp(suffix='.hdf5')
+	t.write(fname, path='data')
+	return fname, t
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_lazy_column_access():
+	fname, t = _write_fake_halo_table()
+	halos = LazyHaloTable(fname)
+	assert len(halos) == len(t)
+	assert halos.keys() == t.keys()
+	assert halos.is_memory_mapped
+	assert np.all(halos['halo_mvir'] == t['halo_mvir'])
+	assert halos['halo_x'].dtype == t['halo_x'].dtype
+	# columns are cached after the first access
+	assert halos['halo_mvir'] is halos['halo_mvir']
+	assert np.all(halos.to_table()['halo_id'] == t['halo_id'])
+	with pytest.raises(KeyError):
+		halos['halo_vmax']
+	halos.close()
+	os.remove(fname)
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_lazy_row_selection():
+	fname, t = _write_fake_halo_table()
+	halos = LazyHaloTable(fname)
+
+	mask = halos['halo_mvir'] > 1e12
+	subset = halos[mask]
+	assert len(subset) == np.count_nonzero(mask)
+	assert np.all(subset['halo_x'] == t['halo_x'][mask])
+
+	# selections can be composed 
+	subsubset = subset[10:100:3]
+	assert np.all(subsubset['halo_id'] == t['halo_id'][mask][10:100:3])
+	idx = np.array([4, 0, 7])
+	assert np.all(subsubset[idx]['halo_id'] == t['halo_id'][mask][10:100:3][idx])
+	halos.close()
+	os.remove(fname)
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_lazy_new_columns():
+	fname, t = _write_fake_halo_table()
+	halos = LazyHaloTable(fname)
+
+	halos['halo_logm'] = np.log10(halos['halo_mvir'])
+	assert 'halo_logm' in halos.keys()
+	mask = halos['halo_x'] > 100
+	assert np.allclose(halos[mask]['halo_logm'], np.log10(t['halo_mvir'][mask]))
+
+	with pytest.raises(ValueError):
+		halos['halo_bad'] = np.zeros(len(halos) + 1)
+
+	del halos['halo_logm']
+	assert 'halo_logm' not in halos.keys()
+	halos.close()
+	os.remove(fname)
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_lazy_host_halo_selection():
+	fname, t = _write_fake_halo_table()
+	halos = LazyHaloTable(fname)
+
+	hosts = SampleSelector.host_halo_selection(table=halos)
+	correct_hosts = SampleSelector.host_halo_selection(table=t)
+	assert np.all(hosts['halo_id'] == correct_hosts['halo_id'])
+	assert halos.host_halo_mask is halos.host_halo_mask
+
+	massive_hosts = halos[halos['halo_mvir'] > 1e12].host_halo_mask
+	assert np.all(massive_hosts == (t['halo_upid'][t['halo_mvir'] > 1e12] == -1))
+	halos.close()
+	os.remove(fname)
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_host_halos():
+	""" Verify that the host halos of a `HaloCatalog` are the same 
+	whether or not its halo table is lazily loaded. 
+	"""
+	fname, t = _write_fake_halo_table()
+	correct_hosts = t[t['halo_hostid'] == t['halo_id']]
+	for lazy_halo_table in (True, False):
+		halocat = HaloCatalog.__new__(HaloCatalog)
+		halocat.processed_halo_table_fname = fname
+		halocat._lazy_halo_table = lazy_halo_table
+		halocat._use_catalog_registry = False
+		assert np.all(halocat.host_halos['halo_id'] == correct_hosts['halo_id'])
+		assert halocat.host_halos is halocat.host_halos
+		if lazy_halo_table is True:
+			halocat.halo_table.close()
+	os.remove(fname)
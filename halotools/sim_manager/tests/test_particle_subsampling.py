@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+import numpy as np
+import os
+import tempfile
+import warnings
+from astropy.table import Table
+from astropy.tests.helper import pytest
+
+try:
+	import h5py
+	HAS_H5PY = True
+except ImportError:
+	HAS_H5PY = False
+
+from ..particle_subsampling import (shuffle_ptcl_table, 
+	ptcl_table_is_shuffled, read_ptcl_subsample)
+from ..generate_random_sim import FakeSim
+from ...custom_exceptions import HalotoolsError
+
+
+__all__ = (
+	['test_shuffle_ptcl_table', 'test_read_ptcl_subsample', 
+	'test_fake_sim_ptcl_table_subsample']
+	)
+
+def _write_fake_ptcl_table(Nptcl=2000):
+	""" Write a small particle table sorted by x, so that 
+	the first rows of the unshuffled table are not a random subsample. 
+	"""
+	np.random.seed(43)
+	t = Table()
+	t['x'] = np.sort(np.random.uniform(0, 250, Nptcl))
+	t['y'] = np.random.uniform(0, 250, Nptcl)
+	t['z'] = np.random.uniform(0, 250, Nptcl)
+	t['ptcl_id'] = np.arange(Nptcl)
+	fname = tempfile.mktemp(suffix='.hdf5')
+	t.write(fname, path='data')
+	f = h5py.File(fname, 'a')
+	f.attrs['simname'] = 'fake'
+	f.close()
+	return fname, t
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_shuffle_ptcl_table():
+	fname, t = _write_fake_ptcl_table()
+	assert not ptcl_table_is_shuffled(fname)
+
+	shuffle_ptcl_table(fname, seed=43)
+	assert ptcl_table_is_shuffled(fname)
+	f = h5py.File(fname, 'r')
+	assert f.attrs['simname'] == 'fake'
+	f.close()
+
+	subsample = read_ptcl_subsample(fname, 1000)
+	assert len(subsample) == 1000
+	assert len(set(subsample['ptcl_id'])) == 1000
+	assert np.all(t['x'][subsample['ptcl_id']] == subsample['x'])
+	# the subsample is spread over the entire box
+	assert np.fabs(np.median(subsample['x']) - np.median(t['x'])) < 20
+
+	# subsamples are nested 
+	smaller_subsample = read_ptcl_subsample(fname, 100)
+	assert np.all(smaller_subsample['ptcl_id'] == subsample['ptcl_id'][:100])
+	os.remove(fname)
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_read_ptcl_subsample():
+	fname, t = _write_fake_ptcl_table()
+
+	with warnings.catch_warnings(record=True) as w:
+		warnings.simplefilter("always")
+		subsample = read_ptcl_subsample(fname, 100)
+		assert len(w) == 1
+	assert len(subsample) == 100
+	assert set(subsample['ptcl_id']) <= set(t['ptcl_id'])
+
+	with pytest.raises(HalotoolsError):
+		read_ptcl_subsample(fname, len(t)+1)
+	os.remove(fname)
+
+def test_fake_sim_ptcl_table_subsample():
+	snapshot = FakeSim()
+	subsample = snapshot.ptcl_table_subsample(100)
+	assert len(subsample) == 100
+	assert np.all(subsample['x'] == snapshot.ptcl_table['x'][:100])
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+import numpy as np
+import os
+import gzip
+import shutil
+import tempfile
+from astropy.tests.helper import pytest
+
+from ..read_nbody_ascii import _read_ascii, _ascii_byte_ranges, _parse_ascii_block
+from ...custom_exceptions import HalotoolsIOError
+
+
+__all__ = (
+	['test_ascii_byte_ranges', 'test_read_ascii', 
+	'test_read_ascii_parallel', 'test_parse_ascii_block', 'test_parse_ascii_block_columns', 
+	'test_read_ascii_column_projection', 'test_read_gzipped_ascii']
+	)
+
+dt = np.dtype([('halo_scale_factor', 'f4'), ('halo_id', 'i8'), 
+	('halo_mvir', 'f4'), ('halo_x', 'f4')])
+
+def _write_fake_ascii(Nrows=1000):
+	""" Write a small ASCII file in the format of a Rockstar hlist, 
+	and return the filename and the rows as a structured array. 
+	"""
+	np.random.seed(43)
+	arr = np.empty(Nrows, dtype=dt)
+	arr['halo_scale_factor'] = 1.0
+	arr['halo_id'] = np.arange(Nrows) + 2**40
+	arr['halo_mvir'] = 10**np.random.uniform(10, 15, Nrows)
+	arr['halo_x'] = np.random.uniform(0, 250, Nrows)
+
+	fname = tempfile.mktemp(suffix='.list')
+	with open(fname, 'w') as f:
+		f.write('#scale(0) id(1) mvir(2) x(3)\n')
+		f.write('#Omega_M = 0.270000; Omega_L = 0.730000; h0 = 0.700000\n')
+		for row in arr:
+			f.write('%.5f %i %.6e %.5f\n' % tuple(row))
+	return fname, arr
+
+def test_ascii_byte_ranges():
+	""" Verify that the byte ranges tile the file and end on a newline. 
+	"""
+	fname, arr = _write_fake_ascii()
+	ranges = _ascii_byte_ranges(fname, 7)
+	assert ranges[0][0] == 0
+	assert ranges[-1][1] == os.path.getsize(fname)
+	with open(fname, 'rb') as f:
+		data = f.read()
+	for first, last in ranges:
+		assert data[last-1:last] == b'\n'
+	for r1, r2 in zip(ranges[:-1], ranges[1:]):
+		assert r1[1] == r2[0]
+	os.remove(fname)
+
+def test_parse_ascii_block():
+	""" Verify that blocks with the wrong number of columns 
+	or values that are not numbers raise an exception. 
+	"""
+	block = b'1.0 2 3.0 4.0\n1.0 2 3.0\n'
+	with pytest.raises(HalotoolsIOError):
+		_parse_ascii_block(block, dt)
+
+	block = b'1.0 2 3.0 4.0\n1.0 2 3.0 4.0 5.0\n'
+	with pytest.raises(HalotoolsIOError):
+		_parse_ascii_block(block, dt)
+
+	block = b'1.0 2 3.0 4.0\n1.0 2 nan3 4.0\n'
+	with pytest.raises(HalotoolsIOError):
+		_parse_ascii_block(block, dt, columns_to_keep=['halo_mvir'])
+
+def test_parse_ascii_block_columns():
+	""" Verify that the kept columns are converted directly to their type, 
+	so that integers are exact beyond the precision of a double, 
+	and that whitespace and a missing trailing newline are handled. 
+	"""
+	block = (b'#scale(0) id(1) mvir(2) x(3)\n'
+		b'1.0 1152921504606846977 1.5e12 10.5\n'
+		b'  0.5\t-1  2e+13 \t 0.25 \r\n'
+		b'\n'
+		b'0.25 1e+06 3.0 7')
+	arr = _parse_ascii_block(block, dt)
+	assert len(arr) == 3
+	assert arr['halo_id'][0] == 2**60 + 1
+	assert np.all(arr['halo_id'][1:] == [-1, 10**6])
+	assert np.allclose(arr['halo_mvir'], [1.5e12, 2e13, 3.0])
+	assert np.allclose(arr['halo_x'], [10.5, 0.25, 7.])
+
+	arr = _parse_ascii_block(block, dt, columns_to_keep=['halo_x', 'halo_id'])
+	assert arr.dtype.names == ('halo_id', 'halo_x')
+	assert arr['halo_id'][0] == 2**60 + 1
+	assert np.allclose(arr['halo_x'], [10.5, 0.25, 7.])
+
+def test_read_ascii():
+	""" Verify that the chunked reader recovers every row in order, 
+	with and without cuts. 
+	"""
+	fname, arr = _write_fake_ascii()
+
+	nocut = lambda x : np.ones(len(x), dtype=bool)
+	output, Nrows = _read_ascii(fname, dt, nocut, 10, 1)
+	assert Nrows == len(arr)
+	assert np.all(output['halo_id'] == arr['halo_id'])
+	assert np.allclose(output['halo_mvir'], arr['halo_mvir'], rtol=1e-5)
+
+	masscut = lambda x : x['halo_mvir'] > 1e12
+	output, Nrows = _read_ascii(fname, dt, masscut, 10, 1)
+	assert Nrows == len(arr)
+	assert np.all(output['halo_id'] == arr['halo_id'][arr['halo_mvir'] > 1e12])
+	os.remove(fname)
+
+@pytest.mark.slow
+def test_read_ascii_parallel():
+	""" Verify that the parallel reader returns the same result as the serial reader. 
+	"""
+	fname, arr = _write_fake_ascii()
+	masscut = lambda x : x['halo_mvir'] > 1e12
+	serial_output, serial_Nrows = _read_ascii(fname, dt, masscut, 1, 1)
+	parallel_output, parallel_Nrows = _read_ascii(fname, dt, masscut, 8, 2)
+	assert serial_Nrows == parallel_Nrows
+	assert np.all(serial_output == parallel_output)
+	os.remove(fname)
+
+def test_read_ascii_column_projection():
+	""" Verify that only the requested columns are stored, 
+	and that cuts may use any of the stored columns. 
+	"""
+	fname, arr = _write_fake_ascii()
+	masscut = lambda x : x['halo_mvir'] > 1e12
+	output, Nrows = _read_ascii(fname, dt, masscut, 10, 1, 
+		columns_to_keep=['halo_x', 'halo_mvir'])
+	assert output.dtype.names == ('halo_mvir', 'halo_x')
+	assert Nrows == len(arr)
+	mask = arr['halo_mvir'] > 1e12
+	assert np.allclose(output['halo_x'], arr['halo_x'][mask], rtol=1e-5)
+	os.remove(fname)
+
+def test_read_gzipped_ascii():
+	""" Verify that gzipped files are read without modifying the file, 
+	and give the same result as the uncompressed file. 
+	"""
+	fname, arr = _write_fake_ascii()
+	gz_fname = fname + '.gz'
+	with open(fname, 'rb') as f_in:
+		with gzip.open(gz_fname, 'wb') as f_out:
+			shutil.copyfileobj(f_in, f_out)
+	with open(gz_fname, 'rb') as f:
+		compressed_bytes = f.read()
+
+	masscut = lambda x : x['halo_mvir'] > 1e12
+	output, Nrows = _read_ascii(fname, dt, masscut, 1, 1)
+	for Nchunks in (1, 10, 1000):
+		gz_output, gz_Nrows = _read_ascii(gz_fname, dt, masscut, Nchunks, 1)
+		assert gz_Nrows == Nrows == len(arr)
+		assert np.all(gz_output == output)
+
+	with open(gz_fname, 'rb') as f:
+		assert f.read() == compressed_bytes
+	os.remove(fname)
+	os.remove(gz_fname)
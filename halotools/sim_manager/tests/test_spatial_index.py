@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+import numpy as np
+import os
+import tempfile
+from astropy.table import Table
+from astropy.tests.helper import pytest
+
+try:
+	import h5py
+	HAS_H5PY = True
+except ImportError:
+	HAS_H5PY = False
+
+from ..spatial_index import (subvolume_ids, spatially_sort_table, 
+	write_subvolume_index, read_subvolume_index, read_region)
+from ..columnar_hdf5 import write_columnar_table, convert_to_columnar
+
+
+__all__ = (
+	['test_spatially_sort_table', 'test_read_region']
+	)
+
+Lbox = 250.
+
+def _fake_halo_table(Nhalos=5000):
+	np.random.seed(43)
+	t = Table()
+	t['halo_id'] = np.arange(Nhalos).astype('i8')
+	t['halo_mvir'] = 10**np.random.uniform(10, 15, Nhalos)
+	for key in ('halo_x', 'halo_y', 'halo_z'):
+		t[key] = np.random.uniform(0, Lbox, Nhalos)
+	t['halo_x'][0] = Lbox
+	return t
+
+def test_spatially_sort_table():
+	t = _fake_halo_table()
+	num_divs = [5, 4, 3]
+	sorted_table, offsets = spatially_sort_table(t, Lbox, num_divs)
+	cellID = subvolume_ids(sorted_table['halo_x'], sorted_table['halo_y'], 
+		sorted_table['halo_z'], Lbox, num_divs)
+	assert np.all(np.diff(cellID) >= 0)
+	assert offsets[0] == 0
+	assert offsets[-1] == len(t)
+	for icell in range(np.prod(num_divs)):
+		assert np.all(cellID[offsets[icell]:offsets[icell+1]] == icell)
+	assert set(sorted_table['halo_id']) == set(t['halo_id'])
+
+@pytest.mark.skipif('not HAS_H5PY')
+def test_read_region():
+	t = _fake_halo_table()
+	num_divs = 8
+	sorted_table, offsets = spatially_sort_table(t, Lbox, num_divs)
+
+	columnar_fname = tempfile.mktemp(suffix='.hdf5')
+	write_columnar_table(sorted_table, columnar_fname, chunk_rows=500)
+	write_subvolume_index(columnar_fname, offsets, num_divs)
+	stored_num_divs, stored_offsets = read_subvolume_index(columnar_fname)
+	assert np.all(stored_num_divs == num_divs)
+	assert np.all(stored_offsets == offsets)
+
+	compound_fname = tempfile.mktemp(suffix='.hdf5')
+	sorted_table.write(compound_fname, path='data')
+	write_subvolume_index(compound_fname, offsets, num_divs)
+
+	unsorted_fname = tempfile.mktemp(suffix='.hdf5')
+	write_columnar_table(t, unsorted_fname)
+	assert read_subvolume_index(unsorted_fname) == (None, None)
+
+	region = (10., 75.5, 100., 250., 0., 31.25)
+	mask = ((t['halo_x'] >= region[0]) & (t['halo_x'] < region[1]) & 
+		(t['halo_y'] >= region[2]) & (t['halo_y'] < region[3]) & 
+		(t['halo_z'] >= region[4]) & (t['halo_z'] < region[5]))
+	correct_ids = np.sort(t['halo_id'][mask])
+
+	for fname in (columnar_fname, compound_fname, unsorted_fname):
+		halos = read_region(fname, Lbox, *region)
+		assert np.all(np.sort(halos['halo_id']) == correct_ids)
+		halos = read_region(fname, Lbox, *region, keys=['halo_mvir'])
+		assert halos.keys() == ['halo_mvir']
+		assert len(halos) == len(correct_ids)
+
+	# the index survives conversion to the columnar layout
+	convert_to_columnar(compound_fname)
+	assert np.all(read_subvolume_index(compound_fname)[1] == offsets)
+
+	halos = read_region(columnar_fname, Lbox, 0, 0, 0, Lbox, 0, Lbox)
+	assert len(halos) == 0
+
+	for fname in (columnar_fname, compound_fname, unsorted_fname):
+		os.remove(fname)
@@ -4,42 +4,361 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 
-import sys, urllib
+import os, sys, json, hashlib, threading
+from astropy.extern.six.moves.urllib.request import Request, urlopen
+from astropy.extern.six.moves.urllib.error import HTTPError
+from astropy.extern.six.moves.http_client import HTTPException
 
-__all__ = ['file_len', 'download_file_from_url']
+from ..custom_exceptions import HalotoolsIOError
+
+__all__ = ['file_len', 'download_file_from_url', 'file_checksum',
+    'read_checksum_manifest', 'fetch_checksum_manifest']
+
+# Number of bytes read from the network or from disk in each block
+default_download_block_size = 2**20
+
+# Downloads smaller than this are never split across several connections
+min_segment_size = 2**22
+
+# Names of the hashlib algorithms producing hexdigests of each length
+_checksum_algorithms = {32: 'md5', 40: 'sha1', 64: 'sha256', 128: 'sha512'}
 
 def file_len(fname):
     with open(fname) as f:
         for i, l in enumerate(f):
             pass
-    return i + 1    
-    
+    return i + 1
+
+def _checksum_algorithm(hexdigest):
+    """ Infer the name of the hashlib algorithm from the length of the input hexdigest.
+    """
+    try:
+        return _checksum_algorithms[len(hexdigest)]
+    except KeyError:
+        raise HalotoolsIOError("Checksum %s is not an md5, sha1, sha256 or sha512 hexdigest"
+            % hexdigest)
 
-def download_file_from_url(url, fname):
-    """ Function to download a file from the web to a specific location, 
-    and print a progress bar along the way. 
+def file_checksum(fname, algorithm='sha256', block_size=default_download_block_size):
+    """ Compute the checksum of a file, reading it one block at a time.
 
-    Parameters 
+    Parameters
     ----------
-    url : string 
-        web location of desired file, e.g., 
-        ``http://www.some.website.com/somefile.txt``. 
+    fname : string
+        Name of the file (including absolute path).
 
-    fname : string 
-        Location and filename to store the downloaded file, e.g., 
-        ``/Users/username/dirname/possibly_new_filename.txt``
+    algorithm : string, optional
+        Name of the `hashlib` algorithm, e.g., ``md5`` or ``sha256``. Default is ``sha256``.
+
+    block_size : int, optional
+        Number of bytes read at a time. Default is 1 MiB.
+
+    Returns
+    -------
+    hexdigest : string
     """
+    checksum = hashlib.new(algorithm)
+    with open(fname, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            checksum.update(block)
+    return checksum.hexdigest()
 
-    print("\n... Downloading data from the following location: \n%s\n" % url)
-    print(" ... Saving the data with the following filename: \n%s\n" % fname) 
+def read_checksum_manifest(text):
+    """ Parse a checksum manifest in the format written by
+    the ``md5sum`` and ``sha256sum`` command-line utilities,
+    i.e., one ``<hexdigest>  <filename>`` pair per line.
+
+    Parameters
+    ----------
+    text : string
+        Contents of the manifest.
+
+    Returns
+    -------
+    manifest : dict
+        Dictionary whose keys are the basenames of the files in the manifest,
+        and whose values are their hexdigests.
+    """
+    manifest = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if (line == '') or (line[0] == '#'):
+            continue
+        try:
+            hexdigest, name = line.split(None, 1)
+        except ValueError:
+            raise HalotoolsIOError("Unable to parse the following line "
+                "of the checksum manifest:\n%s" % line)
+        name = name.lstrip('*')
+        manifest[os.path.basename(name)] = hexdigest.lower()
+    return manifest
+
+def fetch_checksum_manifest(url):
+    """ Download and parse a checksum manifest.
+
+    Parameters
+    ----------
+    url : string
+        web location of the manifest, e.g., ``http://www.some.website.com/SHA256SUMS``.
+
+    Returns
+    -------
+    manifest : dict
+        Dictionary returned by `read_checksum_manifest`, or None
+        if there is no manifest at the input ``url``.
+    """
+    try:
+        response = urlopen(url)
+    except HTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+    try:
+        text = response.read()
+    finally:
+        response.close()
+    return read_checksum_manifest(text.decode('utf-8'))
+
+def _probe_remote_file(url):
+    """ Determine the size of a remote file, and whether the server
+    supports HTTP range requests, with a request for the first byte.
+    Returns (size, accepts_ranges), where size is None if unknown.
+    """
+    response = urlopen(Request(url, headers={'Range': 'bytes=0-0'}))
+    try:
+        if response.getcode() == 206:
+            content_range = response.info().get('Content-Range', '')
+            total = content_range.rpartition('/')[2]
+            if total.isdigit():
+                return int(total), True
+        length = response.info().get('Content-Length', None)
+        return (int(length) if length is not None else None), False
+    finally:
+        response.close()
+
+
+class _SegmentedDownload(object):
+    """ Private class storing the state of a download split into contiguous
+    byte ranges, each fetched with its own HTTP range request.
+
+    The data are written into ``fname.part``, and the number of bytes completed in
+    each segment is recorded in ``fname.part.json``, so that an interrupted
+    download can be resumed. The progress file is only updated after the data
+    have been written, so it never claims bytes that are not on disk.
+    """
+
+    def __init__(self, url, fname, size, num_segments):
+        self.url = url
+        self.part_fname = fname + '.part'
+        self.progress_fname = fname + '.part.json'
+        self.size = size
+        self._lock = threading.Lock()
+        self._last_reported = -1
+
+        if not self._load_progress():
+            boundaries = [size*i//num_segments for i in range(num_segments+1)]
+            self.segments = [[boundaries[i], boundaries[i+1], 0] for i in range(num_segments)]
+            with open(self.part_fname, 'wb') as f:
+                f.truncate(size)
+            self._save_progress()
+
+    def _load_progress(self):
+        if not (os.path.isfile(self.part_fname) and os.path.isfile(self.progress_fname)):
+            return False
+        try:
+            with open(self.progress_fname) as f:
+                progress = json.load(f)
+        except ValueError:
+            return False
+        if (progress.get('url') != self.url) or (progress.get('size') != self.size):
+            return False
+        if os.path.getsize(self.part_fname) != self.size:
+            return False
+        self.segments = progress['segments']
+        print(" ... Resuming the download with %.1f%% of the data already on disk\n"
+            % (100.*self.num_bytes_done/max(1, self.size)))
+        return True
+
+    def _save_progress(self):
+        tmp_fname = self.progress_fname + '.tmp'
+        with open(tmp_fname, 'w') as f:
+            json.dump({'url': self.url, 'size': self.size, 'segments': self.segments}, f)
+        os.rename(tmp_fname, self.progress_fname)
+
+    @property
+    def num_bytes_done(self):
+        return sum(segment[2] for segment in self.segments)
+
+    def _report(self):
+        percent = int(100.*self.num_bytes_done/max(1, self.size))
+        if percent > self._last_reported:
+            self._last_reported = percent
+            print("% 3.1f%% of %d bytes\r" % (percent, self.size), end='')
+            sys.stdout.flush()
+
+    def fetch_segment(self, i, block_size, max_retries):
+        """ Download the remaining bytes of the i^th segment,
+        retrying from the current position after a connection failure.
+        """
+        num_failures = 0
+        while True:
+            start, end, done = self.segments[i]
+            if start + done == end:
+                return
+            try:
+                self._fetch_range(i, start + done, end, block_size)
+            except (IOError, OSError, HTTPException):
+                num_failures += 1
+                if num_failures > max_retries:
+                    raise
+
+    def _fetch_range(self, i, first_byte, end, block_size):
+        request = Request(self.url, headers={'Range': 'bytes=%i-%i' % (first_byte, end-1)})
+        response = urlopen(request)
+        try:
+            if response.getcode() != 206:
+                raise HalotoolsIOError("Server did not honor the range request for %s" % self.url)
+            with open(self.part_fname, 'r+b') as f:
+                f.seek(first_byte)
+                position = first_byte
+                while position < end:
+                    block = response.read(min(block_size, end - position))
+                    if not block:
+                        raise IOError("Connection closed after %i of %i bytes of the range request"
+                            % (position - first_byte, end - first_byte))
+                    f.write(block)
+                    f.flush()
+                    position += len(block)
+                    with self._lock:
+                        self.segments[i][2] = position - self.segments[i][0]
+                        self._save_progress()
+                        self._report()
+        finally:
+            response.close()
+
+    def run(self, block_size, max_retries):
+        """ Download all segments, using one thread per segment.
+        """
+        errors = []
+        def target(i):
+            try:
+                self.fetch_segment(i, block_size, max_retries)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=target, args=(i, ))
+            for i in range(len(self.segments))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if len(errors) > 0:
+            raise HalotoolsIOError("The download of %s was interrupted with the following error:\n%s\n"
+                "%.1f%% of the data are stored in %s.\n"
+                "Call the same function again to resume the download.\n"
+                % (self.url, errors[0], 100.*self.num_bytes_done/max(1, self.size), self.part_fname))
+
+    def finalize(self, fname):
+        os.rename(self.part_fname, fname)
+        os.remove(self.progress_fname)
 
-    def reporthook(a,b,c): 
-        print("% 3.1f%% of %d bytes\r" % (min(100, float(a * b) / c * 100), c),)
-        sys.stdout.flush()
+def _download_single_stream(url, part_fname, block_size, checksum):
+    """ Download a file with a single request, for servers that do not support range requests.
+    Returns the hexdigest of the downloaded data, computed while streaming,
+    or None if no checksum is requested.
+    """
+    response = urlopen(url)
+    try:
+        length = response.info().get('Content-Length', None)
+        size = int(length) if length is not None else None
+        num_bytes, last_reported = 0, -1
+        with open(part_fname, 'wb') as f:
+            for block in iter(lambda: response.read(block_size), b''):
+                f.write(block)
+                if checksum is not None:
+                    checksum.update(block)
+                num_bytes += len(block)
+                if size:
+                    percent = int(100.*num_bytes/size)
+                    if percent > last_reported:
+                        last_reported = percent
+                        print("% 3.1f%% of %d bytes\r" % (percent, size), end='')
+                        sys.stdout.flush()
+    finally:
+        response.close()
+    if (size is not None) and (num_bytes != size):
+        raise HalotoolsIOError("The download of %s was interrupted after %i of %i bytes"
+            % (url, num_bytes, size))
+    return checksum.hexdigest() if checksum is not None else None
+
+def download_file_from_url(url, fname, num_connections=4, checksum=None,
+    max_retries=3, block_size=default_download_block_size):
+    """ Function to download a file from the web to a specific location,
+    and print a progress bar along the way.
+
+    If the server supports HTTP range requests, the file is split into
+    ``num_connections`` byte ranges that are downloaded in parallel,
+    and an interrupted download is resumed from the data already on disk
+    the next time the function is called with the same ``fname``.
+    The data are stored in ``fname.part`` until the download is complete
+    and, if a ``checksum`` is passed, verified.
+
+    Parameters
+    ----------
+    url : string
+        web location of desired file, e.g.,
+        ``http://www.some.website.com/somefile.txt``.
+
+    fname : string
+        Location and filename to store the downloaded file, e.g.,
+        ``/Users/username/dirname/possibly_new_filename.txt``
+
+    num_connections : int, optional
+        Maximum number of simultaneous connections to the server. Default is 4.
+
+    checksum : string, optional
+        Expected md5, sha1, sha256 or sha512 hexdigest of the file,
+        e.g., as returned by `fetch_checksum_manifest`.
+        The algorithm is inferred from the length of the hexdigest.
+        Default is None, in which case the download is not verified.
 
-    urllib.urlretrieve(url, fname, reporthook)
+    max_retries : int, optional
+        Number of times each byte range is re-requested from its current position
+        after a connection failure before the download is interrupted. Default is 3.
 
+    block_size : int, optional
+        Number of bytes read from the network at a time. Default is 1 MiB.
+    """
+
+    print("\n... Downloading data from the following location: \n%s\n" % url)
+    print(" ... Saving the data with the following filename: \n%s\n" % fname)
 
+    if checksum is not None:
+        checksum = checksum.lower()
+        algorithm = _checksum_algorithm(checksum)
 
+    size, accepts_ranges = _probe_remote_file(url)
+    if accepts_ranges is True:
+        num_segments = int(max(1, min(num_connections, size // min_segment_size)))
+        download = _SegmentedDownload(url, fname, size, num_segments)
+        download.run(block_size, max_retries)
+        part_fname = download.part_fname
+        if checksum is not None:
+            hexdigest = file_checksum(part_fname, algorithm=algorithm, block_size=block_size)
+    else:
+        part_fname = fname + '.part'
+        hash_obj = hashlib.new(algorithm) if checksum is not None else None
+        hexdigest = _download_single_stream(url, part_fname, block_size, hash_obj)
 
+    if (checksum is not None) and (hexdigest != checksum):
+        os.remove(part_fname)
+        if accepts_ranges is True:
+            os.remove(download.progress_fname)
+        raise HalotoolsIOError("The %s checksum of the data downloaded from %s is \n%s,\n"
+            "which does not match the expected checksum \n%s\n"
+            "The corrupted download has been deleted." % (algorithm, url, hexdigest, checksum))
 
+    if accepts_ranges is True:
+        download.finalize(fname)
+    else:
+        os.rename(part_fname, fname)
+    print("")
@@ -182,6 +182,18 @@ class SampleSelector(object):
     """ Container class for commonly used sample selections. 
     """
 
+    @staticmethod
+    def host_halo_mask(**kwargs):
+        """ Method returns a boolean array that is True for the host halos 
+        of the input ``table`` and False for the subhalos. 
+        """
+        table = kwargs['table']
+        # Tables such as the LazyHaloTable cache their host halo mask 
+        if hasattr(table, 'host_halo_mask'):
+            return table.host_halo_mask
+        else:
+            return table['halo_upid'] == -1
+
     @staticmethod
     def host_halo_selection(return_subhalos=False, **kwargs):
         """ Method divides sample in to host halos and subhalos, and returns 
@@ -189,7 +201,7 @@ class SampleSelector(object):
         on the value of the input ``return_subhalos``. 
         """
         table = kwargs['table']
-        mask = table['halo_upid'] == -1
+        mask = SampleSelector.host_halo_mask(table = table)
         if return_subhalos is False:
             return table[mask]
         else:
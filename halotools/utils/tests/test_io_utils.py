@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+import numpy as np
+import os
+import hashlib
+import tempfile
+import threading
+from astropy.extern.six.moves import BaseHTTPServer, socketserver
+from astropy.tests.helper import pytest
+
+from .. import io_utils
+from ..io_utils import download_file_from_url, read_checksum_manifest
+from ...custom_exceptions import HalotoolsIOError
+
+__all__ = ['test_parallel_download', 'test_resume_interrupted_download', 
+    'test_checksum_mismatch', 'test_download_without_range_support', 
+    'test_read_checksum_manifest']
+
+
+class _FakeCatalogHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Request handler serving the payload of the server, 
+    honoring single byte-range requests if the server supports them. 
+    """
+
+    def do_GET(self):
+        server = self.server
+        payload = server.payload
+        range_header = self.headers.get('Range', None)
+        if (range_header is not None) and server.accepts_ranges:
+            first, last = range_header.split('=')[1].split('-')
+            first, last = int(first), min(int(last), len(payload)-1)
+            data = payload[first:last+1]
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %i-%i/%i' % (first, last, len(payload)))
+            server.requested_ranges.append((first, last))
+        else:
+            data = payload
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+
+        # Simulate a dropped connection once the byte budget of the server is spent
+        with server.lock:
+            if server.byte_budget is not None:
+                num_bytes = min(len(data), server.byte_budget)
+                server.byte_budget -= num_bytes
+                data = data[:num_bytes]
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class _FakeCatalogServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+def _start_server(payload, accepts_ranges=True):
+    server = _FakeCatalogServer(('127.0.0.1', 0), _FakeCatalogHandler)
+    server.payload = payload
+    server.accepts_ranges = accepts_ranges
+    server.requested_ranges = []
+    server.byte_budget = None
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    url = 'http://127.0.0.1:%i/hlist_1.00035.list.halotools.alpha.version0.hdf5' % server.server_address[1]
+    return server, url
+
+def _fake_payload(num_bytes=200000):
+    return np.random.RandomState(43).randint(0, 256, num_bytes).astype(np.uint8).tostring()
+
+def test_parallel_download(monkeypatch):
+    monkeypatch.setattr(io_utils, 'min_segment_size', 1000)
+    payload = _fake_payload()
+    server, url = _start_server(payload)
+    fname = tempfile.mktemp()
+    checksum = hashlib.sha256(payload).hexdigest()
+    download_file_from_url(url, fname, num_connections=4, checksum=checksum, block_size=4096)
+    server.shutdown()
+
+    with open(fname, 'rb') as f:
+        assert f.read() == payload
+    assert not os.path.isfile(fname + '.part')
+    assert not os.path.isfile(fname + '.part.json')
+    # one probe request for the first byte, then one request per connection
+    segment_starts = sorted(first for first, last in server.requested_ranges[1:])
+    assert segment_starts == [0, 50000, 100000, 150000]
+    os.remove(fname)
+
+def test_resume_interrupted_download(monkeypatch):
+    monkeypatch.setattr(io_utils, 'min_segment_size', 1000)
+    payload = _fake_payload()
+    server, url = _start_server(payload)
+    fname = tempfile.mktemp()
+
+    server.byte_budget = 1 + 120000
+    with pytest.raises(HalotoolsIOError) as err:
+        download_file_from_url(url, fname, num_connections=4, max_retries=0, block_size=4096)
+    assert 'resume' in err.value.args[0]
+    assert not os.path.isfile(fname)
+    assert os.path.isfile(fname + '.part')
+
+    server.byte_budget = None
+    num_previous_requests = len(server.requested_ranges)
+    download_file_from_url(url, fname, num_connections=4, 
+        checksum=hashlib.md5(payload).hexdigest(), block_size=4096)
+    server.shutdown()
+
+    with open(fname, 'rb') as f:
+        assert f.read() == payload
+    # only the missing bytes were requested the second time
+    resumed_ranges = server.requested_ranges[num_previous_requests+1:]
+    num_resumed_bytes = sum(last - first + 1 for first, last in resumed_ranges)
+    assert num_resumed_bytes <= len(payload) - 120000 + 4096*4
+    os.remove(fname)
+
+def test_checksum_mismatch():
+    payload = _fake_payload()
+    server, url = _start_server(payload)
+    fname = tempfile.mktemp()
+    with pytest.raises(HalotoolsIOError) as err:
+        download_file_from_url(url, fname, checksum=hashlib.sha256(b'').hexdigest())
+    server.shutdown()
+    assert 'does not match' in err.value.args[0]
+    assert not os.path.isfile(fname)
+    assert not os.path.isfile(fname + '.part')
+    assert not os.path.isfile(fname + '.part.json')
+
+def test_download_without_range_support():
+    payload = _fake_payload()
+    server, url = _start_server(payload, accepts_ranges=False)
+    fname = tempfile.mktemp()
+    download_file_from_url(url, fname, checksum=hashlib.md5(payload).hexdigest())
+    server.shutdown()
+    with open(fname, 'rb') as f:
+        assert f.read() == payload
+    assert server.requested_ranges == []
+    os.remove(fname)
+
+def test_read_checksum_manifest():
+    text = ("# checksums of the halo catalogs\n"
+        "d41d8cd98f00b204e9800998ecf8427e  hlist_0.50000.list.halotools.alpha.version0.hdf5\n"
+        "D41D8CD98F00B204E9800998ECF8427F *bolshoi/hlist_1.00035.list.halotools.alpha.version0.hdf5\n")
+    manifest = read_checksum_manifest(text)
+    assert manifest['hlist_0.50000.list.halotools.alpha.version0.hdf5'] == 'd41d8cd98f00b204e9800998ecf8427e'
+    assert manifest['hlist_1.00035.list.halotools.alpha.version0.hdf5'] == 'd41d8cd98f00b204e9800998ecf8427f'
+
+    with pytest.raises(HalotoolsIOError):
+        read_checksum_manifest("d41d8cd98f00b204e9800998ecf8427e\n")